@@ -0,0 +1,260 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmark end-to-end flows against the local stand-in server.
+
+Each flow runs in a fresh interpreter against a `benchmarks.server`
+stand-in started by this script, and is reported with:
+
+ * ops/sec: HTTP requests completed per second,
+ * p50 / p99: latency of a single request, from `send` to its result, in ms,
+ * MiB alloc: peak Python allocations during one run (tracemalloc),
+ * max RSS: peak resident set size of the interpreter running the flow.
+
+Results can be saved and later compared against, failing when a flow gets
+slower or bigger than the saved baseline by more than the tolerance:
+
+    python -m benchmarks.bench_flows [--instances N] [--runs N] [--save FILE]
+    python -m benchmarks.bench_flows --compare FILE [--tolerance 0.2]
+"""
+
+from collections import OrderedDict
+import argparse
+import gc
+import json
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from ibm_cloud_sdk_core.authenticators.no_auth_authenticator import NoAuthAuthenticator
+
+from ibm_platform_services.bulk_tagging import BulkTagger
+from ibm_platform_services.catalog_management_v1 import CatalogManagementV1
+from ibm_platform_services.global_search_v2 import GlobalSearchV2
+from ibm_platform_services.global_tagging_v1 import GlobalTaggingV1
+from ibm_platform_services.reclamation_sweep import RECLAIM, ReclamationSweeper
+from ibm_platform_services.resource_controller_v2 import ResourceControllerV2
+from ibm_platform_services.resource_manager_v2 import ResourceManagerV2
+from ibm_platform_services.sharded_list import ShardedLister
+from ibm_platform_services.usage_export import UsageExporter
+from ibm_platform_services.usage_fetcher import RESOURCE_USAGE, UsageFetcher
+from ibm_platform_services.usage_reports_v4 import UsageReportsV4
+
+from .server import CATALOG_PATH, RESOURCE_MANAGER_PATH, StandInServer
+
+
+def client(service_class, url, latencies):
+    """Return a client of the stand-in that records the latency of each request."""
+    service = service_class(authenticator=NoAuthAuthenticator())
+    service.set_service_url(url)
+    send = service.send
+
+    def timed_send(request, **kwargs):
+        start = time.perf_counter()
+        response = send(request, **kwargs)
+        latencies.append(time.perf_counter() - start)
+        return response
+    service.send = timed_send
+    return service
+
+
+def list_instances(url, latencies):
+    """List every resource instance, 100 per page."""
+    controller = client(ResourceControllerV2, url, latencies)
+    return sum(1 for _ in controller.list_resource_instances_iter(limit=100))
+
+
+def list_instances_sharded(url, latencies):
+    """List every resource instance, one chain per resource group on 8 threads."""
+    controller = client(ResourceControllerV2, url, latencies)
+    manager = client(ResourceManagerV2, url + RESOURCE_MANAGER_PATH, latencies)
+    lister = ShardedLister(controller, manager, max_workers=8)
+    return sum(1 for _ in lister.list_resource_instances(limit=100))
+
+
+def bulk_tagging(url, latencies):
+    """Find every resource instance with a search and tag them in bulk."""
+    search = client(GlobalSearchV2, url, latencies)
+    tagging = client(GlobalTaggingV1, url, latencies)
+    crns = [x['crn'] for x in search.search_iter(query='*', fields=['crn'], limit=1000)]
+    BulkTagger(tagging, max_workers=4).attach(crns, tag_names=['env:bench'])
+    return len(crns)
+
+
+def reclamation_sweep(url, latencies):
+    """Reclaim every reclamation of an account on 8 threads."""
+    controller = client(ResourceControllerV2, url, latencies)
+    sweeper = ReclamationSweeper(controller, max_workers=8, rate=10000.0)
+    return sweeper.sweep(RECLAIM, account_id='acct').selected
+
+
+def usage_export(url, latencies):
+    """Export the resource instance usage of an account for one month."""
+    usage = client(UsageReportsV4, url, latencies)
+    rows = 0
+    for record in usage.get_resource_usage_account_iter(account_id='acct',
+                                                        billingmonth='2020-11', limit=20):
+        rows += len(record['usage'])
+    return rows
+
+
+def usage_export_columnar(url, latencies):
+    """Export the same usage into dictionary-encoded column batches."""
+    usage = client(UsageReportsV4, url, latencies)
+    exporter = UsageExporter(usage, batch_size=1000, limit=20)
+    return sum(len(x) for x in exporter.batches(account_id='acct', billingmonth='2020-11'))
+
+
+def usage_fanout(url, latencies):
+    """Fetch the resource instance usage of 4 accounts for 3 months on 16 threads."""
+    usage = client(UsageReportsV4, url, latencies)
+    fetcher = UsageFetcher(usage, max_workers=16, per_account=4)
+    return fetcher.fetch(['acct-{0}'.format(i) for i in range(4)],
+                         ['2020-09', '2020-10', '2020-11'], reports=[RESOURCE_USAGE]).records
+
+
+def catalog_offering(url, latencies):
+    """Get a large offering 20 times."""
+    catalog = client(CatalogManagementV1, url + CATALOG_PATH, latencies)
+    for _ in range(20):
+        catalog.get_offering('catalog-id', 'offering-id').get_result()
+    return 20
+
+
+FLOWS = OrderedDict([
+    ('list_instances', list_instances),
+    ('list_instances_sharded', list_instances_sharded),
+    ('bulk_tagging', bulk_tagging),
+    ('reclamation_sweep', reclamation_sweep),
+    ('usage_export', usage_export),
+    ('usage_export_columnar', usage_export_columnar),
+    ('usage_fanout', usage_fanout),
+    ('catalog_offering', catalog_offering),
+])
+
+# Metrics compared against a baseline, and whether higher is better.
+COMPARED = [('ops_per_sec', True), ('p99_ms', False), ('peak_alloc_mib', False),
+            ('max_rss_mib', False)]
+
+
+def percentile(values, fraction):
+    """Return the nearest-rank percentile of a list of numbers."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def run_flow(name, url, runs):
+    """Run a flow in this interpreter and return its metrics."""
+    flow = FLOWS[name]
+    flow(url, [])  # warm up imports and caches
+    latencies = []
+    gc.collect()
+    start = time.perf_counter()
+    for _ in range(runs):
+        flow(url, latencies)
+    elapsed = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+    flow(url, [])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return OrderedDict([
+        ('flow', name),
+        ('requests', len(latencies)),
+        ('ops_per_sec', len(latencies) / elapsed),
+        ('p50_ms', percentile(latencies, 0.50) * 1000.0),
+        ('p99_ms', percentile(latencies, 0.99) * 1000.0),
+        ('peak_alloc_mib', peak / 2 ** 20),
+        ('max_rss_mib', resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0),
+    ])
+
+
+def run_isolated(name, url, runs):
+    """Run a flow in a fresh interpreter and return its metrics."""
+    out = subprocess.check_output([sys.executable, '-m', 'benchmarks.bench_flows',
+                                   '--flow', name, '--url', url, '--runs', str(runs)])
+    return json.loads(out.decode('utf-8').strip().splitlines()[-1])
+
+
+def compare(results, baseline, tolerance):
+    """Return a description of each metric that regressed against the baseline."""
+    regressions = []
+    baseline = {x['flow']: x for x in baseline}
+    for result in results:
+        previous = baseline.get(result['flow'])
+        if previous is None:
+            continue
+        for metric, higher_is_better in COMPARED:
+            old, new = previous[metric], result[metric]
+            if higher_is_better:
+                regressed = new < old * (1.0 - tolerance)
+            else:
+                regressed = new > old * (1.0 + tolerance)
+            if regressed:
+                regressions.append('{0}: {1} {2:.2f} -> {3:.2f}'.format(
+                    result['flow'], metric, old, new))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--instances', type=int, default=2000,
+                        help='number of resource instances served by the stand-in')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='simulated network latency per request, in seconds')
+    parser.add_argument('--runs', type=int, default=5, help='runs of each flow')
+    parser.add_argument('--flows', nargs='+', choices=list(FLOWS), default=list(FLOWS))
+    parser.add_argument('--save', metavar='FILE', help='save the results as json')
+    parser.add_argument('--compare', metavar='FILE', help='compare with saved results')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='allowed relative regression when comparing')
+    parser.add_argument('--flow', help=argparse.SUPPRESS)
+    parser.add_argument('--url', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.flow:
+        print(json.dumps(run_flow(args.flow, args.url, args.runs)))
+        return 0
+
+    with StandInServer(instances=args.instances, latency=args.latency) as server:
+        results = [run_isolated(name, server.url, args.runs) for name in args.flows]
+
+    print('{0:<24} {1:>9} {2:>10} {3:>9} {4:>9} {5:>10} {6:>9}'.format(
+        'flow', 'requests', 'ops/sec', 'p50 ms', 'p99 ms', 'MiB alloc', 'max RSS'))
+    for result in results:
+        print('{flow:<24} {requests:>9} {ops_per_sec:>10.1f} {p50_ms:>9.2f} {p99_ms:>9.2f} '
+              '{peak_alloc_mib:>10.1f} {max_rss_mib:>9.1f}'.format(**result))
+
+    if args.save:
+        with open(args.save, 'w') as handle:
+            json.dump(results, handle, indent=2)
+    if args.compare:
+        with open(args.compare) as handle:
+            regressions = compare(results, json.load(handle), args.tolerance)
+        for regression in regressions:
+            print('REGRESSION ' + regression)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,91 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Measure the cold-start cost of importing ibm_platform_services.
+
+Each scenario runs in a fresh interpreter so that nothing is already cached
+in sys.modules.  The reported figures are the median and the fastest CPU
+time of the import statement over the runs, and the median peak RSS of the
+child process.  `ibm_cloud_sdk_core`, which every scenario pays for alike
+and which dominates the total, is imported before the timer starts, so the
+times are those of this package alone.  `eager` imports every service
+module up front, as the package did before the services were loaded on
+first use.
+
+    python -m benchmarks.bench_import [--runs N]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+from ibm_platform_services import _SERVICE_MODULES
+
+SCENARIOS = [
+    ('package only', 'import ibm_platform_services'),
+    ('one service', 'from ibm_platform_services import GlobalTaggingV1'),
+    ('all services', 'from ibm_platform_services import *'),
+    ('eager', 'import ibm_platform_services\n' + '\n'.join(
+        'import ibm_platform_services.{0}'.format(x) for x in sorted(_SERVICE_MODULES.values()))),
+]
+
+_CHILD = '''
+import json, resource, time
+import ibm_cloud_sdk_core
+start = time.process_time()
+{stmt}
+elapsed = time.process_time() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{'seconds': elapsed, 'maxrss_kb': rss}}))
+'''
+
+
+def run_scenario(stmt, runs):
+    """
+    Run the import statement `runs` times, each in a new interpreter, and
+    return the median and minimum import time (ms) and the median peak RSS
+    (KiB).
+    """
+    # A first run, not counted, warms the file system cache.
+    subprocess.check_output([sys.executable, '-c', _CHILD.format(stmt=stmt)])
+    times = []
+    rss = []
+    for _ in range(runs):
+        out = subprocess.check_output([sys.executable, '-c', _CHILD.format(stmt=stmt)])
+        sample = json.loads(out.decode('utf-8').strip().splitlines()[-1])
+        times.append(sample['seconds'] * 1000.0)
+        rss.append(sample['maxrss_kb'])
+    return statistics.median(times), min(times), statistics.median(rss)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10,
+                        help='number of fresh interpreters per scenario')
+    args = parser.parse_args(argv)
+
+    print('{0:<15} {1:>12} {2:>10} {3:>14}'.format('scenario', 'median (ms)', 'min (ms)',
+                                                    'max RSS (KiB)'))
+    for name, stmt in SCENARIOS:
+        median, fastest, rss = run_scenario(stmt, args.runs)
+        print('{0:<15} {1:>12.1f} {2:>10.1f} {3:>14.0f}'.format(name, median, fastest, rss))
+
+
+if __name__ == '__main__':
+    main()
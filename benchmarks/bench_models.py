@@ -0,0 +1,80 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmark materializing large numbers of model objects.
+
+Decodes N resource instance and instance usage records with the generated
+`from_dict`, with the compact models and with lazy views, reporting the time
+taken and the memory held by the decoded objects.  Every mode reads one
+top-level property of each object, as a filter would.
+
+    python -m benchmarks.bench_models [--count N]
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+from ibm_platform_services.compact import compact_model
+from ibm_platform_services.lazy import lazy_model
+from ibm_platform_services.resource_controller_v2 import ResourceInstance
+from ibm_platform_services.usage_reports_v4 import InstanceUsage
+
+from .fixtures import instance_usage, resource_instance
+
+
+def measure(decode, attr, records):
+    """Return the seconds taken and bytes held by decoding the records."""
+    gc.collect()
+    start = time.perf_counter()
+    objects = [decode(x) for x in records]
+    for obj in objects:
+        getattr(obj, attr)
+    elapsed = time.perf_counter() - start
+    del objects
+    gc.collect()
+    tracemalloc.start()
+    objects = [decode(x) for x in records]
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return elapsed, held
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--count', type=int, default=100000)
+    args = parser.parse_args(argv)
+
+    print('{0:<18} {1:<10} {2:>10} {3:>12}'.format('model', 'mode', 'seconds', 'MiB held'))
+    for model_class, make, attr in [(ResourceInstance, resource_instance, 'state'),
+                                    (InstanceUsage, instance_usage, 'resource_id')]:
+        records = [make(i) for i in range(args.count)]
+        compact_class = compact_model(model_class)
+        compact_class.from_dict(records[0])
+        lazy_class = lazy_model(model_class)
+        for mode, decode in [('generated', model_class.from_dict),
+                             ('compact', compact_class.from_dict),
+                             ('lazy', lazy_class.from_dict)]:
+            seconds, held = measure(decode, attr, records)
+            print('{0:<18} {1:<10} {2:>10.3f} {3:>12.1f}'.format(
+                model_class.__name__, mode, seconds, held / 2 ** 20))
+
+
+if __name__ == '__main__':
+    main()
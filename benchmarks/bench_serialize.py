@@ -0,0 +1,62 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmark serializing the largest catalog models.
+
+Compares the generated `to_dict` (plus `json.dumps`, as the operations
+do) with the compiled serializer of the serialization module, for a
+Catalog Management `Offering` with several kinds, versions and plans, and a
+Global Catalog `CatalogEntry`.
+
+    python -m benchmarks.bench_serialize [--loops N]
+"""
+
+import argparse
+import json
+import timeit
+
+from ibm_platform_services import serialization
+from ibm_platform_services.catalog_management_v1 import Offering
+from ibm_platform_services.global_catalog_v1 import CatalogEntry
+
+from .fixtures import catalog_entry, offering
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--loops', type=int, default=500)
+    args = parser.parse_args(argv)
+
+    models = [('Offering', Offering.from_dict(offering(kinds=4, versions=4))),
+              ('CatalogEntry', CatalogEntry.from_dict(catalog_entry()))]
+    print('{0:<14} {1:<28} {2:>10}'.format('model', 'method', 'us/call'))
+    for name, model in models:
+        assert serialization.to_dict(model) == model.to_dict()
+        methods = [
+            ('generated to_dict', model.to_dict),
+            ('compiled to_dict', lambda model=model: serialization.to_dict(model)),
+            ('generated to_dict + dumps', lambda model=model: json.dumps(model.to_dict())),
+            ('to_json ({0})'.format('orjson' if serialization.orjson else 'json'),
+             lambda model=model: serialization.to_json(model)),
+        ]
+        for method, function in methods:
+            seconds = min(timeit.repeat(function, number=args.loops, repeat=5))
+            print('{0:<14} {1:<28} {2:>10.1f}'.format(name, method, seconds / args.loops * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,212 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Representative json payloads for the benchmarks.
+"""
+
+import copy
+import json
+
+_OFFERING = json.loads(
+    '{"id": "id", "_rev": "rev", "url": "url", "crn": "crn", "label": "label", "name": "name", '
+    '"offering_icon_url": "offering_icon_url", "offering_docs_url": "offering_docs_url", '
+    '"offering_support_url": "offering_support_url", "tags": ["tags"], "rating": '
+    '{"one_star_count": 14, "two_star_count": 14, "three_star_count": 16, "four_star_count": '
+    '15}, "created": "2019-01-01T12:00:00", "updated": "2019-01-01T12:00:00", '
+    '"short_description": "short_description", "long_description": "long_description", '
+    '"features": [{"title": "title", "description": "description"}], "kinds": [{"id": "id", '
+    '"format_kind": "format_kind", "target_kind": "target_kind", "metadata": {"anyKey": '
+    '"anyValue"}, "install_description": "install_description", "tags": ["tags"], '
+    '"additional_features": [{"title": "title", "description": "description"}], "created": '
+    '"2019-01-01T12:00:00", "updated": "2019-01-01T12:00:00", "versions": [{"id": "id", "_rev":'
+    ' "rev", "crn": "crn", "version": "version", "sha": "sha", "created": '
+    '"2019-01-01T12:00:00", "updated": "2019-01-01T12:00:00", "offering_id": "offering_id", '
+    '"catalog_id": "catalog_id", "kind_id": "kind_id", "tags": ["tags"], "repo_url": '
+    '"repo_url", "source_url": "source_url", "tgz_url": "tgz_url", "configuration": [{"key": '
+    '"key", "type": "type", "default_value": {"anyKey": "anyValue"}, "value_constraint": '
+    '"value_constraint", "description": "description", "required": true, "options": [{"anyKey":'
+    ' "anyValue"}], "hidden": true}], "metadata": {"anyKey": "anyValue"}, "validation": '
+    '{"validated": "2019-01-01T12:00:00", "requested": "2019-01-01T12:00:00", "state": "state",'
+    ' "last_operation": "last_operation", "target": {"anyKey": "anyValue"}}, '
+    '"required_resources": [{"type": "mem", "value": {"anyKey": "anyValue"}}], '
+    '"single_instance": false, "install": {"instructions": "instructions", "script": "script", '
+    '"script_permission": "script_permission", "delete_script": "delete_script", "scope": '
+    '"scope"}, "pre_install": [{"instructions": "instructions", "script": "script", '
+    '"script_permission": "script_permission", "delete_script": "delete_script", "scope": '
+    '"scope"}], "entitlement": {"provider_name": "provider_name", "provider_id": "provider_id",'
+    ' "product_id": "product_id", "part_numbers": ["part_numbers"], "image_repo_name": '
+    '"image_repo_name"}, "licenses": [{"id": "id", "name": "name", "type": "type", "url": '
+    '"url", "description": "description"}], "image_manifest_url": "image_manifest_url", '
+    '"deprecated": true, "package_version": "package_version", "state": {"current": "current", '
+    '"current_entered": "2019-01-01T12:00:00", "pending": "pending", "pending_requested": '
+    '"2019-01-01T12:00:00", "previous": "previous"}, "version_locator": "version_locator", '
+    '"console_url": "console_url", "long_description": "long_description", '
+    '"whitelisted_accounts": ["whitelisted_accounts"]}], "plans": [{"id": "id", "label": '
+    '"label", "name": "name", "short_description": "short_description", "long_description": '
+    '"long_description", "metadata": {"anyKey": "anyValue"}, "tags": ["tags"], '
+    '"additional_features": [{"title": "title", "description": "description"}], "created": '
+    '"2019-01-01T12:00:00", "updated": "2019-01-01T12:00:00", "deployments": [{"id": "id", '
+    '"label": "label", "name": "name", "short_description": "short_description", '
+    '"long_description": "long_description", "metadata": {"anyKey": "anyValue"}, "tags": '
+    '["tags"], "created": "2019-01-01T12:00:00", "updated": "2019-01-01T12:00:00"}]}]}], '
+    '"permit_request_ibm_public_publish": false, "ibm_publish_approved": true, '
+    '"public_publish_approved": false, "public_original_crn": "public_original_crn", '
+    '"publish_public_crn": "publish_public_crn", "portal_approval_record": '
+    '"portal_approval_record", "portal_ui_url": "portal_ui_url", "catalog_id": "catalog_id", '
+    '"catalog_name": "catalog_name", "metadata": {"anyKey": "anyValue"}, "disclaimer": '
+    '"disclaimer", "hidden": true, "provider": "provider", "repo_info": {"token": "token", '
+    '"type": "type"}}')
+
+_CATALOG_ENTRY = json.loads(
+    '{"name": "name", "kind": "service", "overview_ui": {"mapKey": {"display_name": '
+    '"display_name", "long_description": "long_description", "description": "description", '
+    '"featured_description": "featured_description"}}, "images": {"image": "image", '
+    '"small_image": "small_image", "medium_image": "medium_image", "feature_image": '
+    '"feature_image"}, "parent_id": "parent_id", "disabled": true, "tags": ["tags"], "group": '
+    'false, "provider": {"email": "email", "name": "name", "contact": "contact", '
+    '"support_email": "support_email", "phone": "phone"}, "active": true, "metadata": '
+    '{"rc_compatible": false, "service": {"type": "type", "iam_compatible": true, '
+    '"unique_api_key": true, "provisionable": false, "bindable": true, '
+    '"async_provisioning_supported": true, "async_unprovisioning_supported": true, "requires": '
+    '["requires"], "plan_updateable": false, "state": "state", "service_check_enabled": false, '
+    '"test_check_interval": 19, "service_key_supported": false, "cf_guid": {"mapKey": '
+    '"inner"}}, "plan": {"bindable": true, "reservable": true, "allow_internal_users": true, '
+    '"async_provisioning_supported": true, "async_unprovisioning_supported": true, '
+    '"test_check_interval": 19, "single_scope_instance": "single_scope_instance", '
+    '"service_check_enabled": false, "cf_guid": {"mapKey": "inner"}}, "alias": {"type": "type",'
+    ' "plan_id": "plan_id"}, "template": {"services": ["services"], "default_memory": 14, '
+    '"start_cmd": "start_cmd", "source": {"path": "path", "type": "type", "url": "url"}, '
+    '"runtime_catalog_id": "runtime_catalog_id", "cf_runtime_id": "cf_runtime_id", '
+    '"template_id": "template_id", "executable_file": "executable_file", "buildpack": '
+    '"buildpack", "environment_variables": {"mapKey": "inner"}}, "ui": {"strings": {"mapKey": '
+    '{"bullets": [{"title": "title", "description": "description", "icon": "icon", "quantity": '
+    '8}], "media": [{"caption": "caption", "thumbnail_url": "thumbnail_url", "type": "type", '
+    '"URL": "url", "source": {"title": "title", "description": "description", "icon": "icon", '
+    '"quantity": 8}}], "not_creatable_msg": "not_creatable_msg", "not_creatable__robot_msg": '
+    '"not_creatable_robot_msg", "deprecation_warning": "deprecation_warning", '
+    '"popup_warning_message": "popup_warning_message", "instruction": "instruction"}}, "urls": '
+    '{"doc_url": "doc_url", "instructions_url": "instructions_url", "api_url": "api_url", '
+    '"create_url": "create_url", "sdk_download_url": "sdk_download_url", "terms_url": '
+    '"terms_url", "custom_create_page_url": "custom_create_page_url", "catalog_details_url": '
+    '"catalog_details_url", "deprecation_doc_url": "deprecation_doc_url", "dashboard_url": '
+    '"dashboard_url", "registration_url": "registration_url", "apidocsurl": "apidocsurl"}, '
+    '"embeddable_dashboard": "embeddable_dashboard", "embeddable_dashboard_full_width": false, '
+    '"navigation_order": ["navigation_order"], "not_creatable": false, "primary_offering_id": '
+    '"primary_offering_id", "accessible_during_provision": false, "side_by_side_index": 18, '
+    '"end_of_service_time": "2019-01-01T12:00:00", "hidden": true, "hide_lite_metering": true, '
+    '"no_upgrade_next_step": true}, "compliance": ["compliance"], "sla": {"terms": "terms", '
+    '"tenancy": "tenancy", "provisioning": "provisioning", "responsiveness": "responsiveness", '
+    '"dr": {"dr": true, "description": "description"}}, "callbacks": {"controller_url": '
+    '"controller_url", "broker_url": "broker_url", "broker_proxy_url": "broker_proxy_url", '
+    '"dashboard_url": "dashboard_url", "dashboard_data_url": "dashboard_data_url", '
+    '"dashboard_detail_tab_url": "dashboard_detail_tab_url", "dashboard_detail_tab_ext_url": '
+    '"dashboard_detail_tab_ext_url", "service_monitor_api": "service_monitor_api", '
+    '"service_monitor_app": "service_monitor_app", "api_endpoint": {"mapKey": "inner"}}, '
+    '"original_name": "original_name", "version": "version", "other": {"mapKey": {"anyKey": '
+    '"anyValue"}}, "pricing": {"type": "type", "origin": "origin", "starting_price": '
+    '{"plan_id": "plan_id", "deployment_id": "deployment_id", "unit": "unit", "amount": '
+    '[{"country": "country", "currency": "currency", "prices": [{"quantity_tier": 13, "Price": '
+    '5}]}]}, "metrics": [{"part_ref": "part_ref", "metric_id": "metric_id", "tier_model": '
+    '"tier_model", "charge_unit": "charge_unit", "charge_unit_name": "charge_unit_name", '
+    '"charge_unit_quantity": "charge_unit_quantity", "resource_display_name": '
+    '"resource_display_name", "charge_unit_display_name": "charge_unit_display_name", '
+    '"usage_cap_qty": 13, "display_cap": 11, "effective_from": "2019-01-01T12:00:00", '
+    '"effective_until": "2019-01-01T12:00:00", "amounts": [{"country": "country", "currency": '
+    '"currency", "prices": [{"quantity_tier": 13, "Price": 5}]}]}]}, "deployment": {"location":'
+    ' "location", "location_url": "location_url", "original_location": "original_location", '
+    '"target_crn": "target_crn", "service_crn": "service_crn", "mccp_id": "mccp_id", "broker": '
+    '{"name": "name", "guid": "guid"}, "supports_rc_migration": false, "target_network": '
+    '"target_network"}}, "id": "id", "catalog_crn": "catalog_crn", "url": "url", '
+    '"children_url": "children_url", "geo_tags": ["geo_tags"], "pricing_tags": '
+    '["pricing_tags"], "created": "2019-01-01T12:00:00", "updated": "2019-01-01T12:00:00"}')
+
+
+def offering(kinds=1, versions=1):
+    """
+    Return a Catalog Management offering with the given number of kinds,
+    each with the given number of versions and plans.
+    """
+    template = _OFFERING
+    result = copy.deepcopy(template)
+    result['kinds'] = []
+    for k in range(kinds):
+        kind = copy.deepcopy(template['kinds'][0])
+        kind['id'] = 'kind-{0}'.format(k)
+        kind['versions'] = []
+        kind['plans'] = []
+        for v in range(versions):
+            version = copy.deepcopy(template['kinds'][0]['versions'][0])
+            version['id'] = 'version-{0}-{1}'.format(k, v)
+            version['version'] = '1.0.{0}'.format(v)
+            kind['versions'].append(version)
+            plan = copy.deepcopy(template['kinds'][0]['plans'][0])
+            plan['id'] = 'plan-{0}-{1}'.format(k, v)
+            kind['plans'].append(plan)
+        result['kinds'].append(kind)
+    return result
+
+
+def catalog_entry(name='entry'):
+    """
+    Return a Global Catalog entry with the full metadata tree.
+    """
+    result = copy.deepcopy(_CATALOG_ENTRY)
+    result['name'] = name
+    result['id'] = '{0}-id'.format(name)
+    return result
+
+
+def resource_instance(i):
+    """Return the json dictionary of a resource instance."""
+    return {
+        'id': 'crn:v1:bluemix:public:kms:us-south:a/acct::{0}::'.format(i),
+        'guid': '{0:032x}'.format(i),
+        'crn': 'crn:v1:bluemix:public:kms:us-south:a/acct::{0}::'.format(i),
+        'url': '/v2/resource_instances/{0:032x}'.format(i),
+        'name': 'instance-{0}'.format(i),
+        'account_id': 'acct',
+        'resource_group_id': 'group-{0}'.format(i % 20),
+        'resource_id': 'kms',
+        'resource_plan_id': 'plan-{0}'.format(i % 3),
+        'target_crn': 'crn:v1:bluemix:public:globalcatalog::::deployment:us-south',
+        'state': 'active',
+        'type': 'service_instance',
+        'region_id': 'us-south',
+        'created_at': '2020-11-0{0}T10:00:00.000Z'.format(1 + i % 9),
+        'created_by': 'IBMid-1',
+        'parameters': {},
+        'last_operation': {'type': 'create', 'state': 'succeeded'},
+    }
+
+
+def instance_usage(i):
+    """Return the json dictionary of an instance usage record."""
+    return {
+        'account_id': 'acct',
+        'resource_instance_id': 'instance-{0}'.format(i),
+        'resource_id': 'kms',
+        'resource_group_id': 'group-{0}'.format(i % 20),
+        'pricing_country': 'USA',
+        'currency_code': 'USD',
+        'billable': True,
+        'plan_id': 'plan-{0}'.format(i % 3),
+        'region': 'us-south',
+        'month': '2020-11',
+        'usage': [{'metric': 'KEY_VERSIONS', 'unit': 'VERSIONS', 'quantity': i % 100,
+                   'rateable_quantity': i % 100, 'cost': 1.5, 'rated_cost': 1.5,
+                   'price': [], 'discounts': []}],
+    }
@@ -0,0 +1,351 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+A local HTTP stand-in for the platform services used by the benchmarks.
+
+The server emulates, over a fixed synthetic inventory, the endpoints that the
+benchmarked flows call:
+
+ * Resource Controller: `GET /v2/resource_instances`, `GET /v2/resource_keys`
+   (paginated with `next_url`, filtered by `resource_group_id`),
+   `GET /v1/reclamations` (one per instance),
+   `POST /v1/reclamations/{id}/actions/{action}`,
+ * Resource Manager: `GET /v2/resource_groups`,
+ * Global Tagging: `GET /v3/tags`, `POST /v3/tags/attach`,
+   `POST /v3/tags/detach`,
+ * Global Search: `POST /v3/resources/search` (paginated with a cursor),
+ * Usage Reports: `GET /v4/accounts/{id}/resource_instances/usage/{month}`
+   (paginated with `_start`),
+ * Catalog Management: `GET /api/v1-beta/catalogs/{id}/offerings/{id}`.
+
+All services are served from one address, so each client is pointed at the
+server's URL (plus `/v2` for Resource Manager and `/api/v1-beta` for
+Catalog Management).  An optional
+per-request delay simulates network latency.
+
+    python -m benchmarks.server [--port N] [--instances N]
+"""
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qsl, urlencode, urlsplit
+import argparse
+import json
+import re
+import socket
+import threading
+import time
+
+from .fixtures import instance_usage, offering, resource_instance
+
+CATALOG_PATH = '/api/v1-beta'
+RESOURCE_MANAGER_PATH = '/v2'
+
+# The number of resource groups the inventory is spread over, see
+# fixtures.resource_instance.
+RESOURCE_GROUPS = 20
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class StandInServer():
+    """
+    A threaded HTTP server emulating the platform services.
+
+    :attr int instances: The number of resource instances in the inventory.
+    :attr float latency: Seconds to wait before answering each request.
+    :attr dict tags: The tags attached to each CRN.
+    :attr int requests: The number of requests served.
+    """
+
+    def __init__(self,
+                 *,
+                 host: str = '127.0.0.1',
+                 port: int = 0,
+                 instances: int = 1000,
+                 latency: float = 0.0) -> None:
+        """
+        Initialize a StandInServer object.
+
+        :param str host: (optional) The address to listen on.
+        :param int port: (optional) The port to listen on, 0 for any free port.
+        :param int instances: (optional) The number of resource instances.
+        :param float latency: (optional) Seconds to wait before answering
+               each request.
+        """
+        self.instances = instances
+        self.latency = latency
+        self.tags = {}
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        server = self
+
+        class Handler(_Handler):
+            stand_in = server
+
+        self.httpd = _ThreadingHTTPServer((host, port), Handler)
+
+    @property
+    def url(self) -> str:
+        """The base URL of the server."""
+        host, port = self.httpd.server_address[:2]
+        return 'http://{0}:{1}'.format(host, port)
+
+    def start(self) -> 'StandInServer':
+        """Serve requests on a background thread."""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and close the listening socket."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> 'StandInServer':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def crn(self, index: int) -> str:
+        """Return the CRN of the resource instance at `index`."""
+        return resource_instance(index)['crn']
+
+    # Endpoints. Each takes the path match and query parameters (and the
+    # json body for POST) and returns the status code and the json result.
+
+    def list_resource_instances(self, match, params):
+        return 200, self._next_url_page('/v2/resource_instances', params, resource_instance)
+
+    def list_resource_keys(self, match, params):
+        def resource_key(i):
+            return {
+                'id': 'crn:v1:bluemix:public:kms:us-south:a/acct::resource-key:{0}'.format(i),
+                'guid': 'key-{0}'.format(i),
+                'name': 'key-{0}'.format(i),
+                'source_crn': self.crn(i),
+                'state': 'active',
+                'credentials': {'apikey': 'apikey-{0}'.format(i)},
+            }
+        return 200, self._next_url_page('/v2/resource_keys', params, resource_key)
+
+    def list_tags(self, match, params):
+        attached_to = params.get('attached_to')
+        with self._lock:
+            if attached_to:
+                names = sorted(self.tags.get(attached_to, ()))
+            else:
+                names = sorted(set().union(*self.tags.values())) if self.tags else []
+        offset = int(params.get('offset') or 0)
+        limit = int(params.get('limit') or 100)
+        return 200, {
+            'total_count': len(names),
+            'offset': offset,
+            'limit': limit,
+            'items': [{'name': x} for x in names[offset:offset + limit]],
+        }
+
+    def attach_tag(self, match, params, body):
+        return self._update_tags(body, attach=True)
+
+    def detach_tag(self, match, params, body):
+        return self._update_tags(body, attach=False)
+
+    def search(self, match, params, body):
+        limit = int(params.get('limit') or 10)
+        start = int(body.get('search_cursor') or 0)
+        end = min(start + limit, self.instances)
+        items = []
+        with self._lock:
+            for i in range(start, end):
+                crn = self.crn(i)
+                items.append({'crn': crn, 'name': 'instance-{0}'.format(i),
+                              'family': 'resource_controller', 'type': 'resource-instance',
+                              'tags': sorted(self.tags.get(crn, ()))})
+        return 200, {'search_cursor': str(end), 'limit': limit, 'items': items}
+
+    def get_resource_usage_account(self, match, params):
+        limit = int(params.get('limit') or 10)
+        start = int(params.get('_start') or 0)
+        end = min(start + limit, self.instances)
+        base = '/v4/accounts/{0}/resource_instances/usage/{1}'.format(*match.groups())
+        result = {
+            'limit': limit,
+            'count': end - start,
+            'first': {'href': base + '?' + urlencode({'limit': limit})},
+            'resources': [dict(instance_usage(i), month=match.group(2)) for i in range(start, end)],
+        }
+        if end < self.instances:
+            result['next'] = {'href': base + '?' + urlencode({'limit': limit, '_start': end}),
+                              'offset': str(end)}
+        return 200, result
+
+    def get_offering(self, match, params):
+        result = offering(kinds=4, versions=4)
+        result['catalog_id'], result['id'] = match.groups()
+        return 200, result
+
+    def list_reclamations(self, match, params):
+        return 200, {'resources': [{
+            'id': 'reclamation-{0}'.format(i),
+            'entity_crn': self.crn(i),
+            'resource_instance_id': 'instance-{0}'.format(i),
+            'resource_group_id': 'group-{0}'.format(i % RESOURCE_GROUPS),
+            'account_id': 'acct',
+            'state': 'SCHEDULED',
+            'created_at': '2020-11-01T00:00:00Z',
+        } for i in range(self.instances)]}
+
+    def run_reclamation_action(self, match, params, body):
+        reclamation_id, action = match.groups()
+        state = 'RECLAIMING' if action == 'reclaim' else 'RESTORING'
+        return 200, {'id': reclamation_id, 'state': state}
+
+    def list_resource_groups(self, match, params):
+        return 200, {'resources': [{'id': 'group-{0}'.format(i), 'name': 'group {0}'.format(i)}
+                                   for i in range(RESOURCE_GROUPS)]}
+
+    def _next_url_page(self, path, params, make):
+        # Records are numbered across the inventory; record i belongs to
+        # resource group i % RESOURCE_GROUPS.  `start` counts records of the
+        # selected group, or of the whole inventory.
+        limit = int(params.get('limit') or 100)
+        start = int(params.get('start') or 0)
+        group = params.get('resource_group_id')
+        if group is None:
+            indexes = range(self.instances)
+        else:
+            indexes = range(int(group.rsplit('-', 1)[1]), self.instances, RESOURCE_GROUPS)
+        page = indexes[start:start + limit]
+        result = {
+            'rows_count': len(page),
+            'next_url': None,
+            'resources': [make(i) for i in page],
+        }
+        if start + limit < len(indexes):
+            query = {'limit': limit, 'start': start + limit}
+            if group is not None:
+                query['resource_group_id'] = group
+            result['next_url'] = path + '?' + urlencode(query)
+        return result
+
+    def _update_tags(self, body, attach):
+        names = body.get('tag_names') or [body.get('tag_name')]
+        results = []
+        with self._lock:
+            for resource in body.get('resources') or []:
+                tags = self.tags.setdefault(resource['resource_id'], set())
+                if attach:
+                    tags.update(names)
+                else:
+                    tags.difference_update(names)
+                results.append({'resource_id': resource['resource_id'], 'is_error': False})
+        return 200, {'results': results}
+
+
+ROUTES = [
+    ('GET', r'/v2/resource_instances', StandInServer.list_resource_instances),
+    ('GET', r'/v2/resource_keys', StandInServer.list_resource_keys),
+    ('GET', r'/v1/reclamations', StandInServer.list_reclamations),
+    ('POST', r'/v1/reclamations/([^/]+)/actions/([^/]+)', StandInServer.run_reclamation_action),
+    ('GET', RESOURCE_MANAGER_PATH + r'/resource_groups', StandInServer.list_resource_groups),
+    ('GET', r'/v3/tags', StandInServer.list_tags),
+    ('POST', r'/v3/tags/attach', StandInServer.attach_tag),
+    ('POST', r'/v3/tags/detach', StandInServer.detach_tag),
+    ('POST', r'/v3/resources/search', StandInServer.search),
+    ('GET', r'/v4/accounts/([^/]+)/resource_instances/usage/([^/]+)',
+     StandInServer.get_resource_usage_account),
+    ('GET', CATALOG_PATH + r'/catalogs/([^/]+)/offerings/([^/]+)', StandInServer.get_offering),
+]
+ROUTES = [(method, re.compile(pattern + '$'), endpoint) for method, pattern, endpoint in ROUTES]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    stand_in = None
+
+    def setup(self):
+        super().setup()
+        # Headers and body are written separately; without this the body
+        # waits for the client's delayed ACK.
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        self._dispatch('GET')
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        self._dispatch('POST')
+
+    def _dispatch(self, method):
+        server = self.stand_in
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        with server._lock:  # pylint: disable=protected-access
+            server.requests += 1
+        if server.latency:
+            time.sleep(server.latency)
+        parts = urlsplit(self.path)
+        params = dict(parse_qsl(parts.query))
+        for route_method, pattern, endpoint in ROUTES:
+            match = pattern.match(parts.path)
+            if match and route_method == method:
+                if method == 'POST':
+                    status, result = endpoint(server, match, params, json.loads(body or b'{}'))
+                else:
+                    status, result = endpoint(server, match, params)
+                break
+        else:
+            status, result = 404, {'errors': [{'message': 'Not found: ' + parts.path}]}
+        payload = json.dumps(result).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--instances', type=int, default=1000)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='seconds to wait before answering each request')
+    args = parser.parse_args(argv)
+
+    server = StandInServer(host=args.host, port=args.port,
+                           instances=args.instances, latency=args.latency)
+    print('Serving on {0}'.format(server.url))
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -22,19 +22,55 @@ from ibm_cloud_sdk_core import IAMTokenManager, DetailedResponse, BaseService, A
 from .common import get_sdk_headers
 from .version import __version__
 
-from .case_management_v1 import CaseManagementV1
-from .catalog_management_v1 import CatalogManagementV1
-from .configuration_governance_v1 import ConfigurationGovernanceV1
-from .enterprise_management_v1 import EnterpriseManagementV1
-from .enterprise_usage_reports_v1 import EnterpriseUsageReportsV1
-from .global_catalog_v1 import GlobalCatalogV1
-from .global_search_v2 import GlobalSearchV2
-from .global_tagging_v1 import GlobalTaggingV1
-from .iam_access_groups_v2 import IamAccessGroupsV2
-from .iam_identity_v1 import IamIdentityV1
-from .iam_policy_management_v1 import IamPolicyManagementV1
-from .open_service_broker_v1 import OpenServiceBrokerV1
-from .resource_controller_v2 import ResourceControllerV2
-from .resource_manager_v2 import ResourceManagerV2
-from .usage_reports_v4 import UsageReportsV4
-from .user_management_v1 import UserManagementV1
+import sys
+
+# Maps each public service class to the module that defines it.  The service
+# modules are imported on first attribute access so that callers which need
+# only one or two services do not pay for loading all of them.
+_SERVICE_MODULES = {
+    'CaseManagementV1': 'case_management_v1',
+    'CatalogManagementV1': 'catalog_management_v1',
+    'ConfigurationGovernanceV1': 'configuration_governance_v1',
+    'EnterpriseManagementV1': 'enterprise_management_v1',
+    'EnterpriseUsageReportsV1': 'enterprise_usage_reports_v1',
+    'GlobalCatalogV1': 'global_catalog_v1',
+    'GlobalSearchV2': 'global_search_v2',
+    'GlobalTaggingV1': 'global_tagging_v1',
+    'IamAccessGroupsV2': 'iam_access_groups_v2',
+    'IamIdentityV1': 'iam_identity_v1',
+    'IamPolicyManagementV1': 'iam_policy_management_v1',
+    'OpenServiceBrokerV1': 'open_service_broker_v1',
+    'ResourceControllerV2': 'resource_controller_v2',
+    'ResourceManagerV2': 'resource_manager_v2',
+    'UsageReportsV4': 'usage_reports_v4',
+    'UserManagementV1': 'user_management_v1',
+}
+
+__all__ = ['IAMTokenManager', 'DetailedResponse', 'BaseService', 'ApiException',
+           'get_sdk_headers', '__version__'] + sorted(_SERVICE_MODULES)
+
+
+def _load_service(name):
+    """
+    Import the module defining the named service class and cache the class
+    as an attribute of this package.
+    """
+    module = __import__(_SERVICE_MODULES[name], globals(), level=1, fromlist=[name])
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+if sys.version_info >= (3, 7):
+    def __getattr__(name):
+        if name in _SERVICE_MODULES:
+            return _load_service(name)
+        raise AttributeError('module {0!r} has no attribute {1!r}'.format(__name__, name))
+
+    def __dir__():
+        return sorted(set(globals()) | set(_SERVICE_MODULES))
+else:
+    # Module-level __getattr__ (PEP 562) is not available, so fall back
+    # to loading every service eagerly.
+    for _name in _SERVICE_MODULES:
+        _load_service(_name)
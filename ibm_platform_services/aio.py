@@ -0,0 +1,265 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module provides asyncio variants of the service classes.
+
+`AsyncResourceControllerV2`, `AsyncGlobalTaggingV1` and so on are subclasses
+of the regular service classes whose `send` is a coroutine, so every
+operation builds its request with the same code as the synchronous client and
+returns an awaitable `DetailedResponse`:
+
+    service = AsyncGlobalTaggingV1(authenticator=authenticator)
+    tags = (await service.list_tags(limit=10)).get_result()
+
+Requests are sent with aiohttp, which must be installed separately
+(`pip install ibm-platform-services[async]`).  All async clients share one
+`AsyncTransport`, and so one connection pool, per event loop unless given
+their own.  Note that the authenticator still runs synchronously while the
+request is prepared, so an IAM token refresh briefly blocks the event loop.
+The `*_iter` pagination helpers of the synchronous clients are not supported
+on the async clients.
+"""
+
+from typing import Dict
+import asyncio
+import sys
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from ibm_cloud_sdk_core import ApiException, DetailedResponse
+
+from . import _SERVICE_MODULES
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    aiohttp = None
+
+
+class AsyncTransport():
+    """
+    A pooled, non-blocking HTTP transport for the async service clients.
+
+    :attr int limit: The maximum number of simultaneous connections.
+    :attr int limit_per_host: The maximum number of simultaneous connections
+          to one host.
+    :attr float keepalive_timeout: The number of seconds an idle connection
+          is kept open for reuse.
+    """
+
+    def __init__(self,
+                 *,
+                 limit: int = 100,
+                 limit_per_host: int = 0,
+                 keepalive_timeout: float = 15.0) -> None:
+        """
+        Initialize an AsyncTransport object.
+
+        :param int limit: (optional) The maximum number of simultaneous
+               connections, 0 for no limit.
+        :param int limit_per_host: (optional) The maximum number of
+               simultaneous connections to one host, 0 for no limit.
+        :param float keepalive_timeout: (optional) The number of seconds an
+               idle connection is kept open for reuse.
+        """
+        if aiohttp is None:
+            raise ImportError('aiohttp is required for the async clients; '
+                              'install it with "pip install ibm-platform-services[async]"')
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self._session = None
+
+    @property
+    def session(self) -> 'aiohttp.ClientSession':
+        """The aiohttp session, created on first use in the running loop."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.limit,
+                                             limit_per_host=self.limit_per_host,
+                                             keepalive_timeout=self.keepalive_timeout)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def request(self, request: Dict, **kwargs) -> requests.Response:
+        """
+        Send a request prepared by `BaseService.prepare_request`.
+
+        The aiohttp response is read in full and returned as a
+        `requests.Response` so that it can be handled exactly like the
+        responses of the synchronous clients.
+        """
+        options = {}
+        if kwargs.get('timeout') is not None:
+            options['timeout'] = aiohttp.ClientTimeout(total=_total_timeout(kwargs['timeout']))
+        if kwargs.get('verify') is False:
+            options['ssl'] = False
+        proxies = kwargs.get('proxies') or {}
+        if request['url'].startswith('https:') and proxies.get('https'):
+            options['proxy'] = proxies['https']
+        elif proxies.get('http'):
+            options['proxy'] = proxies['http']
+
+        data = request.get('data')
+        if request.get('files'):
+            form = aiohttp.FormData()
+            for name, (filename, value, content_type) in _file_parts(request['files']):
+                form.add_field(name, value, filename=filename, content_type=content_type)
+            data = form
+
+        async with self.session.request(request['method'],
+                                        request['url'],
+                                        headers=dict(request['headers']),
+                                        params=request.get('params') or None,
+                                        data=data,
+                                        **options) as response:
+            body = await response.read()
+            return _to_requests_response(response, body)
+
+    async def close(self) -> None:
+        """Close all pooled connections."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+_default_transports = {}
+
+
+def get_default_transport() -> AsyncTransport:
+    """
+    Return the transport shared by the async clients of the running event
+    loop, creating it on first use.
+    """
+    loop = asyncio.get_event_loop()
+    for other in [l for l in _default_transports if l.is_closed()]:
+        del _default_transports[other]
+    if loop not in _default_transports:
+        _default_transports[loop] = AsyncTransport()
+    return _default_transports[loop]
+
+
+class AsyncServiceMixin():
+    """
+    Mixin that makes `send` a coroutine sending through an `AsyncTransport`.
+
+    :attr AsyncTransport transport: The transport to send requests with, or
+          None for the shared transport of the running event loop.
+    """
+
+    def __init__(self, *args, transport: AsyncTransport = None, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.transport = transport
+
+    async def send(self, request: Dict, **kwargs) -> DetailedResponse:
+        """
+        Send a request and wrap the response in a DetailedResponse or
+        raise an ApiException.
+        """
+        kwargs = dict({'timeout': 60}, **kwargs)
+        kwargs = dict(kwargs, **self.http_config)
+        if self.disable_ssl_verification:
+            kwargs['verify'] = False
+        stream = kwargs.pop('stream', False)
+
+        transport = self.transport or get_default_transport()
+        response = await transport.request(request, **kwargs)
+
+        if 200 <= response.status_code <= 299:
+            if response.status_code == 204 or request['method'] == 'HEAD':
+                result = None
+            elif stream:
+                result = response
+            elif not response.content:
+                result = None
+            elif _is_json_mimetype(response.headers.get('Content-Type')):
+                try:
+                    result = response.json(strict=False)
+                except ValueError as err:
+                    raise ApiException(response.status_code,
+                                       message='Error processing the HTTP response',
+                                       http_response=response) from err
+            else:
+                result = response
+            return DetailedResponse(response=result,
+                                    headers=response.headers,
+                                    status_code=response.status_code)
+        raise ApiException(response.status_code, http_response=response)
+
+
+def _total_timeout(timeout) -> float:
+    """Convert a requests timeout, possibly a (connect, read) tuple, to a total."""
+    if isinstance(timeout, (tuple, list)):
+        return sum(t for t in timeout if t is not None)
+    return timeout
+
+
+def _file_parts(files):
+    """Yield (part name, (filename, value, content type)) for each file part."""
+    for name, file_tuple in files:
+        filename, value = file_tuple[0], file_tuple[1]
+        content_type = file_tuple[2] if len(file_tuple) > 2 else None
+        yield name, (filename, value, content_type)
+
+
+def _is_json_mimetype(mimetype: str) -> bool:
+    """Return True if the content type is JSON."""
+    if not mimetype:
+        return False
+    mimetype = mimetype.split(';')[0].strip().lower()
+    return mimetype == 'application/json' or mimetype.endswith('+json')
+
+
+def _to_requests_response(response: 'aiohttp.ClientResponse', body: bytes) -> requests.Response:
+    """Copy an aiohttp response into a `requests.Response`."""
+    converted = requests.Response()
+    converted.status_code = response.status
+    converted.reason = response.reason
+    converted.headers = CaseInsensitiveDict(response.headers)
+    converted.url = str(response.url)
+    converted.encoding = response.charset
+    converted._content = body  # pylint: disable=protected-access
+    return converted
+
+
+def _async_service_class(name: str) -> type:
+    """Build and cache the async variant of the named service class."""
+    module = __import__(_SERVICE_MODULES[name], globals(), level=1, fromlist=[name])
+    service_class = getattr(module, name)
+    async_name = 'Async' + name
+    async_class = type(async_name, (AsyncServiceMixin, service_class), {
+        '__doc__': 'The asyncio variant of {0}.'.format(name),
+        '__module__': __name__,
+    })
+    globals()[async_name] = async_class
+    return async_class
+
+
+__all__ = ['AsyncTransport', 'AsyncServiceMixin', 'get_default_transport'] + \
+    sorted('Async' + name for name in _SERVICE_MODULES)
+
+
+if sys.version_info >= (3, 7):
+    def __getattr__(name):
+        if name.startswith('Async') and name[len('Async'):] in _SERVICE_MODULES:
+            return _async_service_class(name[len('Async'):])
+        raise AttributeError('module {0!r} has no attribute {1!r}'.format(__name__, name))
+
+    def __dir__():
+        return sorted(set(globals()) | set(__all__))
+else:
+    for _name in _SERVICE_MODULES:
+        _async_service_class(_name)
@@ -0,0 +1,554 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module creates and deletes Resource Controller resources in bulk.
+
+A `ProvisioningPlan` is a graph of create and delete operations on resource
+instances, keys, bindings and aliases.  An operation may use a field of the
+result of another one, which makes it depend on it:
+
+    plan = ProvisioningPlan()
+    db = plan.create('db', INSTANCE, name='db', target='us-south',
+                     resource_group=group_id, resource_plan_id=plan_id)
+    plan.create('db-key', KEY, name='db-key', source=db)
+    result = BulkProvisioner(resource_controller_service, rate=10).run(plan)
+
+`BulkProvisioner` runs the operations whose dependencies have completed
+concurrently, under a rate limit.  A created instance completes once it is
+`active` and a deleted one once it is removed, so that the key above is only
+created on an active instance; waiting does not hold a worker thread.  The
+result records the outcome and timing of each operation.
+"""
+
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, List
+import queue
+import time
+
+from .instance_waiter import InstanceWaiter
+from .resource_controller_v2 import ResourceControllerV2
+from .retry import RateLimiter, backoff_delay, is_retryable, status_code
+
+INSTANCE = 'resource_instance'
+KEY = 'resource_key'
+BINDING = 'resource_binding'
+ALIAS = 'resource_alias'
+
+KINDS = (INSTANCE, KEY, BINDING, ALIAS)
+
+CREATE = 'create'
+DELETE = 'delete'
+
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+
+
+class Ref():
+    """
+    A field of the result of another operation of a plan, used as a
+    parameter.
+
+    :attr str label: The label of the operation.
+    :attr str field: The field of its result.
+    """
+
+    def __init__(self, label: str, field: str = 'id') -> None:
+        """
+        Initialize a Ref object.
+
+        :param str label: The label of the operation.
+        :param str field: (optional) The field of its result.
+        """
+        self.label = label
+        self.field = field
+
+    def __getitem__(self, field: str) -> 'Ref':
+        """Return a reference to another field of the same result."""
+        return Ref(self.label, field)
+
+    def __repr__(self) -> str:
+        return 'Ref({0!r}, {1!r})'.format(self.label, self.field)
+
+
+class Operation():
+    """
+    A create or delete operation of a plan.
+
+    :attr str label: The label of the operation, unique in its plan.
+    :attr str action: `create` or `delete`.
+    :attr str kind: The kind of resource, e.g. `resource_instance`.
+    :attr dict params: The parameters of the operation, some of which may be
+          `Ref`s.
+    :attr List[str] depends_on: The operations this one explicitly depends on.
+    :attr bool wait: Whether the operation completes only once the instance
+          is active (create) or removed (delete).
+    """
+
+    def __init__(self,
+                 label: str,
+                 action: str,
+                 kind: str,
+                 params: Dict,
+                 *,
+                 depends_on: Iterable[str] = (),
+                 wait: bool = None) -> None:
+        """
+        Initialize an Operation object.
+
+        :param str label: The label of the operation.
+        :param str action: `create` or `delete`.
+        :param str kind: The kind of resource.
+        :param dict params: The parameters of the operation.
+        :param Iterable[str] depends_on: (optional) The operations this one
+               depends on, besides those it references.
+        :param bool wait: (optional) Whether to wait for the state of an
+               instance. Defaults to True for instances.
+        """
+        if action not in (CREATE, DELETE):
+            raise ValueError('action must be create or delete')
+        if kind not in KINDS:
+            raise ValueError('unknown kind: {0}'.format(kind))
+        self.label = label
+        self.action = action
+        self.kind = kind
+        self.params = params
+        self.depends_on = list(depends_on)
+        self.wait = (kind == INSTANCE) if wait is None else wait
+
+    def dependencies(self) -> List[str]:
+        """Return the labels of the operations this one depends on."""
+        labels = list(self.depends_on)
+        for value in self.params.values():
+            for item in value if isinstance(value, list) else [value]:
+                if isinstance(item, Ref):
+                    labels.append(item.label)
+        return list(OrderedDict.fromkeys(labels))
+
+
+class ProvisioningPlan():
+    """
+    A graph of create and delete operations.
+
+    :attr OrderedDict operations: The operations, by label, in the order they
+          were added.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize an empty ProvisioningPlan object.
+        """
+        self.operations = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.operations)
+
+    def add(self, operation: Operation) -> Ref:
+        """
+        Add an operation.
+
+        :return: A reference to the ID of its result.
+        :rtype: Ref
+        """
+        if operation.label in self.operations:
+            raise ValueError('duplicate operation: {0}'.format(operation.label))
+        self.operations[operation.label] = operation
+        return Ref(operation.label)
+
+    def create(self,
+               label: str,
+               kind: str,
+               *,
+               depends_on: Iterable[str] = (),
+               wait: bool = None,
+               **params) -> Ref:
+        """
+        Add a create operation.
+
+        :param str label: The label of the operation.
+        :param str kind: The kind of resource, e.g. `INSTANCE`.
+        :param Iterable[str] depends_on: (optional) The operations this one
+               depends on, besides those it references.
+        :param bool wait: (optional) For an instance, whether to wait until
+               it is active. Defaults to True.
+        :param **params: The parameters of the create method, e.g.
+               `create_resource_key`, any of which may be a `Ref`.
+        :return: A reference to the ID of the created resource.
+        :rtype: Ref
+        """
+        return self.add(Operation(label, CREATE, kind, params, depends_on=depends_on, wait=wait))
+
+    def delete(self,
+               label: str,
+               kind: str,
+               id: str,  # pylint: disable=redefined-builtin
+               *,
+               depends_on: Iterable[str] = (),
+               wait: bool = None) -> Ref:
+        """
+        Add a delete operation.
+
+        :param str label: The label of the operation.
+        :param str kind: The kind of resource, e.g. `INSTANCE`.
+        :param str id: The ID of the resource, or a `Ref`.
+        :param Iterable[str] depends_on: (optional) The operations this one
+               depends on, e.g. the deletion of the keys of an instance.
+        :param bool wait: (optional) For an instance, whether to wait until
+               it is removed. Defaults to True.
+        :rtype: Ref
+        """
+        return self.add(Operation(label, DELETE, kind, {'id': id}, depends_on=depends_on,
+                                  wait=wait))
+
+    def order(self) -> List[str]:
+        """
+        Return the labels of the operations in an order respecting their
+        dependencies, and otherwise the order they were added.
+
+        :raises ValueError: if an operation depends on an unknown operation,
+                or the dependencies form a cycle.
+        :rtype: List[str]
+        """
+        remaining = {}
+        dependents = {label: [] for label in self.operations}
+        for label, operation in self.operations.items():
+            dependencies = operation.dependencies()
+            for dependency in dependencies:
+                if dependency not in self.operations:
+                    raise ValueError('{0} depends on unknown operation {1}'.format(
+                        label, dependency))
+                dependents[dependency].append(label)
+            remaining[label] = len(dependencies)
+        ready = [label for label in self.operations if not remaining[label]]
+        order = []
+        while ready:
+            label = ready.pop(0)
+            order.append(label)
+            for dependent in dependents[label]:
+                remaining[dependent] -= 1
+                if not remaining[dependent]:
+                    ready.append(dependent)
+        if len(order) < len(self.operations):
+            cycle = sorted(label for label in self.operations if remaining[label])
+            raise ValueError('dependency cycle between: {0}'.format(', '.join(cycle)))
+        return order
+
+
+class OperationResult():
+    """
+    The outcome of one operation.
+
+    Times are in seconds since the start of the run.
+
+    :attr str label: The label of the operation.
+    :attr str action: `create` or `delete`.
+    :attr str kind: The kind of resource.
+    :attr str status: `succeeded`, `failed` or `skipped` (a dependency
+          failed, or the run was stopped).
+    :attr dict result: The json dictionary of the created resource, or of the
+          instance in its final state.
+    :attr Exception error: The error that failed the operation.
+    :attr int attempts: The number of requests sent.
+    :attr float ready: When its dependencies had completed.
+    :attr float started: When its first request was sent.
+    :attr float called: When its last request returned.
+    :attr float finished: When it completed, including the wait for the state
+          of an instance.
+    """
+
+    def __init__(self, operation: Operation) -> None:
+        """
+        Initialize an OperationResult object.
+
+        :param Operation operation: The operation.
+        """
+        self.label = operation.label
+        self.action = operation.action
+        self.kind = operation.kind
+        self.status = SKIPPED
+        self.result = None
+        self.error = None
+        self.attempts = 0
+        self.ready = None
+        self.started = None
+        self.called = None
+        self.finished = None
+
+    @property
+    def seconds(self) -> float:
+        """The time from the operation being ready to its completion."""
+        if self.ready is None or self.finished is None:
+            return None
+        return self.finished - self.ready
+
+    def to_dict(self) -> Dict:
+        """Return a json dictionary representing the outcome."""
+        outcome = {
+            'label': self.label,
+            'action': self.action,
+            'kind': self.kind,
+            'status': self.status,
+            'attempts': self.attempts,
+        }
+        for field in ('ready', 'started', 'called', 'finished', 'seconds'):
+            value = getattr(self, field)
+            if value is not None:
+                outcome[field] = round(value, 6)
+        if self.error is not None:
+            outcome['error'] = str(self.error)
+        return outcome
+
+
+class ProvisioningResult():
+    """
+    The outcome of a run.
+
+    :attr OrderedDict operations: The `OperationResult` of each operation, by
+          label, in the order of the plan.
+    :attr float seconds: The duration of the run.
+    """
+
+    def __init__(self, plan: ProvisioningPlan) -> None:
+        """
+        Initialize a ProvisioningResult object.
+
+        :param ProvisioningPlan plan: The plan that is run.
+        """
+        self.operations = OrderedDict((label, OperationResult(operation))
+                                      for label, operation in plan.operations.items())
+        self.seconds = 0.0
+
+    def __getitem__(self, label: str) -> OperationResult:
+        return self.operations[label]
+
+    def _labels(self, status: str) -> List[str]:
+        return [label for label, x in self.operations.items() if x.status == status]
+
+    @property
+    def succeeded(self) -> List[str]:
+        """The labels of the operations that succeeded."""
+        return self._labels(SUCCEEDED)
+
+    @property
+    def failed(self) -> List[str]:
+        """The labels of the operations that failed."""
+        return self._labels(FAILED)
+
+    @property
+    def skipped(self) -> List[str]:
+        """The labels of the operations that were not run."""
+        return self._labels(SKIPPED)
+
+    def to_dict(self) -> Dict:
+        """Return a json dictionary summarizing the outcome."""
+        return {
+            'total': len(self.operations),
+            SUCCEEDED: len(self.succeeded),
+            FAILED: len(self.failed),
+            SKIPPED: len(self.skipped),
+            'requests': sum(x.attempts for x in self.operations.values()),
+            'seconds': round(self.seconds, 6),
+        }
+
+    def __str__(self) -> str:
+        """Return a `str` version of this object."""
+        return 'ProvisioningResult({0})'.format(', '.join(
+            '{0}={1}'.format(k, v) for k, v in self.to_dict().items()))
+
+
+class BulkProvisioner():
+    """
+    Runs provisioning plans.
+
+    Operations are run on a bounded pool of worker threads as soon as the
+    operations they depend on have succeeded; the operations depending on a
+    failed operation are skipped.  Every request, including retries, waits
+    for the rate limiter.  Requests failing with Too Many Requests are
+    retried after a backoff, up to `max_attempts` attempts; deletes are also
+    retried on server and connection errors, which creates are not, since
+    the resource may have been created.
+
+    :attr ResourceControllerV2 service: The Resource Controller client.
+    :attr int max_workers: The maximum number of concurrent requests.
+    :attr RateLimiter limiter: The rate limiter of the requests.
+    :attr int max_attempts: The maximum number of requests per operation.
+    :attr float backoff: The bound of the first backoff, in seconds.
+    :attr float max_backoff: The maximum backoff, in seconds.
+    :attr InstanceWaiter waiter: The waiter for the state of instances, or
+          None for one per run.
+    """
+
+    def __init__(self,
+                 service: ResourceControllerV2,
+                 *,
+                 max_workers: int = 8,
+                 rate: float = 10.0,
+                 burst: int = 1,
+                 max_attempts: int = 3,
+                 backoff: float = 1.0,
+                 max_backoff: float = 30.0,
+                 waiter: InstanceWaiter = None) -> None:
+        """
+        Initialize a BulkProvisioner object.
+
+        :param ResourceControllerV2 service: The Resource Controller client.
+        :param int max_workers: (optional) The maximum number of concurrent
+               requests.
+        :param float rate: (optional) The maximum number of requests per
+               second.
+        :param int burst: (optional) The number of requests that may be sent at
+               once after an idle period.
+        :param int max_attempts: (optional) The maximum number of requests per
+               operation.
+        :param float backoff: (optional) The bound of the first backoff, in
+               seconds.
+        :param float max_backoff: (optional) The maximum backoff, in seconds.
+        :param InstanceWaiter waiter: (optional) The waiter for the state of
+               instances, e.g. with a longer timeout.
+        """
+        if max_workers < 1:
+            raise ValueError('max_workers must be at least 1')
+        if max_attempts < 1:
+            raise ValueError('max_attempts must be at least 1')
+        self.service = service
+        self.max_workers = max_workers
+        self.limiter = RateLimiter(rate, burst=burst)
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.waiter = waiter
+
+    def run(self, plan: ProvisioningPlan, *, fail_fast: bool = False) -> ProvisioningResult:
+        """
+        Run a plan.
+
+        :param ProvisioningPlan plan: The plan.
+        :param bool fail_fast: (optional) Start no more operations once one
+               has failed; those already started are completed.
+        :raises ValueError: if the plan has unknown dependencies or a cycle.
+        :rtype: ProvisioningResult
+        """
+        order = plan.order()
+        result = ProvisioningResult(plan)
+        start = time.monotonic()
+        remaining = {}
+        dependents = {label: [] for label in order}
+        for label in order:
+            dependencies = plan.operations[label].dependencies()
+            remaining[label] = len(dependencies)
+            for dependency in dependencies:
+                dependents[dependency].append(label)
+
+        waiter = self.waiter or InstanceWaiter(self.service)
+        done = queue.Queue()
+        running = 0
+        stopped = False
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+
+        def submit(label):
+            result[label].ready = time.monotonic() - start
+            executor.submit(self._execute, plan.operations[label], result, start, waiter, done)
+
+        try:
+            for label in order:
+                if not remaining[label]:
+                    submit(label)
+                    running += 1
+            while running:
+                label, error = done.get()
+                running -= 1
+                outcome = result[label]
+                outcome.finished = time.monotonic() - start
+                if error is None:
+                    outcome.status = SUCCEEDED
+                    for dependent in dependents[label]:
+                        remaining[dependent] -= 1
+                        if not remaining[dependent] and not stopped:
+                            submit(dependent)
+                            running += 1
+                else:
+                    outcome.status = FAILED
+                    outcome.error = error
+                    stopped = stopped or fail_fast
+        finally:
+            executor.shutdown()
+            if self.waiter is None:
+                waiter.close()
+        result.seconds = time.monotonic() - start
+        return result
+
+    def _execute(self, operation, result, start, waiter, done) -> None:
+        """Run an operation and report its completion on the done queue."""
+        outcome = result[operation.label]
+        try:
+            params = {key: _resolve(value, result) for key, value in operation.params.items()}
+            method = getattr(self.service, '{0}_{1}'.format(operation.action, operation.kind))
+            response = self._call(method, params, operation.action, outcome, start)
+            outcome.result = response
+            if not (operation.wait and operation.kind == INSTANCE):
+                done.put((operation.label, None))
+                return
+            if operation.action == CREATE:
+                future = waiter.wait_until_active(response)
+            else:
+                future = waiter.wait_until_removed(params['id'])
+        except Exception as err:  # pylint: disable=broad-except
+            done.put((operation.label, err))
+            return
+
+        def settled(future: Future) -> None:
+            if future.cancelled():
+                done.put((operation.label, RuntimeError('the wait was cancelled')))
+            elif future.exception() is not None:
+                done.put((operation.label, future.exception()))
+            else:
+                outcome.result = future.result()
+                done.put((operation.label, None))
+
+        future.add_done_callback(settled)
+
+    def _call(self, method, params, action, outcome, start) -> Dict:
+        """Send the request of an operation, retrying it if allowed."""
+        while True:
+            self.limiter.acquire()
+            outcome.attempts += 1
+            if outcome.started is None:
+                outcome.started = time.monotonic() - start
+            try:
+                response = method(**params).get_result()
+                outcome.called = time.monotonic() - start
+                return response
+            except Exception as err:  # pylint: disable=broad-except
+                outcome.called = time.monotonic() - start
+                retryable = is_retryable(err) if action == DELETE else status_code(err) == 429
+                if not retryable or outcome.attempts >= self.max_attempts:
+                    raise
+                time.sleep(backoff_delay(outcome.attempts, base=self.backoff,
+                                         cap=self.max_backoff, err=err))
+
+
+def _resolve(value, result: ProvisioningResult):
+    """Replace the `Ref`s in a parameter with the fields they reference."""
+    if isinstance(value, list):
+        return [_resolve(x, result) for x in value]
+    if not isinstance(value, Ref):
+        return value
+    resolved = (result[value.label].result or {}).get(value.field)
+    if resolved is None:
+        raise ValueError('{0} has no {1}'.format(value.label, value.field))
+    return resolved
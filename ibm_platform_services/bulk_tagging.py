@@ -0,0 +1,254 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module provides bulk tagging on top of the Global Tagging service.
+
+`GlobalTaggingV1.attach_tag` and `detach_tag` tag a limited number of
+resources per request and report success per resource in their
+`TagResults`.  `BulkTagger` splits any number of resources into requests of
+the allowed size, sends them concurrently, retries only the resources that
+failed, and aggregates the outcome:
+
+    tagger = BulkTagger(tagging_service, max_workers=8)
+    result = tagger.attach(crns, tag_names=['env:prod'])
+    if result.failed:
+        ...
+"""
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Union
+import time
+
+from .global_tagging_v1 import GlobalTaggingV1, Resource
+from .retry import backoff_delay, is_retryable
+
+# The maximum number of resources in one attach or detach request.
+DEFAULT_CHUNK_SIZE = 100
+
+
+class BulkTagResult():
+    """
+    The aggregated outcome of a bulk attach or detach.
+
+    :attr int total: The number of distinct resources submitted.
+    :attr List[str] succeeded: The IDs of the resources tagged successfully.
+    :attr dict failed: The IDs of the resources that could not be tagged,
+          mapped to the last `TagResultsItem` reported for them, as a dict,
+          to None if the service did not report them, or to the exception
+          that failed their last request.
+    :attr int requests: The number of requests sent.
+    :attr int retried: The number of times a resource was retried.
+    """
+
+    def __init__(self, total: int = 0) -> None:
+        """
+        Initialize a BulkTagResult object.
+
+        :param int total: (optional) The number of resources submitted.
+        """
+        self.total = total
+        self.succeeded = []
+        self.failed = {}
+        self.requests = 0
+        self.retried = 0
+
+    def to_dict(self) -> Dict:
+        """Return a json dictionary summarizing the outcome."""
+        return {
+            'total': self.total,
+            'succeeded': len(self.succeeded),
+            'failed': len(self.failed),
+            'requests': self.requests,
+            'retried': self.retried,
+        }
+
+    def __str__(self) -> str:
+        """Return a `str` version of this object."""
+        return 'BulkTagResult({0})'.format(', '.join(
+            '{0}={1}'.format(k, v) for k, v in self.to_dict().items()))
+
+
+class BulkTagger():
+    """
+    Attaches or detaches tags on any number of resources.
+
+    Resources are sent in chunks of `chunk_size` on a bounded pool of worker
+    threads.  Resources reported with `is_error`, missing from the result,
+    or part of a request that failed with a retryable error (rate limiting,
+    server or connection errors) are retried, re-chunked, after a backoff,
+    up to `max_attempts` attempts in total.  Requests failing with any other
+    error are not retried.
+
+    :attr GlobalTaggingV1 service: The Global Tagging client.
+    :attr int chunk_size: The number of resources per request.
+    :attr int max_workers: The maximum number of concurrent requests.
+    :attr int max_attempts: The maximum number of attempts per resource.
+    :attr float backoff: The bound of the first backoff, in seconds.
+    :attr float max_backoff: The maximum backoff, in seconds.
+    """
+
+    def __init__(self,
+                 service: GlobalTaggingV1,
+                 *,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 max_workers: int = 4,
+                 max_attempts: int = 3,
+                 backoff: float = 1.0,
+                 max_backoff: float = 30.0) -> None:
+        """
+        Initialize a BulkTagger object.
+
+        :param GlobalTaggingV1 service: The Global Tagging client.
+        :param int chunk_size: (optional) The number of resources per request.
+        :param int max_workers: (optional) The maximum number of concurrent
+               requests.
+        :param int max_attempts: (optional) The maximum number of attempts per
+               resource.
+        :param float backoff: (optional) The bound of the first backoff, in
+               seconds.
+        :param float max_backoff: (optional) The maximum backoff, in seconds.
+        """
+        if chunk_size < 1:
+            raise ValueError('chunk_size must be at least 1')
+        if max_workers < 1:
+            raise ValueError('max_workers must be at least 1')
+        if max_attempts < 1:
+            raise ValueError('max_attempts must be at least 1')
+        self.service = service
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def attach(self,
+               resources: List[Union[str, Dict, Resource]],
+               *,
+               tag_name: str = None,
+               tag_names: List[str] = None,
+               account_id: str = None,
+               tag_type: str = None,
+               **kwargs) -> BulkTagResult:
+        """
+        Attach tags to resources.
+
+        :param List resources: The resources to tag, as CRNs or IMS IDs,
+               `Resource` objects or dicts.
+        :param str tag_name: (optional) The name of the tag to attach.
+        :param List[str] tag_names: (optional) The names of the tags to attach.
+        :param str account_id: (optional) The ID of the account of the
+               resources.
+        :param str tag_type: (optional) The type of the tags, `user` or
+               `service`.
+        :param **kwargs: Other parameters of `GlobalTaggingV1.attach_tag`,
+               e.g. `headers`.
+        :rtype: BulkTagResult
+        """
+        return self._run(self.service.attach_tag, resources, tag_name=tag_name,
+                         tag_names=tag_names, account_id=account_id, tag_type=tag_type,
+                         **kwargs)
+
+    def detach(self,
+               resources: List[Union[str, Dict, Resource]],
+               *,
+               tag_name: str = None,
+               tag_names: List[str] = None,
+               account_id: str = None,
+               tag_type: str = None,
+               **kwargs) -> BulkTagResult:
+        """
+        Detach tags from resources.
+
+        :param List resources: The resources to untag, as CRNs or IMS IDs,
+               `Resource` objects or dicts.
+        :param str tag_name: (optional) The name of the tag to detach.
+        :param List[str] tag_names: (optional) The names of the tags to detach.
+        :param str account_id: (optional) The ID of the account of the
+               resources.
+        :param str tag_type: (optional) The type of the tags, `user` or
+               `service`.
+        :param **kwargs: Other parameters of `GlobalTaggingV1.detach_tag`,
+               e.g. `headers`.
+        :rtype: BulkTagResult
+        """
+        return self._run(self.service.detach_tag, resources, tag_name=tag_name,
+                         tag_names=tag_names, account_id=account_id, tag_type=tag_type,
+                         **kwargs)
+
+    def _run(self, operation: Callable, resources: List, **kwargs) -> BulkTagResult:
+        if not kwargs.get('tag_name') and not kwargs.get('tag_names'):
+            raise ValueError('tag_name or tag_names must be provided')
+        pending = OrderedDict()
+        for resource in resources:
+            resource = _resource_dict(resource)
+            pending.setdefault(resource['resource_id'], resource)
+        result = BulkTagResult(len(pending))
+        if not pending:
+            return result
+
+        def send(chunk):
+            try:
+                return operation(chunk, **kwargs).get_result(), None
+            except Exception as err:  # pylint: disable=broad-except
+                return None, err
+
+        workers = min(self.max_workers, -(-len(pending) // self.chunk_size))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for attempt in range(1, self.max_attempts + 1):
+                batch = list(pending.values())
+                chunks = [batch[i:i + self.chunk_size]
+                          for i in range(0, len(batch), self.chunk_size)]
+                retry = OrderedDict()
+                last_error = None
+                for chunk, (tag_results, err) in zip(chunks, executor.map(send, chunks)):
+                    result.requests += 1
+                    if err is not None:
+                        if is_retryable(err):
+                            target, last_error = retry, err
+                        else:
+                            target = result.failed
+                        for resource in chunk:
+                            target[resource['resource_id']] = err
+                        continue
+                    items = {x.get('resource_id'): x for x in tag_results.get('results') or []}
+                    for resource in chunk:
+                        item = items.get(resource['resource_id'])
+                        if item is None or item.get('is_error'):
+                            retry[resource['resource_id']] = item
+                        else:
+                            result.succeeded.append(resource['resource_id'])
+
+                if not retry or attempt == self.max_attempts:
+                    result.failed.update(retry)
+                    break
+                result.retried += len(retry)
+                pending = OrderedDict((key, pending[key]) for key in retry)
+                time.sleep(backoff_delay(attempt, base=self.backoff, cap=self.max_backoff,
+                                         err=last_error))
+        return result
+
+
+def _resource_dict(resource: Union[str, Dict, Resource]) -> Dict:
+    """Return the json dictionary of a resource given as an ID, dict or model."""
+    if isinstance(resource, str):
+        return {'resource_id': resource}
+    if isinstance(resource, Resource):
+        return resource.to_dict()
+    if isinstance(resource, dict) and resource.get('resource_id'):
+        return resource
+    raise ValueError('resources must be IDs, Resource objects or dicts with a resource_id')
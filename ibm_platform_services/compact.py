@@ -0,0 +1,334 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module provides compact, `__slots__`-based variants of the generated
+model classes.
+
+The generated models keep their properties in a per-instance `__dict__` and
+build an intermediate keyword argument dict in `from_dict`.  When millions of
+instances are materialized, e.g. resource instances or usage records, that
+costs noticeably more memory and time than necessary.  `compact_model`
+derives, from a generated model class, a class with the same properties that
+stores them in slots and whose `from_dict` and `to_dict` are compiled once
+per class into straight-line code:
+
+    CompactResourceInstance = compact_model(ResourceInstance)
+    instances = [CompactResourceInstance.from_dict(x)
+                 for x in service.list_resource_instances_iter()]
+
+Nested models are decoded into their compact variants as well.  Compact
+instances can be converted back with `to_model()`.
+"""
+
+from collections import namedtuple
+from typing import Dict, List, Tuple
+import ast
+import inspect
+import json
+import sys
+import textwrap
+import threading
+
+from ibm_cloud_sdk_core.utils import datetime_to_string, string_to_datetime
+
+# Kinds of property, by how the generated from_dict decodes them.
+PLAIN = 'plain'
+MODEL = 'model'
+MODEL_LIST = 'model_list'
+MODEL_DICT = 'model_dict'
+DATETIME = 'datetime'
+
+ModelField = namedtuple('ModelField', ['attr', 'key', 'kind', 'model_class', 'required'])
+ModelField.__doc__ = """
+A property of a generated model class.
+
+:attr str attr: The attribute name.
+:attr str key: The property name in the json dictionary.
+:attr str kind: How the value is decoded: PLAIN, MODEL, MODEL_LIST,
+      MODEL_DICT or DATETIME.
+:attr type model_class: The nested model class, for the MODEL kinds.
+:attr bool required: Whether from_dict requires the property.
+"""
+
+_model_fields = {}
+_compact_classes = {}
+_lock = threading.RLock()
+
+
+class CompactModel():
+    """
+    Base class of the compact model classes built by `compact_model`.
+
+    Additional properties, for models that allow them, are kept in a dict
+    that is only allocated when an instance has any.
+    """
+
+    __slots__ = ('_additional_properties',)
+
+    # Set on each compact class.
+    _model_class = None
+    _fields = ()
+
+    def __getattr__(self, name):
+        extra = object.__getattribute__(self, '_additional_properties')
+        if extra is not None and name in extra:
+            return extra[name]
+        raise AttributeError('{0!r} object has no attribute {1!r}'.format(
+            type(self).__name__, name))
+
+    @classmethod
+    def from_dict(cls, _dict: Dict) -> 'CompactModel':
+        """Initialize a compact model object from a json dictionary."""
+        _compile(cls)
+        return cls.from_dict(_dict)
+
+    def to_dict(self) -> Dict:
+        """Return a json dictionary representing this model."""
+        _compile(type(self))
+        return self.to_dict()
+
+    def to_model(self) -> object:
+        """Return the equivalent instance of the generated model class."""
+        return self._model_class.from_dict(self.to_dict())
+
+    def __str__(self) -> str:
+        """Return a `str` version of this object."""
+        return json.dumps(self.to_dict(), indent=2)
+
+    def __eq__(self, other: object) -> bool:
+        """Return `true` when self and other are equal, false otherwise."""
+        if not isinstance(other, self.__class__):
+            return False
+        return all(getattr(self, name) == getattr(other, name)
+                   for name in self.__slots__ + CompactModel.__slots__)
+
+    def __ne__(self, other: object) -> bool:
+        """Return `true` when self and other are not equal, false otherwise."""
+        return not self == other
+
+    __hash__ = None
+
+
+def compact_model(model_class: type) -> type:
+    """
+    Return the compact variant of a generated model class.
+
+    The compact class is built once per model class and cached.
+
+    :param type model_class: A generated model class, e.g. `ResourceInstance`.
+    :return: A subclass of `CompactModel` named `Compact<model class name>`.
+    :rtype: type
+    :raises TypeError: If the model class does not follow the generated
+            from_dict layout, e.g. models that dispatch to a subclass on a
+            discriminator property.
+    """
+    with _lock:
+        compact_class = _compact_classes.get(model_class)
+        if compact_class is None:
+            fields, additional_properties = model_fields(model_class)
+            namespace = {
+                '__slots__': tuple(field[0] for field in fields),
+                '__module__': __name__,
+                '__doc__': 'Compact variant of {0}.{1}.'.format(model_class.__module__,
+                                                                model_class.__name__),
+                '_model_class': model_class,
+                '_fields': fields,
+                '_allows_additional_properties': additional_properties,
+            }
+            compact_class = type('Compact' + model_class.__name__, (CompactModel,), namespace)
+            _compact_classes[model_class] = compact_class
+        return compact_class
+
+
+def model_fields(model_class: type) -> Tuple[List[ModelField], bool]:
+    """
+    Return the properties of a generated model class, read from its
+    from_dict, and whether the model allows additional properties.
+
+    :raises TypeError: If the model class does not follow the generated
+            from_dict layout.
+    """
+    with _lock:
+        if model_class not in _model_fields:
+            _model_fields[model_class] = _parse_from_dict(model_class)
+        return _model_fields[model_class]
+
+
+def _parse_from_dict(model_class: type) -> Tuple[List[ModelField], bool]:
+    """Read the properties of a generated model class from its from_dict."""
+    try:
+        source = textwrap.dedent(inspect.getsource(model_class.from_dict))
+    except (OSError, TypeError) as err:
+        raise TypeError('the source of {0}.from_dict is not available'.format(
+            model_class.__name__)) from err
+    function = ast.parse(source).body[0]
+    module_globals = vars(sys.modules[model_class.__module__])
+    unsupported = TypeError('{0} does not have a generated from_dict'.format(model_class.__name__))
+
+    body = function.body
+    if body and isinstance(body[0], ast.Expr) and _constant(body[0].value) is not None:
+        body = body[1:]
+    if not body or not isinstance(body[-1], ast.Return):
+        raise unsupported
+    fields = []
+    additional_properties = False
+    for statement in body[1:-1]:
+        if isinstance(statement, ast.If):
+            attr, key, kind, nested = _parse_assignment(statement, module_globals, unsupported)
+            fields.append(ModelField(attr, key, kind, nested, bool(statement.orelse)))
+        elif (isinstance(statement, ast.Expr) and isinstance(statement.value, ast.Call)
+              and isinstance(statement.value.func, ast.Attribute)
+              and statement.value.func.attr == 'update'):
+            additional_properties = True
+        else:
+            raise unsupported
+    return fields, additional_properties
+
+
+def _parse_assignment(statement, module_globals, unsupported):
+    """Parse `if 'key' in _dict: args['attr'] = <decode _dict.get('key')>`."""
+    if len(statement.body) != 1 or not isinstance(statement.body[0], ast.Assign):
+        raise unsupported
+    assign = statement.body[0]
+    attr = _constant(_subscript_index(assign.targets[0]))
+    key = _constant(statement.test.left) if isinstance(statement.test, ast.Compare) else None
+    value = assign.value
+    if attr is None or key is None:
+        raise unsupported
+    if _is_get(value, key):
+        return attr, key, PLAIN, None
+    if isinstance(value, ast.Call) and len(value.args) == 1 and _is_get(value.args[0], key):
+        if isinstance(value.func, ast.Name) and value.func.id == 'string_to_datetime':
+            return attr, key, DATETIME, None
+        if _is_from_dict(value.func):
+            return attr, key, MODEL, module_globals[value.func.value.id]
+    if isinstance(value, ast.ListComp) and _is_get(value.generators[0].iter, key):
+        if _is_from_dict(value.elt.func):
+            return attr, key, MODEL_LIST, module_globals[value.elt.func.value.id]
+    if isinstance(value, ast.DictComp) and isinstance(value.generators[0].iter, ast.Call):
+        if (_is_get(value.generators[0].iter.func.value, key)
+                and _is_from_dict(value.value.func)):
+            return attr, key, MODEL_DICT, module_globals[value.value.func.value.id]
+    raise unsupported
+
+
+def _constant(node):
+    """Return the value of a string literal node, or None."""
+    if sys.version_info >= (3, 8):
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            return node.value
+    elif isinstance(node, ast.Str):
+        return node.s
+    return None
+
+
+def _subscript_index(node):
+    """Return the index node of `args['attr']`."""
+    if not isinstance(node, ast.Subscript):
+        return None
+    if sys.version_info >= (3, 9):
+        return node.slice
+    return node.slice.value
+
+
+def _is_get(node, key):
+    """Return True if the node is `_dict.get(key)`."""
+    return (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+            and node.func.attr == 'get' and isinstance(node.func.value, ast.Name)
+            and node.func.value.id == '_dict' and len(node.args) == 1
+            and _constant(node.args[0]) == key)
+
+
+def _is_from_dict(node):
+    """Return True if the node is `SomeModel.from_dict`."""
+    return (isinstance(node, ast.Attribute) and node.attr == 'from_dict'
+            and isinstance(node.value, ast.Name))
+
+
+def _compile(compact_class: type) -> None:
+    """
+    Compile the from_dict and to_dict of a compact class.
+
+    Nested compact classes are created here, not in compact_model, so that
+    models which refer to each other can be built.
+    """
+    with _lock:
+        if 'from_dict' in vars(compact_class):
+            return
+        namespace = {
+            '_new': object.__new__,
+            '_string_to_datetime': string_to_datetime,
+            '_datetime_to_string': datetime_to_string,
+        }
+        decode = ['def from_dict(cls, _dict):',
+                  '    self = _new(cls)',
+                  '    get = _dict.get']
+        encode = ['def to_dict(self):',
+                  '    _dict = {}']
+        properties = []
+        for index, (attr, key, kind, nested, required) in enumerate(compact_class._fields):
+            properties.append(key)
+            if required:
+                decode.append('    if {0!r} not in _dict:'.format(key))
+                decode.append('        raise ValueError({0!r})'.format(
+                    'Required property \'{0}\' not present in {1} JSON'.format(
+                        key, compact_class._model_class.__name__)))
+            value = 'get({0!r})'.format(key)
+            if kind == PLAIN:
+                decode.append('    self.{0} = {1}'.format(attr, value))
+                encode.append('    if self.{0} is not None:'.format(attr))
+                encode.append('        _dict[{0!r}] = self.{1}'.format(key, attr))
+                continue
+            decode.append('    value = {0}'.format(value))
+            encode.append('    value = self.{0}'.format(attr))
+            encode.append('    if value is not None:')
+            if kind == DATETIME:
+                decoded = '_string_to_datetime(value)'
+                encoded = '_datetime_to_string(value)'
+            else:
+                nested_name = '_nested_{0}'.format(index)
+                namespace[nested_name] = compact_model(nested)
+                if kind == MODEL:
+                    decoded = '{0}.from_dict(value)'.format(nested_name)
+                    encoded = 'value.to_dict()'
+                elif kind == MODEL_LIST:
+                    decoded = '[{0}.from_dict(x) for x in value]'.format(nested_name)
+                    encoded = '[x.to_dict() for x in value]'
+                else:
+                    decoded = '{{k: {0}.from_dict(v) for k, v in value.items()}}'.format(nested_name)
+                    encoded = '{k: v.to_dict() for k, v in value.items()}'
+            decode.append('    self.{0} = None if value is None else {1}'.format(attr, decoded))
+            encode.append('        _dict[{0!r}] = {1}'.format(key, encoded))
+
+        if compact_class._allows_additional_properties:
+            namespace['_properties'] = frozenset(properties)
+            decode.append('    extra = {k: v for k, v in _dict.items() if k not in _properties}')
+            decode.append('    self._additional_properties = extra or None')
+            encode.append('    if self._additional_properties:')
+            encode.append('        for k, v in self._additional_properties.items():')
+            encode.append('            if v is not None:')
+            encode.append('                _dict[k] = v')
+        else:
+            decode.append('    self._additional_properties = None')
+        decode.append('    return self')
+        encode.append('    return _dict')
+
+        exec('\n'.join(decode + [''] + encode), namespace)  # pylint: disable=exec-used
+        namespace['from_dict'].__doc__ = CompactModel.from_dict.__doc__
+        namespace['to_dict'].__doc__ = CompactModel.to_dict.__doc__
+        compact_class.to_dict = namespace['to_dict']
+        compact_class.from_dict = classmethod(namespace['from_dict'])
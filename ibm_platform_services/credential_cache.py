@@ -0,0 +1,248 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module caches the credentials of resource keys.
+
+Reading credentials with `ResourceControllerV2.get_resource_key` on every
+start or refresh costs a request each time.  `CredentialCache` keeps the
+resource keys it has read for a time-to-live, and shares one request between
+the threads that miss on the same key at the same time:
+
+    cache = CredentialCache(resource_controller_service, ttl=600)
+    credentials = cache.get(resource_key_id)
+    apikey = credentials['apikey']
+
+A key read again in the last part of its time-to-live is refreshed in the
+background, so that callers keep being served from the cache.  The least
+recently used keys are evicted beyond `max_size`.
+"""
+
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict
+import threading
+import time
+
+from .resource_controller_v2 import ResourceControllerV2
+
+
+class _Entry():
+    """A cached resource key."""
+
+    __slots__ = ('value', 'expires_at', 'refresh_at')
+
+    def __init__(self, value, expires_at, refresh_at):
+        self.value = value
+        self.expires_at = expires_at
+        self.refresh_at = refresh_at
+
+
+class CredentialCache():
+    """
+    A thread-safe cache of resource keys, by resource key ID.
+
+    The dictionaries returned are shared with the cache and must not be
+    modified.
+
+    :attr ResourceControllerV2 service: The Resource Controller client.
+    :attr float ttl: The time a key is served from the cache, in seconds.
+    :attr float refresh_ahead: The fraction of the time-to-live, at its end,
+          during which a read key is refreshed in the background.
+    :attr int max_size: The maximum number of cached keys.
+    """
+
+    _clock = staticmethod(time.monotonic)
+
+    def __init__(self,
+                 service: ResourceControllerV2,
+                 *,
+                 ttl: float = 300.0,
+                 refresh_ahead: float = 0.2,
+                 max_size: int = 1024,
+                 max_workers: int = 2) -> None:
+        """
+        Initialize a CredentialCache object.
+
+        :param ResourceControllerV2 service: The Resource Controller client.
+        :param float ttl: (optional) The time a key is served from the cache,
+               in seconds.
+        :param float refresh_ahead: (optional) The fraction of the
+               time-to-live, at its end, during which a read key is refreshed
+               in the background; 0 to disable.
+        :param int max_size: (optional) The maximum number of cached keys.
+        :param int max_workers: (optional) The maximum number of concurrent
+               background refreshes.
+        """
+        if ttl <= 0:
+            raise ValueError('ttl must be positive')
+        if not 0 <= refresh_ahead < 1:
+            raise ValueError('refresh_ahead must be at least 0 and less than 1')
+        if max_size < 1:
+            raise ValueError('max_size must be at least 1')
+        self.service = service
+        self.ttl = ttl
+        self.refresh_ahead = refresh_ahead
+        self.max_size = max_size
+        self.max_workers = max_workers
+        self._entries = OrderedDict()  # key ID -> _Entry, least recently used first
+        self._loading = {}             # key ID -> Future of the request in flight
+        self._generation = 0           # bumped when all keys are dropped
+        self._generations = {}         # key ID -> [times dropped, requests in flight]
+        self._lock = threading.Lock()
+        self._executor = None
+        self._stats = {'hits': 0, 'misses': 0, 'loads': 0, 'refreshes': 0,
+                       'refresh_errors': 0, 'evictions': 0}
+
+    def __len__(self) -> int:
+        """Return the number of cached keys, expired or not."""
+        return len(self._entries)
+
+    def __contains__(self, key_id: str) -> bool:
+        """Return True if a key is cached and not expired."""
+        with self._lock:
+            entry = self._entries.get(key_id)
+            return entry is not None and self._clock() < entry.expires_at
+
+    def get(self, key_id: str) -> Dict:
+        """
+        Return the credentials of a resource key.
+
+        :param str key_id: The short or long ID of the key.
+        :return: The `credentials` of the key, as a dict.
+        :rtype: dict
+        """
+        return self.get_key(key_id).get('credentials') or {}
+
+    def get_key(self, key_id: str) -> Dict:
+        """
+        Return a resource key, reading it if it is not cached or expired.
+
+        Errors of `get_resource_key` are raised to every caller waiting for
+        the request, and are not cached.
+
+        :param str key_id: The short or long ID of the key.
+        :return: The json dictionary of the `ResourceKey`.
+        :rtype: dict
+        """
+        with self._lock:
+            now = self._clock()
+            entry = self._entries.get(key_id)
+            if entry is not None and now < entry.expires_at:
+                self._entries.move_to_end(key_id)
+                self._stats['hits'] += 1
+                if now >= entry.refresh_at and key_id not in self._loading:
+                    self._refresh(key_id)
+                return entry.value
+            self._stats['misses'] += 1
+            future = self._loading.get(key_id)
+            leader = future is None
+            if leader:
+                future = self._loading[key_id] = Future()
+                generation = self._start(key_id)
+        if leader:
+            self._load(key_id, future, generation)
+        return future.result()
+
+    def invalidate(self, key_id: str = None) -> None:
+        """
+        Drop a key, e.g. after its credentials were rotated, or all keys.
+
+        The requests in flight when keys are dropped do not cache their
+        results, and later callers send a new request.
+
+        :param str key_id: (optional) The ID of the key; all keys if not given.
+        """
+        with self._lock:
+            if key_id is None:
+                self._generation += 1
+                self._entries.clear()
+                self._loading.clear()
+            else:
+                if self._loading.pop(key_id, None) is not None:
+                    self._generations[key_id][0] += 1
+                self._entries.pop(key_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return the counters of the cache: `hits`, `misses`, `loads` (requests
+        sent), `refreshes` (background requests), `refresh_errors` and
+        `evictions`.
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def close(self) -> None:
+        """Wait for the background refreshes to complete."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+    def __enter__(self) -> 'CredentialCache':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _refresh(self, key_id: str) -> None:
+        """Start a background refresh of a key. Call with the lock held."""
+        future = self._loading[key_id] = Future()
+        self._stats['refreshes'] += 1
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        self._executor.submit(self._load, key_id, future, self._start(key_id), True)
+
+    def _start(self, key_id: str) -> tuple:
+        """Count a request of a key and return its generation. Call with the lock held."""
+        counts = self._generations.setdefault(key_id, [0, 0])
+        counts[1] += 1
+        return (self._generation, counts[0])
+
+    def _load(self, key_id: str, future: Future, generation: tuple, refresh: bool = False) -> None:
+        """Read a key, cache it and resolve the future of its request."""
+        try:
+            value = self.service.get_resource_key(key_id).get_result()
+        except Exception as err:  # pylint: disable=broad-except
+            with self._lock:
+                self._stats['loads'] += 1
+                if refresh:
+                    # The key keeps being served until it expires.
+                    self._stats['refresh_errors'] += 1
+                self._finish(key_id, future)
+            future.set_exception(err)
+            return
+        with self._lock:
+            self._stats['loads'] += 1
+            if generation == (self._generation, self._generations[key_id][0]):
+                now = self._clock()
+                self._entries[key_id] = _Entry(value, now + self.ttl,
+                                               now + self.ttl * (1 - self.refresh_ahead))
+                self._entries.move_to_end(key_id)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+                    self._stats['evictions'] += 1
+            self._finish(key_id, future)
+        future.set_result(value)
+
+    def _finish(self, key_id: str, future: Future) -> None:
+        """Forget a completed request of a key. Call with the lock held."""
+        if self._loading.get(key_id) is future:
+            del self._loading[key_id]
+        counts = self._generations[key_id]
+        counts[1] -= 1
+        if counts[1] == 0:
+            del self._generations[key_id]
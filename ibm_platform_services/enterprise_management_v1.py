@@ -22,7 +22,7 @@ groups, and accounts within the enterprise.
 """
 
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, Iterator, List
 import json
 
 from ibm_cloud_sdk_core import BaseService, DetailedResponse
@@ -31,6 +31,7 @@ from ibm_cloud_sdk_core.get_authenticator import get_authenticator_from_environm
 from ibm_cloud_sdk_core.utils import datetime_to_string, string_to_datetime
 
 from .common import get_sdk_headers
+from .pagers import next_url_pager
 
 ##############################################################################
 # Service
@@ -207,6 +208,29 @@ class EnterpriseManagementV1(BaseService):
         return response
 
 
+    def list_account_groups_iter(self,
+        *,
+        prefetch: bool = False,
+        **kwargs
+    ) -> Iterator[Dict]:
+        """
+        Iterate over all account groups.
+
+        Yields the account groups returned by `list_account_groups` one at a time,
+        following `next_url` until the last page. Pages are requested as the iterator
+        advances.
+
+        :param bool prefetch: (optional) Request the next page on a background
+               thread while the current page is being consumed.
+        :param **kwargs: The parameters of `list_account_groups`.
+        :return: An iterator of `dict`s representing `AccountGroup` objects.
+        :rtype: Iterator[dict]
+        """
+
+        return iter(next_url_pager(self, self.list_account_groups, 'resources', 'V1',
+                                   prefetch=prefetch, **kwargs))
+
+
     def get_account_group(self,
         account_group_id: str,
         **kwargs
@@ -506,6 +530,28 @@ class EnterpriseManagementV1(BaseService):
         return response
 
 
+    def list_accounts_iter(self,
+        *,
+        prefetch: bool = False,
+        **kwargs
+    ) -> Iterator[Dict]:
+        """
+        Iterate over all accounts.
+
+        Yields the accounts returned by `list_accounts` one at a time, following
+        `next_url` until the last page. Pages are requested as the iterator advances.
+
+        :param bool prefetch: (optional) Request the next page on a background
+               thread while the current page is being consumed.
+        :param **kwargs: The parameters of `list_accounts`.
+        :return: An iterator of `dict`s representing `Account` objects.
+        :rtype: Iterator[dict]
+        """
+
+        return iter(next_url_pager(self, self.list_accounts, 'resources', 'V1',
+                                   prefetch=prefetch, **kwargs))
+
+
     def get_account(self,
         account_id: str,
         **kwargs
@@ -733,6 +779,28 @@ class EnterpriseManagementV1(BaseService):
         return response
 
 
+    def list_enterprises_iter(self,
+        *,
+        prefetch: bool = False,
+        **kwargs
+    ) -> Iterator[Dict]:
+        """
+        Iterate over all enterprises.
+
+        Yields the enterprises returned by `list_enterprises` one at a time, following
+        `next_url` until the last page. Pages are requested as the iterator advances.
+
+        :param bool prefetch: (optional) Request the next page on a background
+               thread while the current page is being consumed.
+        :param **kwargs: The parameters of `list_enterprises`.
+        :return: An iterator of `dict`s representing `Enterprise` objects.
+        :rtype: Iterator[dict]
+        """
+
+        return iter(next_url_pager(self, self.list_enterprises, 'resources', 'V1',
+                                   prefetch=prefetch, **kwargs))
+
+
     def get_enterprise(self,
         enterprise_id: str,
         **kwargs
@@ -28,7 +28,7 @@ system properties. Both properties are defined in an IBM Cloud billing account,
 across many regions.
 """
 
-from typing import Dict, List
+from typing import Dict, Iterator, List
 import json
 
 from ibm_cloud_sdk_core import BaseService, DetailedResponse
@@ -37,6 +37,7 @@ from ibm_cloud_sdk_core.get_authenticator import get_authenticator_from_environm
 from ibm_cloud_sdk_core.utils import convert_list
 
 from .common import get_sdk_headers
+from .pagers import token_pager
 
 ##############################################################################
 # Service
@@ -175,6 +176,30 @@ class GlobalSearchV2(BaseService):
         response = self.send(request)
         return response
 
+
+    def search_iter(self,
+        *,
+        prefetch: bool = False,
+        **kwargs
+    ) -> Iterator[Dict]:
+        """
+        Iterate over all resources matching a search.
+
+        Yields the resources returned by `search` one at a time, passing the
+        `search_cursor` of each result to the next call until an empty result set is
+        returned. Pages are requested as the iterator advances.
+
+        :param bool prefetch: (optional) Request the next page on a background
+               thread while the current page is being consumed.
+        :param **kwargs: The parameters of `search`.
+        :return: An iterator of `dict`s representing `ResultItem` objects.
+        :rtype: Iterator[dict]
+        """
+
+        return iter(token_pager(self.search, 'items', 'search_cursor',
+                                lambda result: result.get('search_cursor') if result.get('items') else None,
+                                prefetch=prefetch, **kwargs))
+
     #########################
     # resourceTypes
     #########################
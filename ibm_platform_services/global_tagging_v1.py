@@ -27,7 +27,7 @@ the tag.
 """
 
 from enum import Enum
-from typing import Dict, List
+from typing import Dict, Iterator, List
 import json
 
 from ibm_cloud_sdk_core import BaseService, DetailedResponse
@@ -36,6 +36,7 @@ from ibm_cloud_sdk_core.get_authenticator import get_authenticator_from_environm
 from ibm_cloud_sdk_core.utils import convert_list, convert_model
 
 from .common import get_sdk_headers
+from .pagers import offset_pager
 
 ##############################################################################
 # Service
@@ -168,6 +169,28 @@ class GlobalTaggingV1(BaseService):
         return response
 
 
+    def list_tags_iter(self,
+        *,
+        prefetch: bool = False,
+        **kwargs
+    ) -> Iterator[Dict]:
+        """
+        Iterate over all tags.
+
+        Yields the tags returned by `list_tags` one at a time, advancing `offset` until
+        `total_count` items have been returned. Pages are requested as the iterator
+        advances.
+
+        :param bool prefetch: (optional) Request the next page on a background
+               thread while the current page is being consumed.
+        :param **kwargs: The parameters of `list_tags`.
+        :return: An iterator of `dict`s representing `Tag` objects.
+        :rtype: Iterator[dict]
+        """
+
+        return iter(offset_pager(self.list_tags, 'items', prefetch=prefetch, **kwargs))
+
+
     def delete_tag_all(self,
         *,
         providers: str = None,
@@ -23,7 +23,7 @@ container.
 """
 
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, Iterator, List
 import json
 
 from ibm_cloud_sdk_core import BaseService, DetailedResponse
@@ -32,6 +32,7 @@ from ibm_cloud_sdk_core.get_authenticator import get_authenticator_from_environm
 from ibm_cloud_sdk_core.utils import convert_model, datetime_to_string, string_to_datetime
 
 from .common import get_sdk_headers
+from .pagers import offset_pager
 
 ##############################################################################
 # Service
@@ -225,6 +226,28 @@ class IamAccessGroupsV2(BaseService):
         return response
 
 
+    def list_access_groups_iter(self,
+        *,
+        prefetch: bool = False,
+        **kwargs
+    ) -> Iterator[Dict]:
+        """
+        Iterate over all access groups.
+
+        Yields the access groups returned by `list_access_groups` one at a time, advancing
+        `offset` until `total_count` items have been returned. Pages are requested as the
+        iterator advances.
+
+        :param bool prefetch: (optional) Request the next page on a background
+               thread while the current page is being consumed.
+        :param **kwargs: The parameters of `list_access_groups`.
+        :return: An iterator of `dict`s representing `Group` objects.
+        :rtype: Iterator[dict]
+        """
+
+        return iter(offset_pager(self.list_access_groups, 'groups', prefetch=prefetch, **kwargs))
+
+
     def get_access_group(self,
         access_group_id: str,
         *,
@@ -711,6 +734,28 @@ class IamAccessGroupsV2(BaseService):
         return response
 
 
+    def list_access_group_members_iter(self,
+        *,
+        prefetch: bool = False,
+        **kwargs
+    ) -> Iterator[Dict]:
+        """
+        Iterate over all access group members.
+
+        Yields the access group members returned by `list_access_group_members` one at a
+        time, advancing `offset` until `total_count` items have been returned. Pages are
+        requested as the iterator advances.
+
+        :param bool prefetch: (optional) Request the next page on a background
+               thread while the current page is being consumed.
+        :param **kwargs: The parameters of `list_access_group_members`.
+        :return: An iterator of `dict`s representing `ListGroupMembersResponseMember` objects.
+        :rtype: Iterator[dict]
+        """
+
+        return iter(offset_pager(self.list_access_group_members, 'members', prefetch=prefetch, **kwargs))
+
+
     def remove_member_from_access_group(self,
         access_group_id: str,
         iam_id: str,
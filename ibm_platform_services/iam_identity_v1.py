@@ -23,7 +23,7 @@ ApiKeys).
 
 from datetime import datetime
 from enum import Enum
-from typing import Dict, List
+from typing import Dict, Iterator, List
 import json
 
 from ibm_cloud_sdk_core import BaseService, DetailedResponse
@@ -32,6 +32,7 @@ from ibm_cloud_sdk_core.get_authenticator import get_authenticator_from_environm
 from ibm_cloud_sdk_core.utils import convert_model, datetime_to_string, string_to_datetime
 
 from .common import get_sdk_headers
+from .pagers import get_query_param, token_pager
 
 ##############################################################################
 # Service
@@ -160,6 +161,30 @@ class IamIdentityV1(BaseService):
         return response
 
 
+    def list_api_keys_iter(self,
+        *,
+        prefetch: bool = False,
+        **kwargs
+    ) -> Iterator[Dict]:
+        """
+        Iterate over all API keys.
+
+        Yields the API keys returned by `list_api_keys` one at a time, passing the
+        `pagetoken` of the `next` link until the last page. Pages are requested as the
+        iterator advances.
+
+        :param bool prefetch: (optional) Request the next page on a background
+               thread while the current page is being consumed.
+        :param **kwargs: The parameters of `list_api_keys`.
+        :return: An iterator of `dict`s representing `ApiKey` objects.
+        :rtype: Iterator[dict]
+        """
+
+        return iter(token_pager(self.list_api_keys, 'apikeys', 'pagetoken',
+                                lambda result: get_query_param(result.get('next'), 'pagetoken'),
+                                prefetch=prefetch, **kwargs))
+
+
     def create_api_key(self,
         name: str,
         iam_id: str,
@@ -604,6 +629,30 @@ class IamIdentityV1(BaseService):
         return response
 
 
+    def list_service_ids_iter(self,
+        *,
+        prefetch: bool = False,
+        **kwargs
+    ) -> Iterator[Dict]:
+        """
+        Iterate over all service IDs.
+
+        Yields the service IDs returned by `list_service_ids` one at a time, passing the
+        `pagetoken` of the `next` link until the last page. Pages are requested as the
+        iterator advances.
+
+        :param bool prefetch: (optional) Request the next page on a background
+               thread while the current page is being consumed.
+        :param **kwargs: The parameters of `list_service_ids`.
+        :return: An iterator of `dict`s representing `ServiceId` objects.
+        :rtype: Iterator[dict]
+        """
+
+        return iter(token_pager(self.list_service_ids, 'serviceids', 'pagetoken',
+                                lambda result: get_query_param(result.get('next'), 'pagetoken'),
+                                prefetch=prefetch, **kwargs))
+
+
     def create_service_id(self,
         account_id: str,
         name: str,
@@ -0,0 +1,375 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module waits for resource instances to reach a state.
+
+Provisioning and deprovisioning are asynchronous: `create_resource_instance`
+and `delete_resource_instance` return while the instance is still
+`provisioning` or being removed.  `InstanceWaiter` tracks any number of such
+instances from one background thread and returns a future per instance,
+resolved when the instance reaches the awaited state:
+
+    waiter = InstanceWaiter(resource_controller_service)
+    futures = [waiter.wait_until_active(service.create_resource_instance(...).get_result())
+               for ... in ...]
+    for future in concurrent.futures.as_completed(futures):
+        instance = future.result()
+
+Each instance is polled with an exponential backoff with jitter, which
+starts over whenever its state changes.  When several instances of the same
+resource group and offering are due at about the same time, they are polled
+together with one `list_resource_instances` call filtered on those, instead
+of one `get_resource_instance` call each; the waiter stops doing so for a group
+whose listing turns out to be much larger than the number of instances
+awaited in it.
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, List, Union
+import heapq
+import itertools
+import random
+import threading
+import time
+
+from .resource_controller_v2 import ResourceControllerV2
+from .retry import is_retryable, status_code
+
+ACTIVE_STATES = frozenset(['active'])
+REMOVED_STATES = frozenset(['removed', 'pending_reclamation'])
+FAILED_STATES = frozenset(['failed'])
+
+
+class InstanceStateError(Exception):
+    """
+    Raised when an awaited instance reaches a failure state, or is not in
+    the awaited state when its timeout expires.
+
+    :attr dict instance: The last observed json dictionary of the instance,
+          or None if it was never observed.
+    """
+
+    def __init__(self, message: str, instance: Dict = None) -> None:
+        super().__init__(message)
+        self.instance = instance
+
+
+class _Watch():
+    """An instance being waited for."""
+
+    def __init__(self, instance_id, coalesce_key, targets, failures, deadline):
+        self.instance_id = instance_id
+        self.coalesce_key = coalesce_key
+        self.targets = targets
+        self.failures = failures
+        self.deadline = deadline
+        self.future = Future()
+        self.delay = None
+        self.state = None
+        self.instance = None
+
+
+class InstanceWaiter():
+    """
+    Waits for resource instances to reach a state.
+
+    :attr ResourceControllerV2 service: The Resource Controller client.
+    :attr float initial_delay: The delay before the first poll and after a
+          change of state, in seconds.
+    :attr float max_delay: The maximum delay between polls, in seconds.
+    :attr float multiplier: The growth of the delay between polls while the
+          state does not change.
+    :attr float timeout: The default time to wait for an instance, in seconds.
+    :attr int coalesce_threshold: The minimum number of due instances of the
+          same resource group and offering to poll with one list call.
+    :attr int max_workers: The maximum number of concurrent polls.
+    """
+
+    def __init__(self,
+                 service: ResourceControllerV2,
+                 *,
+                 initial_delay: float = 2.0,
+                 max_delay: float = 60.0,
+                 multiplier: float = 2.0,
+                 timeout: float = 1800.0,
+                 coalesce_threshold: int = 4,
+                 max_workers: int = 4) -> None:
+        """
+        Initialize an InstanceWaiter object.
+
+        :param ResourceControllerV2 service: The Resource Controller client.
+        :param float initial_delay: (optional) The delay before the first poll
+               and after a change of state, in seconds.
+        :param float max_delay: (optional) The maximum delay between polls, in
+               seconds.
+        :param float multiplier: (optional) The growth of the delay between
+               polls while the state does not change.
+        :param float timeout: (optional) The default time to wait for an
+               instance, in seconds.
+        :param int coalesce_threshold: (optional) The minimum number of due
+               instances of the same resource group and offering to poll with
+               one list call.
+        :param int max_workers: (optional) The maximum number of concurrent
+               polls.
+        """
+        self.service = service
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.timeout = timeout
+        self.coalesce_threshold = coalesce_threshold
+        self.max_workers = max_workers
+        self._schedule = []  # heap of (due time, sequence, watch)
+        self._sequence = itertools.count()
+        self._uncoalesced = set()
+        self._watches = set()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread = None
+        self._executor = None
+
+    def wait_for(self,
+                 instance: Union[str, Dict],
+                 *,
+                 states: Iterable[str],
+                 failure_states: Iterable[str] = FAILED_STATES,
+                 timeout: float = None) -> Future:
+        """
+        Wait for an instance to reach one of the given states.
+
+        :param instance: The ID (CRN) or GUID of the instance, or its json
+               dictionary as returned by `create_resource_instance`, which
+               lets it be polled together with similar instances.
+        :param Iterable[str] states: The awaited states.
+        :param Iterable[str] failure_states: (optional) The states that
+               fail the wait.
+        :param float timeout: (optional) The time to wait, in seconds.
+        :return: A future resolved with the json dictionary of the instance
+                 once it is in one of the states, or failed with an
+                 `InstanceStateError` or the error that stopped polling.
+        :rtype: Future
+        """
+        coalesce_key = None
+        if isinstance(instance, dict):
+            instance_id = instance.get('guid') or instance.get('id')
+            if instance.get('resource_group_id') and instance.get('resource_id'):
+                coalesce_key = (instance['resource_group_id'], instance['resource_id'])
+        else:
+            instance_id = instance
+        if not instance_id:
+            raise ValueError('instance must be provided')
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        watch = _Watch(instance_id, coalesce_key, frozenset(states), frozenset(failure_states),
+                       deadline)
+        with self._condition:
+            if self._closed:
+                raise RuntimeError('the waiter is closed')
+            if self._thread is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+                self._thread = threading.Thread(target=self._run, name='instance-waiter',
+                                                daemon=True)
+                self._thread.start()
+            self._watches.add(watch)
+            self._reschedule(watch, self.initial_delay)
+        return watch.future
+
+    def wait_until_active(self, instance: Union[str, Dict], **kwargs) -> Future:
+        """Wait for an instance to be provisioned, see `wait_for`."""
+        return self.wait_for(instance, states=ACTIVE_STATES, **kwargs)
+
+    def wait_until_removed(self, instance: Union[str, Dict], **kwargs) -> Future:
+        """Wait for an instance to be deleted or reclaimable, see `wait_for`."""
+        return self.wait_for(instance, states=REMOVED_STATES, **kwargs)
+
+    def pending(self) -> int:
+        """Return the number of instances still being waited for."""
+        with self._condition:
+            return len(self._watches)
+
+    def close(self) -> None:
+        """
+        Stop polling. The futures of the instances still being waited for are
+        cancelled.
+        """
+        with self._condition:
+            self._closed = True
+            watches = list(self._watches)
+            self._watches.clear()
+            self._schedule = []
+            self._condition.notify()
+        # Watches being polled are cancelled too; their poll finds the
+        # future cancelled and drops them.
+        for watch in watches:
+            watch.future.cancel()
+        if self._thread is not None:
+            self._thread.join()
+            self._executor.shutdown()
+
+    def __enter__(self) -> 'InstanceWaiter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _reschedule(self, watch: _Watch, delay: float) -> None:
+        """Schedule the next poll of a watch. Call with the condition held."""
+        watch.delay = delay
+        due = min(time.monotonic() + random.uniform(delay / 2, delay), watch.deadline)
+        heapq.heappush(self._schedule, (due, next(self._sequence), watch))
+        self._condition.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._closed:
+                    now = time.monotonic()
+                    if self._schedule and self._schedule[0][0] <= now:
+                        break
+                    timeout = self._schedule[0][0] - now if self._schedule else None
+                    self._condition.wait(timeout)
+                if self._closed:
+                    return
+                due = []
+                while self._schedule and self._schedule[0][0] <= now:
+                    watch = heapq.heappop(self._schedule)[2]
+                    if watch.future.cancelled():
+                        self._watches.discard(watch)
+                    else:
+                        due.append(watch)
+                self._take_early(due, now)
+            if due:
+                self._poll(due)
+
+    def _take_early(self, due: List[_Watch], now: float) -> None:
+        """
+        Add to the due watches the scheduled watches that could be polled with
+        them in one list call and are due within half their delay. Call with
+        the condition held.
+        """
+        keys = {x.coalesce_key for x in due if x.coalesce_key is not None} - self._uncoalesced
+        if not keys:
+            return
+        kept = []
+        for entry in self._schedule:
+            watch = entry[2]
+            if watch.coalesce_key in keys and entry[0] <= now + watch.delay / 2:
+                due.append(watch)
+            else:
+                kept.append(entry)
+        if len(kept) < len(self._schedule):
+            heapq.heapify(kept)
+            self._schedule = kept
+
+    def _poll(self, due: List[_Watch]) -> None:
+        """Poll the due watches, coalescing those that can be."""
+        groups = {}
+        single = []
+        for watch in due:
+            if watch.coalesce_key is not None and watch.coalesce_key not in self._uncoalesced:
+                groups.setdefault(watch.coalesce_key, []).append(watch)
+            else:
+                single.append(watch)
+        tasks = []
+        for key, watches in groups.items():
+            if len(watches) >= self.coalesce_threshold:
+                tasks.append(self._executor.submit(self._poll_group, key, watches))
+            else:
+                single.extend(watches)
+        tasks.extend(self._executor.submit(self._poll_one, watch) for watch in single)
+        for task in tasks:
+            task.result()
+
+    def _poll_group(self, key, watches: List[_Watch]) -> None:
+        """Poll watches with one listing of their resource group and offering."""
+        resource_group_id, resource_id = key
+        wanted = {watch.instance_id: watch for watch in watches}
+        budget = max(100, 4 * len(watches))
+        fetched = 0
+        try:
+            for instance in self.service.list_resource_instances_iter(
+                    resource_group_id=resource_group_id, resource_id=resource_id, limit='100'):
+                fetched += 1
+                watch = wanted.pop(instance.get('guid'), None) or wanted.pop(instance.get('id'), None)
+                if watch is not None:
+                    self._observe(watch, instance)
+                if not wanted:
+                    break
+                if fetched >= budget:
+                    self._uncoalesced.add(key)
+                    break
+        except Exception:  # pylint: disable=broad-except
+            self._uncoalesced.add(key)
+        # Instances the listing did not return, e.g. removed ones, are polled
+        # one by one.
+        for watch in wanted.values():
+            self._poll_one(watch)
+
+    def _poll_one(self, watch: _Watch) -> None:
+        """Poll one watch with get_resource_instance."""
+        try:
+            instance = self.service.get_resource_instance(watch.instance_id).get_result()
+        except Exception as err:  # pylint: disable=broad-except
+            if status_code(err) == 404 and watch.targets & REMOVED_STATES:
+                self._resolve(watch, result=watch.instance or {'id': watch.instance_id,
+                                                               'state': 'removed'})
+            elif is_retryable(err):
+                self._retry(watch, err)
+            else:
+                self._resolve(watch, error=err)
+            return
+        self._observe(watch, instance)
+
+    def _observe(self, watch: _Watch, instance: Dict) -> None:
+        """Record the state of an instance and resolve or reschedule its watch."""
+        state = instance.get('state')
+        changed = state != watch.state
+        watch.state = state
+        watch.instance = instance
+        if state in watch.targets:
+            self._resolve(watch, result=instance)
+        elif state in watch.failures:
+            self._resolve(watch, error=InstanceStateError(
+                'instance {0} is {1}'.format(watch.instance_id, state), instance))
+        else:
+            self._retry(watch, None, reset=changed)
+
+    def _retry(self, watch: _Watch, err: Exception, reset: bool = False) -> None:
+        """Reschedule a watch, or fail it if its deadline has passed."""
+        if time.monotonic() >= watch.deadline:
+            if err is None:
+                err = InstanceStateError('timed out waiting for instance {0}, last state {1}'.format(
+                    watch.instance_id, watch.state), watch.instance)
+            self._resolve(watch, error=err)
+            return
+        if reset:
+            delay = self.initial_delay
+        else:
+            delay = min(watch.delay * self.multiplier, self.max_delay)
+        with self._condition:
+            if not self._closed and not watch.future.cancelled():
+                self._reschedule(watch, delay)
+            else:
+                self._watches.discard(watch)
+
+    def _resolve(self, watch: _Watch, result: Dict = None, error: Exception = None) -> None:
+        with self._condition:
+            self._watches.discard(watch)
+        if watch.future.set_running_or_notify_cancel():
+            if error is not None:
+                watch.future.set_exception(error)
+            else:
+                watch.future.set_result(result)
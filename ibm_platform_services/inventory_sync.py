@@ -0,0 +1,364 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module keeps a local SQLite mirror of the Resource Controller inventory.
+
+The list operations of `ResourceControllerV2` accept `updated_from` and
+`updated_to` filters.  `InventorySync` records, for each collection, the
+latest `updated_at` it has stored (the watermark) and on the next run only
+lists the records updated since then:
+
+    store = InventoryStore('inventory.db')
+    sync = InventorySync(resource_controller_service, store)
+    sync.sync()                  # first run: full crawl
+    ...
+    stats = sync.sync()          # later runs: only the changes
+    instance = store.get(RESOURCE_INSTANCES, crn)
+
+The list operations do not return deleted records by default, so an
+incremental sync does not see deletions: run a full sync
+(`sync(full=True)`) from time to time, which deletes the records that are
+no longer listed.  Records that do come back in the `removed` state are
+deleted by any sync.
+"""
+
+from datetime import timedelta
+from typing import Dict, Iterator, List, Optional
+import json
+import sqlite3
+import threading
+import time
+
+from ibm_cloud_sdk_core.utils import datetime_to_string, string_to_datetime
+
+from .resource_controller_v2 import ResourceControllerV2
+
+RESOURCE_INSTANCES = 'resource_instances'
+RESOURCE_KEYS = 'resource_keys'
+RESOURCE_BINDINGS = 'resource_bindings'
+RESOURCE_ALIASES = 'resource_aliases'
+
+COLLECTIONS = (RESOURCE_INSTANCES, RESOURCE_KEYS, RESOURCE_BINDINGS, RESOURCE_ALIASES)
+
+# The states of records that no longer exist.
+DELETED_STATES = frozenset(['removed'])
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS resources (
+    collection TEXT NOT NULL,
+    id TEXT NOT NULL,
+    guid TEXT,
+    name TEXT,
+    state TEXT,
+    resource_group_id TEXT,
+    updated_at TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (collection, id)
+);
+CREATE INDEX IF NOT EXISTS resources_guid ON resources (collection, guid);
+CREATE TABLE IF NOT EXISTS watermarks (
+    collection TEXT PRIMARY KEY,
+    updated_at TEXT,
+    synced_at REAL NOT NULL
+);
+'''
+
+
+class InventoryStore():
+    """
+    A SQLite store of Resource Controller records, keyed by collection and ID.
+
+    Records are kept as their json dictionaries; the ID, GUID, name, state,
+    resource group and update time are also stored in columns for lookups.
+
+    :attr str path: The path of the database file, or `:memory:`.
+    """
+
+    def __init__(self, path: str = ':memory:') -> None:
+        """
+        Initialize an InventoryStore object, creating the database if needed.
+
+        :param str path: (optional) The path of the database file. Defaults
+               to an in-memory database.
+        """
+        self.path = path
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            self._connection.close()
+
+    def get(self, collection: str, resource_id: str) -> Optional[Dict]:
+        """
+        Return a stored record by ID (the CRN), or None.
+
+        :param str collection: The collection, e.g. `RESOURCE_INSTANCES`.
+        :param str resource_id: The ID of the record.
+        :rtype: dict
+        """
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT data FROM resources WHERE collection = ? AND id = ?',
+                (collection, resource_id)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_by_guid(self, collection: str, guid: str) -> Optional[Dict]:
+        """Return a stored record by GUID, or None."""
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT data FROM resources WHERE collection = ? AND guid = ?',
+                (collection, guid)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def records(self,
+                collection: str,
+                *,
+                resource_group_id: str = None,
+                state: str = None) -> Iterator[Dict]:
+        """
+        Yield the stored records of a collection.
+
+        :param str collection: The collection, e.g. `RESOURCE_INSTANCES`.
+        :param str resource_group_id: (optional) Only the records of this
+               resource group.
+        :param str state: (optional) Only the records in this state.
+        :return: An iterator of the json dictionaries of the records.
+        """
+        sql = 'SELECT data FROM resources WHERE collection = ?'
+        params = [collection]
+        if resource_group_id is not None:
+            sql += ' AND resource_group_id = ?'
+            params.append(resource_group_id)
+        if state is not None:
+            sql += ' AND state = ?'
+            params.append(state)
+        with self._lock:
+            rows = self._connection.execute(sql + ' ORDER BY id', params).fetchall()
+        for row in rows:
+            yield json.loads(row[0])
+
+    def count(self, collection: str) -> int:
+        """Return the number of stored records of a collection."""
+        with self._lock:
+            return self._connection.execute(
+                'SELECT COUNT(*) FROM resources WHERE collection = ?', (collection,)).fetchone()[0]
+
+    def ids(self, collection: str) -> List[str]:
+        """Return the IDs of the stored records of a collection."""
+        with self._lock:
+            return [row[0] for row in self._connection.execute(
+                'SELECT id FROM resources WHERE collection = ?', (collection,))]
+
+    def upsert(self, collection: str, records: List[Dict]) -> None:
+        """Insert or replace records in one transaction."""
+        rows = [(collection, _record_id(x), x.get('guid'), x.get('name'), x.get('state'),
+                 x.get('resource_group_id'), x.get('updated_at'), json.dumps(x))
+                for x in records]
+        with self._lock, self._connection:
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO resources VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+
+    def delete(self, collection: str, resource_ids: List[str]) -> None:
+        """Delete records by ID in one transaction."""
+        with self._lock, self._connection:
+            self._connection.executemany(
+                'DELETE FROM resources WHERE collection = ? AND id = ?',
+                [(collection, x) for x in resource_ids])
+
+    def watermark(self, collection: str) -> Optional[str]:
+        """
+        Return the latest `updated_at` stored for a collection, an empty
+        string if it was synced while empty, or None if it has never been
+        synced.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT updated_at FROM watermarks WHERE collection = ?',
+                (collection,)).fetchone()
+        if row is None:
+            return None
+        return row[0] or ''
+
+    def set_watermark(self, collection: str, updated_at: Optional[str]) -> None:
+        """Record the latest `updated_at` stored for a collection."""
+        with self._lock, self._connection:
+            self._connection.execute('INSERT OR REPLACE INTO watermarks VALUES (?, ?, ?)',
+                                     (collection, updated_at, time.time()))
+
+
+class SyncStats():
+    """
+    The outcome of syncing one collection.
+
+    :attr str collection: The collection.
+    :attr bool full: Whether the whole collection was listed.
+    :attr int fetched: The number of records listed.
+    :attr int upserted: The number of records inserted or updated.
+    :attr int deleted: The number of records deleted.
+    :attr str watermark: The watermark after the sync.
+    :attr float seconds: The duration of the sync.
+    """
+
+    def __init__(self, collection: str, full: bool) -> None:
+        """
+        Initialize a SyncStats object.
+
+        :param str collection: The collection.
+        :param bool full: Whether the whole collection is listed.
+        """
+        self.collection = collection
+        self.full = full
+        self.fetched = 0
+        self.upserted = 0
+        self.deleted = 0
+        self.watermark = None
+        self.seconds = 0.0
+
+    def to_dict(self) -> Dict:
+        """Return a json dictionary representing the outcome."""
+        return dict(vars(self))
+
+
+class InventorySync():
+    """
+    Synchronizes an `InventoryStore` with the Resource Controller.
+
+    :attr ResourceControllerV2 service: The Resource Controller client.
+    :attr InventoryStore store: The local store.
+    :attr List[str] collections: The collections to sync.
+    :attr float lookback: Seconds subtracted from the watermark when listing
+          changes, so that records whose update became visible late are not
+          missed. Records seen twice are simply stored again.
+    :attr int batch_size: The number of records written per transaction.
+    """
+
+    def __init__(self,
+                 service: ResourceControllerV2,
+                 store: InventoryStore,
+                 *,
+                 collections: List[str] = COLLECTIONS,
+                 lookback: float = 300.0,
+                 batch_size: int = 500) -> None:
+        """
+        Initialize an InventorySync object.
+
+        :param ResourceControllerV2 service: The Resource Controller client.
+        :param InventoryStore store: The local store.
+        :param List[str] collections: (optional) The collections to sync.
+        :param float lookback: (optional) Seconds subtracted from the
+               watermark when listing changes.
+        :param int batch_size: (optional) The number of records written per
+               transaction.
+        """
+        unknown = set(collections) - set(COLLECTIONS)
+        if unknown:
+            raise ValueError('unknown collections: {0}'.format(', '.join(sorted(unknown))))
+        self.service = service
+        self.store = store
+        self.collections = list(collections)
+        self.lookback = lookback
+        self.batch_size = batch_size
+
+    def sync(self, *, full: bool = False, **kwargs) -> Dict[str, SyncStats]:
+        """
+        Bring the store up to date.
+
+        Collections that have never been synced are listed in full; the
+        others only from their watermark, unless `full` is set.
+
+        :param bool full: (optional) List every collection in full and delete
+               the records that are no longer listed.
+        :param **kwargs: Other parameters of the list operations, e.g.
+               `headers`, and `prefetch` (default True) to request the next
+               page while the current one is stored.
+        :return: The outcome for each collection.
+        :rtype: dict
+        """
+        return {collection: self.sync_collection(collection, full=full, **kwargs)
+                for collection in self.collections}
+
+    def sync_collection(self, collection: str, *, full: bool = False, **kwargs) -> SyncStats:
+        """
+        Bring one collection of the store up to date, see `sync`.
+
+        :param str collection: The collection, e.g. `RESOURCE_INSTANCES`.
+        :rtype: SyncStats
+        """
+        start = time.monotonic()
+        watermark = self.store.watermark(collection)
+        full = full or watermark is None
+        stats = SyncStats(collection, full)
+        if not full and watermark:
+            since = string_to_datetime(watermark) - timedelta(seconds=self.lookback)
+            kwargs['updated_from'] = datetime_to_string(since)
+
+        list_iter = getattr(self.service, 'list_{0}_iter'.format(collection))
+        prefetch = kwargs.pop('prefetch', True)
+        latest = watermark or None
+        seen = set() if full else None
+        upserts, deletes = [], []
+        for record in list_iter(prefetch=prefetch, **kwargs):
+            stats.fetched += 1
+            resource_id = _record_id(record)
+            updated_at = record.get('updated_at')
+            if updated_at and (latest is None or _later(updated_at, latest)):
+                latest = updated_at
+            if record.get('state') in DELETED_STATES:
+                deletes.append(resource_id)
+            else:
+                upserts.append(record)
+                if seen is not None:
+                    seen.add(resource_id)
+            if len(upserts) + len(deletes) >= self.batch_size:
+                self._write(collection, upserts, deletes, stats)
+                upserts, deletes = [], []
+        self._write(collection, upserts, deletes, stats)
+
+        if seen is not None:
+            gone = [x for x in self.store.ids(collection) if x not in seen]
+            self._write(collection, [], gone, stats)
+        self.store.set_watermark(collection, latest)
+        stats.watermark = latest
+        stats.seconds = time.monotonic() - start
+        return stats
+
+    def _write(self, collection, upserts, deletes, stats) -> None:
+        if upserts:
+            self.store.upsert(collection, upserts)
+            stats.upserted += len(upserts)
+        if deletes:
+            self.store.delete(collection, deletes)
+            stats.deleted += len(deletes)
+
+
+def _record_id(record: Dict) -> str:
+    """Return the key of a record: its ID (the CRN), or its GUID."""
+    resource_id = record.get('id') or record.get('guid')
+    if not resource_id:
+        raise ValueError('record has neither id nor guid')
+    return resource_id
+
+
+def _later(first: str, second: str) -> bool:
+    """Return True if the first date-time string is later than the second."""
+    if len(first) == len(second) and first[-1:] == second[-1:] == 'Z':
+        return first > second
+    return string_to_datetime(first) > string_to_datetime(second)
@@ -0,0 +1,217 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module provides lazy views of the generated model classes.
+
+The generated `from_dict` decodes the whole tree of a response up front:
+`CatalogEntry.from_dict` builds the `OverviewUI`, `Image`, `Provider` and
+`CatalogEntryMetadata` objects and parses every date even if the caller only
+reads `id` and `name`.  A lazy view keeps the json dictionary and decodes a
+property the first time it is read, caching the result:
+
+    LazyCatalogEntry = lazy_model(CatalogEntry)
+    entries = [LazyCatalogEntry.from_dict(x) for x in result['resources']]
+    active = [x for x in entries if x.active]
+
+Nested models are returned as lazy views too.  `to_model()` decodes a view
+completely into the generated model class.
+"""
+
+from typing import Dict
+import json
+import threading
+
+from ibm_cloud_sdk_core.utils import datetime_to_string, string_to_datetime
+
+from .compact import DATETIME, MODEL, MODEL_DICT, MODEL_LIST, PLAIN, model_fields
+
+_lazy_classes = {}
+_lock = threading.RLock()
+
+
+class LazyModel():
+    """
+    Base class of the lazy model views built by `lazy_model`.
+
+    :attr dict _dict: The json dictionary the view was created from.
+    """
+
+    __slots__ = ('_dict', '_cache')
+
+    # Set on each lazy class.
+    _model_class = None
+    _fields = ()
+    _properties = frozenset()
+    _allows_additional_properties = False
+
+    def __init__(self, _dict: Dict) -> None:
+        """
+        Initialize a lazy view of a json dictionary.
+
+        :param dict _dict: The json dictionary of the model.
+        :raises ValueError: If a required property is not present.
+        """
+        for field in self._fields:
+            if field.required and field.key not in _dict:
+                raise ValueError('Required property \'{0}\' not present in {1} JSON'.format(
+                    field.key, self._model_class.__name__))
+        self._dict = _dict
+        self._cache = None
+
+    @classmethod
+    def from_dict(cls, _dict: Dict) -> 'LazyModel':
+        """Initialize a lazy view of a json dictionary."""
+        return cls(_dict)
+
+    def __getattr__(self, name):
+        if self._allows_additional_properties and name not in self._properties \
+                and name in self._dict:
+            return self._dict[name]
+        raise AttributeError('{0!r} object has no attribute {1!r}'.format(
+            type(self).__name__, name))
+
+    def to_dict(self) -> Dict:
+        """
+        Return a json dictionary representing this model.
+
+        Properties that have not been read or assigned are copied from the
+        original json dictionary as they are.
+        """
+        cache = self._cache or {}
+        _dict = {}
+        for field in self._fields:
+            if field.attr in cache:
+                value = _encode(field, cache[field.attr])
+            else:
+                value = self._dict.get(field.key)
+            if value is not None:
+                _dict[field.key] = value
+        if self._allows_additional_properties:
+            for key, value in self._dict.items():
+                if key not in self._properties and value is not None:
+                    _dict[key] = value
+        return _dict
+
+    def to_model(self) -> object:
+        """Return the equivalent, fully decoded generated model object."""
+        return self._model_class.from_dict(self.to_dict())
+
+    def __str__(self) -> str:
+        """Return a `str` version of this object."""
+        return json.dumps(self.to_dict(), indent=2)
+
+    def __eq__(self, other: object) -> bool:
+        """Return `true` when self and other are equal, false otherwise."""
+        if not isinstance(other, self.__class__):
+            return False
+        return self.to_dict() == other.to_dict()
+
+    def __ne__(self, other: object) -> bool:
+        """Return `true` when self and other are not equal, false otherwise."""
+        return not self == other
+
+    __hash__ = None
+
+
+class _LazyProperty():
+    """
+    Descriptor decoding one property of a lazy view on first access.
+    """
+
+    def __init__(self, field) -> None:
+        self.field = field
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        field = self.field
+        cache = instance._cache  # pylint: disable=protected-access
+        if cache is not None and field.attr in cache:
+            return cache[field.attr]
+        value = instance._dict.get(field.key)  # pylint: disable=protected-access
+        if field.kind == PLAIN or value is None:
+            return value
+        value = _decode(field, value)
+        if cache is None:
+            cache = instance._cache = {}  # pylint: disable=protected-access
+        cache[field.attr] = value
+        return value
+
+    def __set__(self, instance, value) -> None:
+        if instance._cache is None:  # pylint: disable=protected-access
+            instance._cache = {}  # pylint: disable=protected-access
+        instance._cache[self.field.attr] = value  # pylint: disable=protected-access
+
+
+def _decode(field, value):
+    """Decode the json value of a property."""
+    if field.kind == DATETIME:
+        return string_to_datetime(value)
+    nested = lazy_model(field.model_class)
+    if field.kind == MODEL:
+        return nested(value)
+    if field.kind == MODEL_LIST:
+        return [nested(x) for x in value]
+    return {k: nested(v) for k, v in value.items()}
+
+
+def _encode(field, value):
+    """Encode the value of a property as json."""
+    if value is None or field.kind == PLAIN:
+        return value
+    if field.kind == DATETIME:
+        return datetime_to_string(value)
+    if field.kind == MODEL:
+        return value.to_dict()
+    if field.kind == MODEL_LIST:
+        return [x.to_dict() for x in value]
+    if field.kind == MODEL_DICT:
+        return {k: v.to_dict() for k, v in value.items()}
+    return value
+
+
+def lazy_model(model_class: type) -> type:
+    """
+    Return the lazy view class of a generated model class.
+
+    The lazy class is built once per model class and cached.
+
+    :param type model_class: A generated model class, e.g. `CatalogEntry`.
+    :return: A subclass of `LazyModel` named `Lazy<model class name>`.
+    :rtype: type
+    :raises TypeError: If the model class does not follow the generated
+            from_dict layout.
+    """
+    with _lock:
+        lazy_class = _lazy_classes.get(model_class)
+        if lazy_class is None:
+            fields, additional_properties = model_fields(model_class)
+            namespace = {
+                '__slots__': (),
+                '__module__': __name__,
+                '__doc__': 'Lazy view of {0}.{1}.'.format(model_class.__module__,
+                                                          model_class.__name__),
+                '_model_class': model_class,
+                '_fields': tuple(fields),
+                '_properties': frozenset(field.key for field in fields),
+                '_allows_additional_properties': additional_properties,
+            }
+            for field in fields:
+                namespace[field.attr] = _LazyProperty(field)
+            lazy_class = type('Lazy' + model_class.__name__, (LazyModel,), namespace)
+            _lazy_classes[model_class] = lazy_class
+        return lazy_class
@@ -0,0 +1,322 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module provides pagers that walk the pages of a list operation and yield
+the listed items one at a time.
+
+The services in this package paginate in one of three ways:
+
+ * offset/limit with a `total_count` in the response (Global Tagging,
+   IAM Access Groups),
+ * an opaque page token passed back as a query parameter (`pagetoken` for IAM
+   Identity, `start` for Usage Reports),
+ * a `next_url` link to be followed as is (Resource Controller, Enterprise
+   Management).
+
+Each style has a factory below that builds a `Pager` for a bound service
+method.  `merge_iters` walks several item iterators at once on worker
+threads.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qsl, urljoin, urlsplit
+import queue
+import threading
+
+from ibm_cloud_sdk_core import BaseService
+
+from .common import get_sdk_headers
+
+_ITEM = 'item'
+_ERROR = 'error'
+_DONE = 'done'
+
+
+class Pager():
+    """
+    An iterable over the items of a paginated list operation.
+
+    Pages are requested lazily as the iterator advances.  With `prefetch`
+    enabled the request for the next page is issued on a background thread
+    as soon as the current page has been received, so the network round trip
+    overlaps with the caller's processing of the current page.
+
+    :attr Callable get_page: Function that takes the token of the page to
+          fetch (None for the first page) and returns a tuple of the page
+          result and the token of the following page (None on the last page).
+    :attr str items_key: The property of the page result holding the items.
+    :attr bool prefetch: Fetch the next page in the background.
+    """
+
+    def __init__(self,
+                 get_page: Callable[[object], Tuple[Dict, object]],
+                 items_key: str,
+                 *,
+                 prefetch: bool = False) -> None:
+        """
+        Initialize a Pager object.
+
+        :param Callable get_page: Function that takes a page token and returns
+               the page result and the token of the following page.
+        :param str items_key: The property of the page result holding the items.
+        :param bool prefetch: (optional) Fetch the next page in the background.
+        """
+        self.get_page = get_page
+        self.items_key = items_key
+        self.prefetch = prefetch
+
+    def pages(self) -> Iterator[Dict]:
+        """Yield the result of each page in turn."""
+        if not self.prefetch:
+            token = None
+            while True:
+                result, next_token = self.get_page(token)
+                yield result
+                if next_token is None or next_token == token:
+                    return
+                token = next_token
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            token = None
+            future = executor.submit(self.get_page, token)
+            try:
+                while future is not None:
+                    result, next_token = future.result()
+                    if next_token is None or next_token == token:
+                        future = None
+                    else:
+                        token = next_token
+                        future = executor.submit(self.get_page, token)
+                    yield result
+            finally:
+                if future is not None:
+                    future.cancel()
+
+    def __iter__(self) -> Iterator[Dict]:
+        """Yield each item of each page in turn."""
+        for result in self.pages():
+            for item in result.get(self.items_key) or []:
+                yield item
+
+
+def offset_pager(operation: Callable,
+                 items_key: str,
+                 *,
+                 prefetch: bool = False,
+                 **kwargs) -> Pager:
+    """
+    Return a Pager for an operation paginated with `offset` and `limit`.
+
+    Paging stops once `total_count` items have been seen, or on the first
+    empty or short page when the service does not report a total.
+
+    :param Callable operation: The bound service method to call.
+    :param str items_key: The property of the result holding the items.
+    :param bool prefetch: (optional) Fetch the next page in the background.
+    :param **kwargs: The arguments of the operation. `offset` sets the
+           starting offset.
+    """
+    first_offset = kwargs.pop('offset', None) or 0
+    limit = kwargs.get('limit')
+
+    def get_page(offset):
+        if offset is None:
+            offset = first_offset
+        result = operation(offset=offset, **kwargs).get_result()
+        count = len(result.get(items_key) or [])
+        next_offset = offset + count
+        total_count = result.get('total_count')
+        if count == 0:
+            next_offset = None
+        elif total_count is not None:
+            if next_offset >= total_count:
+                next_offset = None
+        elif limit is not None and count < limit:
+            next_offset = None
+        return result, next_offset
+
+    return Pager(get_page, items_key, prefetch=prefetch)
+
+
+def token_pager(operation: Callable,
+                items_key: str,
+                token_param: str,
+                next_token: Callable[[Dict], Optional[str]],
+                *,
+                prefetch: bool = False,
+                **kwargs) -> Pager:
+    """
+    Return a Pager for an operation paginated with an opaque page token.
+
+    :param Callable operation: The bound service method to call.
+    :param str items_key: The property of the result holding the items.
+    :param str token_param: The operation argument carrying the page token.
+    :param Callable next_token: Function returning the token of the next page
+           from a page result, or None on the last page.
+    :param bool prefetch: (optional) Fetch the next page in the background.
+    :param **kwargs: The arguments of the operation.
+    """
+    def get_page(token):
+        params = dict(kwargs)
+        if token is not None:
+            params[token_param] = token
+        result = operation(**params).get_result()
+        return result, next_token(result)
+
+    return Pager(get_page, items_key, prefetch=prefetch)
+
+
+def next_url_pager(service: BaseService,
+                   operation: Callable,
+                   items_key: str,
+                   service_version: str,
+                   *,
+                   prefetch: bool = False,
+                   **kwargs) -> Pager:
+    """
+    Return a Pager for an operation whose results link to the next page with a
+    `next_url` property.
+
+    The first page is fetched with the operation itself; each following page
+    is fetched by issuing a GET for the `next_url` of the previous page.
+
+    :param BaseService service: The service the operation belongs to.
+    :param Callable operation: The bound service method to call.
+    :param str items_key: The property of the result holding the items.
+    :param str service_version: The service version, e.g. `V2`.
+    :param bool prefetch: (optional) Fetch the next page in the background.
+    :param **kwargs: The arguments of the operation.
+    """
+    operation_id = operation.__name__
+    extra_headers = kwargs.get('headers')
+
+    def get_page(next_url):
+        if next_url is None:
+            response = operation(**kwargs)
+        else:
+            headers = get_sdk_headers(service_name=service.DEFAULT_SERVICE_NAME,
+                                      service_version=service_version,
+                                      operation_id=operation_id)
+            if extra_headers:
+                headers.update(extra_headers)
+            headers['Accept'] = 'application/json'
+            url, params = _split_next_url(service.service_url, next_url)
+            request = service.prepare_request(method='GET',
+                                              url=url,
+                                              headers=headers,
+                                              params=params)
+            response = service.send(request)
+        result = response.get_result()
+        return result, result.get('next_url') or None
+
+    return Pager(get_page, items_key, prefetch=prefetch)
+
+
+def merge_iters(sources: List[Callable[[], Iterable]],
+                *,
+                max_workers: int,
+                buffer_size: int,
+                ordered: bool = False) -> Iterator:
+    """
+    Walk several iterators concurrently and yield their items.
+
+    Each source is iterated on a bounded pool of worker threads, into a
+    bounded buffer, so that memory use does not grow with the number of
+    items.  The first error raised by a source is re-raised to the caller,
+    and closing the returned iterator stops the sources.
+
+    :param List[Callable] sources: Functions returning the iterators to walk.
+    :param int max_workers: The maximum number of sources walked at a time.
+    :param int buffer_size: The maximum number of items buffered, per source
+           if `ordered` is set.
+    :param bool ordered: (optional) Yield the items source by source, in the
+           order of the sources, instead of in arrival order.
+    :rtype: Iterator
+    """
+    if ordered:
+        buffers = [queue.Queue(maxsize=buffer_size) for _ in sources]
+        # Each buffer is read until its source is done.
+        reads = [(buffer, 1) for buffer in buffers]
+    else:
+        buffers = [queue.Queue(maxsize=buffer_size)] * len(sources)
+        reads = [(buffers[0], len(sources))] if sources else []
+    stop = threading.Event()
+
+    def put(buffer, entry):
+        while not stop.is_set():
+            try:
+                buffer.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def walk(source, buffer):
+        try:
+            if stop.is_set():
+                return
+            for item in source():
+                if not put(buffer, (_ITEM, item)):
+                    return
+        except Exception as err:  # pylint: disable=broad-except
+            put(buffer, (_ERROR, err))
+        finally:
+            put(buffer, (_DONE, None))
+
+    # Sources are submitted in order, so with `ordered` set the source being
+    # consumed has always been started before any of the sources blocked on
+    # a full buffer after it.
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for source, buffer in zip(sources, buffers):
+            executor.submit(walk, source, buffer)
+        try:
+            for buffer, pending in reads:
+                while pending:
+                    kind, value = buffer.get()
+                    if kind == _DONE:
+                        pending -= 1
+                    elif kind == _ERROR:
+                        raise value
+                    else:
+                        yield value
+        finally:
+            stop.set()
+
+
+def get_query_param(url: Optional[str], name: str) -> Optional[str]:
+    """
+    Return the value of a query parameter of a URL, or None if the URL is
+    not set or does not have the parameter.
+    """
+    if not url:
+        return None
+    return dict(parse_qsl(urlsplit(url).query)).get(name)
+
+
+def _split_next_url(service_url: str, next_url: str) -> Tuple[str, Dict]:
+    """
+    Split a next-page link into an operation path relative to the service
+    URL and its query parameters.
+    """
+    full_url = urljoin(service_url.rstrip('/') + '/', next_url)
+    service_path = urlsplit(service_url).path.rstrip('/')
+    parts = urlsplit(full_url)
+    path = parts.path
+    if service_path and path.startswith(service_path + '/'):
+        path = path[len(service_path):]
+    return path, dict(parse_qsl(parts.query))
@@ -0,0 +1,328 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module reclaims or restores reclaimed resource instances in bulk.
+
+A deleted instance first becomes a reclamation, which can be restored or
+reclaimed for good with `run_reclamation_action`.  `ReclamationSweeper`
+lists the reclamations, selects them by age, resource group and state, and
+runs an action on the selection concurrently, under a rate limit per
+account:
+
+    sweeper = ReclamationSweeper(resource_controller_service, max_workers=8, rate=5)
+    result = sweeper.sweep(RECLAIM, account_id=account_id, min_age=7 * 86400,
+                           deadline=3600)
+    print(result)
+
+A deadline stops the sweep from starting new actions, so that a scheduled
+cleanup ends within its window; the reclamations left are reported as
+skipped.
+"""
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List
+import threading
+import time
+
+from ibm_cloud_sdk_core.utils import string_to_datetime
+
+from .resource_controller_v2 import ResourceControllerV2
+from .retry import RateLimiter, backoff_delay, is_retryable
+
+RECLAIM = 'reclaim'
+RESTORE = 'restore'
+
+
+def select_reclamations(reclamations: Iterable[Dict],
+                        *,
+                        min_age: float = None,
+                        max_age: float = None,
+                        resource_group_ids: Iterable[str] = None,
+                        states: Iterable[str] = None,
+                        now: datetime = None) -> List[Dict]:
+    """
+    Select reclamations by age, resource group and state.
+
+    The age of a reclamation is the time since its `created_at`; the
+    reclamations without one are only selected if no age bound is given.
+
+    :param Iterable[dict] reclamations: The json dictionaries of the
+           reclamations.
+    :param float min_age: (optional) The minimum age, in seconds.
+    :param float max_age: (optional) The maximum age, in seconds.
+    :param Iterable[str] resource_group_ids: (optional) The resource groups
+           of the selected reclamations.
+    :param Iterable[str] states: (optional) The states of the selected
+           reclamations, compared without case.
+    :param datetime now: (optional) The time ages are computed at; defaults
+           to the current time.
+    :rtype: List[dict]
+    """
+    now = now or datetime.now(timezone.utc)
+    newest = now - timedelta(seconds=min_age) if min_age is not None else None
+    oldest = now - timedelta(seconds=max_age) if max_age is not None else None
+    groups = set(resource_group_ids) if resource_group_ids is not None else None
+    wanted_states = {x.lower() for x in states} if states is not None else None
+    selected = []
+    for reclamation in reclamations:
+        if groups is not None and reclamation.get('resource_group_id') not in groups:
+            continue
+        if (wanted_states is not None
+                and (reclamation.get('state') or '').lower() not in wanted_states):
+            continue
+        if newest is not None or oldest is not None:
+            created_at = reclamation.get('created_at')
+            if not created_at:
+                continue
+            created_at = string_to_datetime(created_at)
+            if created_at.tzinfo is None:
+                created_at = created_at.replace(tzinfo=timezone.utc)
+            if newest is not None and created_at > newest:
+                continue
+            if oldest is not None and created_at < oldest:
+                continue
+        selected.append(reclamation)
+    return selected
+
+
+class SweepResult():
+    """
+    The outcome of a sweep.
+
+    :attr str action: The action run, `reclaim` or `restore`.
+    :attr int listed: The number of reclamations listed.
+    :attr int selected: The number of reclamations selected.
+    :attr List[str] succeeded: The IDs of the reclamations the action
+          succeeded on.
+    :attr dict failed: The IDs of the reclamations the action failed on,
+          mapped to the error of the last attempt.
+    :attr List[str] skipped: The IDs of the selected reclamations that were
+          not acted on before the deadline.
+    :attr int requests: The number of action requests sent.
+    :attr int retried: The number of requests that were retried.
+    :attr float seconds: The duration of the sweep, listing included.
+    """
+
+    def __init__(self, action: str) -> None:
+        """
+        Initialize a SweepResult object.
+
+        :param str action: The action run.
+        """
+        self.action = action
+        self.listed = 0
+        self.selected = 0
+        self.succeeded = []
+        self.failed = OrderedDict()
+        self.skipped = []
+        self.requests = 0
+        self.retried = 0
+        self.seconds = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """The number of reclamations acted on per second."""
+        done = len(self.succeeded) + len(self.failed)
+        return done / self.seconds if self.seconds else 0.0
+
+    def to_dict(self) -> Dict:
+        """Return a json dictionary summarizing the outcome."""
+        return {
+            'action': self.action,
+            'listed': self.listed,
+            'selected': self.selected,
+            'succeeded': len(self.succeeded),
+            'failed': len(self.failed),
+            'skipped': len(self.skipped),
+            'requests': self.requests,
+            'retried': self.retried,
+            'seconds': round(self.seconds, 3),
+            'per_second': round(self.throughput, 3),
+        }
+
+    def __str__(self) -> str:
+        """Return a `str` version of this object."""
+        return 'SweepResult({0})'.format(', '.join(
+            '{0}={1}'.format(k, v) for k, v in self.to_dict().items()))
+
+
+class ReclamationSweeper():
+    """
+    Runs reclamation actions in bulk.
+
+    Actions run on a bounded pool of worker threads.  Each account has its
+    own rate limiter, shared by the sweeps of this sweeper, so that a sweep
+    over several accounts does not exceed the rate of any of them.  Actions
+    failing with a retryable error (rate limiting, server or connection
+    errors) are retried after a backoff, up to `max_attempts` attempts.
+
+    :attr ResourceControllerV2 service: The Resource Controller client.
+    :attr int max_workers: The maximum number of concurrent actions.
+    :attr float rate: The maximum number of actions per second per account.
+    :attr int burst: The number of actions per account that may be sent at
+          once after an idle period.
+    :attr int max_attempts: The maximum number of attempts per reclamation.
+    :attr float backoff: The bound of the first backoff, in seconds.
+    :attr float max_backoff: The maximum backoff, in seconds.
+    """
+
+    def __init__(self,
+                 service: ResourceControllerV2,
+                 *,
+                 max_workers: int = 8,
+                 rate: float = 5.0,
+                 burst: int = 1,
+                 max_attempts: int = 3,
+                 backoff: float = 1.0,
+                 max_backoff: float = 30.0) -> None:
+        """
+        Initialize a ReclamationSweeper object.
+
+        :param ResourceControllerV2 service: The Resource Controller client.
+        :param int max_workers: (optional) The maximum number of concurrent
+               actions.
+        :param float rate: (optional) The maximum number of actions per second
+               per account.
+        :param int burst: (optional) The number of actions per account that may
+               be sent at once after an idle period.
+        :param int max_attempts: (optional) The maximum number of attempts per
+               reclamation.
+        :param float backoff: (optional) The bound of the first backoff, in
+               seconds.
+        :param float max_backoff: (optional) The maximum backoff, in seconds.
+        """
+        if max_workers < 1:
+            raise ValueError('max_workers must be at least 1')
+        if max_attempts < 1:
+            raise ValueError('max_attempts must be at least 1')
+        # Fail now rather than on the first action.
+        RateLimiter(rate, burst=burst)
+        self.service = service
+        self.max_workers = max_workers
+        self.rate = rate
+        self.burst = burst
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def list(self,
+             *,
+             account_id: str = None,
+             resource_instance_id: str = None,
+             **kwargs) -> List[Dict]:
+        """
+        List and select reclamations.
+
+        :param str account_id: (optional) The ID of the account.
+        :param str resource_instance_id: (optional) The short ID of a resource
+               instance.
+        :param **kwargs: The criteria of `select_reclamations`.
+        :rtype: List[dict]
+        """
+        return self._list(account_id, resource_instance_id, kwargs)[1]
+
+    def sweep(self,
+              action: str,
+              *,
+              account_id: str = None,
+              reclamations: Iterable[Dict] = None,
+              deadline: float = None,
+              request_by: str = None,
+              comment: str = None,
+              **kwargs) -> SweepResult:
+        """
+        Run an action on the selected reclamations.
+
+        :param str action: `reclaim` or `restore`.
+        :param str account_id: (optional) The ID of the account to list the
+               reclamations of.
+        :param Iterable[dict] reclamations: (optional) The reclamations to act
+               on, instead of listing them; they are still selected with the
+               criteria given.
+        :param float deadline: (optional) The number of seconds after which
+               no new action is started.
+        :param str request_by: (optional) The request initiator, if different
+               from the request token.
+        :param str comment: (optional) A comment to describe the actions.
+        :param **kwargs: The criteria of `select_reclamations`, e.g. `min_age`.
+        :rtype: SweepResult
+        """
+        if action not in (RECLAIM, RESTORE):
+            raise ValueError('action must be reclaim or restore')
+        start = time.monotonic()
+        result = SweepResult(action)
+        if reclamations is None:
+            result.listed, selected = self._list(account_id, None, kwargs)
+        else:
+            reclamations = list(reclamations)
+            result.listed = len(reclamations)
+            selected = select_reclamations(reclamations, **kwargs)
+        result.selected = len(selected)
+        stop_at = start + deadline if deadline is not None else None
+        lock = threading.Lock()
+
+        def run(reclamation):
+            if stop_at is not None and time.monotonic() >= stop_at:
+                with lock:
+                    result.skipped.append(reclamation['id'])
+                return
+            limiter = self._limiter(reclamation.get('account_id') or account_id)
+            attempt = 0
+            while True:
+                attempt += 1
+                limiter.acquire()
+                try:
+                    self.service.run_reclamation_action(reclamation['id'], action,
+                                                        request_by=request_by, comment=comment)
+                    error = None
+                except Exception as err:  # pylint: disable=broad-except
+                    error = err
+                with lock:
+                    result.requests += 1
+                    if error is None:
+                        result.succeeded.append(reclamation['id'])
+                        return
+                    if not is_retryable(error) or attempt >= self.max_attempts:
+                        result.failed[reclamation['id']] = error
+                        return
+                    result.retried += 1
+                time.sleep(backoff_delay(attempt, base=self.backoff, cap=self.max_backoff,
+                                         err=error))
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            list(executor.map(run, selected))
+        result.seconds = time.monotonic() - start
+        return result
+
+    def _list(self, account_id, resource_instance_id, criteria):
+        """Return the number of reclamations listed and the selected ones."""
+        reclamations = self.service.list_reclamations(
+            account_id=account_id,
+            resource_instance_id=resource_instance_id).get_result().get('resources') or []
+        return len(reclamations), select_reclamations(reclamations, **criteria)
+
+    def _limiter(self, account_id: str) -> RateLimiter:
+        """Return the rate limiter of an account."""
+        with self._lock:
+            limiter = self._limiters.get(account_id)
+            if limiter is None:
+                limiter = self._limiters[account_id] = RateLimiter(self.rate, burst=self.burst)
+            return limiter
@@ -23,7 +23,7 @@ Enables consumption of a global resource through a Cloud Foundry space in any re
 """
 
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, Iterator, List
 import json
 
 from ibm_cloud_sdk_core import BaseService, DetailedResponse
@@ -32,6 +32,7 @@ from ibm_cloud_sdk_core.get_authenticator import get_authenticator_from_environm
 from ibm_cloud_sdk_core.utils import convert_model, datetime_to_string, string_to_datetime
 
 from .common import get_sdk_headers
+from .pagers import next_url_pager
 
 ##############################################################################
 # Service
@@ -152,6 +153,29 @@ class ResourceControllerV2(BaseService):
         return response
 
 
+    def list_resource_instances_iter(self,
+        *,
+        prefetch: bool = False,
+        **kwargs
+    ) -> Iterator[Dict]:
+        """
+        Iterate over all resource instances.
+
+        Yields the resource instances returned by `list_resource_instances` one at a time,
+        following `next_url` until the last page. Pages are requested as the iterator
+        advances.
+
+        :param bool prefetch: (optional) Request the next page on a background
+               thread while the current page is being consumed.
+        :param **kwargs: The parameters of `list_resource_instances`.
+        :return: An iterator of `dict`s representing `ResourceInstance` objects.
+        :rtype: Iterator[dict]
+        """
+
+        return iter(next_url_pager(self, self.list_resource_instances, 'resources', 'V2',
+                                   prefetch=prefetch, **kwargs))
+
+
     def create_resource_instance(self,
         name: str,
         target: str,
@@ -525,6 +549,28 @@ class ResourceControllerV2(BaseService):
         return response
 
 
+    def list_resource_keys_iter(self,
+        *,
+        prefetch: bool = False,
+        **kwargs
+    ) -> Iterator[Dict]:
+        """
+        Iterate over all resource keys.
+
+        Yields the resource keys returned by `list_resource_keys` one at a time, following
+        `next_url` until the last page. Pages are requested as the iterator advances.
+
+        :param bool prefetch: (optional) Request the next page on a background
+               thread while the current page is being consumed.
+        :param **kwargs: The parameters of `list_resource_keys`.
+        :return: An iterator of `dict`s representing `ResourceKey` objects.
+        :rtype: Iterator[dict]
+        """
+
+        return iter(next_url_pager(self, self.list_resource_keys, 'resources', 'V2',
+                                   prefetch=prefetch, **kwargs))
+
+
     def create_resource_key(self,
         name: str,
         source: str,
@@ -783,6 +829,29 @@ class ResourceControllerV2(BaseService):
         return response
 
 
+    def list_resource_bindings_iter(self,
+        *,
+        prefetch: bool = False,
+        **kwargs
+    ) -> Iterator[Dict]:
+        """
+        Iterate over all resource bindings.
+
+        Yields the resource bindings returned by `list_resource_bindings` one at a time,
+        following `next_url` until the last page. Pages are requested as the iterator
+        advances.
+
+        :param bool prefetch: (optional) Request the next page on a background
+               thread while the current page is being consumed.
+        :param **kwargs: The parameters of `list_resource_bindings`.
+        :return: An iterator of `dict`s representing `ResourceBinding` objects.
+        :rtype: Iterator[dict]
+        """
+
+        return iter(next_url_pager(self, self.list_resource_bindings, 'resources', 'V2',
+                                   prefetch=prefetch, **kwargs))
+
+
     def create_resource_binding(self,
         source: str,
         target: str,
@@ -1051,6 +1120,29 @@ class ResourceControllerV2(BaseService):
         return response
 
 
+    def list_resource_aliases_iter(self,
+        *,
+        prefetch: bool = False,
+        **kwargs
+    ) -> Iterator[Dict]:
+        """
+        Iterate over all resource aliases.
+
+        Yields the resource aliases returned by `list_resource_aliases` one at a time,
+        following `next_url` until the last page. Pages are requested as the iterator
+        advances.
+
+        :param bool prefetch: (optional) Request the next page on a background
+               thread while the current page is being consumed.
+        :param **kwargs: The parameters of `list_resource_aliases`.
+        :return: An iterator of `dict`s representing `ResourceAlias` objects.
+        :rtype: Iterator[dict]
+        """
+
+        return iter(next_url_pager(self, self.list_resource_aliases, 'resources', 'V2',
+                                   prefetch=prefetch, **kwargs))
+
+
     def create_resource_alias(self,
         name: str,
         source: str,
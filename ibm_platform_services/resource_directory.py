@@ -0,0 +1,240 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module provides an in-memory directory of resource groups and quota
+definitions.
+
+Translating a resource group name to its ID, or finding the quota of a
+group, otherwise takes a `list_resource_groups` or `get_quota_definition`
+request each time.  `ResourceGroupDirectory` loads all the groups of an
+account and all the quota definitions with one request each, indexes them
+by ID and name, and answers lookups from memory until its time-to-live
+expires:
+
+    directory = ResourceGroupDirectory(resource_manager_service, account_id=account_id)
+    group_id = directory.group_id('default')
+    quota = directory.quota_of('default')
+
+An expired directory is reloaded by the first lookup; the other threads keep
+reading the previous copy meanwhile.  A lookup of an unknown group reloads
+the directory at most once per `miss_interval`, so that groups created
+since the last load are found.
+"""
+
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+import threading
+import time
+
+from .resource_manager_v2 import ResourceManagerV2
+from .retry import status_code
+
+
+class _Snapshot():
+    """The groups and quota definitions loaded at one time."""
+
+    def __init__(self, groups, quotas, loaded_at):
+        self.groups = groups
+        self.by_id = {x['id']: x for x in groups if x.get('id')}
+        self.by_name = {x['name']: x for x in groups if x.get('name')}
+        self.quotas = {x['id']: x for x in quotas if x.get('id')}
+        self.loaded_at = loaded_at
+        # Quota definitions read one by one, by ID, as Futures.
+        self.read_quotas = {}
+        self.lock = threading.Lock()
+
+
+class ResourceGroupDirectory():
+    """
+    A cached index of the resource groups of an account and of the quota
+    definitions.
+
+    All methods are thread-safe.  The dictionaries returned are shared with
+    the directory and must not be modified.
+
+    :attr ResourceManagerV2 service: The Resource Manager client.
+    :attr str account_id: The ID of the account, or None for the account of
+          the credentials.
+    :attr float ttl: The time the directory is used before being reloaded,
+          in seconds.
+    :attr float miss_interval: The minimum time between reloads caused by
+          lookups of unknown groups, in seconds.
+    """
+
+    _clock = staticmethod(time.monotonic)
+
+    def __init__(self,
+                 service: ResourceManagerV2,
+                 *,
+                 account_id: str = None,
+                 ttl: float = 300.0,
+                 miss_interval: float = 10.0) -> None:
+        """
+        Initialize a ResourceGroupDirectory object. Nothing is loaded until
+        the first lookup or `refresh`.
+
+        :param ResourceManagerV2 service: The Resource Manager client.
+        :param str account_id: (optional) The ID of the account.
+        :param float ttl: (optional) The time the directory is used before
+               being reloaded, in seconds.
+        :param float miss_interval: (optional) The minimum time between
+               reloads caused by lookups of unknown groups, in seconds.
+        """
+        if ttl <= 0:
+            raise ValueError('ttl must be positive')
+        self.service = service
+        self.account_id = account_id
+        self.ttl = ttl
+        self.miss_interval = miss_interval
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def refresh(self) -> None:
+        """Reload the groups and quota definitions now."""
+        with self._lock:
+            self._load()
+
+    def groups(self) -> List[Dict]:
+        """Return the json dictionaries of the resource groups."""
+        return list(self._current().groups)
+
+    def group(self, id_or_name: str) -> Optional[Dict]:
+        """
+        Return a resource group by ID or name, or None.
+
+        :param str id_or_name: The ID or the name of the group.
+        :return: The json dictionary of the `ResourceGroup`.
+        :rtype: dict
+        """
+        group = self._find(self._current(), id_or_name)
+        if group is None and self._reload_on_miss():
+            group = self._find(self._snapshot, id_or_name)
+        return group
+
+    def group_id(self, name: str) -> str:
+        """
+        Return the ID of a resource group.
+
+        :param str name: The name (or the ID) of the group.
+        :raises KeyError: if there is no such group.
+        :rtype: str
+        """
+        group = self.group(name)
+        if group is None:
+            raise KeyError(name)
+        return group['id']
+
+    def default_group(self) -> Optional[Dict]:
+        """Return the default resource group of the account, or None."""
+        for group in self._current().groups:
+            if group.get('default'):
+                return group
+        return None
+
+    def quota(self, quota_id: str) -> Optional[Dict]:
+        """
+        Return a quota definition by ID, or None.
+
+        Definitions not returned by `list_quota_definitions` are read with
+        `get_quota_definition`, one request per ID shared by concurrent
+        callers, and kept until the next reload.  Other errors than 404 are
+        raised and not kept.
+
+        :param str quota_id: The ID of the quota.
+        :return: The json dictionary of the `QuotaDefinition`, or None if
+                 there is no such quota.
+        :rtype: dict
+        """
+        snapshot = self._current()
+        quota = snapshot.quotas.get(quota_id)
+        if quota is not None:
+            return quota
+        with snapshot.lock:
+            future = snapshot.read_quotas.get(quota_id)
+            leader = future is None
+            if leader:
+                future = snapshot.read_quotas[quota_id] = Future()
+        if leader:
+            try:
+                quota = self._read_quota(quota_id)
+            except Exception as err:  # pylint: disable=broad-except
+                with snapshot.lock:
+                    del snapshot.read_quotas[quota_id]
+                future.set_exception(err)
+            else:
+                future.set_result(quota)
+        return future.result()
+
+    def quota_of(self, id_or_name: str) -> Optional[Dict]:
+        """
+        Return the quota definition of a resource group.
+
+        :param str id_or_name: The ID or the name of the group.
+        :raises KeyError: if there is no such group.
+        :rtype: dict
+        """
+        group = self.group(id_or_name)
+        if group is None:
+            raise KeyError(id_or_name)
+        return self.quota(group['quota_id']) if group.get('quota_id') else None
+
+    def _read_quota(self, quota_id: str) -> Optional[Dict]:
+        """Read a quota definition, or return None if there is no such quota."""
+        try:
+            return self.service.get_quota_definition(quota_id).get_result()
+        except Exception as err:  # pylint: disable=broad-except
+            if status_code(err) == 404:
+                return None
+            raise
+
+    @staticmethod
+    def _find(snapshot: _Snapshot, id_or_name: str) -> Optional[Dict]:
+        return snapshot.by_id.get(id_or_name) or snapshot.by_name.get(id_or_name)
+
+    def _current(self) -> _Snapshot:
+        """Return the current snapshot, loading it if missing or expired."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    self._load()
+                return self._snapshot
+        if self._clock() - snapshot.loaded_at >= self.ttl:
+            # One thread reloads; the others use the expired snapshot.
+            if self._lock.acquire(blocking=False):
+                try:
+                    if self._snapshot is snapshot:
+                        self._load()
+                finally:
+                    self._lock.release()
+            return self._snapshot
+        return snapshot
+
+    def _reload_on_miss(self) -> bool:
+        """Reload after a lookup of an unknown group, unless reloaded recently."""
+        with self._lock:
+            if self._clock() - self._snapshot.loaded_at < self.miss_interval:
+                return False
+            self._load()
+            return True
+
+    def _load(self) -> None:
+        """Load a new snapshot. Call with the lock held."""
+        groups = self.service.list_resource_groups(
+            account_id=self.account_id).get_result().get('resources') or []
+        quotas = self.service.list_quota_definitions().get_result().get('resources') or []
+        self._snapshot = _Snapshot(groups, quotas, self._clock())
@@ -0,0 +1,140 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module provides the retry policy shared by the bulk helpers of this
+package: which errors are worth retrying, how long to wait before the next
+attempt, and a rate limiter to pace requests.
+"""
+
+from typing import Optional
+import random
+import threading
+import time
+
+import requests
+
+from ibm_cloud_sdk_core import ApiException
+
+# Too Many Requests, and the server errors that are usually transient.
+RETRYABLE_STATUS_CODES = frozenset([429, 500, 502, 503, 504])
+
+
+def status_code(err: Exception) -> Optional[int]:
+    """
+    Return the HTTP status code of an ApiException, or None for other errors.
+    """
+    if not isinstance(err, ApiException):
+        return None
+    return getattr(err, 'status_code', None) or getattr(err, 'code', None)
+
+
+def is_retryable(err: Exception) -> bool:
+    """
+    Return True if an operation that failed with the given error can be
+    expected to succeed when retried: rate limiting, transient server errors,
+    and connection failures or timeouts.
+    """
+    if isinstance(err, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        return True
+    return status_code(err) in RETRYABLE_STATUS_CODES
+
+
+def retry_after(err: Exception) -> Optional[float]:
+    """
+    Return the delay in seconds requested by the `Retry-After` header of the
+    response an ApiException was raised for, or None.
+    """
+    response = getattr(err, 'http_response', None)
+    if response is None:
+        return None
+    value = response.headers.get('Retry-After')
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int,
+                  *,
+                  base: float = 1.0,
+                  cap: float = 30.0,
+                  err: Exception = None) -> float:
+    """
+    Return the seconds to wait before retry number `attempt` (starting at 1).
+
+    The delay is drawn uniformly between 0 and an exponentially growing bound
+    ("full jitter"), so that concurrent clients do not retry in lockstep.  A
+    `Retry-After` requested by the server takes precedence.
+
+    :param int attempt: The number of the retry, starting at 1.
+    :param float base: (optional) The bound of the first retry, in seconds.
+    :param float cap: (optional) The maximum delay, in seconds.
+    :param Exception err: (optional) The error that caused the retry.
+    :rtype: float
+    """
+    if err is not None:
+        requested = retry_after(err)
+        if requested is not None:
+            return min(requested, cap)
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+class RateLimiter():
+    """
+    A token bucket limiting the rate of requests across threads.
+
+    :attr float rate: The sustained number of requests per second.
+    :attr int burst: The number of requests that may be sent at once after
+          an idle period.
+    """
+
+    def __init__(self, rate: float, *, burst: int = 1) -> None:
+        """
+        Initialize a RateLimiter object.
+
+        :param float rate: The sustained number of requests per second.
+        :param int burst: (optional) The number of requests that may be sent
+               at once after an idle period.
+        """
+        if rate <= 0:
+            raise ValueError('rate must be positive')
+        if burst < 1:
+            raise ValueError('burst must be at least 1')
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        Wait until a request may be sent.
+
+        :return: The seconds waited.
+        :rtype: float
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # The token is taken now, possibly going into debt, so that
+            # waiting threads are served in the order they arrived.
+            self._tokens -= 1
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if delay:
+            time.sleep(delay)
+        return delay
@@ -0,0 +1,149 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module provides a parallel scan over the Global Search service.
+
+A single `GlobalSearchV2.search` cursor chain is strictly serial.  To scan a
+large account faster, the query is split into disjoint slices with
+`partition_query` (for example one slice per `family` or per CRN prefix) and
+`SearchScanner` drives one cursor chain per slice concurrently, merging the
+results into one stream de-duplicated by CRN.
+"""
+
+from typing import Dict, Iterator, List
+import functools
+import re
+
+from .global_search_v2 import GlobalSearchV2
+from .pagers import merge_iters
+
+_LUCENE_SPECIAL_CHARS = re.compile(r'([+\-!(){}\[\]^"~*?:\\/&|])')
+
+
+def escape_term(value: str) -> str:
+    """
+    Escape the Lucene special characters in a query term.
+    """
+    return _LUCENE_SPECIAL_CHARS.sub(r'\\\1', value)
+
+
+def partition_query(query: str,
+                    field: str,
+                    values: List[str],
+                    *,
+                    prefix: bool = False,
+                    include_rest: bool = True) -> List[str]:
+    """
+    Split a Lucene query into disjoint slices, one per value of a field.
+
+    :param str query: The query to partition, e.g. `*` or `type:cf-space`.
+    :param str field: The field to partition on, e.g. `family`, `region` or
+           `crn`.
+    :param List[str] values: The values of the field, one slice per value.
+           The values must not overlap; with `prefix` set no value may be a
+           prefix of another.
+    :param bool prefix: (optional) Match the values as prefixes instead of
+           exact terms, e.g. to partition on CRN prefixes.
+    :param bool include_rest: (optional) Add a final slice matching the
+           resources whose field matches none of the values, so that the
+           slices together cover the whole query.
+    :return: The list of slice queries.
+    :rtype: List[str]
+    """
+    if not values:
+        raise ValueError('values must be provided')
+    terms = []
+    for value in values:
+        if prefix:
+            terms.append('{0}:{1}*'.format(field, escape_term(value)))
+        else:
+            terms.append('{0}:"{1}"'.format(field, value.replace('\\', '\\\\').replace('"', '\\"')))
+    base = '({0})'.format(query or '*')
+    slices = ['{0} AND {1}'.format(base, term) for term in terms]
+    if include_rest:
+        slices.append('{0} AND NOT ({1})'.format(base, ' OR '.join(terms)))
+    return slices
+
+
+class SearchScanner():
+    """
+    Scans several Global Search queries concurrently.
+
+    Each query is driven through its own cursor chain on a bounded pool of
+    worker threads.  Results are handed to the caller through a bounded queue
+    as they arrive, and resources seen in more than one slice are returned
+    only once.  The queue bounds the results buffered ahead of the caller;
+    de-duplication keeps the CRN of every result, so its memory grows with
+    the number of distinct results unless it is turned off.
+
+    :attr GlobalSearchV2 service: The Global Search client to scan with.
+    :attr int max_workers: The maximum number of concurrent cursor chains.
+    :attr int queue_size: The maximum number of results buffered ahead of the
+          caller.
+    """
+
+    def __init__(self,
+                 service: GlobalSearchV2,
+                 *,
+                 max_workers: int = 4,
+                 queue_size: int = 1000) -> None:
+        """
+        Initialize a SearchScanner object.
+
+        :param GlobalSearchV2 service: The Global Search client to scan with.
+        :param int max_workers: (optional) The maximum number of concurrent
+               cursor chains.
+        :param int queue_size: (optional) The maximum number of results
+               buffered ahead of the caller.
+        """
+        if max_workers < 1:
+            raise ValueError('max_workers must be at least 1')
+        self.service = service
+        self.max_workers = max_workers
+        self.queue_size = queue_size
+
+    def scan(self, queries: List[str], *, dedup: bool = True, **kwargs) -> Iterator[Dict]:
+        """
+        Scan all resources matching any of the queries.
+
+        Results are yielded in arrival order, which interleaves the slices.
+        The first error raised by any cursor chain stops the scan and is
+        re-raised to the caller.
+
+        :param List[str] queries: The slice queries, e.g. from
+               `partition_query`.
+        :param bool dedup: (optional) Return the resources seen in more than
+               one slice only once; turn off for disjoint slices to keep
+               memory use bounded.
+        :param **kwargs: Other parameters of `GlobalSearchV2.search`, e.g.
+               `fields`, `account_id` or `limit`.
+        :return: An iterator of `dict`s representing `ResultItem` objects.
+        :rtype: Iterator[dict]
+        """
+        if 'query' in kwargs or 'search_cursor' in kwargs:
+            raise ValueError('query and search_cursor are set by the scanner')
+        sources = [functools.partial(self.service.search_iter, query=x, **kwargs)
+                   for x in queries]
+        seen = set()
+        for item in merge_iters(sources, max_workers=self.max_workers,
+                                buffer_size=self.queue_size):
+            crn = item.get('crn') if dedup else None
+            if crn is not None:
+                if crn in seen:
+                    continue
+                seen.add(crn)
+            yield item
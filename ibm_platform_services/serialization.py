@@ -0,0 +1,136 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module provides a fast path for serializing model objects.
+
+The generated `to_dict` checks every property with `hasattr` and `getattr`
+and recurses through the nested models' `to_dict`.  `to_dict` below instead
+uses a serializer compiled once per model class into straight-line code, and
+`to_json` encodes the result to JSON bytes, with orjson when it is installed.
+
+The result can be passed to any operation in place of the model, e.g.
+
+    service.replace_offering(catalog_identifier, offering_id,
+                             kinds=[to_dict(x) for x in offering.kinds])
+
+or sent as a pre-encoded body.
+"""
+
+from typing import Callable, Dict
+import json
+import threading
+
+from ibm_cloud_sdk_core.utils import datetime_to_string
+
+from .compact import DATETIME, MODEL, MODEL_DICT, MODEL_LIST, PLAIN, model_fields
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+_serializers = {}
+_lock = threading.Lock()
+
+
+def to_dict(model: object) -> Dict:
+    """
+    Return a json dictionary representing a model object.
+
+    Equivalent to `model.to_dict()` for generated models.  Dictionaries are
+    returned as they are, and objects the compiler does not support fall back
+    to their own `to_dict`.
+
+    :param model: A model object or a dict.
+    :rtype: dict
+    """
+    if isinstance(model, dict):
+        return model
+    try:
+        serializer = _serializers[type(model)]
+    except KeyError:
+        serializer = get_serializer(type(model))
+    return serializer(model)
+
+
+def to_json(model: object, *, indent: int = None) -> bytes:
+    """
+    Return the JSON encoding of a model object as UTF-8 bytes.
+
+    :param model: A model object or a dict.
+    :param int indent: (optional) Indent nested structures by this many
+           spaces. orjson is only used with no indent or an indent of 2.
+    :rtype: bytes
+    """
+    _dict = to_dict(model)
+    if orjson is not None and indent in (None, 2):
+        return orjson.dumps(_dict, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(_dict, indent=indent).encode('utf-8')
+
+
+def get_serializer(model_class: type) -> Callable[[object], Dict]:
+    """
+    Return the compiled to_dict function of a model class.
+
+    The function is compiled on first use and cached.  For classes that do
+    not have a generated from_dict, the class's own to_dict is returned.
+
+    :param type model_class: A model class.
+    """
+    serializer = _serializers.get(model_class)
+    if serializer is None:
+        try:
+            serializer = _compile(model_class)
+        except TypeError:
+            serializer = model_class.to_dict
+        with _lock:
+            serializer = _serializers.setdefault(model_class, serializer)
+    return serializer
+
+
+def _compile(model_class: type) -> Callable[[object], Dict]:
+    """Compile the to_dict function of a generated model class."""
+    fields, additional_properties = model_fields(model_class)
+    namespace = {
+        '_to_dict': to_dict,
+        '_datetime_to_string': datetime_to_string,
+    }
+    lines = ['def to_dict(self):',
+             '    _dict = {}',
+             '    values = self.__dict__']
+    for field in fields:
+        lines.append('    value = values.get({0!r})'.format(field.attr))
+        lines.append('    if value is not None:')
+        if field.kind == PLAIN:
+            encoded = 'value'
+        elif field.kind == DATETIME:
+            encoded = '_datetime_to_string(value)'
+        elif field.kind == MODEL:
+            encoded = '_to_dict(value)'
+        elif field.kind == MODEL_LIST:
+            encoded = '[_to_dict(x) for x in value]'
+        elif field.kind == MODEL_DICT:
+            encoded = '{k: _to_dict(v) for k, v in value.items()}'
+        lines.append('        _dict[{0!r}] = {1}'.format(field.key, encoded))
+    if additional_properties:
+        namespace['_properties'] = model_class._properties  # pylint: disable=protected-access
+        lines.append('    for key, value in values.items():')
+        lines.append('        if key not in _properties and value is not None:')
+        lines.append('            _dict[key] = value')
+    lines.append('    return _dict')
+    exec('\n'.join(lines), namespace)  # pylint: disable=exec-used
+    return namespace['to_dict']
@@ -0,0 +1,172 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module lists the resources of an account in parallel, one pagination
+chain per resource group.
+
+A `list_resource_instances` crawl follows a single chain of `next_url`
+links.  `ShardedLister` enumerates the resource groups of the account with
+`ResourceManagerV2.list_resource_groups` and follows one chain per
+`resource_group_id` concurrently:
+
+    lister = ShardedLister(resource_controller_service, resource_manager_service,
+                           max_workers=8)
+    for instance in lister.list_resource_instances(account_id=account_id):
+        ...
+
+Results are yielded in a stable order: resource group by resource group, in
+the order of the group IDs, and within a group in the order of the service.
+Instances in resource groups that are not listed by `list_resource_groups`
+(for example deleted groups) are not returned.
+"""
+
+from typing import Callable, Dict, Iterator, List
+import functools
+
+from .pagers import merge_iters
+from .resource_controller_v2 import ResourceControllerV2
+from .resource_manager_v2 import ResourceManagerV2
+
+
+class ShardedLister():
+    """
+    Lists Resource Controller collections concurrently by resource group.
+
+    Each resource group is listed on a bounded pool of worker threads, into
+    its own bounded buffer, so that memory use does not grow with the size
+    of the account while the groups after the one being consumed are
+    fetched ahead.
+
+    :attr ResourceControllerV2 service: The Resource Controller client.
+    :attr ResourceManagerV2 resource_manager: The Resource Manager client.
+    :attr int max_workers: The maximum number of concurrent chains.
+    :attr int buffer_size: The maximum number of items buffered per group.
+    """
+
+    def __init__(self,
+                 service: ResourceControllerV2,
+                 resource_manager: ResourceManagerV2,
+                 *,
+                 max_workers: int = 8,
+                 buffer_size: int = 1000) -> None:
+        """
+        Initialize a ShardedLister object.
+
+        :param ResourceControllerV2 service: The Resource Controller client.
+        :param ResourceManagerV2 resource_manager: The Resource Manager client.
+        :param int max_workers: (optional) The maximum number of concurrent
+               chains.
+        :param int buffer_size: (optional) The maximum number of items
+               buffered per group.
+        """
+        if max_workers < 1:
+            raise ValueError('max_workers must be at least 1')
+        self.service = service
+        self.resource_manager = resource_manager
+        self.max_workers = max_workers
+        self.buffer_size = buffer_size
+
+    def resource_group_ids(self, account_id: str = None) -> List[str]:
+        """
+        Return the sorted IDs of the resource groups of an account.
+
+        :param str account_id: (optional) The ID of the account; defaults to
+               the account of the credentials.
+        :rtype: List[str]
+        """
+        result = self.resource_manager.list_resource_groups(account_id=account_id).get_result()
+        return sorted(x['id'] for x in result.get('resources') or [])
+
+    def list_resource_instances(self,
+                                *,
+                                account_id: str = None,
+                                resource_group_ids: List[str] = None,
+                                **kwargs) -> Iterator[Dict]:
+        """
+        List the resource instances of an account.
+
+        :param str account_id: (optional) The ID of the account whose
+               resource groups are listed.
+        :param List[str] resource_group_ids: (optional) The resource groups
+               to list, instead of all the groups of the account.
+        :param **kwargs: Other parameters of `list_resource_instances`, e.g.
+               `type` or `limit`.
+        :return: An iterator of `dict`s representing `ResourceInstance`
+                 objects.
+        :rtype: Iterator[dict]
+        """
+        return self._list(self.service.list_resource_instances_iter, account_id,
+                          resource_group_ids, kwargs)
+
+    def list_resource_keys(self,
+                           *,
+                           account_id: str = None,
+                           resource_group_ids: List[str] = None,
+                           **kwargs) -> Iterator[Dict]:
+        """
+        List the resource keys of an account, see `list_resource_instances`.
+
+        :rtype: Iterator[dict]
+        """
+        return self._list(self.service.list_resource_keys_iter, account_id,
+                          resource_group_ids, kwargs)
+
+    def list_resource_bindings(self,
+                               *,
+                               account_id: str = None,
+                               resource_group_ids: List[str] = None,
+                               **kwargs) -> Iterator[Dict]:
+        """
+        List the resource bindings of an account, see `list_resource_instances`.
+
+        :rtype: Iterator[dict]
+        """
+        return self._list(self.service.list_resource_bindings_iter, account_id,
+                          resource_group_ids, kwargs)
+
+    def list_resource_aliases(self,
+                              *,
+                              account_id: str = None,
+                              resource_group_ids: List[str] = None,
+                              **kwargs) -> Iterator[Dict]:
+        """
+        List the resource aliases of an account, see `list_resource_instances`.
+
+        :rtype: Iterator[dict]
+        """
+        return self._list(self.service.list_resource_aliases_iter, account_id,
+                          resource_group_ids, kwargs)
+
+    def _list(self,
+              list_iter: Callable,
+              account_id: str,
+              resource_group_ids: List[str],
+              kwargs: Dict) -> Iterator[Dict]:
+        if 'resource_group_id' in kwargs:
+            raise ValueError('resource_group_id is set by the lister')
+        if resource_group_ids is None:
+            resource_group_ids = self.resource_group_ids(account_id)
+        return self._merge(list_iter, resource_group_ids, kwargs)
+
+    def _merge(self,
+               list_iter: Callable,
+               resource_group_ids: List[str],
+               kwargs: Dict) -> Iterator[Dict]:
+        sources = [functools.partial(list_iter, resource_group_id=x, **kwargs)
+                   for x in resource_group_ids]
+        return merge_iters(sources, max_workers=self.max_workers,
+                           buffer_size=self.buffer_size, ordered=True)
@@ -0,0 +1,294 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module provides an in-memory inverted index of the tags of resources.
+
+A `TagIndex` is loaded from Global Search results and answers boolean tag
+queries locally, without a search request per question:
+
+    index = TagIndex()
+    index.refresh(search_service, full=True)
+    crns = index.query(all_of=['env:prod', 'team:a'], none_of=['pci'])
+
+Each resource is given a small integer ID, and each tag maps to a bitmap of
+the IDs of the resources carrying it, so that a query is a handful of
+bitwise operations on Python integers.  The index can be refreshed
+incrementally with a query selecting only the resources that changed.
+"""
+
+from typing import Dict, Iterable, List, Set, Union
+import threading
+
+from .global_search_v2 import GlobalSearchV2, ResultItem
+from .tag_reconcile import normalize_tag
+
+_HAS_BIT_COUNT = hasattr(int, 'bit_count')  # Python 3.10+
+
+
+class TagIndex():
+    """
+    An inverted index from tag to the resources carrying it.
+
+    All methods are thread-safe.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize an empty TagIndex object.
+        """
+        self._ids = {}            # crn -> id
+        self._crns = []           # id -> crn, None for a free id
+        self._free = []           # ids of removed resources, to reuse
+        self._resource_tags = {}  # id -> frozenset of tags
+        self._bitmaps = {}        # tag -> bytearray, bit i set if resource i has the tag
+        self._counts = {}         # tag -> number of resources with the tag
+        self._live = bytearray()  # bit i set if id i is in use
+        self._cache = {}          # tag (None for _live) -> int version of the bitmap
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        """Return the number of indexed resources."""
+        return len(self._ids)
+
+    def __contains__(self, crn: str) -> bool:
+        """Return True if the resource is indexed."""
+        return crn in self._ids
+
+    def tags(self) -> Dict[str, int]:
+        """Return the number of resources carrying each tag."""
+        with self._lock:
+            return dict(self._counts)
+
+    def tags_of(self, crn: str) -> Set[str]:
+        """Return the tags of an indexed resource, or an empty set."""
+        with self._lock:
+            resource_id = self._ids.get(crn)
+            return set(self._resource_tags.get(resource_id, ()))
+
+    def add(self, crn: str, tags: Iterable[str]) -> None:
+        """
+        Index a resource with its tags, replacing the tags it was indexed with.
+
+        :param str crn: The CRN of the resource.
+        :param Iterable[str] tags: All the tags of the resource.
+        """
+        tags = frozenset(normalize_tag(x) for x in tags or ())
+        with self._lock:
+            resource_id = self._ids.get(crn)
+            if resource_id is None:
+                resource_id = self._free.pop() if self._free else len(self._crns)
+                if resource_id == len(self._crns):
+                    self._crns.append(crn)
+                else:
+                    self._crns[resource_id] = crn
+                self._ids[crn] = resource_id
+                _set_bit(self._live, resource_id)
+                self._cache.pop(None, None)
+                previous = frozenset()
+            else:
+                previous = self._resource_tags[resource_id]
+                if previous == tags:
+                    return
+            for tag in previous - tags:
+                self._untag(tag, resource_id)
+            for tag in tags - previous:
+                _set_bit(self._bitmaps.setdefault(tag, bytearray()), resource_id)
+                self._counts[tag] = self._counts.get(tag, 0) + 1
+                self._cache.pop(tag, None)
+            self._resource_tags[resource_id] = tags
+
+    def remove(self, crn: str) -> bool:
+        """
+        Remove a resource from the index.
+
+        :return: True if the resource was indexed.
+        :rtype: bool
+        """
+        with self._lock:
+            resource_id = self._ids.pop(crn, None)
+            if resource_id is None:
+                return False
+            for tag in self._resource_tags.pop(resource_id):
+                self._untag(tag, resource_id)
+            _clear_bit(self._live, resource_id)
+            self._cache.pop(None, None)
+            self._crns[resource_id] = None
+            self._free.append(resource_id)
+            return True
+
+    def ingest(self,
+               items: Iterable[Union[Dict, ResultItem]],
+               *,
+               replace: bool = False) -> int:
+        """
+        Index the resources of a stream of search results.
+
+        :param Iterable items: `ResultItem` objects or dicts with a `crn`
+               and, for tagged resources, a `tags` property.
+        :param bool replace: (optional) Remove the indexed resources that are
+               not in the stream, i.e. the stream is the complete inventory.
+        :return: The number of resources ingested.
+        :rtype: int
+        """
+        seen = set()
+        for item in items:
+            if isinstance(item, dict):
+                crn, tags = item.get('crn'), item.get('tags')
+            else:
+                crn, tags = item.crn, getattr(item, 'tags', None)
+            if crn is None:
+                continue
+            self.add(crn, tags)
+            seen.add(crn)
+        if replace:
+            with self._lock:
+                for crn in [x for x in self._ids if x not in seen]:
+                    self.remove(crn)
+        return len(seen)
+
+    def refresh(self,
+                service: GlobalSearchV2,
+                *,
+                query: str = '*',
+                full: bool = False,
+                **kwargs) -> int:
+        """
+        Load the index with a Global Search scan.
+
+        For an incremental refresh, pass a query selecting the resources
+        that may have changed since the last refresh; resources not returned
+        keep their indexed tags.  A full refresh also removes the resources
+        the scan did not return.
+
+        :param GlobalSearchV2 service: The Global Search client.
+        :param str query: (optional) The query of the scan.
+        :param bool full: (optional) The query returns the complete inventory.
+        :param **kwargs: Other parameters of `GlobalSearchV2.search`, e.g.
+               `account_id`.
+        :return: The number of resources ingested.
+        :rtype: int
+        """
+        kwargs.setdefault('limit', 1000)
+        items = service.search_iter(query=query, fields=['crn', 'tags'], **kwargs)
+        return self.ingest(items, replace=full)
+
+    def bitmap(self,
+               *,
+               all_of: Iterable[str] = (),
+               any_of: Iterable[str] = (),
+               none_of: Iterable[str] = ()) -> int:
+        """
+        Return the bitmap of the resources matching a tag query.
+
+        Bit `i` of the result is set if the resource with ID `i` matches.
+        Use `crns` to convert it to CRNs.  See `query` for the parameters.
+
+        :rtype: int
+        """
+        with self._lock:
+            result = self._bitmap(None)
+            for tag in all_of:
+                result &= self._bitmap(normalize_tag(tag))
+            any_of = list(any_of)
+            if any_of:
+                union = 0
+                for tag in any_of:
+                    union |= self._bitmap(normalize_tag(tag))
+                result &= union
+            for tag in none_of:
+                result &= ~self._bitmap(normalize_tag(tag))
+            return result
+
+    def query(self,
+              *,
+              all_of: Iterable[str] = (),
+              any_of: Iterable[str] = (),
+              none_of: Iterable[str] = ()) -> List[str]:
+        """
+        Return the CRNs of the resources matching a tag query.
+
+        A resource matches if it carries all the tags of `all_of`, at least
+        one of the tags of `any_of` (if any are given) and none of the tags
+        of `none_of`.  With no tags at all, every resource matches.
+
+        :param Iterable[str] all_of: (optional) Tags the resources must all carry.
+        :param Iterable[str] any_of: (optional) Tags of which the resources
+               must carry at least one.
+        :param Iterable[str] none_of: (optional) Tags the resources must not
+               carry.
+        :rtype: List[str]
+        """
+        with self._lock:
+            return self.crns(self.bitmap(all_of=all_of, any_of=any_of, none_of=none_of))
+
+    def count(self, **kwargs) -> int:
+        """Return the number of resources matching a tag query, see `query`."""
+        return _popcount(self.bitmap(**kwargs))
+
+    def crns(self, bitmap: int) -> List[str]:
+        """Return the CRNs of the resources whose bits are set in a bitmap."""
+        with self._lock:
+            return [self._crns[i] for i in _members(bitmap)]
+
+    def _bitmap(self, tag: str) -> int:
+        """Return the bitmap of a tag, or of all resources for None, as an int."""
+        bitmap = self._cache.get(tag)
+        if bitmap is None:
+            source = self._live if tag is None else self._bitmaps.get(tag, b'')
+            bitmap = int.from_bytes(source, 'little')
+            self._cache[tag] = bitmap
+        return bitmap
+
+    def _untag(self, tag: str, resource_id: int) -> None:
+        """Clear the bit of a resource in a tag, dropping the tag once unused."""
+        self._cache.pop(tag, None)
+        self._counts[tag] -= 1
+        if self._counts[tag]:
+            _clear_bit(self._bitmaps[tag], resource_id)
+        else:
+            del self._counts[tag]
+            del self._bitmaps[tag]
+
+
+def _set_bit(bitmap: bytearray, index: int) -> None:
+    byte = index >> 3
+    if byte >= len(bitmap):
+        bitmap.extend(bytes(byte + 1 - len(bitmap)))
+    bitmap[byte] |= 1 << (index & 7)
+
+
+def _clear_bit(bitmap: bytearray, index: int) -> None:
+    byte = index >> 3
+    if byte < len(bitmap):
+        bitmap[byte] &= ~(1 << (index & 7)) & 0xff
+
+
+def _popcount(bitmap: int) -> int:
+    if _HAS_BIT_COUNT:
+        return bitmap.bit_count()
+    return bin(bitmap).count('1')
+
+
+def _members(bitmap: int) -> List[int]:
+    """Return the indexes of the bits set in a non-negative int."""
+    bits = bin(bitmap)[:1:-1]
+    members = []
+    index = bits.find('1')
+    while index >= 0:
+        members.append(index)
+        index = bits.find('1', index + 1)
+    return members
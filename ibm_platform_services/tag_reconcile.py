@@ -0,0 +1,333 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module reconciles the tags of resources with a desired state.
+
+Instead of attaching every desired tag on every run, `TagReconciler` reads
+the tags currently attached, computes the tags to attach and detach per
+resource, and sends only those.  Changes are grouped by tag, and tags that
+are to be attached to (or detached from) exactly the same resources share a
+request, so that each request carries as many resources as possible:
+
+    reconciler = TagReconciler(tagging_service, search=search_service)
+    result = reconciler.reconcile({crn: {'env:prod', 'team:a'} for crn in crns})
+
+A steady-state run, where nothing changed, sends no tagging request at all.
+"""
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Set, Tuple
+
+from .bulk_tagging import DEFAULT_CHUNK_SIZE, BulkTagResult, BulkTagger
+from .global_search_v2 import GlobalSearchV2
+from .global_tagging_v1 import GlobalTaggingV1
+
+ATTACH = 'attach'
+DETACH = 'detach'
+
+# The search field holding the tags of each type.
+_SEARCH_TAG_FIELDS = {None: 'tags', 'user': 'tags', 'service': 'service_tags'}
+
+
+def normalize_tag(tag: str) -> str:
+    """
+    Return the form in which the tagging service stores a tag name.
+
+    Tag names are not case-sensitive and are stored in lower case, so
+    `Env:Prod` and `env:prod` name the same tag.
+    """
+    return tag.strip().lower()
+
+
+class TagPlan():
+    """
+    The tagging requests needed to reach a desired state.
+
+    :attr List[Tuple] attach: The attach operations, as tuples of the tag
+          names and the IDs of the resources to attach them to.
+    :attr List[Tuple] detach: The detach operations, as tuples of the tag
+          names and the IDs of the resources to detach them from.
+    :attr int unchanged: The number of resources already in the desired state.
+    """
+
+    def __init__(self,
+                 attach: List[Tuple[List[str], List[str]]],
+                 detach: List[Tuple[List[str], List[str]]],
+                 unchanged: int = 0) -> None:
+        """
+        Initialize a TagPlan object.
+
+        :param List[Tuple] attach: The attach operations.
+        :param List[Tuple] detach: The detach operations.
+        :param int unchanged: (optional) The number of resources already in
+               the desired state.
+        """
+        self.attach = attach
+        self.detach = detach
+        self.unchanged = unchanged
+
+    def __bool__(self) -> bool:
+        """Return True if the plan has any operation."""
+        return bool(self.attach or self.detach)
+
+    def requests(self, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        """Return the number of requests needed to execute the plan."""
+        return sum(-(-len(resources) // chunk_size)
+                   for _, resources in self.attach + self.detach)
+
+    def to_dict(self) -> Dict:
+        """Return a json dictionary representing the plan."""
+        return {
+            ATTACH: [{'tag_names': tags, 'resources': resources} for tags, resources in self.attach],
+            DETACH: [{'tag_names': tags, 'resources': resources} for tags, resources in self.detach],
+            'unchanged': self.unchanged,
+        }
+
+
+def plan_tags(desired: Dict[str, Iterable[str]],
+              current: Dict[str, Iterable[str]],
+              *,
+              prune: bool = True) -> TagPlan:
+    """
+    Compute the minimal attach and detach operations between two states.
+
+    :param dict desired: The desired tags of each resource, by resource ID.
+    :param dict current: The tags currently attached to each resource, by
+           resource ID. Resources missing from it have no tags.
+    :param bool prune: (optional) Detach the current tags of a resource that
+           are not in its desired tags. Otherwise tags are only attached.
+    :rtype: TagPlan
+    """
+    to_attach = OrderedDict()
+    to_detach = OrderedDict()
+    unchanged = 0
+    for resource_id, tags in desired.items():
+        wanted = {normalize_tag(x) for x in tags}
+        present = {normalize_tag(x) for x in current.get(resource_id) or ()}
+        missing = wanted - present
+        extra = present - wanted if prune else set()
+        for tag in sorted(missing):
+            to_attach.setdefault(tag, []).append(resource_id)
+        for tag in sorted(extra):
+            to_detach.setdefault(tag, []).append(resource_id)
+        if not missing and not extra:
+            unchanged += 1
+    return TagPlan(_merge(to_attach), _merge(to_detach), unchanged)
+
+
+def _merge(by_tag: Dict[str, List[str]]) -> List[Tuple[List[str], List[str]]]:
+    """Group the tags that apply to exactly the same resources."""
+    by_resources = OrderedDict()
+    for tag, resources in by_tag.items():
+        by_resources.setdefault(tuple(resources), []).append(tag)
+    return [(tags, list(resources)) for resources, tags in by_resources.items()]
+
+
+class TagReconcileResult():
+    """
+    The outcome of a reconciliation.
+
+    :attr TagPlan plan: The operations that were computed.
+    :attr List[Tuple] results: The `BulkTagResult` of each operation, as
+          tuples of the action (`attach` or `detach`), the tag names and the
+          result.
+    """
+
+    def __init__(self, plan: TagPlan) -> None:
+        """
+        Initialize a TagReconcileResult object.
+
+        :param TagPlan plan: The operations that were computed.
+        """
+        self.plan = plan
+        self.results = []
+
+    @property
+    def failed(self) -> Dict[str, List[Tuple[str, List[str]]]]:
+        """
+        The operations that failed, by resource ID, as tuples of the action
+        and the tag names.
+        """
+        failed = {}
+        for action, tags, result in self.results:
+            for resource_id in result.failed:
+                failed.setdefault(resource_id, []).append((action, tags))
+        return failed
+
+    def to_dict(self) -> Dict:
+        """Return a json dictionary summarizing the outcome."""
+        summary = {'unchanged': self.plan.unchanged}
+        for action in (ATTACH, DETACH):
+            # The number of tags attached or detached, counted per resource.
+            summary[action] = sum(len(result.succeeded) * len(tags)
+                                  for a, tags, result in self.results if a == action)
+        summary['requests'] = sum(result.requests for _, _, result in self.results)
+        summary['failed'] = len(self.failed)
+        return summary
+
+
+class TagReconciler():
+    """
+    Brings the tags of resources to a desired state.
+
+    The current tags are read with a Global Search scan returning the `tags`
+    field when a search client is given, which costs one request per page of
+    resources, and otherwise with `list_tags(attached_to=...)` for each
+    resource, on a bounded pool of threads.
+
+    Operations on more resources than fit in one request are sent one after
+    the other, each spread over the pool of the bulk tagger; smaller
+    operations are sent concurrently.
+
+    :attr GlobalTaggingV1 service: The Global Tagging client.
+    :attr GlobalSearchV2 search: The Global Search client, or None.
+    :attr BulkTagger tagger: The bulk tagger sending the changes.
+    :attr int max_workers: The maximum number of concurrent requests.
+    """
+
+    def __init__(self,
+                 service: GlobalTaggingV1,
+                 *,
+                 search: GlobalSearchV2 = None,
+                 max_workers: int = 4,
+                 **kwargs) -> None:
+        """
+        Initialize a TagReconciler object.
+
+        :param GlobalTaggingV1 service: The Global Tagging client.
+        :param GlobalSearchV2 search: (optional) A Global Search client to read
+               the current tags with.
+        :param int max_workers: (optional) The maximum number of concurrent
+               requests.
+        :param **kwargs: Other parameters of `BulkTagger`, e.g.
+               `max_attempts`.
+        """
+        self.service = service
+        self.search = search
+        self.max_workers = max_workers
+        self.tagger = BulkTagger(service, max_workers=max_workers, **kwargs)
+
+    def current_tags(self,
+                     resource_ids: Iterable[str],
+                     *,
+                     query: str = None,
+                     account_id: str = None,
+                     tag_type: str = None,
+                     providers: List[str] = None) -> Dict[str, Set[str]]:
+        """
+        Read the tags currently attached to resources.
+
+        :param Iterable[str] resource_ids: The IDs of the resources.
+        :param str query: (optional) With a search client, the query of the
+               scan. It should match all the resources; defaults to `*`.
+        :param str account_id: (optional) The ID of the account of the
+               resources.
+        :param str tag_type: (optional) The type of the tags to read, `user`
+               or `service`; a search client reads the `tags` or
+               `service_tags` field.
+        :param List[str] providers: (optional) Without a search client, the
+               provider of the resources, `ghost` or `ims`.
+        :return: The set of tags of each resource.
+        :rtype: dict
+        """
+        wanted = set(resource_ids)
+        current = {}
+        if self.search is not None:
+            field = _SEARCH_TAG_FIELDS.get(tag_type)
+            if field is None:
+                raise ValueError('tags of type {0} cannot be read with a search client'.format(tag_type))
+            for item in self.search.search_iter(query=query or '*', fields=['crn', field],
+                                                account_id=account_id, limit=1000):
+                if item.get('crn') in wanted:
+                    current[item['crn']] = set(item.get(field) or ())
+            return current
+
+        def list_tags(resource_id):
+            return resource_id, {x['name'] for x in self.service.list_tags_iter(
+                attached_to=resource_id, account_id=account_id, tag_type=tag_type,
+                providers=providers or ['ghost'], limit=1000)}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for resource_id, tags in executor.map(list_tags, wanted):
+                current[resource_id] = tags
+        return current
+
+    def plan(self,
+             desired: Dict[str, Iterable[str]],
+             *,
+             current: Dict[str, Iterable[str]] = None,
+             prune: bool = True,
+             **kwargs) -> TagPlan:
+        """
+        Compute the operations that would bring resources to a desired state.
+
+        :param dict desired: The desired tags of each resource, by resource ID.
+        :param dict current: (optional) The current tags of each resource;
+               read with `current_tags` if not given.
+        :param bool prune: (optional) Detach the tags that are not desired.
+        :param **kwargs: The parameters of `current_tags`.
+        :rtype: TagPlan
+        """
+        if current is None:
+            current = self.current_tags(desired, **kwargs)
+        return plan_tags(desired, current, prune=prune)
+
+    def reconcile(self,
+                  desired: Dict[str, Iterable[str]],
+                  *,
+                  current: Dict[str, Iterable[str]] = None,
+                  prune: bool = True,
+                  account_id: str = None,
+                  tag_type: str = None,
+                  **kwargs) -> TagReconcileResult:
+        """
+        Bring resources to a desired state.
+
+        Detach operations are sent before attach operations.
+
+        :param dict desired: The desired tags of each resource, by resource ID.
+        :param dict current: (optional) The current tags of each resource;
+               read with `current_tags` if not given.
+        :param bool prune: (optional) Detach the tags that are not desired.
+        :param str account_id: (optional) The ID of the account of the
+               resources.
+        :param str tag_type: (optional) The type of the tags, `user` or
+               `service`.
+        :param **kwargs: Other parameters of `current_tags`.
+        :rtype: TagReconcileResult
+        """
+        plan = self.plan(desired, current=current, prune=prune, account_id=account_id,
+                         tag_type=tag_type, **kwargs)
+        result = TagReconcileResult(plan)
+        for action, operations in ((DETACH, plan.detach), (ATTACH, plan.attach)):
+            result.results.extend(self._execute(action, operations, account_id=account_id,
+                                                tag_type=tag_type))
+        return result
+
+    def _execute(self, action, operations, **kwargs) -> List[Tuple[str, List[str], BulkTagResult]]:
+        send = self.tagger.attach if action == ATTACH else self.tagger.detach
+        large = [x for x in operations if len(x[1]) > self.tagger.chunk_size]
+        small = [x for x in operations if len(x[1]) <= self.tagger.chunk_size]
+        results = [(action, tags, send(resources, tag_names=tags, **kwargs))
+                   for tags, resources in large]
+        if small:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                outcomes = executor.map(lambda x: send(x[1], tag_names=x[0], **kwargs), small)
+                results.extend((action, tags, outcome)
+                               for (tags, _), outcome in zip(small, outcomes))
+        return results
@@ -0,0 +1,270 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module provides keep-alive connection pools that can be shared by
+several service clients.
+
+By default each client sends its requests on its own HTTP session, so a
+process using `ResourceControllerV2`, `ResourceManagerV2`, `GlobalTaggingV1`
+and `GlobalSearchV2` opens separate TCP/TLS connections for each of them.
+Clients attached to the same `PooledTransport` share one session and reuse
+connections per host:
+
+    share_transport(controller, manager, tagging, search)
+
+Named transports are kept in a package-level registry; `configure_transport`
+sets the pool sizes of a named transport before it is first used.
+"""
+
+from typing import Dict
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from ibm_cloud_sdk_core import BaseService
+
+DEFAULT_TRANSPORT_NAME = 'default'
+
+
+class TransportStats():
+    """
+    Thread-safe counters of the requests sent through a transport.
+
+    :attr int requests: The number of requests sent.
+    :attr int new_connections: The number of connections opened, i.e. the
+          number of TCP (and TLS) handshakes.
+    :attr int evicted_pools: The number of per-host pools closed for being
+          idle.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize a TransportStats object.
+        """
+        self.requests = 0
+        self.new_connections = 0
+        self.evicted_pools = 0
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, count: int = 1) -> None:
+        """Add `count` to the named counter."""
+        with self._lock:
+            setattr(self, name, getattr(self, name) + count)
+
+    @property
+    def reused_connections(self) -> int:
+        """The number of requests sent on an already open connection."""
+        return max(self.requests - self.new_connections, 0)
+
+    def to_dict(self) -> Dict:
+        """Return a json dictionary representing the counters."""
+        return {
+            'requests': self.requests,
+            'new_connections': self.new_connections,
+            'reused_connections': self.reused_connections,
+            'evicted_pools': self.evicted_pools,
+        }
+
+
+class _PooledAdapter(HTTPAdapter):
+    """
+    An HTTPAdapter that counts new connections and closes the pools of hosts
+    that have been idle for too long.
+    """
+
+    def __init__(self, stats: TransportStats, idle_timeout: float, **kwargs) -> None:
+        self.stats = stats
+        self.idle_timeout = idle_timeout
+        self._last_used = {}
+        self._last_sweep = time.monotonic()
+        self._lock = threading.Lock()
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        stats = self.stats
+
+        def counting(pool_class):
+            def _new_conn(pool):
+                stats.increment('new_connections')
+                return pool_class._new_conn(pool)  # pylint: disable=protected-access
+            return type('Counting' + pool_class.__name__, (pool_class,), {'_new_conn': _new_conn})
+
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': counting(HTTPConnectionPool),
+            'https': counting(HTTPSConnectionPool),
+        }
+
+    def send(self, request, *args, **kwargs):  # pylint: disable=arguments-differ
+        self.stats.increment('requests')
+        parsed = requests.utils.urlparse(request.url)
+        now = time.monotonic()
+        with self._lock:
+            self._last_used[(parsed.scheme, parsed.hostname)] = now
+        if self.idle_timeout is not None and now - self._last_sweep >= self.idle_timeout / 2:
+            self.evict_idle(now)
+        return super().send(request, *args, **kwargs)
+
+    def evict_idle(self, now: float = None) -> int:
+        """Close the pools of hosts idle for longer than idle_timeout."""
+        if self.idle_timeout is None:
+            return 0
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._last_sweep = now
+            idle = {key for key, last in self._last_used.items() if now - last > self.idle_timeout}
+            for key in idle:
+                del self._last_used[key]
+        if not idle:
+            return 0
+        pools = self.poolmanager.pools
+        evicted = 0
+        for pool_key in list(pools.keys()):
+            if (pool_key.key_scheme, pool_key.key_host) in idle:
+                try:
+                    del pools[pool_key]
+                    evicted += 1
+                except KeyError:
+                    pass
+        self.stats.increment('evicted_pools', evicted)
+        return evicted
+
+
+class PooledTransport():
+    """
+    A requests session with a tunable keep-alive pool per host.
+
+    :attr int pool_connections: The number of per-host pools kept open.
+    :attr int pool_maxsize: The maximum number of connections kept open to
+          one host.
+    :attr bool pool_block: Block when all connections to a host are in use
+          instead of opening an extra, non-pooled connection.
+    :attr float idle_timeout: Close the pool of a host after this many
+          seconds without requests, or None to keep pools open.
+    :attr TransportStats stats: The request and connection counters.
+    """
+
+    def __init__(self,
+                 *,
+                 pool_connections: int = 10,
+                 pool_maxsize: int = 10,
+                 pool_block: bool = False,
+                 idle_timeout: float = None) -> None:
+        """
+        Initialize a PooledTransport object.
+
+        :param int pool_connections: (optional) The number of per-host pools
+               kept open.
+        :param int pool_maxsize: (optional) The maximum number of connections
+               kept open to one host.
+        :param bool pool_block: (optional) Block when all connections to a
+               host are in use.
+        :param float idle_timeout: (optional) Close the pool of a host after
+               this many seconds without requests.
+        """
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.idle_timeout = idle_timeout
+        self.stats = TransportStats()
+        self._adapter = _PooledAdapter(self.stats,
+                                       idle_timeout,
+                                       pool_connections=pool_connections,
+                                       pool_maxsize=pool_maxsize,
+                                       pool_block=pool_block)
+        self.session = requests.Session()
+        self.session.mount('https://', self._adapter)
+        self.session.mount('http://', self._adapter)
+
+    def attach(self, *services: BaseService) -> None:
+        """
+        Send the requests of the given service clients through this transport.
+
+        :raises ValueError: If the installed ibm_cloud_sdk_core does not let
+                clients use a custom HTTP client.
+        """
+        for service in services:
+            if not hasattr(service, 'set_http_client'):
+                raise ValueError('sharing a transport requires a version of ibm_cloud_sdk_core '
+                                 'that provides BaseService.set_http_client')
+            service.set_http_client(self.session)
+
+    def evict_idle(self) -> int:
+        """
+        Close the pools of hosts idle for longer than idle_timeout.
+
+        Idle pools are also closed automatically as requests are sent.
+
+        :return: The number of pools closed.
+        :rtype: int
+        """
+        return self._adapter.evict_idle()
+
+    def close(self) -> None:
+        """Close all pooled connections."""
+        self.session.close()
+
+
+_transports = {}
+_transports_lock = threading.Lock()
+
+
+def configure_transport(name: str = DEFAULT_TRANSPORT_NAME, **kwargs) -> PooledTransport:
+    """
+    Create or replace the named transport with the given pool settings.
+
+    Clients already attached to a replaced transport keep using it.
+
+    :param str name: (optional) The name of the transport.
+    :param **kwargs: The parameters of `PooledTransport`.
+    :return: The new transport.
+    :rtype: PooledTransport
+    """
+    transport = PooledTransport(**kwargs)
+    with _transports_lock:
+        _transports[name] = transport
+    return transport
+
+
+def get_transport(name: str = DEFAULT_TRANSPORT_NAME) -> PooledTransport:
+    """
+    Return the named transport, creating it with default settings on first
+    use.
+
+    :param str name: (optional) The name of the transport.
+    :rtype: PooledTransport
+    """
+    with _transports_lock:
+        if name not in _transports:
+            _transports[name] = PooledTransport()
+        return _transports[name]
+
+
+def share_transport(*services: BaseService, name: str = DEFAULT_TRANSPORT_NAME) -> PooledTransport:
+    """
+    Attach the given service clients to the named transport.
+
+    :param str name: (optional) The name of the transport.
+    :return: The transport the clients were attached to.
+    :rtype: PooledTransport
+    """
+    transport = get_transport(name)
+    transport.attach(*services)
+    return transport
@@ -0,0 +1,384 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module aggregates resource instance usage with NumPy.
+
+A `UsageTable` holds the flattened usage rows of `usage_export` in NumPy
+columns: the string columns as `int32` codes into dictionaries, the numbers
+as `float64`.  Group-by, top-k and month-over-month rollups are computed on
+the codes with a few vectorized operations instead of a Python loop per
+row:
+
+    table = UsageTable.load(UsageExporter(usage_reports_service),
+                            account_id=account_id, billingmonth='2020-11')
+    by_group = table.group_by('resource_group_id').to_dict()
+    top_plans = table.top(['resource_id', 'plan_id'], 10)
+
+    months = UsageTable.concat([october, november])
+    changes = months.month_over_month('resource_group_id').top_changes(5)
+
+Missing strings have the code `usage_export.MISSING` and form a group of
+their own, labelled None; missing numbers (NaN) count as 0 in sums.  NumPy
+is required by this module; it is installed with the `analytics` extra
+(`pip install ibm-platform-services[analytics]`).
+"""
+
+from typing import Dict, Iterable, List, Sequence, Tuple, Union
+
+from .usage_export import (MISSING, NUMBER_COLUMNS, STRING_COLUMNS, Dictionary, UsageBatch,
+                           UsageExporter)
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+# Group codes are counted directly, without sorting, when the number of
+# possible key combinations is at most this.
+_DENSE_LIMIT = 1 << 22
+
+
+def _require_numpy() -> None:
+    if numpy is None:
+        raise ImportError('usage_analytics requires numpy; '
+                          'install it with "pip install ibm-platform-services[analytics]"')
+
+
+class Rollup():
+    """
+    The totals of a value per group of rows.
+
+    :attr List[str] keys: The columns the rows are grouped by.
+    :attr ndarray codes: The codes of the groups, one row per group and one
+          column per key.
+    :attr ndarray totals: The total of each group.
+    :attr ndarray counts: The number of rows of each group.
+    """
+
+    def __init__(self, keys: List[str], codes, totals, counts,
+                 dictionaries: Dict[str, Dictionary]) -> None:
+        """
+        Initialize a Rollup object.
+
+        :param List[str] keys: The columns the rows are grouped by.
+        :param ndarray codes: The codes of the groups.
+        :param ndarray totals: The total of each group.
+        :param ndarray counts: The number of rows of each group.
+        :param dict dictionaries: The dictionaries of the key columns.
+        """
+        self.keys = keys
+        self.codes = codes
+        self.totals = totals
+        self.counts = counts
+        self._dictionaries = dictionaries
+
+    def __len__(self) -> int:
+        """Return the number of groups."""
+        return len(self.totals)
+
+    def labels(self, indexes: Iterable[int] = None) -> List[Union[str, Tuple]]:
+        """
+        Return the key values of groups: a string per group when grouping
+        by one column, a tuple of strings otherwise.
+
+        :param Iterable[int] indexes: (optional) The indexes of the groups;
+               all groups if not given.
+        """
+        codes = self.codes if indexes is None else self.codes[numpy.asarray(indexes, dtype=numpy.intp)]
+        columns = [_decode(self._dictionaries[key], codes[:, i]) for i, key in enumerate(self.keys)]
+        if len(columns) == 1:
+            return columns[0]
+        return list(zip(*columns))
+
+    def to_dict(self) -> Dict:
+        """Return the total of each group, by key values."""
+        return dict(zip(self.labels(), self.totals.tolist()))
+
+    def top(self, k: int) -> List[Tuple]:
+        """
+        Return the `k` groups with the largest totals, largest first, as
+        tuples of the key values and the total.
+        """
+        indexes = _top_indexes(self.totals, k)
+        return list(zip(self.labels(indexes), self.totals[indexes].tolist()))
+
+
+class MonthlyRollup():
+    """
+    The totals of a value per group of rows and per month.
+
+    :attr List[str] keys: The columns the rows are grouped by.
+    :attr List[str] months: The months, in order.
+    :attr ndarray totals: The totals, one row per group and one column per
+          month; 0 for the months a group has no usage.
+    :attr ndarray deltas: The change of each group from each month to the
+          next, one column per month after the first.
+    """
+
+    def __init__(self, rollup: Rollup, months: List[str], totals) -> None:
+        """
+        Initialize a MonthlyRollup object.
+
+        :param Rollup rollup: The groups, with their totals over all months.
+        :param List[str] months: The months, in order.
+        :param ndarray totals: The totals per group and month.
+        """
+        self.keys = rollup.keys
+        self.months = months
+        self.totals = totals
+        self.deltas = numpy.diff(totals, axis=1)
+        self._rollup = rollup
+
+    def __len__(self) -> int:
+        """Return the number of groups."""
+        return len(self.totals)
+
+    def labels(self, indexes: Iterable[int] = None) -> List[Union[str, Tuple]]:
+        """Return the key values of groups, see `Rollup.labels`."""
+        return self._rollup.labels(indexes)
+
+    def to_dict(self) -> Dict:
+        """Return the totals of each group by month, by key values."""
+        return {label: dict(zip(self.months, row))
+                for label, row in zip(self.labels(), self.totals.tolist())}
+
+    def top_changes(self, k: int, *, month: str = None) -> List[Tuple]:
+        """
+        Return the `k` groups whose total changed the most into a month,
+        in either direction, as tuples of the key values, the total of the
+        previous month and the total of the month.
+
+        :param int k: The number of groups.
+        :param str month: (optional) The month; defaults to the last one.
+        :rtype: List[tuple]
+        """
+        index = len(self.months) - 1 if month is None else self.months.index(month)
+        if index < 1:
+            raise ValueError('there is no month before {0}'.format(self.months[index]))
+        deltas = self.deltas[:, index - 1]
+        indexes = _top_indexes(numpy.abs(deltas), k)
+        before = self.totals[indexes, index - 1].tolist()
+        after = self.totals[indexes, index].tolist()
+        return list(zip(self.labels(indexes), before, after))
+
+
+class UsageTable():
+    """
+    Usage rows in NumPy columns.
+
+    :attr dict columns: The columns by name: `int32` codes for the string
+          columns of `usage_export.STRING_COLUMNS`, `float64` values for
+          `usage_export.NUMBER_COLUMNS`.
+    :attr dict dictionaries: The `Dictionary` of each string column.
+    """
+
+    def __init__(self, columns: Dict, dictionaries: Dict[str, Dictionary]) -> None:
+        """
+        Initialize a UsageTable object.
+
+        :param dict columns: The columns by name.
+        :param dict dictionaries: The `Dictionary` of each string column.
+        """
+        _require_numpy()
+        self.columns = columns
+        self.dictionaries = dictionaries
+
+    @classmethod
+    def from_batches(cls, batches: Iterable[UsageBatch]) -> 'UsageTable':
+        """
+        Build a table from batches of `usage_export`, e.g. of several
+        exports; their codes are translated to common dictionaries.
+        """
+        _require_numpy()
+        dictionaries = {name: Dictionary() for name in STRING_COLUMNS}
+        remaps = {}
+        parts = {name: [] for name in STRING_COLUMNS + NUMBER_COLUMNS}
+        for batch in batches:
+            columns = batch.to_numpy()
+            for name in STRING_COLUMNS:
+                remap = _remap(remaps, batch.dictionaries[name], dictionaries[name])
+                # Copy, since the batch arrays may still grow.
+                parts[name].append(remap[columns[name]])
+            for name in NUMBER_COLUMNS:
+                parts[name].append(columns[name].copy())
+        columns = {}
+        for name, arrays in parts.items():
+            dtype = numpy.int32 if name in dictionaries else numpy.float64
+            columns[name] = numpy.concatenate(arrays) if arrays else numpy.empty(0, dtype=dtype)
+        return cls(columns, dictionaries)
+
+    @classmethod
+    def load(cls, exporter: UsageExporter, **kwargs) -> 'UsageTable':
+        """
+        Load a usage report into a table.
+
+        :param UsageExporter exporter: The exporter reading the report.
+        :param **kwargs: The parameters of `UsageExporter.batches`.
+        :rtype: UsageTable
+        """
+        return cls.from_batches(exporter.batches(**kwargs))
+
+    @classmethod
+    def concat(cls, tables: Sequence['UsageTable']) -> 'UsageTable':
+        """Return the rows of several tables, e.g. of several months, in one."""
+        _require_numpy()
+        dictionaries = {name: Dictionary() for name in STRING_COLUMNS}
+        remaps = {}
+        columns = {}
+        for name in STRING_COLUMNS:
+            columns[name] = numpy.concatenate(
+                [_remap(remaps, x.dictionaries[name], dictionaries[name])[x.columns[name]]
+                 for x in tables] or [numpy.empty(0, dtype=numpy.int32)])
+        for name in NUMBER_COLUMNS:
+            columns[name] = numpy.concatenate(
+                [x.columns[name] for x in tables] or [numpy.empty(0)])
+        return cls(columns, dictionaries)
+
+    def __len__(self) -> int:
+        """Return the number of rows."""
+        return len(self.columns['cost'])
+
+    def where(self, **values: Union[str, Iterable[str]]) -> 'UsageTable':
+        """
+        Return the rows whose string columns have the given values.
+
+        :param **values: A value or a list of values for each column
+               filtered, e.g. `region='us-south'`.
+        :rtype: UsageTable
+        """
+        mask = numpy.ones(len(self), dtype=bool)
+        for name, wanted in values.items():
+            wanted = [wanted] if isinstance(wanted, str) or wanted is None else list(wanted)
+            # Unknown values match no row; None matches the missing values.
+            codes = [MISSING if x is None else self.dictionaries[name].code(x) for x in wanted]
+            codes = [x for x, value in zip(codes, wanted) if value is None or x != MISSING]
+            mask &= numpy.isin(self.columns[name], codes)
+        return UsageTable({name: column[mask] for name, column in self.columns.items()},
+                          self.dictionaries)
+
+    def group_by(self, keys: Union[str, List[str]], *, value: str = 'cost') -> Rollup:
+        """
+        Sum a number column per group of rows with the same key values.
+
+        :param keys: The string column or columns to group by.
+        :param str value: (optional) The number column summed.
+        :rtype: Rollup
+        """
+        keys = [keys] if isinstance(keys, str) else list(keys)
+        if not keys:
+            raise ValueError('keys must be provided')
+        values = self.columns[value]
+        values = numpy.where(numpy.isnan(values), 0.0, values)
+        # Shifted by one so that missing values get the code 0.
+        columns = [self.columns[key].astype(numpy.int64) + 1 for key in keys]
+        sizes = [len(self.dictionaries[key]) + 1 for key in keys]
+        space = 1
+        for size in sizes:
+            space *= size
+
+        if space <= max(_DENSE_LIMIT, 4 * len(values)):
+            # Mixed-radix code of the key combination, counted directly.
+            combined = numpy.zeros(len(values), dtype=numpy.int64)
+            for column, size in zip(columns, sizes):
+                combined *= size
+                combined += column
+            counts = numpy.bincount(combined, minlength=space)
+            present = numpy.flatnonzero(counts)
+            totals = numpy.bincount(combined, weights=values, minlength=space)[present]
+            counts = counts[present]
+            codes = numpy.empty((len(present), len(keys)), dtype=numpy.int64)
+            remainder = present.copy()
+            for i in range(len(keys) - 1, -1, -1):
+                remainder, codes[:, i] = numpy.divmod(remainder, sizes[i])
+        else:
+            stacked = numpy.stack(columns, axis=1)
+            codes, inverse = numpy.unique(stacked, axis=0, return_inverse=True)
+            inverse = inverse.reshape(-1)
+            counts = numpy.bincount(inverse, minlength=len(codes))
+            totals = numpy.bincount(inverse, weights=values, minlength=len(codes))
+        codes -= 1
+        return Rollup(keys, codes, totals, counts, self.dictionaries)
+
+    def top(self, keys: Union[str, List[str]], k: int, *, value: str = 'cost') -> List[Tuple]:
+        """
+        Return the `k` groups with the largest totals, see `group_by` and
+        `Rollup.top`.
+        """
+        return self.group_by(keys, value=value).top(k)
+
+    def month_over_month(self, keys: Union[str, List[str]], *,
+                         value: str = 'cost') -> MonthlyRollup:
+        """
+        Sum a number column per group of rows and per month.
+
+        :param keys: The string column or columns to group by.
+        :param str value: (optional) The number column summed.
+        :rtype: MonthlyRollup
+        """
+        keys = [keys] if isinstance(keys, str) else list(keys)
+        by_month = self.group_by(keys + ['month'], value=value)
+        codes, rows = numpy.unique(by_month.codes[:, :-1], axis=0, return_inverse=True)
+        rows = rows.reshape(-1)
+        month_codes = by_month.codes[:, -1]
+        present = numpy.unique(month_codes)
+        months = sorted(zip(_decode(self.dictionaries['month'], present), present.tolist()),
+                        key=lambda month: month[0] or '')
+        order = [code for _, code in months]
+        # The last slot is for the missing month, MISSING (-1).
+        column_of = numpy.zeros(len(self.dictionaries['month']) + 1, dtype=numpy.intp)
+        column_of[order] = numpy.arange(len(order))
+        totals = numpy.zeros((len(codes), len(order)))
+        totals[rows, column_of[month_codes]] = by_month.totals
+        groups = Rollup(keys, codes, totals.sum(axis=1),
+                        numpy.bincount(rows, weights=by_month.counts, minlength=len(codes)),
+                        self.dictionaries)
+        return MonthlyRollup(groups, [month for month, _ in months], totals)
+
+
+def _decode(dictionary: Dictionary, codes) -> List[str]:
+    """Return the values of codes, None for `MISSING`."""
+    values = dictionary.values
+    return [values[code] if code != MISSING else None for code in codes.tolist()]
+
+
+def _remap(remaps: Dict, source: Dictionary, target: Dictionary):
+    """
+    Return the array translating the codes of a source dictionary into
+    codes of a target dictionary, extending it if the source has grown.
+    Its last element is `MISSING`, so that `MISSING` codes (-1) translate
+    to themselves.
+    """
+    remap = remaps.get(id(source))
+    if remap is None or len(remap) <= len(source):
+        start = 0 if remap is None else len(remap) - 1
+        added = numpy.fromiter((target.encode(x) for x in source.values[start:]),
+                               dtype=numpy.int32, count=len(source) - start)
+        known = added if remap is None else numpy.concatenate([remap[:-1], added])
+        remap = numpy.append(known, numpy.int32(MISSING)).astype(numpy.int32)
+        remaps[id(source)] = remap
+    return remap
+
+
+def _top_indexes(values, k: int):
+    """Return the indexes of the `k` largest values, largest first."""
+    if k <= 0:
+        return numpy.empty(0, dtype=numpy.intp)
+    if k < len(values):
+        candidates = numpy.argpartition(-values, k - 1)[:k]
+    else:
+        candidates = numpy.arange(len(values))
+    return candidates[numpy.argsort(-values[candidates], kind='stable')]
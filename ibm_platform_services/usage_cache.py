@@ -0,0 +1,276 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module caches usage reports on disk.
+
+The usage of a billing month no longer changes once the month is finalized,
+but every report run downloads it again.  `UsageReportCache` keeps the
+responses of the usage report operations of `UsageReportsV4` and
+`EnterpriseUsageReportsV1` in a directory, one file per request, named by a
+hash of the operation URL and parameters:
+
+    cache = UsageReportCache('~/.cache/usage-reports')
+    cache.attach(usage_reports_service, enterprise_usage_reports_service)
+    summary = usage_reports_service.get_account_summary(account_id, '2020-10')
+
+The responses of finalized months are kept for good and never rewritten.
+The responses of the current month, and of the previous month until it is
+finalized `grace_days` after its end, are used for `ttl` seconds only.
+Other operations, and failed responses, are not cached.  The files hold the
+report data in clear, so the directory must be protected accordingly.
+
+The files are keyed by the identity of the client that sent the request, so
+that clients with different credentials can share a directory without
+reading each other's reports.  By default the identity is a hash of the
+credentials of the client's authenticator, e.g. its API key or trusted
+profile; give the cache an explicit `identity`, e.g. the account ID, for
+authenticators whose credentials change, such as bearer tokens.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+import functools
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+
+from ibm_cloud_sdk_core import BaseService, DetailedResponse
+from ibm_cloud_sdk_core.authenticators import Authenticator
+
+# The paths of the UsageReportsV4 operations end with the billing month.
+_MONTH_PATH = re.compile(r'/v4/accounts/.+/(?:summary|usage)/(\d{4}-\d{2})$')
+# EnterpriseUsageReportsV1 takes the month as a parameter.
+_ENTERPRISE_PATH = re.compile(r'/v1/resource-usage-reports$')
+_MONTH = re.compile(r'^(\d{4})-(\d{2})$')
+# The properties of the authenticators and token managers naming the caller.
+_CREDENTIALS = ('apikey', 'username', 'password', 'bearer_token', 'client_id', 'account_id',
+                'iam_account_id', 'iam_profile_crn', 'iam_profile_id', 'iam_profile_name',
+                'cr_token_filename')
+
+
+class UsageReportCache():
+    """
+    A persistent cache of usage report responses.
+
+    Any number of clients and processes may share a cache directory.
+
+    :attr str directory: The directory of the cache files.
+    :attr str identity: The identity of the clients, part of the keys of
+          the responses, or None to derive it from their credentials.
+    :attr float ttl: The time the responses of months not yet finalized are
+          used, in seconds.
+    :attr float grace_days: The number of days after its end when a month is
+          considered finalized.
+    """
+
+    _clock = staticmethod(time.time)
+
+    def __init__(self,
+                 directory: str,
+                 *,
+                 ttl: float = 900.0,
+                 grace_days: float = 3.0,
+                 identity: str = None) -> None:
+        """
+        Initialize a UsageReportCache object, creating the directory if
+        needed.
+
+        :param str directory: The directory of the cache files.
+        :param float ttl: (optional) The time the responses of months not yet
+               finalized are used, in seconds.
+        :param float grace_days: (optional) The number of days after its end
+               when a month is considered finalized.
+        :param str identity: (optional) The identity of the clients, e.g. the
+               account ID; responses cached under one identity are not
+               served to another.  Defaults to a hash of the credentials of
+               each client.
+        """
+        if ttl < 0:
+            raise ValueError('ttl must not be negative')
+        if grace_days < 0:
+            raise ValueError('grace_days must not be negative')
+        self.directory = os.path.expanduser(directory)
+        self.ttl = ttl
+        self.grace_days = grace_days
+        self.identity = identity
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        self._stats = {'hits': 0, 'misses': 0, 'stores': 0}
+        self._lock = threading.Lock()
+
+    def attach(self, *services: BaseService) -> None:
+        """
+        Serve the usage report requests of the given service clients from
+        this cache.  A client already attached to this cache is left as is.
+
+        :raises ValueError: if the cache has no `identity` and the credentials
+                of a client cannot be identified.
+        """
+        for service in services:
+            send = service.send
+            if isinstance(send, functools.partial) and send.func == self._send:
+                continue
+            identity = self.identity
+            if identity is None:
+                identity = _identity_of(service.authenticator)
+            service.send = functools.partial(self._send, send, identity)
+
+    def is_final(self, month: str) -> bool:
+        """
+        Return whether the usage of a billing month is finalized.
+
+        :param str month: The billing month, yyyy-mm.
+        :rtype: bool
+        """
+        match = _MONTH.match(month)
+        if match is None:
+            raise ValueError('invalid billing month: {0}'.format(month))
+        year, number = int(match.group(1)), int(match.group(2))
+        end = datetime(year + number // 12, number % 12 + 1, 1, tzinfo=timezone.utc)
+        now = datetime.fromtimestamp(self._clock(), timezone.utc)
+        return now >= end + timedelta(days=self.grace_days)
+
+    def clear(self, *, final: bool = False) -> int:
+        """
+        Delete the responses of the months not yet finalized.
+
+        :param bool final: (optional) Also delete the responses of finalized
+               months.
+        :return: The number of responses deleted.
+        :rtype: int
+        """
+        deleted = 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                if not final and name.endswith('.json'):
+                    entry = self._read(path)
+                    if entry is not None and entry['final']:
+                        continue
+                try:
+                    os.remove(path)
+                    deleted += 1
+                except FileNotFoundError:
+                    pass
+        return deleted
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return the counters of the cache: `hits`, `misses` (requests sent)
+        and `stores` (responses written).
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def _send(self, send, identity: str, request: Dict, **kwargs) -> DetailedResponse:
+        """Serve a request from the cache, or send it and cache the response."""
+        month = self._month(request)
+        if month is None:
+            return send(request, **kwargs)
+        path = self._path(request, month, identity)
+        final = self.is_final(month)
+        entry = self._read(path)
+        if entry is not None and (entry['final'] or
+                                  (not final and self._clock() - entry['stored_at'] < self.ttl)):
+            self._count('hits')
+            return DetailedResponse(response=entry['result'], headers=entry['headers'],
+                                    status_code=entry['status_code'])
+        self._count('misses')
+        response = send(request, **kwargs)
+        result = response.get_result()
+        if response.get_status_code() == 200 and isinstance(result, (dict, list)):
+            # A non-final entry is replaced, e.g. once its month is finalized.
+            self._write(path, {
+                'month': month,
+                'final': final,
+                'stored_at': self._clock(),
+                'status_code': 200,
+                'headers': dict(response.get_headers() or {}),
+                'result': result,
+            })
+        return response
+
+    def _month(self, request: Dict) -> Optional[str]:
+        """Return the billing month of a usage report request, or None."""
+        if request.get('method') != 'GET':
+            return None
+        path = urlsplit(request['url']).path
+        match = _MONTH_PATH.search(path)
+        if match is not None:
+            return match.group(1)
+        if _ENTERPRISE_PATH.search(path):
+            month = (request.get('params') or {}).get('month')
+            if month is None:
+                # The service defaults to the current month.
+                return datetime.fromtimestamp(self._clock(), timezone.utc).strftime('%Y-%m')
+            if _MONTH.match(month):
+                return month
+        return None
+
+    def _path(self, request: Dict, month: str, identity: str) -> str:
+        """Return the path of the cache file of a request."""
+        headers = request.get('headers') or {}
+        key = json.dumps([identity, request['url'], month, request.get('params') or {},
+                          headers.get('Accept-Language')], sort_keys=True, default=str)
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest + '.json')
+
+    @staticmethod
+    def _read(path: str) -> Optional[Dict]:
+        try:
+            with open(path, 'rb') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, path: str, entry: Dict) -> None:
+        """Write a cache file atomically."""
+        directory = os.path.dirname(path)
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        fd, temporary = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as file:
+                json.dump(entry, file)
+            os.replace(temporary, path)
+        except BaseException:
+            os.remove(temporary)
+            raise
+        self._count('stores')
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+
+def _identity_of(authenticator) -> str:
+    """Return a hash of the credentials of an authenticator."""
+    credentials = {}
+    for source in (authenticator, getattr(authenticator, 'token_manager', None)):
+        for name in _CREDENTIALS:
+            value = getattr(source, name, None)
+            if isinstance(value, str) and value:
+                credentials[name] = value
+    kind = authenticator.authentication_type()
+    if not credentials and kind != Authenticator.AUTHTYPE_NOAUTH:
+        raise ValueError('the credentials of the {0} authenticator cannot be identified, '
+                         'an identity must be given'.format(kind))
+    key = json.dumps([kind, credentials], sort_keys=True)
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
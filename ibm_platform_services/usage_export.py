@@ -0,0 +1,372 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module exports resource instance usage as columns.
+
+The usage operations of `UsageReportsV4` return `InstanceUsage` records,
+each with a list of `Metric`s.  `UsageExporter` walks all the pages of a
+report and flattens it into one row per instance and metric, accumulated
+column by column in batches of a bounded number of rows:
+
+    exporter = UsageExporter(usage_reports_service)
+    for batch in exporter.batches(account_id=account_id, billingmonth='2020-11'):
+        costs = batch.column('cost')          # array('d')
+        plans = batch.column('plan_id')       # list of str
+
+    exporter.export('usage-2020-11.parquet', account_id=account_id,
+                    billingmonth='2020-11')
+
+String columns are dictionary-encoded: each batch stores 32-bit codes into
+dictionaries of the distinct values, which are shared by all the batches of
+an export.  Numbers are stored in `array('d')`.  Memory use is thus bounded
+by the batch size and the number of distinct strings, not by the size of
+the report.  `UsageBatch.to_numpy` returns NumPy views of the columns, and
+`export` writes Parquet files with pyarrow; both are optional dependencies
+(`pip install ibm-platform-services[analytics,parquet]`).
+CSV files are written without either.
+"""
+
+from array import array
+from typing import Dict, Iterable, Iterator, Tuple
+import csv
+
+from .usage_reports_v4 import UsageReportsV4
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+try:
+    import pyarrow
+    import pyarrow.compute
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+ACCOUNT = 'account'
+RESOURCE_GROUP = 'resource_group'
+ORGANIZATION = 'org'
+
+# The columns of the export: the string columns, then the number columns.
+STRING_COLUMNS = ('month', 'account_id', 'resource_group_id', 'organization_id',
+                  'resource_instance_id', 'resource_id', 'plan_id', 'region', 'currency_code',
+                  'metric', 'unit')
+NUMBER_COLUMNS = ('quantity', 'rateable_quantity', 'cost', 'rated_cost')
+COLUMNS = STRING_COLUMNS + NUMBER_COLUMNS
+
+# The code of a missing string value; it is never stored in a dictionary.
+MISSING = -1
+
+_INSTANCE_FIELDS = STRING_COLUMNS[:-2]
+_NAN = float('nan')
+
+
+class Dictionary():
+    """
+    The distinct values of a string column, each with a code: its index in
+    `values`.  Codes are never reassigned, so the codes of earlier batches
+    stay valid as values are added.  A missing value (None) is encoded as
+    `MISSING` and is not added.
+
+    :attr List[str] values: The values, by code.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize an empty Dictionary object.
+        """
+        self.values = []
+        self._codes = {}
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def encode(self, value: str) -> int:
+        """Return the code of a value, adding it if it is new."""
+        if value is None:
+            return MISSING
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def code(self, value: str) -> int:
+        """
+        Return the code of a value, or -1 if it is not in the dictionary;
+        -1 is also `MISSING`, the code of None.
+        """
+        return self._codes.get(value, -1)
+
+
+class UsageBatch():
+    """
+    Flattened usage rows, stored by column.
+
+    :attr Dict[str, Dictionary] dictionaries: The dictionary of each string
+          column.
+    :attr Dict[str, array] codes: The codes of each string column,
+          `array('i')`.
+    :attr Dict[str, array] numbers: The values of each number column,
+          `array('d')`; missing values are NaN.
+    """
+
+    def __init__(self, dictionaries: Dict[str, Dictionary]) -> None:
+        """
+        Initialize an empty UsageBatch object.
+
+        :param dict dictionaries: The dictionary of each string column.
+        """
+        self.dictionaries = dictionaries
+        self.codes = {name: array('i') for name in STRING_COLUMNS}
+        self.numbers = {name: array('d') for name in NUMBER_COLUMNS}
+
+    def __len__(self) -> int:
+        """Return the number of rows."""
+        return len(self.numbers['cost'])
+
+    def append(self, instance: Dict, metric: Dict) -> None:
+        """Add the row of a metric of an instance usage record."""
+        self._append(self._encode(instance), metric)
+
+    def _encode(self, instance: Dict) -> list:
+        """Return the codes of the fields of an instance usage record."""
+        return [self.dictionaries[name].encode(instance.get(name)) for name in _INSTANCE_FIELDS]
+
+    def _append(self, instance_codes: list, metric: Dict) -> None:
+        for name, code in zip(_INSTANCE_FIELDS, instance_codes):
+            self.codes[name].append(code)
+        self.codes['metric'].append(self.dictionaries['metric'].encode(metric.get('metric')))
+        self.codes['unit'].append(self.dictionaries['unit'].encode(metric.get('unit')))
+        for name in NUMBER_COLUMNS:
+            value = metric.get(name)
+            self.numbers[name].append(_NAN if value is None else value)
+
+    def column(self, name: str) -> Iterable:
+        """
+        Return a column: the list of the values of a string column, or the
+        `array('d')` of a number column.
+        """
+        if name in self.numbers:
+            return self.numbers[name]
+        values = self.dictionaries[name].values
+        return [values[code] if code != MISSING else None for code in self.codes[name]]
+
+    def rows(self) -> Iterator[Tuple]:
+        """Yield the rows, as tuples of the values of `COLUMNS`."""
+        columns = [self.column(name) for name in COLUMNS]
+        return zip(*columns)
+
+    def to_numpy(self) -> Dict:
+        """
+        Return the columns as NumPy arrays: `int32` codes for the string
+        columns and `float64` values for the number columns, both sharing
+        the memory of the batch.  Missing strings have the code `MISSING`.
+
+        :raises ImportError: if NumPy is not installed.
+        :rtype: dict
+        """
+        if numpy is None:
+            raise ImportError('to_numpy requires numpy; '
+                              'install it with "pip install ibm-platform-services[analytics]"')
+        columns = {name: numpy.frombuffer(codes, dtype=numpy.int32)
+                   for name, codes in self.codes.items()}
+        columns.update((name, numpy.frombuffer(values, dtype=numpy.float64))
+                       for name, values in self.numbers.items())
+        return columns
+
+
+def flatten(instances: Iterable[Dict],
+            *,
+            batch_size: int = 10000,
+            dictionaries: Dict[str, Dictionary] = None) -> Iterator[UsageBatch]:
+    """
+    Flatten instance usage records into batches of rows.
+
+    :param Iterable[dict] instances: The json dictionaries of `InstanceUsage`
+           records.
+    :param int batch_size: (optional) The maximum number of rows per batch.
+    :param dict dictionaries: (optional) The dictionaries to encode the
+           string columns with, to share them with other exports.
+    :return: An iterator of batches; all but the last are full.
+    :rtype: Iterator[UsageBatch]
+    """
+    if batch_size < 1:
+        raise ValueError('batch_size must be at least 1')
+    if dictionaries is None:
+        dictionaries = {name: Dictionary() for name in STRING_COLUMNS}
+    batch = UsageBatch(dictionaries)
+    for instance in instances:
+        usage = instance.get('usage')
+        if not usage:
+            continue
+        instance_codes = batch._encode(instance)  # pylint: disable=protected-access
+        for metric in usage:
+            batch._append(instance_codes, metric)  # pylint: disable=protected-access
+            if len(batch) >= batch_size:
+                yield batch
+                batch = UsageBatch(dictionaries)
+    if len(batch):
+        yield batch
+
+
+class UsageExporter():
+    """
+    Streams the resource instance usage of an account, resource group or
+    organization into columns.
+
+    :attr UsageReportsV4 service: The Usage Reports client.
+    :attr int batch_size: The maximum number of rows per batch.
+    :attr int limit: The number of records per page.
+    :attr bool prefetch: Whether the next page is requested while the
+          current one is flattened.
+    """
+
+    def __init__(self,
+                 service: UsageReportsV4,
+                 *,
+                 batch_size: int = 10000,
+                 limit: int = 20,
+                 prefetch: bool = True) -> None:
+        """
+        Initialize a UsageExporter object.
+
+        :param UsageReportsV4 service: The Usage Reports client.
+        :param int batch_size: (optional) The maximum number of rows per batch.
+        :param int limit: (optional) The number of records per page, at most
+               20.
+        :param bool prefetch: (optional) Request the next page while the
+               current one is flattened.
+        """
+        if batch_size < 1:
+            raise ValueError('batch_size must be at least 1')
+        self.service = service
+        self.batch_size = batch_size
+        self.limit = limit
+        self.prefetch = prefetch
+
+    def batches(self,
+                *,
+                account_id: str,
+                billingmonth: str,
+                scope: str = ACCOUNT,
+                resource_group_id: str = None,
+                organization_id: str = None,
+                **kwargs) -> Iterator[UsageBatch]:
+        """
+        Stream a usage report as batches of rows.
+
+        :param str account_id: The ID of the account.
+        :param str billingmonth: The billing month, `yyyy-mm`.
+        :param str scope: (optional) The report: `account` (the default),
+               `resource_group` or `org`.
+        :param str resource_group_id: (optional) The resource group of a
+               `resource_group` report, or a filter of an `account` report.
+        :param str organization_id: (optional) The organization of an `org`
+               report, or a filter of an `account` report.
+        :param **kwargs: Other parameters of the usage operation, e.g.
+               `plan_id`.
+        :rtype: Iterator[UsageBatch]
+        """
+        if scope not in (ACCOUNT, RESOURCE_GROUP, ORGANIZATION):
+            raise ValueError('scope must be account, resource_group or org')
+        if scope == RESOURCE_GROUP and resource_group_id is None:
+            raise ValueError('resource_group_id must be provided')
+        if scope == ORGANIZATION and organization_id is None:
+            raise ValueError('organization_id must be provided')
+        kwargs.update(account_id=account_id, billingmonth=billingmonth)
+        if resource_group_id is not None:
+            kwargs['resource_group_id'] = resource_group_id
+        if organization_id is not None:
+            kwargs['organization_id'] = organization_id
+        kwargs.setdefault('limit', self.limit)
+        list_iter = getattr(self.service, 'get_resource_usage_{0}_iter'.format(scope))
+        return flatten(list_iter(prefetch=self.prefetch, **kwargs), batch_size=self.batch_size)
+
+    def export(self, path: str, *, format: str = None, **kwargs) -> int:  # pylint: disable=redefined-builtin
+        """
+        Write a usage report to a file, one batch at a time.
+
+        :param str path: The path of the file.
+        :param str format: (optional) `parquet` (one row group per batch,
+               string columns dictionary-encoded; requires pyarrow) or
+               `csv`. Defaults to `parquet` when pyarrow is installed.
+        :param **kwargs: The parameters of `batches`.
+        :return: The number of rows written.
+        :rtype: int
+        """
+        if format is None:
+            format = 'parquet' if pyarrow is not None else 'csv'
+        if format == 'parquet':
+            if pyarrow is None:
+                raise ImportError('parquet export requires pyarrow; '
+                                  'install it with "pip install ibm-platform-services[parquet]"')
+            sink = _ParquetSink(path)
+        elif format == 'csv':
+            sink = _CsvSink(path)
+        else:
+            raise ValueError('format must be parquet or csv')
+        rows = 0
+        try:
+            for batch in self.batches(**kwargs):
+                sink.write(batch)
+                rows += len(batch)
+        finally:
+            sink.close()
+        return rows
+
+
+class _CsvSink():
+    """Writes batches to a CSV file with a header row."""
+
+    def __init__(self, path: str) -> None:
+        self._file = open(path, 'w', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(COLUMNS)
+
+    def write(self, batch: UsageBatch) -> None:
+        self._writer.writerows(batch.rows())
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class _ParquetSink():
+    """Writes batches to a Parquet file, one row group per batch."""
+
+    def __init__(self, path: str) -> None:
+        strings = pyarrow.dictionary(pyarrow.int32(), pyarrow.string())
+        self._schema = pyarrow.schema([(name, strings) for name in STRING_COLUMNS] +
+                                      [(name, pyarrow.float64()) for name in NUMBER_COLUMNS])
+        self._writer = pyarrow.parquet.ParquetWriter(path, self._schema)
+
+    def write(self, batch: UsageBatch) -> None:
+        arrays = []
+        for name in STRING_COLUMNS:
+            # Missing values are null indices; the dictionary holds no null.
+            indices = pyarrow.array(batch.codes[name], type=pyarrow.int32())
+            indices = pyarrow.compute.if_else(pyarrow.compute.equal(indices, MISSING),
+                                              pyarrow.scalar(None, type=pyarrow.int32()), indices)
+            arrays.append(pyarrow.DictionaryArray.from_arrays(
+                indices, pyarrow.array(batch.dictionaries[name].values, type=pyarrow.string())))
+        for name in NUMBER_COLUMNS:
+            arrays.append(pyarrow.array(batch.numbers[name], type=pyarrow.float64()))
+        self._writer.write_table(pyarrow.Table.from_arrays(arrays, schema=self._schema))
+
+    def close(self) -> None:
+        self._writer.close()
@@ -0,0 +1,337 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module fetches the usage of many accounts and months concurrently.
+
+`UsageFetcher` requests the account usage (`get_account_usage`) and the
+pages of resource instance usage (`get_resource_usage_account`) of every
+account and billing month on a thread pool.  At most `per_account` requests
+of an account are in flight at a time, and accounts take turns for the free
+workers.  Requests rate limited (429) or failing with a server error (5xx)
+are retried with backoff.  Each page is passed to a sink as soon as it is
+received, on the calling thread:
+
+    def sink(page):
+        for record in page.resources:
+            out.write(json.dumps(dict(record, billingmonth=page.billingmonth)) + '\\n')
+
+    fetcher = UsageFetcher(usage_reports_service, max_workers=16, per_account=4)
+    result = fetcher.fetch(account_ids, months_between('2019-01', '2020-12'), sink)
+    print(result)
+
+The pages of one report come one after the other, since each gives the
+offset of the next; the reports of different accounts and months are
+fetched side by side.  Attach a `UsageReportCache` to the service to serve
+finalized months from disk.
+"""
+
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List
+import queue
+import re
+import time
+
+from .retry import backoff_delay, is_retryable
+from .usage_reports_v4 import UsageReportsV4
+
+ACCOUNT_USAGE = 'account_usage'
+RESOURCE_USAGE = 'resource_usage'
+
+_MONTH = re.compile(r'^(\d{4})-(\d{2})$')
+
+
+def months_between(first: str, last: str) -> List[str]:
+    """
+    Return the billing months from `first` to `last`, both included.
+
+    :param str first: The first month, yyyy-mm.
+    :param str last: The last month, yyyy-mm.
+    :rtype: List[str]
+    """
+    bounds = []
+    for month in (first, last):
+        match = _MONTH.match(month)
+        if match is None or not 1 <= int(match.group(2)) <= 12:
+            raise ValueError('invalid billing month: {0}'.format(month))
+        bounds.append(int(match.group(1)) * 12 + int(match.group(2)) - 1)
+    if bounds[0] > bounds[1]:
+        raise ValueError('first must not be after last')
+    return ['{0:04d}-{1:02d}'.format(x // 12, x % 12 + 1) for x in range(bounds[0], bounds[1] + 1)]
+
+
+class UsagePage():
+    """
+    A page of a usage report.
+
+    :attr str account_id: The ID of the account.
+    :attr str billingmonth: The billing month.
+    :attr str report: `account_usage` or `resource_usage`.
+    :attr int page: The index of the page in the report, from 0.
+    :attr dict result: The json dictionary of the `AccountUsage`, or of the
+          `InstancesUsage` page.
+    """
+
+    def __init__(self, account_id: str, billingmonth: str, report: str, page: int,
+                 result: Dict) -> None:
+        """
+        Initialize a UsagePage object.
+        """
+        self.account_id = account_id
+        self.billingmonth = billingmonth
+        self.report = report
+        self.page = page
+        self.result = result
+
+    @property
+    def resources(self) -> List[Dict]:
+        """The usage records of the page."""
+        return self.result.get('resources') or []
+
+
+class FetchResult():
+    """
+    The outcome of a fetch.
+
+    :attr int pages: The number of pages passed to the sink.
+    :attr int records: The number of usage records in those pages.
+    :attr dict failed: The reports that could not be fetched in full, by
+          (account ID, month, report), mapped to the error of the last
+          attempt.
+    :attr int requests: The number of requests sent.
+    :attr int retried: The number of requests that were retried.
+    :attr float seconds: The duration of the fetch.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize a FetchResult object.
+        """
+        self.pages = 0
+        self.records = 0
+        self.failed = OrderedDict()
+        self.requests = 0
+        self.retried = 0
+        self.seconds = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """The number of pages fetched per second."""
+        return self.pages / self.seconds if self.seconds else 0.0
+
+    def to_dict(self) -> Dict:
+        """Return a json dictionary summarizing the outcome."""
+        return {
+            'pages': self.pages,
+            'records': self.records,
+            'failed': len(self.failed),
+            'requests': self.requests,
+            'retried': self.retried,
+            'seconds': round(self.seconds, 3),
+            'per_second': round(self.throughput, 3),
+        }
+
+    def __str__(self) -> str:
+        """Return a `str` version of this object."""
+        return 'FetchResult({0})'.format(', '.join(
+            '{0}={1}'.format(k, v) for k, v in self.to_dict().items()))
+
+
+class _Task():
+    """A request for a page of a report."""
+
+    __slots__ = ('account_id', 'billingmonth', 'report', 'page', 'start')
+
+    def __init__(self, account_id, billingmonth, report, page=0, start=None):
+        self.account_id = account_id
+        self.billingmonth = billingmonth
+        self.report = report
+        self.page = page
+        self.start = start
+
+
+class UsageFetcher():
+    """
+    Fetches usage reports of many accounts and months on a thread pool.
+
+    :attr UsageReportsV4 service: The Usage Reports client.
+    :attr int max_workers: The maximum number of requests in flight.
+    :attr int per_account: The maximum number of requests of one account in
+          flight.
+    :attr int limit: The number of records per page of resource usage.
+    :attr int max_attempts: The maximum number of attempts of a request.
+    :attr float backoff: The base delay between attempts, in seconds.
+    :attr float max_backoff: The maximum delay between attempts, in seconds.
+    """
+
+    def __init__(self,
+                 service: UsageReportsV4,
+                 *,
+                 max_workers: int = 16,
+                 per_account: int = 4,
+                 limit: int = 20,
+                 max_attempts: int = 5,
+                 backoff: float = 1.0,
+                 max_backoff: float = 30.0) -> None:
+        """
+        Initialize a UsageFetcher object.
+
+        :param UsageReportsV4 service: The Usage Reports client.
+        :param int max_workers: (optional) The maximum number of requests in
+               flight.
+        :param int per_account: (optional) The maximum number of requests of
+               one account in flight.
+        :param int limit: (optional) The number of records per page of
+               resource usage, at most 20.
+        :param int max_attempts: (optional) The maximum number of attempts of
+               a request.
+        :param float backoff: (optional) The base delay between attempts, in
+               seconds.
+        :param float max_backoff: (optional) The maximum delay between
+               attempts, in seconds.
+        """
+        if max_workers < 1:
+            raise ValueError('max_workers must be at least 1')
+        if per_account < 1:
+            raise ValueError('per_account must be at least 1')
+        if max_attempts < 1:
+            raise ValueError('max_attempts must be at least 1')
+        self.service = service
+        self.max_workers = max_workers
+        self.per_account = per_account
+        self.limit = limit
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def fetch(self,
+              account_ids: Iterable[str],
+              months: Iterable[str],
+              sink: Callable[[UsagePage], None] = None,
+              *,
+              reports: Iterable[str] = (ACCOUNT_USAGE, RESOURCE_USAGE),
+              **kwargs) -> FetchResult:
+        """
+        Fetch the usage reports of accounts and months.
+
+        A report that fails stops at the page that failed and is recorded in
+        `FetchResult.failed`; the other reports go on.  If the sink raises,
+        no new request is started and the error is raised once the requests
+        in flight complete.
+
+        :param Iterable[str] account_ids: The IDs of the accounts.
+        :param Iterable[str] months: The billing months, yyyy-mm.
+        :param Callable sink: (optional) The function receiving each
+               `UsagePage`, called on the calling thread.
+        :param Iterable[str] reports: (optional) The reports fetched,
+               `account_usage` and/or `resource_usage`.
+        :param **kwargs: Other parameters of the operations, e.g. `names`,
+               `headers` or the filters of `get_resource_usage_account`;
+               `limit` and `start` are set by the fetcher.
+        :rtype: FetchResult
+        """
+        for name in ('limit', 'start'):
+            if name in kwargs:
+                raise ValueError('{0} is set by the fetcher'.format(name))
+        reports = list(reports)
+        for report in reports:
+            if report not in (ACCOUNT_USAGE, RESOURCE_USAGE):
+                raise ValueError('unknown report: {0}'.format(report))
+        months = list(months)
+        started = time.monotonic()
+        result = FetchResult()
+        ready = OrderedDict()
+        for account_id in account_ids:
+            ready[account_id] = deque(_Task(account_id, month, report)
+                                      for month in months for report in reports)
+        running = dict.fromkeys(ready, 0)
+        turns = deque(ready)
+        done = queue.Queue()
+        in_flight = 0
+        error = None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while True:
+                # Accounts take turns for the free workers.
+                idle = 0
+                while error is None and in_flight < self.max_workers and idle < len(turns):
+                    account_id = turns[0]
+                    turns.rotate(-1)
+                    tasks = ready[account_id]
+                    if not tasks or running[account_id] >= self.per_account:
+                        idle += 1
+                        continue
+                    idle = 0
+                    running[account_id] += 1
+                    in_flight += 1
+                    executor.submit(self._run, tasks.popleft(), kwargs, done)
+                if in_flight == 0:
+                    break
+                task, page, attempts, failure = done.get()
+                in_flight -= 1
+                running[task.account_id] -= 1
+                result.requests += attempts
+                result.retried += attempts - 1
+                if failure is not None:
+                    result.failed[(task.account_id, task.billingmonth, task.report)] = failure
+                    continue
+                if error is not None:
+                    continue
+                usage_page = UsagePage(task.account_id, task.billingmonth, task.report,
+                                       task.page, page)
+                try:
+                    if sink is not None:
+                        sink(usage_page)
+                except Exception as err:  # pylint: disable=broad-except
+                    error = err
+                    continue
+                result.pages += 1
+                result.records += len(usage_page.resources)
+                start = (page.get('next') or {}).get('offset') if task.report == RESOURCE_USAGE else None
+                if start:
+                    # Finish the reports already started first.
+                    ready[task.account_id].appendleft(
+                        _Task(task.account_id, task.billingmonth, task.report, task.page + 1, start))
+
+        result.seconds = time.monotonic() - started
+        if error is not None:
+            raise error
+        return result
+
+    def _run(self, task: _Task, kwargs: Dict, done: queue.Queue) -> None:
+        """Request a page, retrying, and queue the outcome."""
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                if task.report == ACCOUNT_USAGE:
+                    extra = {'headers': kwargs['headers']} if 'headers' in kwargs else {}
+                    response = self.service.get_account_usage(
+                        task.account_id, task.billingmonth, names=kwargs.get('names'),
+                        accept_language=kwargs.get('accept_language'), **extra)
+                else:
+                    response = self.service.get_resource_usage_account(
+                        task.account_id, task.billingmonth, limit=self.limit, start=task.start,
+                        **kwargs)
+                done.put((task, response.get_result(), attempt, None))
+                return
+            except Exception as err:  # pylint: disable=broad-except
+                if not is_retryable(err) or attempt >= self.max_attempts:
+                    done.put((task, None, attempt, err))
+                    return
+                delay = backoff_delay(attempt, base=self.backoff, cap=self.max_backoff, err=err)
+            time.sleep(delay)
@@ -0,0 +1,340 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module walks the usage reports of an enterprise hierarchy.
+
+`EnterpriseUsageReportsV1.get_resource_usage_report` returns the reports of
+the children of an enterprise or account group with `children=true`, a
+page at a time.  `HierarchyTraverser` expands the hierarchy breadth-first
+from an enterprise or an account group, requesting the children of many
+entities at once on a thread pool, and returns the tree of `UsageNode`s with
+the usage of each entity rolled up from its accounts:
+
+    traverser = HierarchyTraverser(enterprise_usage_reports_service, max_workers=8)
+    root = traverser.traverse(enterprise_id=enterprise_id, month='2020-11')
+    for node in root.walk():
+        print(node.entity_type, node.entity_name, node.totals['billable_cost'])
+
+The rolled-up `resources` of a node have the json structure of
+`ResourceUsage`, `PlanUsage` and `MetricUsage`, summed by resource, by plan,
+pricing region and billable flag, and by metric and unit; prices are not
+carried over.  An entity reported twice is kept once.
+"""
+
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional
+import queue
+import time
+
+from .enterprise_usage_reports_v1 import EnterpriseUsageReportsV1, ResourceUsageReport
+from .pagers import get_query_param
+from .retry import backoff_delay, is_retryable
+
+ENTERPRISE = ResourceUsageReport.EntityTypeEnum.ENTERPRISE.value
+ACCOUNT_GROUP = ResourceUsageReport.EntityTypeEnum.ACCOUNT_GROUP.value
+ACCOUNT = ResourceUsageReport.EntityTypeEnum.ACCOUNT.value
+
+# The parameter selecting an entity, by type of the entities with children.
+_PARENT_PARAMS = {ENTERPRISE: 'enterprise_id', ACCOUNT_GROUP: 'account_group_id'}
+
+_COSTS = ('billable_cost', 'non_billable_cost', 'billable_rated_cost', 'non_billable_rated_cost')
+_PLAN_TOTALS = ('cost', 'rated_cost')
+_METRIC_TOTALS = ('quantity', 'rateable_quantity', 'cost', 'rated_cost')
+
+
+class UsageNode():
+    """
+    An entity of an enterprise hierarchy with its usage.
+
+    :attr str entity_id: The ID of the entity.
+    :attr str entity_type: `enterprise`, `account-group` or `account`.
+    :attr str entity_name: The name of the entity.
+    :attr dict report: The json dictionary of the `ResourceUsageReport` of
+          the entity, as returned by the service.
+    :attr int depth: The distance from the root of the traversal.
+    :attr List[UsageNode] children: The child entities.
+    :attr bool expanded: Whether the children were requested.
+    :attr dict totals: The rolled-up billable and non-billable costs.
+    :attr List[dict] resources: The rolled-up usage, by resource.
+    """
+
+    def __init__(self, report: Dict, depth: int = 0) -> None:
+        """
+        Initialize a UsageNode object.
+
+        :param dict report: The json dictionary of the report of the entity.
+        :param int depth: (optional) The distance from the root.
+        """
+        self.entity_id = report.get('entity_id')
+        self.entity_type = report.get('entity_type')
+        self.entity_name = report.get('entity_name')
+        self.report = report
+        self.depth = depth
+        self.children = []
+        self.expanded = False
+        self.totals = dict.fromkeys(_COSTS, 0.0)
+        self.resources = []
+
+    def walk(self) -> Iterator['UsageNode']:
+        """Yield this node and its descendants, breadth-first."""
+        nodes = deque([self])
+        while nodes:
+            node = nodes.popleft()
+            yield node
+            nodes.extend(node.children)
+
+    def find(self, entity_id: str) -> Optional['UsageNode']:
+        """Return the node of an entity in this tree, or None."""
+        for node in self.walk():
+            if node.entity_id == entity_id:
+                return node
+        return None
+
+    def accounts(self) -> List['UsageNode']:
+        """Return the account nodes of this tree."""
+        return [x for x in self.walk() if x.entity_type == ACCOUNT]
+
+    def roll_up(self) -> None:
+        """
+        Compute the rolled-up usage of this node: the sum of its children if
+        it was expanded, its own report otherwise.  The children must be
+        rolled up first.
+        """
+        totals = dict.fromkeys(_COSTS, 0.0)
+        resources = OrderedDict()
+        if self.expanded:
+            for child in self.children:
+                _add(totals, child.totals, _COSTS)
+                _merge(resources, child.resources)
+        else:
+            _add(totals, self.report, _COSTS)
+            _merge(resources, self.report.get('resources') or [])
+        self.totals = totals
+        self.resources = [resource for resource, _ in resources.values()]
+
+    def to_dict(self) -> Dict:
+        """Return a json dictionary of the rolled-up tree."""
+        _dict = {
+            'entity_id': self.entity_id,
+            'entity_type': self.entity_type,
+            'entity_name': self.entity_name,
+        }
+        _dict.update(self.totals)
+        _dict['resources'] = self.resources
+        _dict['children'] = [x.to_dict() for x in self.children]
+        return _dict
+
+    def __str__(self) -> str:
+        """Return a `str` version of this object."""
+        return 'UsageNode({0} {1}, children={2}, billable_cost={3})'.format(
+            self.entity_type, self.entity_id, len(self.children), self.totals['billable_cost'])
+
+
+class HierarchyTraverser():
+    """
+    Expands enterprise hierarchies and rolls up their usage.
+
+    :attr EnterpriseUsageReportsV1 service: The Enterprise Usage Reports
+          client.
+    :attr int max_workers: The maximum number of requests in flight.
+    :attr int limit: The number of reports per page, or None for the
+          service default.
+    :attr int max_attempts: The maximum number of attempts of a request.
+    :attr float backoff: The base delay between attempts, in seconds.
+    :attr float max_backoff: The maximum delay between attempts, in seconds.
+    """
+
+    def __init__(self,
+                 service: EnterpriseUsageReportsV1,
+                 *,
+                 max_workers: int = 8,
+                 limit: int = None,
+                 max_attempts: int = 3,
+                 backoff: float = 1.0,
+                 max_backoff: float = 30.0) -> None:
+        """
+        Initialize a HierarchyTraverser object.
+
+        :param EnterpriseUsageReportsV1 service: The Enterprise Usage Reports
+               client.
+        :param int max_workers: (optional) The maximum number of requests in
+               flight.
+        :param int limit: (optional) The number of reports per page.
+        :param int max_attempts: (optional) The maximum number of attempts of
+               a request, retrying rate limiting and server errors.
+        :param float backoff: (optional) The base delay between attempts, in
+               seconds.
+        :param float max_backoff: (optional) The maximum delay between
+               attempts, in seconds.
+        """
+        if max_workers < 1:
+            raise ValueError('max_workers must be at least 1')
+        if max_attempts < 1:
+            raise ValueError('max_attempts must be at least 1')
+        self.service = service
+        self.max_workers = max_workers
+        self.limit = limit
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def traverse(self,
+                 *,
+                 enterprise_id: str = None,
+                 account_group_id: str = None,
+                 month: str = None,
+                 billing_unit_id: str = None,
+                 max_depth: int = None) -> UsageNode:
+        """
+        Expand the hierarchy under an enterprise or an account group and roll
+        up its usage.
+
+        The pages of the children of one entity are requested one after the
+        other, since each gives the offset of the next; the children of
+        different entities are requested side by side.  If a request fails,
+        no new request is started and the error is raised once the requests
+        in flight complete.
+
+        :param str enterprise_id: (optional) The ID of the enterprise at the
+               root.
+        :param str account_group_id: (optional) The ID of the account group
+               at the root.
+        :param str month: (optional) The billing month, yyyy-mm; defaults to
+               the current month.
+        :param str billing_unit_id: (optional) The ID of the billing unit by
+               which to filter the reports.
+        :param int max_depth: (optional) The depth of the deepest entities
+               returned; entities at that depth are not expanded and count
+               with their own reports.
+        :return: The root of the tree.
+        :rtype: UsageNode
+        """
+        if (enterprise_id is None) == (account_group_id is None):
+            raise ValueError('exactly one of enterprise_id or account_group_id must be provided')
+        params = {'month': month, 'billing_unit_id': billing_unit_id}
+        if enterprise_id is not None:
+            root_type, root_id = ENTERPRISE, enterprise_id
+        else:
+            root_type, root_id = ACCOUNT_GROUP, account_group_id
+        reports = self._get(dict(params, **{_PARENT_PARAMS[root_type]: root_id})).get('reports')
+        root = UsageNode(dict({'entity_id': root_id, 'entity_type': root_type},
+                              **(reports[0] if reports else {})))
+
+        seen = {root_id}
+        pending = deque()
+        if max_depth is None or max_depth > 0:
+            pending.append((root, None))
+        done = queue.Queue()
+        in_flight = 0
+        error = None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while True:
+                while error is None and pending and in_flight < self.max_workers:
+                    node, offset = pending.popleft()
+                    in_flight += 1
+                    executor.submit(self._children, node, offset, params, done)
+                if in_flight == 0:
+                    break
+                node, page, failure = done.get()
+                in_flight -= 1
+                if failure is not None:
+                    error = error or failure
+                    continue
+                if error is not None:
+                    continue
+                node.expanded = True
+                for report in page.get('reports') or []:
+                    if report.get('entity_id') in seen:
+                        continue
+                    seen.add(report.get('entity_id'))
+                    child = UsageNode(report, node.depth + 1)
+                    node.children.append(child)
+                    if child.entity_type in _PARENT_PARAMS and \
+                            (max_depth is None or child.depth < max_depth):
+                        pending.append((child, None))
+                offset = get_query_param((page.get('next') or {}).get('href'), 'offset')
+                if offset:
+                    pending.appendleft((node, offset))
+
+        if error is not None:
+            raise error
+        for node in reversed(list(root.walk())):
+            node.roll_up()
+        return root
+
+    def _children(self, node: UsageNode, offset: Optional[str], params: Dict,
+                  done: queue.Queue) -> None:
+        """Request a page of the children of a node and queue the outcome."""
+        try:
+            page = self._get(dict(params, children=True, limit=self.limit, offset=offset,
+                                  **{_PARENT_PARAMS[node.entity_type]: node.entity_id}))
+            done.put((node, page, None))
+        except Exception as err:  # pylint: disable=broad-except
+            done.put((node, None, err))
+
+    def _get(self, params: Dict) -> Dict:
+        """Request reports, retrying rate limiting and server errors."""
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return self.service.get_resource_usage_report(**params).get_result()
+            except Exception as err:  # pylint: disable=broad-except
+                if not is_retryable(err) or attempt >= self.max_attempts:
+                    raise
+                delay = backoff_delay(attempt, base=self.backoff, cap=self.max_backoff, err=err)
+            time.sleep(delay)
+
+
+def _add(totals: Dict, values: Dict, names: Iterable[str]) -> None:
+    for name in names:
+        totals[name] = totals.get(name, 0.0) + (values.get(name) or 0.0)
+
+
+def _merge(resources: Dict, usage: Iterable[Dict]) -> None:
+    """
+    Add `ResourceUsage` json dictionaries to a rollup, which maps resource
+    IDs to the rolled-up dictionary and an index of its plans.
+    """
+    for resource in usage:
+        resource_id = resource.get('resource_id')
+        if resource_id not in resources:
+            total = {'resource_id': resource_id}
+            total.update(dict.fromkeys(_COSTS, 0.0))
+            total['plans'] = []
+            resources[resource_id] = (total, {})
+        total, plans = resources[resource_id]
+        _add(total, resource, _COSTS)
+        for plan in resource.get('plans') or []:
+            key = (plan.get('plan_id'), plan.get('pricing_region'), plan.get('billable'))
+            if key not in plans:
+                plan_total = {'plan_id': key[0], 'pricing_region': key[1], 'billable': key[2],
+                              'cost': 0.0, 'rated_cost': 0.0, 'usage': []}
+                total['plans'].append(plan_total)
+                plans[key] = (plan_total, {})
+            plan_total, metrics = plans[key]
+            _add(plan_total, plan, _PLAN_TOTALS)
+            for metric in plan.get('usage') or []:
+                key = (metric.get('metric'), metric.get('unit'))
+                if key not in metrics:
+                    metric_total = {'metric': key[0], 'unit': key[1]}
+                    metric_total.update(dict.fromkeys(_METRIC_TOTALS, 0.0))
+                    plan_total['usage'].append(metric_total)
+                    metrics[key] = metric_total
+                _add(metrics[key], metric, _METRIC_TOTALS)
@@ -21,7 +21,7 @@ Usage reports for IBM Cloud accounts
 """
 
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, Iterator, List
 import json
 
 from ibm_cloud_sdk_core import BaseService, DetailedResponse
@@ -30,6 +30,7 @@ from ibm_cloud_sdk_core.get_authenticator import get_authenticator_from_environm
 from ibm_cloud_sdk_core.utils import datetime_to_string, string_to_datetime
 
 from .common import get_sdk_headers
+from .pagers import token_pager
 
 ##############################################################################
 # Service
@@ -395,6 +396,30 @@ class UsageReportsV4(BaseService):
         return response
 
 
+    def get_resource_usage_account_iter(self,
+        *,
+        prefetch: bool = False,
+        **kwargs
+    ) -> Iterator[Dict]:
+        """
+        Iterate over all resource instance usage reports.
+
+        Yields the resource instance usage reports returned by
+        `get_resource_usage_account` one at a time, passing the `offset` of the `next`
+        link as `start` until the last page. Pages are requested as the iterator advances.
+
+        :param bool prefetch: (optional) Request the next page on a background
+               thread while the current page is being consumed.
+        :param **kwargs: The parameters of `get_resource_usage_account`.
+        :return: An iterator of `dict`s representing `InstanceUsage` objects.
+        :rtype: Iterator[dict]
+        """
+
+        return iter(token_pager(self.get_resource_usage_account, 'resources', 'start',
+                                lambda result: (result.get('next') or {}).get('offset'),
+                                prefetch=prefetch, **kwargs))
+
+
     def get_resource_usage_resource_group(self,
         account_id: str,
         resource_group_id: str,
@@ -481,6 +506,31 @@ class UsageReportsV4(BaseService):
         return response
 
 
+    def get_resource_usage_resource_group_iter(self,
+        *,
+        prefetch: bool = False,
+        **kwargs
+    ) -> Iterator[Dict]:
+        """
+        Iterate over all resource instance usage reports.
+
+        Yields the resource instance usage reports returned by
+        `get_resource_usage_resource_group` one at a time, passing the `offset` of the
+        `next` link as `start` until the last page. Pages are requested as the iterator
+        advances.
+
+        :param bool prefetch: (optional) Request the next page on a background
+               thread while the current page is being consumed.
+        :param **kwargs: The parameters of `get_resource_usage_resource_group`.
+        :return: An iterator of `dict`s representing `InstanceUsage` objects.
+        :rtype: Iterator[dict]
+        """
+
+        return iter(token_pager(self.get_resource_usage_resource_group, 'resources', 'start',
+                                lambda result: (result.get('next') or {}).get('offset'),
+                                prefetch=prefetch, **kwargs))
+
+
     def get_resource_usage_org(self,
         account_id: str,
         organization_id: str,
@@ -566,6 +616,30 @@ class UsageReportsV4(BaseService):
         return response
 
 
+    def get_resource_usage_org_iter(self,
+        *,
+        prefetch: bool = False,
+        **kwargs
+    ) -> Iterator[Dict]:
+        """
+        Iterate over all resource instance usage reports.
+
+        Yields the resource instance usage reports returned by `get_resource_usage_org`
+        one at a time, passing the `offset` of the `next` link as `start` until the last
+        page. Pages are requested as the iterator advances.
+
+        :param bool prefetch: (optional) Request the next page on a background
+               thread while the current page is being consumed.
+        :param **kwargs: The parameters of `get_resource_usage_org`.
+        :return: An iterator of `dict`s representing `InstanceUsage` objects.
+        :rtype: Iterator[dict]
+        """
+
+        return iter(token_pager(self.get_resource_usage_org, 'resources', 'start',
+                                lambda result: (result.get('next') or {}).get('offset'),
+                                prefetch=prefetch, **kwargs))
+
+
 ##############################################################################
 # Models
 ##############################################################################
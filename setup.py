@@ -66,6 +66,9 @@ setup(name=PACKAGE_NAME.replace('_', '-'),
       license='Apache 2.0',
       install_requires=install_requires,
       tests_require=tests_require,
+      extras_require={'async': ['aiohttp>=3.6.0'],
+                      'analytics': ['numpy>=1.16.0'],
+                      'parquet': ['pyarrow>=5.0.0']},
       cmdclass={'test': PyTest, 'test_unit': PyTestUnit, 'test_integration': PyTestIntegration},
       author='IBM',
       author_email='devexdev@us.ibm.com',
@@ -0,0 +1,147 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Unit Tests for the async service clients
+"""
+
+import asyncio
+import json
+
+from ibm_cloud_sdk_core import ApiException
+from ibm_cloud_sdk_core.authenticators.no_auth_authenticator import NoAuthAuthenticator
+import pytest
+
+web = pytest.importorskip('aiohttp.web')
+
+# pylint: disable=wrong-import-position
+from ibm_platform_services import aio
+from ibm_platform_services.global_tagging_v1 import GlobalTaggingV1
+
+
+def _run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+async def _with_server(handler, scenario):
+    """
+    Start a local server routing every request to `handler` and run
+    `scenario(base_url, requests_seen)`.
+    """
+    seen = []
+
+    async def record(request):
+        seen.append((request.method, request.path_qs, await request.text(), dict(request.headers)))
+        return await handler(request)
+
+    app = web.Application()
+    app.router.add_route('*', '/{tail:.*}', record)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]  # pylint: disable=protected-access
+    try:
+        return await scenario('http://127.0.0.1:{0}'.format(port), seen)
+    finally:
+        await aio.get_default_transport().close()
+        await runner.cleanup()
+
+
+class TestAsyncClients():
+    """
+    Test Class for the async service clients
+    """
+
+    def test_async_class(self):
+        """
+        The async variant subclasses the service class
+        """
+        assert issubclass(aio.AsyncGlobalTaggingV1, GlobalTaggingV1)
+        assert aio.AsyncGlobalTaggingV1.__module__ == 'ibm_platform_services.aio'
+        assert 'AsyncResourceControllerV2' in dir(aio)
+        with pytest.raises(AttributeError):
+            getattr(aio, 'AsyncNoSuchServiceV1')
+
+    def test_list_tags(self):
+        """
+        list_tags() on the async client
+        """
+        async def handler(_request):
+            return web.json_response({'total_count': 1, 'items': [{'name': 'env:prod'}]})
+
+        async def scenario(base_url, seen):
+            service = aio.AsyncGlobalTaggingV1(authenticator=NoAuthAuthenticator())
+            service.set_service_url(base_url)
+            responses = await asyncio.gather(*[service.list_tags(limit=1, attached_only=True)
+                                               for _ in range(5)])
+            return responses, seen
+
+        responses, seen = _run(_with_server(handler, scenario))
+
+        assert len(responses) == 5
+        assert responses[0].get_status_code() == 200
+        assert responses[0].get_result()['items'][0]['name'] == 'env:prod'
+        method, path, _, headers = seen[0]
+        assert method == 'GET'
+        assert path.startswith('/v3/tags?')
+        assert 'attached_only=true' in path
+        assert headers['User-Agent'].startswith('platform-services-python-sdk')
+
+    def test_attach_tag_body(self):
+        """
+        attach_tag() sends the same body as the synchronous client
+        """
+        async def handler(_request):
+            return web.json_response({'results': []})
+
+        async def scenario(base_url, seen):
+            service = aio.AsyncGlobalTaggingV1(authenticator=NoAuthAuthenticator(),
+                                               transport=aio.AsyncTransport(limit=2))
+            service.set_service_url(base_url)
+            try:
+                await service.attach_tag([{'resource_id': 'crn:1'}], tag_names=['a'])
+            finally:
+                await service.transport.close()
+            return seen
+
+        seen = _run(_with_server(handler, scenario))
+
+        assert seen[0][0] == 'POST'
+        assert json.loads(seen[0][2]) == {'resources': [{'resource_id': 'crn:1'}], 'tag_names': ['a']}
+
+    def test_error_response(self):
+        """
+        An error status raises ApiException with the service's message
+        """
+        async def handler(_request):
+            return web.json_response({'errors': [{'message': 'no such tag'}]}, status=404)
+
+        async def scenario(base_url, _seen):
+            service = aio.AsyncGlobalTaggingV1(authenticator=NoAuthAuthenticator())
+            service.set_service_url(base_url)
+            with pytest.raises(ApiException) as err:
+                await service.delete_tag('missing')
+            return err.value
+
+        error = _run(_with_server(handler, scenario))
+
+        assert error.message == 'no such tag'
+        assert error.http_response.status_code == 404
@@ -0,0 +1,256 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Unit Tests for the bulk_provisioning module
+"""
+
+import json
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+from ibm_cloud_sdk_core import ApiException
+from ibm_cloud_sdk_core.authenticators.no_auth_authenticator import NoAuthAuthenticator
+import pytest
+import responses
+
+from ibm_platform_services import retry
+from ibm_platform_services.bulk_provisioning import (FAILED, INSTANCE, KEY, SKIPPED, SUCCEEDED,
+                                                     BulkProvisioner, ProvisioningPlan, Ref)
+from ibm_platform_services.instance_waiter import InstanceWaiter
+from ibm_platform_services.resource_controller_v2 import ResourceControllerV2
+from ibm_platform_services.retry import RateLimiter
+
+service_url = 'https://resource-controller.cloud.ibm.com'
+json_headers = {'Content-Type': 'application/json'}
+
+service = ResourceControllerV2(authenticator=NoAuthAuthenticator())
+service.set_service_url(service_url)
+
+
+class _Controller():
+    """A stand-in Resource Controller recording the order of events."""
+
+    def __init__(self, polls_until_active=1, fail_names=()):
+        self.polls_until_active = polls_until_active
+        self.fail_names = set(fail_names)
+        self.polls = {}
+        self.events = []
+        self.lock = threading.Lock()
+
+    def create_instance(self, request):
+        body = json.loads(request.body)
+        if body['name'] in self.fail_names:
+            return (400, json_headers, json.dumps({'errors': [{'message': 'bad plan'}]}))
+        guid = 'guid-' + body['name']
+        with self.lock:
+            self.events.append(('create', body['name']))
+            self.polls[guid] = 0
+        return (202, json_headers, json.dumps({'id': 'crn:' + guid, 'guid': guid,
+                                               'name': body['name'], 'state': 'provisioning'}))
+
+    def get_instance(self, request):
+        guid = urlsplit(request.url).path.rsplit('/', 1)[1]
+        with self.lock:
+            self.polls[guid] += 1
+            active = self.polls[guid] >= self.polls_until_active
+            if active:
+                self.events.append(('active', guid))
+        return (200, json_headers, json.dumps({'id': 'crn:' + guid, 'guid': guid,
+                                               'state': 'active' if active else 'provisioning'}))
+
+    def create_key(self, request):
+        body = json.loads(request.body)
+        with self.lock:
+            self.events.append(('key', body['source']))
+        return (201, json_headers, json.dumps({'id': 'key-' + body['name'], 'name': body['name'],
+                                               'source_crn': body['source']}))
+
+    def mock(self):
+        responses.add_callback(responses.POST, service_url + '/v2/resource_instances',
+                               callback=self.create_instance)
+        responses.add_callback(responses.GET,
+                               re.compile(re.escape(service_url) + r'/v2/resource_instances/.+'),
+                               callback=self.get_instance)
+        responses.add_callback(responses.POST, service_url + '/v2/resource_keys',
+                               callback=self.create_key)
+
+
+def _provisioner(**kwargs):
+    waiter = InstanceWaiter(service, initial_delay=0.01, max_delay=0.02, timeout=5.0)
+    kwargs.setdefault('rate', 1000.0)
+    return BulkProvisioner(service, waiter=waiter, **kwargs), waiter
+
+
+def _environment(plan, name):
+    instance = plan.create(name, INSTANCE, name=name, target='us-south',
+                           resource_group='rg', resource_plan_id='plan')
+    plan.create(name + '-key', KEY, name=name + '-key', source=instance)
+
+
+class TestProvisioningPlan():
+    """
+    Test Class for ProvisioningPlan
+    """
+
+    def test_order(self):
+        """
+        Operations are ordered after their dependencies, then as added.
+        """
+        plan = ProvisioningPlan()
+        plan.create('key', KEY, name='k', source=Ref('db'))
+        plan.create('db', INSTANCE, name='db')
+        plan.create('other', KEY, name='o', source='crn', depends_on=['key'])
+        assert plan.order() == ['db', 'key', 'other']
+        assert Ref('db')['guid'].field == 'guid'
+
+    def test_invalid_plans(self):
+        """
+        Unknown dependencies, cycles and duplicates are rejected.
+        """
+        plan = ProvisioningPlan()
+        plan.create('a', KEY, source=Ref('missing'))
+        with pytest.raises(ValueError, match='unknown operation'):
+            plan.order()
+
+        plan = ProvisioningPlan()
+        plan.create('a', KEY, source=Ref('b'))
+        plan.create('b', KEY, source=Ref('a'))
+        plan.create('c', KEY, source='crn')
+        with pytest.raises(ValueError, match='cycle between: a, b'):
+            plan.order()
+        with pytest.raises(ValueError):
+            plan.create('c', KEY)
+        with pytest.raises(ValueError):
+            plan.create('d', 'resource_thing')
+
+
+class TestBulkProvisioner():
+    """
+    Test Class for BulkProvisioner
+    """
+
+    @responses.activate
+    def test_run(self):
+        """
+        Keys are created once their instance is active, with its ID.
+        """
+        controller = _Controller(polls_until_active=2)
+        controller.mock()
+        plan = ProvisioningPlan()
+        for name in ('a', 'b', 'c'):
+            _environment(plan, name)
+        provisioner, waiter = _provisioner()
+        with waiter:
+            result = provisioner.run(plan)
+        assert result.succeeded == list(plan.operations)
+        assert result['a'].result['state'] == 'active'
+        assert result['a-key'].result['source_crn'] == 'crn:guid-a'
+        for name in ('a', 'b', 'c'):
+            events = controller.events
+            assert events.index(('active', 'guid-' + name)) < events.index(('key', 'crn:guid-' + name))
+        outcome = result['a-key']
+        assert outcome.ready <= outcome.started <= outcome.called <= outcome.finished
+        assert result['a'].finished >= result['a'].called
+        assert result.to_dict()['requests'] == 6
+        assert outcome.to_dict()['status'] == SUCCEEDED
+
+    @responses.activate
+    def test_failure_skips_dependents(self):
+        """
+        Operations depending on a failed operation are skipped.
+        """
+        controller = _Controller(fail_names=['b'])
+        controller.mock()
+        plan = ProvisioningPlan()
+        _environment(plan, 'a')
+        _environment(plan, 'b')
+        provisioner, waiter = _provisioner()
+        with waiter:
+            result = provisioner.run(plan)
+        assert result.failed == ['b']
+        assert result.skipped == ['b-key']
+        assert result.succeeded == ['a', 'a-key']
+        assert isinstance(result['b'].error, ApiException)
+        assert str(result) == ('ProvisioningResult(total=4, succeeded=2, failed=1, skipped=1, '
+                               'requests=3, seconds={0})'.format(round(result.seconds, 6)))
+
+    @responses.activate
+    def test_fail_fast(self):
+        """
+        With fail_fast, no operation is started after a failure.
+        """
+        controller = _Controller(fail_names=['a'])
+        controller.mock()
+        plan = ProvisioningPlan()
+        plan.create('a', INSTANCE, name='a', target='t', resource_group='rg',
+                    resource_plan_id='p')
+        plan.create('b', KEY, name='b', source='crn', depends_on=['a'])
+        provisioner, waiter = _provisioner(max_workers=1)
+        with waiter:
+            result = provisioner.run(plan, fail_fast=True)
+        assert result.failed == ['a']
+        assert result.skipped == ['b']
+
+    @responses.activate
+    def test_retry(self, monkeypatch):
+        """
+        Creates are retried on Too Many Requests only.
+        """
+        monkeypatch.setattr(retry.random, 'uniform', lambda a, b: 0.0)
+        statuses = [429, 503]
+
+        def callback(_request):
+            if statuses:
+                return (statuses.pop(0), json_headers, json.dumps({'errors': [{'message': 'x'}]}))
+            return (201, json_headers, json.dumps({'id': 'k'}))
+
+        responses.add_callback(responses.POST, service_url + '/v2/resource_keys', callback=callback)
+        plan = ProvisioningPlan()
+        plan.create('k', KEY, name='k', source='crn')
+        provisioner, waiter = _provisioner()
+        with waiter:
+            result = provisioner.run(plan)
+        assert result.failed == ['k']
+        assert result['k'].attempts == 2
+        assert result['k'].error.status_code == 503
+
+
+class TestRateLimiter():
+    """
+    Test Class for RateLimiter
+    """
+
+    def test_rate(self):
+        """
+        Requests beyond the burst are spaced by the rate.
+        """
+        limiter = RateLimiter(100.0, burst=2)
+        start = time.monotonic()
+        for _ in range(6):
+            limiter.acquire()
+        assert time.monotonic() - start >= 0.035
+
+    def test_invalid_arguments(self):
+        """
+        The rate and burst must be positive.
+        """
+        with pytest.raises(ValueError):
+            RateLimiter(0)
+        with pytest.raises(ValueError):
+            RateLimiter(1.0, burst=0)
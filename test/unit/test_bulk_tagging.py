@@ -0,0 +1,176 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Unit Tests for the bulk_tagging and retry modules
+"""
+
+import json
+import threading
+
+from ibm_cloud_sdk_core import ApiException
+from ibm_cloud_sdk_core.authenticators.no_auth_authenticator import NoAuthAuthenticator
+import pytest
+import requests
+import responses
+
+from ibm_platform_services import retry
+from ibm_platform_services.bulk_tagging import BulkTagger
+from ibm_platform_services.global_tagging_v1 import GlobalTaggingV1, Resource
+
+base_url = 'https://tags.global-search-tagging.cloud.ibm.com'
+attach_url = base_url + '/v3/tags/attach'
+detach_url = base_url + '/v3/tags/detach'
+
+service = GlobalTaggingV1(authenticator=NoAuthAuthenticator())
+service.set_service_url(base_url)
+
+
+def _tag_callback(fail_once=(), always_fail=(), status_once=None):
+    """
+    Return a responses callback reporting `is_error` for the given resources,
+    and the list of resource ID lists it received.
+    """
+    calls = []
+    failed = set()
+    lock = threading.Lock()
+
+    def callback(request):
+        ids = [x['resource_id'] for x in json.loads(request.body)['resources']]
+        with lock:
+            calls.append(ids)
+            if status_once is not None and len(calls) == 1:
+                return (status_once, {'Content-Type': 'application/json'}, json.dumps({'errors': [{'message': 'busy'}]}))
+            results = []
+            for resource_id in ids:
+                is_error = resource_id in always_fail
+                if resource_id in fail_once and resource_id not in failed:
+                    failed.add(resource_id)
+                    is_error = True
+                results.append({'resource_id': resource_id, 'is_error': is_error})
+        return (200, {'Content-Type': 'application/json'}, json.dumps({'results': results}))
+    return callback, calls
+
+
+class TestBulkTagger():
+    """
+    Test Class for BulkTagger
+    """
+
+    @responses.activate
+    def test_attach_chunks(self):
+        """
+        attach() sends the resources in chunks
+        """
+        callback, calls = _tag_callback()
+        responses.add_callback(responses.POST, attach_url, callback=callback)
+        crns = ['crn:{0}'.format(i) for i in range(25)]
+        result = BulkTagger(service, chunk_size=10, max_workers=3).attach(
+            crns + ['crn:0'], tag_names=['env:prod'])
+
+        assert sorted(len(x) for x in calls) == [5, 10, 10]
+        assert sorted(result.succeeded) == sorted(crns)
+        assert result.failed == {}
+        assert result.to_dict() == {'total': 25, 'succeeded': 25, 'failed': 0,
+                                    'requests': 3, 'retried': 0}
+        body = json.loads(responses.calls[0].request.body)
+        assert body['tag_names'] == ['env:prod']
+
+    @responses.activate
+    def test_retry_failed_items(self, monkeypatch):
+        """
+        Only the resources reported with is_error are retried
+        """
+        monkeypatch.setattr(retry.random, 'uniform', lambda a, b: 0)
+        callback, calls = _tag_callback(fail_once={'crn:1', 'crn:7'}, always_fail={'crn:3'})
+        responses.add_callback(responses.POST, detach_url, callback=callback)
+        result = BulkTagger(service, chunk_size=5).detach(
+            ['crn:{0}'.format(i) for i in range(10)], tag_name='env:dev')
+
+        assert calls[2:] == [['crn:1', 'crn:3', 'crn:7'], ['crn:3']]
+        assert len(result.succeeded) == 9
+        assert result.failed == {'crn:3': {'resource_id': 'crn:3', 'is_error': True}}
+        assert result.requests == 4
+        assert result.retried == 4
+
+    @responses.activate
+    def test_retry_retryable_errors(self, monkeypatch):
+        """
+        Chunks failing with a retryable status are retried whole
+        """
+        monkeypatch.setattr(retry.random, 'uniform', lambda a, b: 0)
+        callback, calls = _tag_callback(status_once=503)
+        responses.add_callback(responses.POST, attach_url, callback=callback)
+        resources = [Resource(resource_id='crn:a'), {'resource_id': 'crn:b', 'resource_type': 't'}]
+        result = BulkTagger(service).attach(resources, tag_name='env:prod')
+
+        assert calls == [['crn:a', 'crn:b'], ['crn:a', 'crn:b']]
+        assert result.succeeded == ['crn:a', 'crn:b']
+        assert result.retried == 2
+
+    @responses.activate
+    def test_permanent_errors(self):
+        """
+        Chunks failing with a non-retryable status are not retried
+        """
+        responses.add(responses.POST, attach_url, status=403,
+                      body=json.dumps({'errors': [{'message': 'forbidden'}]}))
+        result = BulkTagger(service).attach(['crn:a'], tag_name='env:prod')
+
+        assert len(responses.calls) == 1
+        assert isinstance(result.failed['crn:a'], ApiException)
+        assert result.succeeded == []
+
+    def test_invalid_arguments(self):
+        """
+        Invalid arguments are rejected
+        """
+        with pytest.raises(ValueError):
+            BulkTagger(service).attach(['crn:a'])
+        with pytest.raises(ValueError):
+            BulkTagger(service).attach([{'name': 'x'}], tag_name='t')
+        with pytest.raises(ValueError):
+            BulkTagger(service, chunk_size=0)
+        assert BulkTagger(service).attach([], tag_name='t').total == 0
+
+
+class TestRetry():
+    """
+    Test Class for the retry module
+    """
+
+    def test_is_retryable(self):
+        """
+        is_retryable()
+        """
+        assert retry.is_retryable(ApiException(429))
+        assert retry.is_retryable(ApiException(503))
+        assert retry.is_retryable(requests.exceptions.ConnectionError())
+        assert not retry.is_retryable(ApiException(404))
+        assert not retry.is_retryable(ValueError())
+
+    def test_backoff_delay(self):
+        """
+        backoff_delay() grows exponentially up to the cap and honors Retry-After
+        """
+        assert 0 <= retry.backoff_delay(1, base=1.0) <= 1.0
+        assert 0 <= retry.backoff_delay(10, base=1.0, cap=5.0) <= 5.0
+        response = requests.Response()
+        response.headers['Retry-After'] = '7'
+        err = ApiException(429, http_response=response)
+        assert retry.retry_after(err) == 7.0
+        assert retry.backoff_delay(1, err=err) == 7.0
+        assert retry.backoff_delay(1, cap=2.0, err=err) == 2.0
@@ -35,3 +35,14 @@ class TestCommon(unittest.TestCase):
         self.assertIsNotNone(headers.get('User-Agent'))
         print("User-Agent: {0}".format(headers.get('User-Agent')))
         self.assertTrue(headers.get('User-Agent').startswith('platform-services-python-sdk'))
+
+    def test_get_sdk_headers_mutable(self):
+        """
+        Test that get_sdk_headers returns a new dict that callers may modify
+        """
+        headers = common.get_sdk_headers('global_tagging', 'V1', 'list_tags')
+        self.assertEqual(headers, {'User-Agent': common.get_user_agent()})
+        headers['User-Agent'] = 'other'
+        headers['X-Correlation-Id'] = 'abc'
+        self.assertEqual(common.get_sdk_headers('global_tagging', 'V1', 'list_tags'),
+                         {'User-Agent': common.get_user_agent()})
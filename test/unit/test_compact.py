@@ -0,0 +1,129 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Unit Tests for the compact module
+"""
+
+import datetime
+
+import pytest
+
+from ibm_platform_services.case_management_v1 import StatusPayload
+from ibm_platform_services.compact import CompactModel, compact_model
+from ibm_platform_services.catalog_management_v1 import HelmPackageChart
+from ibm_platform_services.global_search_v2 import ResultItem
+from ibm_platform_services.resource_controller_v2 import ResourceInstance, ResourceInstancesList
+from ibm_platform_services.usage_reports_v4 import InstanceUsage
+
+resource_instance_json = {
+    'id': 'crn:v1:x', 'guid': 'g1', 'name': 'my-instance', 'state': 'active',
+    'created_at': '2020-11-30T10:20:30Z', 'parameters': {'a': 1},
+    'last_operation': {'type': 'create'},
+}
+
+instances_list_json = {
+    'next_url': '/v2/resource_instances?start=abc', 'rows_count': 2,
+    'resources': [resource_instance_json, dict(resource_instance_json, guid='g2')],
+}
+
+instance_usage_json = {
+    'account_id': 'acct', 'resource_instance_id': 'i1', 'resource_id': 'kms',
+    'pricing_country': 'USA', 'currency_code': 'USD', 'billable': True, 'plan_id': 'p1',
+    'month': '2020-11',
+    'usage': [{'metric': 'KEYS', 'quantity': 3, 'rateable_quantity': 3, 'cost': 1.5,
+               'rated_cost': 1.5, 'price': [], 'unit': 'KEYS', 'discounts': []}],
+}
+
+
+class TestCompactModel():
+    """
+    Test Class for compact_model
+    """
+
+    def test_compact_class(self):
+        """
+        The compact class uses slots and is cached
+        """
+        compact_class = compact_model(ResourceInstance)
+        assert compact_class is compact_model(ResourceInstance)
+        assert issubclass(compact_class, CompactModel)
+        assert compact_class.__name__ == 'CompactResourceInstance'
+        instance = compact_class.from_dict(resource_instance_json)
+        assert not hasattr(instance, '__dict__')
+        assert 'guid' in compact_class.__slots__
+
+    def test_round_trip(self):
+        """
+        Compact models decode and encode like the generated models
+        """
+        for model_class, model_json in [(ResourceInstancesList, instances_list_json),
+                                        (InstanceUsage, instance_usage_json)]:
+            compact = compact_model(model_class).from_dict(model_json)
+            model = model_class.from_dict(model_json)
+            assert compact.to_dict() == model.to_dict()
+            assert compact.to_model() == model
+            assert str(compact) == str(model)
+
+    def test_nested_models(self):
+        """
+        Nested models and datetimes are decoded
+        """
+        instances = compact_model(ResourceInstancesList).from_dict(instances_list_json)
+        first = instances.resources[0]
+        assert type(first) is compact_model(ResourceInstance)
+        assert first.created_at == datetime.datetime(2020, 11, 30, 10, 20, 30,
+                                                     tzinfo=first.created_at.tzinfo)
+        assert first.last_operation == {'type': 'create'}
+        assert first.resource_group_id is None
+        assert instances.resources[1] != first
+        assert compact_model(ResourceInstance).from_dict(resource_instance_json) == first
+
+    def test_additional_properties(self):
+        """
+        Additional properties are kept for models that allow them
+        """
+        item = compact_model(ResultItem).from_dict({'crn': 'crn:1', 'name': 'n', 'family': 'f'})
+        assert item.crn == 'crn:1'
+        assert item.name == 'n'
+        assert item.to_dict() == {'crn': 'crn:1', 'name': 'n', 'family': 'f'}
+        with pytest.raises(AttributeError):
+            getattr(item, 'region')
+
+    def test_json_keys_differ_from_attributes(self):
+        """
+        Properties whose json key is not a valid attribute name are mapped
+        """
+        chart_json = {'Chart.yaml': {'name': 'chart', 'version': '1.0.0'},
+                      'README.md': '# chart', 'values-metadata': {'a': 'b'}}
+        chart = compact_model(HelmPackageChart).from_dict(chart_json)
+        assert chart.readme_md == '# chart'
+        assert chart.chart_yaml.name == 'chart'
+        assert chart.to_dict() == HelmPackageChart.from_dict(chart_json).to_dict()
+
+    def test_required_property(self):
+        """
+        A missing required property raises ValueError
+        """
+        with pytest.raises(ValueError):
+            compact_model(ResourceInstancesList).from_dict({'rows_count': 0})
+
+    def test_unsupported_model(self):
+        """
+        Models that dispatch on a discriminator are rejected
+        """
+        with pytest.raises(TypeError):
+            compact_model(StatusPayload)
@@ -0,0 +1,254 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Unit Tests for the credential_cache module
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import json
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+from ibm_cloud_sdk_core import ApiException
+from ibm_cloud_sdk_core.authenticators.no_auth_authenticator import NoAuthAuthenticator
+import pytest
+import responses
+
+from ibm_platform_services.credential_cache import CredentialCache
+from ibm_platform_services.resource_controller_v2 import ResourceControllerV2
+
+service_url = 'https://resource-controller.cloud.ibm.com'
+json_headers = {'Content-Type': 'application/json'}
+
+service = ResourceControllerV2(authenticator=NoAuthAuthenticator())
+service.set_service_url(service_url)
+
+
+class _Keys():
+    """Resource keys whose API key changes on every read."""
+
+    def __init__(self, delay=0.0, statuses=None):
+        self.delay = delay
+        self.statuses = statuses or []
+        self.reads = {}
+        self.lock = threading.Lock()
+
+    def callback(self, request):
+        key_id = urlsplit(request.url).path.rsplit('/', 1)[1]
+        time.sleep(self.delay)
+        with self.lock:
+            if self.statuses:
+                return (self.statuses.pop(0), json_headers, json.dumps({'errors': [{'message': 'x'}]}))
+            count = self.reads[key_id] = self.reads.get(key_id, 0) + 1
+        return (200, json_headers, json.dumps({
+            'id': key_id, 'credentials': {'apikey': '{0}-{1}'.format(key_id, count)}}))
+
+    def mock(self):
+        responses.add_callback(responses.GET,
+                               re.compile(re.escape(service_url) + r'/v2/resource_keys/.+'),
+                               callback=self.callback)
+
+
+class _Clock():
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _cache(**kwargs):
+    cache = CredentialCache(service, **kwargs)
+    cache._clock = _Clock()
+    return cache
+
+
+class TestCredentialCache():
+    """
+    Test Class for CredentialCache
+    """
+
+    @responses.activate
+    def test_hit_and_expiry(self):
+        """
+        Keys are served from the cache until they expire.
+        """
+        keys = _Keys()
+        keys.mock()
+        cache = _cache(ttl=60, refresh_ahead=0)
+        assert cache.get('k1') == {'apikey': 'k1-1'}
+        cache._clock.now += 59
+        assert cache.get('k1') == {'apikey': 'k1-1'}
+        assert 'k1' in cache
+        cache._clock.now += 1
+        assert 'k1' not in cache
+        assert cache.get('k1') == {'apikey': 'k1-2'}
+        assert cache.stats() == {'hits': 1, 'misses': 2, 'loads': 2, 'refreshes': 0,
+                                 'refresh_errors': 0, 'evictions': 0}
+
+    @responses.activate
+    def test_single_flight(self):
+        """
+        Concurrent misses on a key share one request.
+        """
+        keys = _Keys(delay=0.1)
+        keys.mock()
+        cache = CredentialCache(service)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda _: cache.get('k1'), range(8)))
+        assert results == [{'apikey': 'k1-1'}] * 8
+        assert keys.reads == {'k1': 1}
+        assert cache.stats()['loads'] == 1
+
+    @responses.activate
+    def test_refresh_ahead(self):
+        """
+        A key read near its expiry is refreshed in the background.
+        """
+        keys = _Keys()
+        keys.mock()
+        with _cache(ttl=100, refresh_ahead=0.2) as cache:
+            cache.get('k1')
+            cache._clock.now += 79
+            assert cache.get('k1') == {'apikey': 'k1-1'}
+            assert cache.stats()['refreshes'] == 0
+            cache._clock.now += 1
+            # Served from the cache while the refresh is in flight.
+            assert cache.get('k1') == {'apikey': 'k1-1'}
+            cache.close()
+            assert cache.get('k1') == {'apikey': 'k1-2'}
+            assert cache.stats()['refreshes'] == 1
+            # The refreshed key gets a new time-to-live.
+            cache._clock.now += 79
+            assert cache.get('k1') == {'apikey': 'k1-2'}
+
+    @responses.activate
+    def test_errors(self):
+        """
+        Errors are raised and not cached; failed refreshes keep the key.
+        """
+        keys = _Keys(statuses=[404])
+        keys.mock()
+        with _cache(ttl=100, refresh_ahead=0.5) as cache:
+            with pytest.raises(ApiException):
+                cache.get('k1')
+            assert len(cache) == 0
+            assert cache.get('k1') == {'apikey': 'k1-1'}
+            keys.statuses.append(503)
+            cache._clock.now += 60
+            cache.get('k1')
+            cache.close()
+            assert cache.get('k1') == {'apikey': 'k1-1'}
+            assert cache.stats()['refresh_errors'] == 1
+
+    @responses.activate
+    def test_eviction_and_invalidation(self):
+        """
+        The least recently used keys are evicted; invalidated keys are read again.
+        """
+        keys = _Keys()
+        keys.mock()
+        cache = _cache(max_size=2)
+        cache.get('k1')
+        cache.get('k2')
+        cache.get('k1')
+        cache.get('k3')
+        assert 'k1' in cache and 'k3' in cache and 'k2' not in cache
+        assert cache.stats()['evictions'] == 1
+        cache.invalidate('k1')
+        assert cache.get('k1') == {'apikey': 'k1-2'}
+        cache.invalidate()
+        assert len(cache) == 0
+
+    @responses.activate
+    def test_invalidation_in_flight(self):
+        """
+        A request in flight when its key is dropped does not cache its result;
+        the requests of other keys do.
+        """
+        keys = _Keys()
+        gate = threading.Event()
+
+        def callback(request):
+            gate.wait(5)
+            return keys.callback(request)
+
+        responses.add_callback(responses.GET,
+                               re.compile(re.escape(service_url) + r'/v2/resource_keys/.+'),
+                               callback=callback)
+        with _cache(ttl=100, refresh_ahead=0.5) as cache:
+            gate.set()
+            cache.get('k1')
+            cache.get('k2')
+            gate.clear()
+            cache._clock.now += 60
+            cache.get('k1')
+            cache.get('k2')
+            cache.invalidate('k2')
+            gate.set()
+            cache.close()
+            assert cache.get('k1') == {'apikey': 'k1-2'}
+            assert 'k2' not in cache
+            assert cache.get('k2') == {'apikey': 'k2-3'}
+            assert not cache._generations
+
+    @responses.activate
+    def test_rotation_in_flight(self):
+        """
+        A key read after it is dropped gets a new request, not the one in
+        flight since before the rotation.
+        """
+        state = {'apikey': 'old'}
+        started = threading.Event()
+        gate = threading.Event()
+
+        def callback(_request):
+            apikey = state['apikey']
+            if apikey == 'old':
+                started.set()
+                gate.wait(5)
+            return (200, json_headers, json.dumps({'id': 'k1', 'credentials': {'apikey': apikey}}))
+
+        responses.add_callback(responses.GET,
+                               re.compile(re.escape(service_url) + r'/v2/resource_keys/.+'),
+                               callback=callback)
+        cache = _cache()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            before = executor.submit(cache.get, 'k1')
+            assert started.wait(5)
+            state['apikey'] = 'new'
+            cache.invalidate('k1')
+            assert cache.get('k1') == {'apikey': 'new'}
+            gate.set()
+            assert before.result() == {'apikey': 'old'}
+        assert cache.get('k1') == {'apikey': 'new'}
+        assert cache.stats()['loads'] == 2
+        assert not cache._generations
+
+    def test_invalid_arguments(self):
+        """
+        Invalid settings are rejected.
+        """
+        with pytest.raises(ValueError):
+            CredentialCache(service, ttl=0)
+        with pytest.raises(ValueError):
+            CredentialCache(service, refresh_ahead=1)
+        with pytest.raises(ValueError):
+            CredentialCache(service, max_size=0)
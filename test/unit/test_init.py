@@ -0,0 +1,73 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Test the lazy loading of service modules by the package
+"""
+
+import subprocess
+import sys
+import unittest
+
+import pytest
+
+import ibm_platform_services
+
+_LOADED_MODULES = '''
+import sys
+{stmt}
+print(' '.join(sorted(m for m in sys.modules if m.startswith('ibm_platform_services.'))))
+'''
+
+
+def _loaded_modules(stmt):
+    out = subprocess.check_output([sys.executable, '-c', _LOADED_MODULES.format(stmt=stmt)])
+    return out.decode('utf-8').split()
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason='requires module __getattr__')
+class TestLazyImport(unittest.TestCase):
+    """
+    Test lazy loading of the service modules
+    """
+
+    def test_package_import_loads_no_services(self):
+        """
+        Importing the package must not import any service module
+        """
+        modules = _loaded_modules('import ibm_platform_services')
+        self.assertEqual(modules, ['ibm_platform_services.common',
+                                   'ibm_platform_services.version'])
+
+    def test_service_import_loads_only_that_service(self):
+        """
+        Importing one service class must import only its module
+        """
+        modules = _loaded_modules('from ibm_platform_services import GlobalTaggingV1')
+        self.assertIn('ibm_platform_services.global_tagging_v1', modules)
+        self.assertNotIn('ibm_platform_services.catalog_management_v1', modules)
+        self.assertNotIn('ibm_platform_services.global_catalog_v1', modules)
+
+    def test_attribute_access(self):
+        """
+        Service classes are resolved and cached on first access
+        """
+        from ibm_platform_services.resource_controller_v2 import ResourceControllerV2
+        self.assertIs(ibm_platform_services.ResourceControllerV2, ResourceControllerV2)
+        self.assertIn('ResourceControllerV2', vars(ibm_platform_services))
+        self.assertIn('UsageReportsV4', dir(ibm_platform_services))
+        with self.assertRaises(AttributeError):
+            getattr(ibm_platform_services, 'NoSuchServiceV1')
@@ -0,0 +1,218 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Unit Tests for the instance_waiter module
+"""
+
+import json
+import re
+import threading
+from urllib.parse import parse_qs, urlsplit
+
+from ibm_cloud_sdk_core import ApiException
+from ibm_cloud_sdk_core.authenticators.no_auth_authenticator import NoAuthAuthenticator
+import pytest
+import responses
+
+from ibm_platform_services.instance_waiter import InstanceStateError, InstanceWaiter
+from ibm_platform_services.resource_controller_v2 import ResourceControllerV2
+
+service_url = 'https://resource-controller.cloud.ibm.com'
+json_headers = {'Content-Type': 'application/json'}
+
+service = ResourceControllerV2(authenticator=NoAuthAuthenticator())
+service.set_service_url(service_url)
+
+
+class _Fleet():
+    """Instances whose state moves along a sequence on each observation."""
+
+    def __init__(self, sequences, statuses=None):
+        self.sequences = {guid: list(states) for guid, states in sequences.items()}
+        self.statuses = statuses or {}
+        self.gets = 0
+        self.lists = 0
+        self.lock = threading.Lock()
+
+    def _observe(self, guid):
+        states = self.sequences[guid]
+        state = states.pop(0) if len(states) > 1 else states[0]
+        return {'id': 'crn:' + guid, 'guid': guid, 'state': state,
+                'resource_group_id': 'rg', 'resource_id': 'offering'}
+
+    def get(self, request):
+        guid = urlsplit(request.url).path.rsplit('/', 1)[1]
+        with self.lock:
+            self.gets += 1
+            statuses = self.statuses.get(guid)
+            if statuses:
+                return (statuses.pop(0), json_headers, json.dumps({'errors': [{'message': 'x'}]}))
+            return (200, json_headers, json.dumps(self._observe(guid)))
+
+    def list(self, request):
+        query = {k: v[0] for k, v in parse_qs(urlsplit(request.url).query).items()}
+        assert query['resource_group_id'] == 'rg'
+        assert query['resource_id'] == 'offering'
+        with self.lock:
+            self.lists += 1
+            resources = [self._observe(guid) for guid in sorted(self.sequences)]
+        return (200, json_headers, json.dumps({'next_url': None, 'resources': resources}))
+
+    def mock(self):
+        responses.add_callback(responses.GET,
+                               re.compile(re.escape(service_url) + r'/v2/resource_instances/.+'),
+                               callback=self.get)
+        responses.add_callback(responses.GET, service_url + '/v2/resource_instances',
+                               callback=self.list)
+
+
+def _waiter(**kwargs):
+    kwargs.setdefault('initial_delay', 0.01)
+    kwargs.setdefault('max_delay', 0.02)
+    kwargs.setdefault('timeout', 5.0)
+    return InstanceWaiter(service, **kwargs)
+
+
+def _created(guid):
+    return {'id': 'crn:' + guid, 'guid': guid, 'state': 'provisioning',
+            'resource_group_id': 'rg', 'resource_id': 'offering'}
+
+
+class TestInstanceWaiter():
+    """
+    Test Class for InstanceWaiter
+    """
+
+    @responses.activate
+    def test_wait_until_active(self):
+        """
+        Futures resolve with the instance once it is active.
+        """
+        fleet = _Fleet({'a': ['provisioning', 'provisioning', 'active'],
+                        'b': ['provisioning', 'active']})
+        fleet.mock()
+        with _waiter() as waiter:
+            futures = {guid: waiter.wait_until_active(guid) for guid in ('a', 'b')}
+            assert futures['a'].result(timeout=5)['state'] == 'active'
+            assert futures['b'].result(timeout=5)['state'] == 'active'
+            assert waiter.pending() == 0
+        assert fleet.gets == 5
+        assert fleet.lists == 0
+
+    @responses.activate
+    def test_failure_state(self):
+        """
+        A failure state fails the future with the instance.
+        """
+        fleet = _Fleet({'a': ['provisioning', 'failed']})
+        fleet.mock()
+        with _waiter() as waiter:
+            future = waiter.wait_until_active('a')
+            with pytest.raises(InstanceStateError) as err:
+                future.result(timeout=5)
+        assert err.value.instance['state'] == 'failed'
+
+    @responses.activate
+    def test_timeout(self):
+        """
+        An instance not in the awaited state at its deadline fails the future.
+        """
+        fleet = _Fleet({'a': ['provisioning']})
+        fleet.mock()
+        with _waiter() as waiter:
+            future = waiter.wait_until_active('a', timeout=0.1)
+            with pytest.raises(InstanceStateError) as err:
+                future.result(timeout=5)
+        assert 'timed out' in str(err.value)
+        assert err.value.instance['state'] == 'provisioning'
+
+    @responses.activate
+    def test_retryable_errors(self):
+        """
+        Retryable errors are polled again; other errors fail the future.
+        """
+        fleet = _Fleet({'a': ['active'], 'b': ['active']}, statuses={'a': [503, 429], 'b': [403]})
+        fleet.mock()
+        with _waiter() as waiter:
+            assert waiter.wait_until_active('a').result(timeout=5)['state'] == 'active'
+            with pytest.raises(ApiException) as err:
+                waiter.wait_until_active('b').result(timeout=5)
+        assert err.value.status_code == 403
+
+    @responses.activate
+    def test_wait_until_removed(self):
+        """
+        A deleted instance that is no longer found counts as removed.
+        """
+        fleet = _Fleet({'a': ['active', 'pending_reclamation'], 'b': ['active']},
+                       statuses={'b': [404]})
+        fleet.mock()
+        with _waiter() as waiter:
+            assert waiter.wait_until_removed('a').result(timeout=5)['state'] == 'pending_reclamation'
+            assert waiter.wait_until_removed('b').result(timeout=5)['state'] == 'removed'
+
+    @responses.activate
+    def test_coalesced_polls(self):
+        """
+        Due instances of the same group and offering are polled with one list call.
+        """
+        sequences = {str(i): ['provisioning', 'active'] for i in range(6)}
+        fleet = _Fleet(sequences)
+        fleet.mock()
+        # The instances are first due within half a delay of each other.
+        with _waiter(initial_delay=0.2, coalesce_threshold=4) as waiter:
+            futures = [waiter.wait_until_active(_created(guid)) for guid in sequences]
+            for future in futures:
+                assert future.result(timeout=5)['state'] == 'active'
+        assert fleet.lists >= 1
+        assert fleet.gets < len(sequences)
+
+    @responses.activate
+    def test_below_threshold(self):
+        """
+        Fewer due instances than the threshold are polled one by one.
+        """
+        fleet = _Fleet({'a': ['active'], 'b': ['active']})
+        fleet.mock()
+        with _waiter(coalesce_threshold=4) as waiter:
+            futures = [waiter.wait_until_active(_created(guid)) for guid in ('a', 'b')]
+            for future in futures:
+                future.result(timeout=5)
+        assert fleet.lists == 0
+        assert fleet.gets == 2
+
+    @responses.activate
+    def test_close_cancels(self):
+        """
+        Closing the waiter cancels the futures still pending.
+        """
+        fleet = _Fleet({'a': ['provisioning']})
+        fleet.mock()
+        waiter = _waiter()
+        future = waiter.wait_until_active('a')
+        waiter.close()
+        assert future.cancelled()
+        with pytest.raises(RuntimeError):
+            waiter.wait_until_active('a')
+
+    def test_bad_instance(self):
+        """
+        An instance without an ID is rejected.
+        """
+        with _waiter() as waiter:
+            with pytest.raises(ValueError):
+                waiter.wait_until_active({'name': 'x'})
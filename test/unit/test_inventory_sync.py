@@ -0,0 +1,154 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Unit Tests for the inventory_sync module
+"""
+
+import json
+from urllib.parse import parse_qs, urlsplit
+
+from ibm_cloud_sdk_core.authenticators.no_auth_authenticator import NoAuthAuthenticator
+import pytest
+import responses
+
+from ibm_platform_services.inventory_sync import (RESOURCE_INSTANCES, RESOURCE_KEYS,
+                                                  InventoryStore, InventorySync)
+from ibm_platform_services.resource_controller_v2 import ResourceControllerV2
+
+base_url = 'https://resource-controller.cloud.ibm.com'
+
+service = ResourceControllerV2(authenticator=NoAuthAuthenticator())
+service.set_service_url(base_url)
+
+
+def _record(i, state='active', updated_at='2020-11-01T10:00:00.000Z'):
+    return {'id': 'crn:{0}'.format(i), 'guid': 'guid-{0}'.format(i), 'name': 'r{0}'.format(i),
+            'state': state, 'resource_group_id': 'group-{0}'.format(i % 2),
+            'updated_at': updated_at}
+
+
+def _mock_list(path, records):
+    """
+    Serve `records` (a list, replaced in place by the tests) two per page,
+    and return the list of query parameters of each request.
+    """
+    queries = []
+
+    def callback(request):
+        query = {k: v[0] for k, v in parse_qs(urlsplit(request.url).query).items()}
+        queries.append(query)
+        start = int(query.get('start', 0))
+        page = records[start:start + 2]
+        next_url = None
+        if start + 2 < len(records):
+            next_url = '{0}?start={1}'.format(path, start + 2)
+        result = {'rows_count': len(page), 'next_url': next_url, 'resources': page}
+        return (200, {'Content-Type': 'application/json'}, json.dumps(result))
+    responses.add_callback(responses.GET, base_url + path, callback=callback)
+    return queries
+
+
+class TestInventorySync():
+    """
+    Test Class for InventorySync
+    """
+
+    @responses.activate
+    def test_sync(self, tmp_path):
+        """
+        The first sync is a full crawl, the next ones fetch deltas
+        """
+        instances = [_record(i) for i in range(5)]
+        queries = _mock_list('/v2/resource_instances', instances)
+        store = InventoryStore(str(tmp_path / 'inventory.db'))
+        sync = InventorySync(service, store, collections=[RESOURCE_INSTANCES], lookback=60)
+
+        stats = sync.sync()[RESOURCE_INSTANCES]
+        assert stats.full
+        assert (stats.fetched, stats.upserted, stats.deleted) == (5, 5, 0)
+        assert stats.watermark == '2020-11-01T10:00:00.000Z'
+        assert len(queries) == 3
+        assert 'updated_from' not in queries[0]
+        assert store.count(RESOURCE_INSTANCES) == 5
+
+        # Only the changes are listed, from the watermark minus the lookback.
+        instances[:] = [_record(1, updated_at='2020-11-02T08:00:00.000Z'),
+                        _record(3, state='removed', updated_at='2020-11-02T09:00:00.000Z'),
+                        _record(9, updated_at='2020-11-02T07:00:00.000Z')]
+        del queries[:]
+        stats = sync.sync()[RESOURCE_INSTANCES]
+        assert not stats.full
+        assert queries[0]['updated_from'] == '2020-11-01T09:59:00Z'
+        assert (stats.fetched, stats.upserted, stats.deleted) == (3, 2, 1)
+        assert stats.watermark == '2020-11-02T09:00:00.000Z'
+        assert store.get(RESOURCE_INSTANCES, 'crn:3') is None
+        assert store.get(RESOURCE_INSTANCES, 'crn:1')['updated_at'] == '2020-11-02T08:00:00.000Z'
+        assert store.get_by_guid(RESOURCE_INSTANCES, 'guid-9')['name'] == 'r9'
+        assert sorted(store.ids(RESOURCE_INSTANCES)) == ['crn:0', 'crn:1', 'crn:2', 'crn:4', 'crn:9']
+
+        # The watermark survives reopening the store.
+        store.close()
+        store = InventoryStore(str(tmp_path / 'inventory.db'))
+        assert store.watermark(RESOURCE_INSTANCES) == '2020-11-02T09:00:00.000Z'
+        assert [x['name'] for x in store.records(RESOURCE_INSTANCES, resource_group_id='group-0')] \
+            == ['r0', 'r2', 'r4']
+
+    @responses.activate
+    def test_full_sync_deletes_unlisted(self):
+        """
+        A full sync deletes the records that are no longer listed
+        """
+        keys = [_record(i) for i in range(3)]
+        _mock_list('/v2/resource_keys', keys)
+        store = InventoryStore()
+        sync = InventorySync(service, store, collections=[RESOURCE_KEYS])
+        sync.sync()
+
+        del keys[1]
+        stats = sync.sync(full=True)[RESOURCE_KEYS]
+        assert stats.deleted == 1
+        assert sorted(store.ids(RESOURCE_KEYS)) == ['crn:0', 'crn:2']
+        assert stats.to_dict()['upserted'] == 2
+
+    @responses.activate
+    def test_deletions(self):
+        """
+        Deleted records, which are not listed, are kept by incremental syncs
+        and deleted by the next full sync
+        """
+        instances = [_record(i) for i in range(4)]
+        queries = _mock_list('/v2/resource_instances', instances)
+        store = InventoryStore()
+        sync = InventorySync(service, store, collections=[RESOURCE_INSTANCES])
+        sync.sync(prefetch=False)
+
+        instances[:] = [_record(1, updated_at='2020-11-02T08:00:00.000Z')]
+        stats = sync.sync(prefetch=False)[RESOURCE_INSTANCES]
+        assert (stats.full, stats.deleted) == (False, 0)
+        assert store.count(RESOURCE_INSTANCES) == 4
+
+        stats = sync.sync(full=True)[RESOURCE_INSTANCES]
+        assert (stats.full, stats.upserted, stats.deleted) == (True, 1, 3)
+        assert store.ids(RESOURCE_INSTANCES) == ['crn:1']
+        assert len(queries) == 2 + 1 + 1
+
+    def test_unknown_collection(self):
+        """
+        Unknown collections are rejected
+        """
+        with pytest.raises(ValueError):
+            InventorySync(service, InventoryStore(), collections=['widgets'])
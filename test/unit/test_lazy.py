@@ -0,0 +1,112 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Unit Tests for the lazy module
+"""
+
+import datetime
+from unittest import mock
+
+import pytest
+
+from ibm_platform_services import lazy
+from ibm_platform_services.global_catalog_v1 import CatalogEntry, Provider
+from ibm_platform_services.global_search_v2 import ResultItem
+from ibm_platform_services.resource_controller_v2 import ResourceInstancesList
+
+catalog_entry_json = {
+    'name': 'kms', 'kind': 'service', 'id': 'kms-id', 'disabled': False, 'tags': ['a'],
+    'overview_ui': {'en': {'display_name': 'Key Protect', 'long_description': 'l',
+                           'description': 'd'}},
+    'images': {'image': 'https://x/image.svg'},
+    'provider': {'email': 'x@ibm.com', 'name': 'IBM'},
+    'created': '2020-11-30T10:20:30Z',
+}
+
+
+class TestLazyModel():
+    """
+    Test Class for lazy_model
+    """
+
+    def test_lazy_class(self):
+        """
+        The lazy class is cached and keeps only the json dictionary
+        """
+        lazy_class = lazy.lazy_model(CatalogEntry)
+        assert lazy_class is lazy.lazy_model(CatalogEntry)
+        assert lazy_class.__name__ == 'LazyCatalogEntry'
+        entry = lazy_class.from_dict(catalog_entry_json)
+        assert not hasattr(entry, '__dict__')
+
+    def test_decodes_on_first_access(self):
+        """
+        Nested models and datetimes are decoded once, when first read
+        """
+        entry = lazy.lazy_model(CatalogEntry).from_dict(catalog_entry_json)
+        with mock.patch.object(lazy, 'string_to_datetime',
+                               wraps=lazy.string_to_datetime) as to_datetime:
+            assert entry.name == 'kms'
+            assert to_datetime.call_count == 0
+            created = entry.created
+            assert entry.created is created
+            assert to_datetime.call_count == 1
+        assert isinstance(created, datetime.datetime)
+        provider = entry.provider
+        assert type(provider) is lazy.lazy_model(Provider)
+        assert provider.name == 'IBM'
+        assert entry.provider is provider
+        assert entry.overview_ui['en'].display_name == 'Key Protect'
+        assert entry.metadata is None
+
+    def test_to_dict_and_to_model(self):
+        """
+        to_dict() and to_model() match the generated model
+        """
+        entry = lazy.lazy_model(CatalogEntry).from_dict(catalog_entry_json)
+        model = CatalogEntry.from_dict(catalog_entry_json)
+        assert entry.provider.name == 'IBM'
+        assert entry.to_dict() == model.to_dict()
+        assert entry.to_model() == model
+
+    def test_assignment(self):
+        """
+        Assigned properties are encoded by to_dict()
+        """
+        entry = lazy.lazy_model(CatalogEntry).from_dict(dict(catalog_entry_json))
+        entry.name = 'renamed'
+        entry.provider = lazy.lazy_model(Provider).from_dict({'email': 'e', 'name': 'n'})
+        assert entry.to_dict()['name'] == 'renamed'
+        assert entry.to_dict()['provider'] == {'email': 'e', 'name': 'n'}
+        assert catalog_entry_json['name'] == 'kms'
+
+    def test_additional_properties(self):
+        """
+        Additional properties are read from the json dictionary
+        """
+        item = lazy.lazy_model(ResultItem).from_dict({'crn': 'crn:1', 'family': 'f'})
+        assert item.family == 'f'
+        assert item.to_dict() == {'crn': 'crn:1', 'family': 'f'}
+        with pytest.raises(AttributeError):
+            getattr(item, 'region')
+
+    def test_required_property(self):
+        """
+        A missing required property raises ValueError
+        """
+        with pytest.raises(ValueError):
+            lazy.lazy_model(ResourceInstancesList).from_dict({'rows_count': 0})
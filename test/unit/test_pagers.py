@@ -0,0 +1,242 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Unit Tests for the pagers module
+"""
+
+import json
+import urllib
+
+from ibm_cloud_sdk_core.authenticators.no_auth_authenticator import NoAuthAuthenticator
+import pytest
+import responses
+
+from ibm_platform_services.enterprise_management_v1 import EnterpriseManagementV1
+from ibm_platform_services.global_tagging_v1 import GlobalTaggingV1
+from ibm_platform_services.iam_identity_v1 import IamIdentityV1
+from ibm_platform_services.pagers import Pager, get_query_param, merge_iters
+from ibm_platform_services.resource_controller_v2 import ResourceControllerV2
+from ibm_platform_services.usage_reports_v4 import UsageReportsV4
+
+
+def _query(call):
+    query_string = call.request.url.split('?', 1)[1] if '?' in call.request.url else ''
+    return dict(urllib.parse.parse_qsl(query_string))
+
+
+class TestPager():
+    """
+    Test Class for Pager
+    """
+
+    @pytest.mark.parametrize('prefetch', [False, True])
+    def test_pager_walks_all_pages(self, prefetch):
+        """
+        Pager yields the items of every page in order
+        """
+        pages = {None: ({'items': [1, 2]}, 'b'), 'b': ({'items': [3]}, 'c'), 'c': ({'items': []}, None)}
+        requested = []
+
+        def get_page(token):
+            requested.append(token)
+            return pages[token]
+
+        pager = Pager(get_page, 'items', prefetch=prefetch)
+        assert list(pager) == [1, 2, 3]
+        assert requested == [None, 'b', 'c']
+
+    def test_pager_stops_on_repeated_token(self):
+        """
+        Pager stops when the service hands back the same token
+        """
+        pager = Pager(lambda token: ({'items': [token]}, 'same'), 'items')
+        assert list(pager) == [None, 'same']
+
+    def test_pager_is_lazy(self):
+        """
+        Pager does not request a page before it is needed
+        """
+        requested = []
+
+        def get_page(token):
+            requested.append(token)
+            return {'items': [token or 0]}, (token or 0) + 1
+
+        items = iter(Pager(get_page, 'items'))
+        assert next(items) == 0
+        assert next(items) == 1
+        assert requested == [None, 1]
+
+    def test_get_query_param(self):
+        """
+        get_query_param()
+        """
+        assert get_query_param('https://x/v1/apikeys?pagesize=2&pagetoken=abc', 'pagetoken') == 'abc'
+        assert get_query_param('https://x/v1/apikeys?pagesize=2', 'pagetoken') is None
+        assert get_query_param(None, 'pagetoken') is None
+
+    def test_merge_iters(self):
+        """
+        merge_iters() yields the items of every source and re-raises errors
+        """
+        sources = [lambda: iter([1, 2]), lambda: iter([]), lambda: iter([3])]
+        assert list(merge_iters(sources, max_workers=2, buffer_size=1, ordered=True)) == [1, 2, 3]
+        assert sorted(merge_iters(sources, max_workers=2, buffer_size=1)) == [1, 2, 3]
+        assert not list(merge_iters([], max_workers=2, buffer_size=1))
+
+        def failing():
+            yield 0
+            raise OSError('down')
+
+        with pytest.raises(OSError):
+            list(merge_iters([failing, lambda: iter(range(100))], max_workers=2, buffer_size=1))
+
+
+class TestNextUrlPager():
+    """
+    Test Class for next_url paging
+    """
+
+    @responses.activate
+    @pytest.mark.parametrize('prefetch', [False, True])
+    def test_list_resource_instances_iter(self, prefetch):
+        """
+        list_resource_instances_iter()
+        """
+        service = ResourceControllerV2(authenticator=NoAuthAuthenticator())
+        service.set_service_url('https://resource-controller.cloud.ibm.com')
+        url = 'https://resource-controller.cloud.ibm.com/v2/resource_instances'
+        responses.add(responses.GET, url, content_type='application/json', status=200,
+                      body=json.dumps({'rows_count': 2, 'resources': [{'id': 'a'}, {'id': 'b'}],
+                                       'next_url': '/v2/resource_instances?limit=2&start=tok'}))
+        responses.add(responses.GET, url, content_type='application/json', status=200,
+                      body=json.dumps({'rows_count': 1, 'resources': [{'id': 'c'}], 'next_url': None}))
+
+        ids = [x['id'] for x in service.list_resource_instances_iter(limit='2', prefetch=prefetch)]
+
+        assert ids == ['a', 'b', 'c']
+        assert len(responses.calls) == 2
+        assert _query(responses.calls[0]) == {'limit': '2'}
+        assert _query(responses.calls[1]) == {'limit': '2', 'start': 'tok'}
+
+    @responses.activate
+    def test_list_accounts_iter_versioned_service_url(self):
+        """
+        list_accounts_iter() with a next_url that repeats the service URL path
+        """
+        service = EnterpriseManagementV1(authenticator=NoAuthAuthenticator())
+        service.set_service_url('https://enterprise.cloud.ibm.com/v1')
+        url = 'https://enterprise.cloud.ibm.com/v1/accounts'
+        responses.add(responses.GET, url, content_type='application/json', status=200,
+                      body=json.dumps({'resources': [{'id': 'a'}],
+                                       'next_url': '/v1/accounts?next_docid=d1'}))
+        responses.add(responses.GET, url, content_type='application/json', status=200,
+                      body=json.dumps({'resources': [{'id': 'b'}]}))
+
+        ids = [x['id'] for x in service.list_accounts_iter(enterprise_id='e1')]
+
+        assert ids == ['a', 'b']
+        assert responses.calls[1].request.url.startswith(url + '?')
+        assert _query(responses.calls[1]) == {'next_docid': 'd1'}
+
+
+class TestTokenPager():
+    """
+    Test Class for page token paging
+    """
+
+    @responses.activate
+    def test_list_api_keys_iter(self):
+        """
+        list_api_keys_iter()
+        """
+        service = IamIdentityV1(authenticator=NoAuthAuthenticator())
+        service.set_service_url('https://iam.cloud.ibm.com')
+        url = 'https://iam.cloud.ibm.com/v1/apikeys'
+        responses.add(responses.GET, url, content_type='application/json', status=200,
+                      body=json.dumps({'apikeys': [{'id': 'k1'}],
+                                       'next': url + '?pagesize=1&pagetoken=p2'}))
+        responses.add(responses.GET, url, content_type='application/json', status=200,
+                      body=json.dumps({'apikeys': [{'id': 'k2'}]}))
+
+        ids = [x['id'] for x in service.list_api_keys_iter(account_id='acct', pagesize=1)]
+
+        assert ids == ['k1', 'k2']
+        assert 'pagetoken' not in _query(responses.calls[0])
+        assert _query(responses.calls[1])['pagetoken'] == 'p2'
+        assert _query(responses.calls[1])['account_id'] == 'acct'
+
+    @responses.activate
+    def test_get_resource_usage_account_iter(self):
+        """
+        get_resource_usage_account_iter()
+        """
+        service = UsageReportsV4(authenticator=NoAuthAuthenticator())
+        service.set_service_url('https://billing.cloud.ibm.com')
+        url = 'https://billing.cloud.ibm.com/v4/accounts/acct/resource_instances/usage/2020-11'
+        responses.add(responses.GET, url, content_type='application/json', status=200,
+                      body=json.dumps({'resources': [{'resource_instance_id': 'i1'}],
+                                       'next': {'href': 'x', 'offset': 's2'}}))
+        responses.add(responses.GET, url, content_type='application/json', status=200,
+                      body=json.dumps({'resources': [{'resource_instance_id': 'i2'}]}))
+
+        ids = [x['resource_instance_id']
+               for x in service.get_resource_usage_account_iter(account_id='acct',
+                                                                billingmonth='2020-11')]
+
+        assert ids == ['i1', 'i2']
+        assert _query(responses.calls[1])['_start'] == 's2'
+
+
+class TestOffsetPager():
+    """
+    Test Class for offset paging
+    """
+
+    @responses.activate
+    def test_list_tags_iter(self):
+        """
+        list_tags_iter()
+        """
+        service = GlobalTaggingV1(authenticator=NoAuthAuthenticator())
+        service.set_service_url('https://tags.global-search-tagging.cloud.ibm.com')
+        url = 'https://tags.global-search-tagging.cloud.ibm.com/v3/tags'
+        for names in (['t1', 't2'], ['t3']):
+            responses.add(responses.GET, url, content_type='application/json', status=200,
+                          body=json.dumps({'total_count': 3, 'items': [{'name': n} for n in names]}))
+
+        names = [x['name'] for x in service.list_tags_iter(limit=2)]
+
+        assert names == ['t1', 't2', 't3']
+        assert len(responses.calls) == 2
+        assert _query(responses.calls[0])['offset'] == '0'
+        assert _query(responses.calls[1])['offset'] == '2'
+
+    @responses.activate
+    def test_list_tags_iter_short_page(self):
+        """
+        list_tags_iter() stops on a short page when no total is reported
+        """
+        service = GlobalTaggingV1(authenticator=NoAuthAuthenticator())
+        service.set_service_url('https://tags.global-search-tagging.cloud.ibm.com')
+        url = 'https://tags.global-search-tagging.cloud.ibm.com/v3/tags'
+        responses.add(responses.GET, url, content_type='application/json', status=200,
+                      body=json.dumps({'items': [{'name': 't1'}]}))
+
+        assert [x['name'] for x in service.list_tags_iter(limit=2, offset=5)] == ['t1']
+        assert len(responses.calls) == 1
+        assert _query(responses.calls[0])['offset'] == '5'
@@ -0,0 +1,170 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Unit Tests for the reclamation_sweep module
+"""
+
+from datetime import datetime, timezone
+import json
+import re
+import threading
+from urllib.parse import urlsplit
+
+from ibm_cloud_sdk_core.authenticators.no_auth_authenticator import NoAuthAuthenticator
+import pytest
+import responses
+
+from ibm_platform_services import retry
+from ibm_platform_services.reclamation_sweep import (RECLAIM, RESTORE, ReclamationSweeper,
+                                                     select_reclamations)
+from ibm_platform_services.resource_controller_v2 import ResourceControllerV2
+
+service_url = 'https://resource-controller.cloud.ibm.com'
+json_headers = {'Content-Type': 'application/json'}
+
+service = ResourceControllerV2(authenticator=NoAuthAuthenticator())
+service.set_service_url(service_url)
+
+NOW = datetime(2020, 12, 31, tzinfo=timezone.utc)
+
+RECLAMATIONS = [
+    {'id': 'r1', 'account_id': 'acct-a', 'resource_group_id': 'g1', 'state': 'SCHEDULED',
+     'created_at': '2020-12-01T00:00:00Z'},
+    {'id': 'r2', 'account_id': 'acct-a', 'resource_group_id': 'g2', 'state': 'SCHEDULED',
+     'created_at': '2020-12-20T00:00:00Z'},
+    {'id': 'r3', 'account_id': 'acct-b', 'resource_group_id': 'g1', 'state': 'RESTORING',
+     'created_at': '2020-12-30T00:00:00Z'},
+    {'id': 'r4', 'account_id': 'acct-b', 'resource_group_id': 'g1', 'state': 'SCHEDULED'},
+]
+
+DAY = 86400
+
+
+def _mock(statuses=None):
+    """Mock the reclamation endpoints; return the actions run, by ID."""
+    statuses = statuses or {}
+    actions = {}
+    lock = threading.Lock()
+
+    def action(request):
+        parts = urlsplit(request.url).path.split('/')
+        reclamation_id, name = parts[3], parts[5]
+        with lock:
+            pending = statuses.get(reclamation_id)
+            if pending:
+                return (pending.pop(0), json_headers, json.dumps({'errors': [{'message': 'x'}]}))
+            actions.setdefault(reclamation_id, []).append(name)
+        return (200, json_headers, json.dumps({'id': reclamation_id, 'state': 'RECLAIMING'}))
+
+    responses.add(responses.GET, service_url + '/v1/reclamations',
+                  json={'resources': RECLAMATIONS})
+    responses.add_callback(responses.POST,
+                           re.compile(re.escape(service_url) + r'/v1/reclamations/.+/actions/.+'),
+                           callback=action)
+    return actions
+
+
+class TestSelectReclamations():
+    """
+    Test Class for select_reclamations
+    """
+
+    def test_criteria(self):
+        """
+        Reclamations are selected by age, resource group and state.
+        """
+        def ids(**kwargs):
+            return [x['id'] for x in select_reclamations(RECLAMATIONS, now=NOW, **kwargs)]
+
+        assert ids() == ['r1', 'r2', 'r3', 'r4']
+        assert ids(min_age=7 * DAY) == ['r1', 'r2']
+        assert ids(max_age=14 * DAY) == ['r2', 'r3']
+        assert ids(min_age=7 * DAY, max_age=14 * DAY) == ['r2']
+        assert ids(resource_group_ids=['g1']) == ['r1', 'r3', 'r4']
+        assert ids(states=['scheduled'], resource_group_ids=['g1']) == ['r1', 'r4']
+
+
+class TestReclamationSweeper():
+    """
+    Test Class for ReclamationSweeper
+    """
+
+    @responses.activate
+    def test_sweep(self):
+        """
+        The action runs on each selected reclamation.
+        """
+        actions = _mock()
+        sweeper = ReclamationSweeper(service, max_workers=4, rate=1000.0)
+        result = sweeper.sweep(RECLAIM, account_id='acct-a', states=['SCHEDULED'])
+        assert actions == {'r1': [RECLAIM], 'r2': [RECLAIM], 'r4': [RECLAIM]}
+        assert sorted(result.succeeded) == ['r1', 'r2', 'r4']
+        summary = result.to_dict()
+        assert summary['listed'] == 4
+        assert summary['selected'] == 3
+        assert summary['requests'] == 3
+        assert summary['failed'] == 0
+        assert result.throughput > 0
+        assert str(result).startswith('SweepResult(action=reclaim, listed=4')
+        request = responses.calls[0].request
+        assert 'account_id=acct-a' in request.url
+
+    @responses.activate
+    def test_retries_and_failures(self, monkeypatch):
+        """
+        Retryable errors are retried; other errors fail the reclamation.
+        """
+        monkeypatch.setattr(retry.random, 'uniform', lambda a, b: 0.0)
+        actions = _mock(statuses={'r1': [429, 503], 'r2': [409], 'r3': [500, 500, 500]})
+        sweeper = ReclamationSweeper(service, rate=1000.0, backoff=0.0)
+        result = sweeper.sweep(RESTORE, reclamations=RECLAMATIONS)
+        assert actions == {'r1': [RESTORE], 'r4': [RESTORE]}
+        assert sorted(result.succeeded) == ['r1', 'r4']
+        assert sorted(result.failed) == ['r2', 'r3']
+        assert result.failed['r2'].status_code == 409
+        assert result.retried == 4
+        assert result.requests == 8
+        assert result.listed == 4
+
+    @responses.activate
+    def test_deadline(self):
+        """
+        No action is started after the deadline.
+        """
+        actions = _mock()
+        result = ReclamationSweeper(service).sweep(RECLAIM, reclamations=RECLAMATIONS, deadline=0)
+        assert actions == {}
+        assert sorted(result.skipped) == ['r1', 'r2', 'r3', 'r4']
+
+    def test_rate_limit_per_account(self):
+        """
+        Each account has its own rate limiter.
+        """
+        sweeper = ReclamationSweeper(service)
+        assert sweeper._limiter('a') is sweeper._limiter('a')
+        assert sweeper._limiter('a') is not sweeper._limiter('b')
+
+    def test_invalid_arguments(self):
+        """
+        Invalid settings and actions are rejected.
+        """
+        with pytest.raises(ValueError):
+            ReclamationSweeper(service, max_workers=0)
+        with pytest.raises(ValueError):
+            ReclamationSweeper(service, rate=0)
+        with pytest.raises(ValueError):
+            ReclamationSweeper(service).sweep('delete', reclamations=[])
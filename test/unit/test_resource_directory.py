@@ -0,0 +1,190 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Unit Tests for the resource_directory module
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import json
+import threading
+
+from ibm_cloud_sdk_core import ApiException
+from ibm_cloud_sdk_core.authenticators.no_auth_authenticator import NoAuthAuthenticator
+import pytest
+import responses
+
+from ibm_platform_services.resource_directory import ResourceGroupDirectory
+from ibm_platform_services.resource_manager_v2 import ResourceManagerV2
+
+service_url = 'https://resource-controller.cloud.ibm.com/v2'
+
+service = ResourceManagerV2(authenticator=NoAuthAuthenticator())
+service.set_service_url(service_url)
+
+GROUPS = [
+    {'id': 'g1', 'name': 'default', 'default': True, 'quota_id': 'q1'},
+    {'id': 'g2', 'name': 'prod', 'default': False, 'quota_id': 'q2'},
+    {'id': 'g3', 'name': 'scratch', 'default': False},
+]
+QUOTAS = [{'id': 'q1', 'name': 'Trial'}]
+
+
+def _mock(groups=None):
+    responses.add(responses.GET, service_url + '/resource_groups',
+                  json={'resources': groups or GROUPS})
+    responses.add(responses.GET, service_url + '/quota_definitions', json={'resources': QUOTAS})
+    responses.add(responses.GET, service_url + '/quota_definitions/q2',
+                  json={'id': 'q2', 'name': 'Pay-As-You-Go'})
+
+
+def _requests(path):
+    return sum(1 for x in responses.calls if x.request.url.split('?')[0].endswith(path))
+
+
+class _Clock():
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _directory(**kwargs):
+    directory = ResourceGroupDirectory(service, **kwargs)
+    directory._clock = _Clock()
+    return directory
+
+
+class TestResourceGroupDirectory():
+    """
+    Test Class for ResourceGroupDirectory
+    """
+
+    @responses.activate
+    def test_lookups(self):
+        """
+        Groups and quotas are looked up by ID and name from one load.
+        """
+        _mock()
+        directory = _directory(account_id='acct')
+        assert directory.group_id('prod') == 'g2'
+        assert directory.group_id('g2') == 'g2'
+        assert directory.group('default')['id'] == 'g1'
+        assert directory.default_group()['name'] == 'default'
+        assert directory.quota_of('default') == {'id': 'q1', 'name': 'Trial'}
+        assert directory.quota_of('scratch') is None
+        assert [x['id'] for x in directory.groups()] == ['g1', 'g2', 'g3']
+        assert 'account_id=acct' in responses.calls[0].request.url
+        assert _requests('/resource_groups') == 1
+        assert _requests('/quota_definitions') == 1
+
+    @responses.activate
+    def test_quota_fallback(self):
+        """
+        Quotas missing from the list are read one by one, once.
+        """
+        _mock()
+        directory = _directory()
+        assert directory.quota_of('prod')['name'] == 'Pay-As-You-Go'
+        assert directory.quota('q2')['name'] == 'Pay-As-You-Go'
+        assert _requests('/quota_definitions/q2') == 1
+
+    @responses.activate
+    def test_quota_concurrent(self):
+        """
+        Concurrent lookups of a quota missing from the list share one request.
+        """
+        _mock()
+        gate = threading.Event()
+
+        def callback(_request):
+            gate.wait(5)
+            return (200, {'Content-Type': 'application/json'},
+                    json.dumps({'id': 'q3', 'name': 'Subscription'}))
+
+        responses.add_callback(responses.GET, service_url + '/quota_definitions/q3',
+                               callback=callback)
+        directory = _directory()
+        directory.refresh()
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = [executor.submit(directory.quota, 'q3') for _ in range(4)]
+            gate.set()
+            assert [x.result()['name'] for x in results] == ['Subscription'] * 4
+        assert _requests('/quota_definitions/q3') == 1
+        assert 'q3' not in directory._snapshot.quotas
+
+    @responses.activate
+    def test_quota_errors(self):
+        """
+        An unknown quota is None; other errors are raised and not kept.
+        """
+        _mock()
+        responses.add(responses.GET, service_url + '/quota_definitions/q4', status=404,
+                      json={'errors': [{'message': 'not found'}]})
+        responses.add(responses.GET, service_url + '/quota_definitions/q5', status=500,
+                      json={'errors': [{'message': 'down'}]})
+        directory = _directory()
+        assert directory.quota('q4') is None
+        assert directory.quota('q4') is None
+        assert _requests('/quota_definitions/q4') == 1
+        for _ in range(2):
+            with pytest.raises(ApiException):
+                directory.quota('q5')
+        assert _requests('/quota_definitions/q5') == 2
+
+    @responses.activate
+    def test_ttl(self):
+        """
+        The directory is reloaded once its time-to-live expires.
+        """
+        _mock()
+        directory = _directory(ttl=60)
+        directory.group_id('prod')
+        directory._clock.now += 59
+        directory.group_id('prod')
+        assert _requests('/resource_groups') == 1
+        directory._clock.now += 1
+        directory.group_id('prod')
+        assert _requests('/resource_groups') == 2
+
+    @responses.activate
+    def test_unknown_group(self):
+        """
+        Unknown groups reload the directory, at most once per interval.
+        """
+        _mock()
+        directory = _directory(miss_interval=10)
+        assert directory.group('new') is None
+        assert _requests('/resource_groups') == 1
+        directory._clock.now += 10
+        responses.replace(responses.GET, service_url + '/resource_groups',
+                          json={'resources': GROUPS + [{'id': 'g4', 'name': 'new'}]})
+        assert directory.group_id('new') == 'g4'
+        assert _requests('/resource_groups') == 2
+        with pytest.raises(KeyError):
+            directory.group_id('missing')
+        with pytest.raises(KeyError):
+            directory.quota_of('missing')
+        assert _requests('/resource_groups') == 2
+
+    def test_invalid_arguments(self):
+        """
+        The time-to-live must be positive.
+        """
+        with pytest.raises(ValueError):
+            ResourceGroupDirectory(service, ttl=0)
@@ -0,0 +1,145 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Unit Tests for the search_scan module
+"""
+
+import json
+
+from ibm_cloud_sdk_core import ApiException
+from ibm_cloud_sdk_core.authenticators.no_auth_authenticator import NoAuthAuthenticator
+import pytest
+import responses
+
+from ibm_platform_services.global_search_v2 import GlobalSearchV2
+from ibm_platform_services.search_scan import SearchScanner, escape_term, partition_query
+
+base_url = 'https://api.global-search-tagging.cloud.ibm.com'
+search_url = base_url + '/v3/resources/search'
+
+service = GlobalSearchV2(authenticator=NoAuthAuthenticator())
+service.set_service_url(base_url)
+
+
+def _search_callback(pages):
+    """
+    Return a responses callback serving `pages[query]` one page per cursor.
+    """
+    def callback(request):
+        body = json.loads(request.body)
+        query = body['query']
+        index = int(body.get('search_cursor', '0'))
+        items = pages[query][index] if index < len(pages[query]) else []
+        result = {'search_cursor': str(index + 1), 'items': items}
+        return (200, {}, json.dumps(result))
+    return callback
+
+
+class TestPartitionQuery():
+    """
+    Test Class for partition_query
+    """
+
+    def test_partition_query(self):
+        """
+        partition_query()
+        """
+        slices = partition_query('type:cf-space', 'family', ['resource_controller', 'ims'])
+        assert slices == [
+            '(type:cf-space) AND family:"resource_controller"',
+            '(type:cf-space) AND family:"ims"',
+            '(type:cf-space) AND NOT (family:"resource_controller" OR family:"ims")',
+        ]
+
+    def test_partition_query_prefix(self):
+        """
+        partition_query() with CRN prefixes
+        """
+        slices = partition_query('*', 'crn', ['crn:v1:bluemix:public:kms'], prefix=True,
+                                 include_rest=False)
+        assert slices == ['(*) AND crn:crn\\:v1\\:bluemix\\:public\\:kms*']
+        assert escape_term('a+b') == 'a\\+b'
+
+    def test_partition_query_no_values(self):
+        """
+        partition_query() requires values
+        """
+        with pytest.raises(ValueError):
+            partition_query('*', 'family', [])
+
+
+class TestSearchScanner():
+    """
+    Test Class for SearchScanner
+    """
+
+    @responses.activate
+    def test_search_iter(self):
+        """
+        search_iter() follows the cursor until an empty page
+        """
+        pages = {'*': [[{'crn': 'a'}, {'crn': 'b'}], [{'crn': 'c'}]]}
+        responses.add_callback(responses.POST, search_url, callback=_search_callback(pages),
+                               content_type='application/json')
+
+        crns = [x['crn'] for x in service.search_iter(query='*', limit=2)]
+
+        assert crns == ['a', 'b', 'c']
+        assert len(responses.calls) == 3
+        assert json.loads(responses.calls[2].request.body)['search_cursor'] == '2'
+
+    @responses.activate
+    def test_scan_merges_and_deduplicates(self):
+        """
+        scan() merges all slices and returns each CRN once
+        """
+        pages = {
+            's1': [[{'crn': 'a'}, {'crn': 'b'}], [{'crn': 'c'}]],
+            's2': [[{'crn': 'd'}, {'crn': 'a'}]],
+            's3': [],
+        }
+        responses.add_callback(responses.POST, search_url, callback=_search_callback(pages),
+                               content_type='application/json')
+
+        scanner = SearchScanner(service, max_workers=2)
+        crns = [x['crn'] for x in scanner.scan(['s1', 's2', 's3'], fields=['crn'])]
+
+        assert sorted(crns) == ['a', 'b', 'c', 'd']
+        for call in responses.calls:
+            assert json.loads(call.request.body)['fields'] == ['crn']
+
+        crns = [x['crn'] for x in scanner.scan(['s1', 's2', 's3'], dedup=False)]
+        assert sorted(crns) == ['a', 'a', 'b', 'c', 'd']
+
+    @responses.activate
+    def test_scan_raises_slice_error(self):
+        """
+        scan() re-raises the error of a failing slice
+        """
+        responses.add(responses.POST, search_url, status=500,
+                      body=json.dumps({'error': 'boom'}), content_type='application/json')
+
+        scanner = SearchScanner(service, max_workers=2)
+        with pytest.raises(ApiException):
+            list(scanner.scan(['s1', 's2']))
+
+    def test_scan_rejects_query_argument(self):
+        """
+        scan() rejects the arguments it sets itself
+        """
+        with pytest.raises(ValueError):
+            list(SearchScanner(service).scan(['*'], query='*'))
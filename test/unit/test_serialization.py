@@ -0,0 +1,98 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Unit Tests for the serialization module
+"""
+
+import datetime
+import json
+from unittest import mock
+
+from ibm_platform_services import serialization
+from ibm_platform_services.catalog_management_v1 import Feature, Kind, Offering, Rating
+from ibm_platform_services.compact import compact_model
+from ibm_platform_services.global_search_v2 import ResultItem
+from ibm_platform_services.resource_controller_v2 import ResourceInstance
+
+
+def _offering():
+    created = datetime.datetime(2020, 11, 30, 10, 20, 30)
+    return Offering(id='offering-id', name='offering', tags=['a', 'b'], created=created,
+                    rating=Rating(one_star_count=1),
+                    features=[Feature(title='t1'), Feature(title='t2', description='d')],
+                    kinds=[Kind(id='kind-id', metadata={'k': 'v'}, created=created,
+                                additional_features=[Feature(title='t3')])])
+
+
+class TestSerialization():
+    """
+    Test Class for the serialization module
+    """
+
+    def test_to_dict_matches_generated(self):
+        """
+        to_dict() matches the generated to_dict
+        """
+        offering = _offering()
+        assert serialization.to_dict(offering) == offering.to_dict()
+        assert serialization.to_dict(offering)['created'] == '2020-11-30T10:20:30Z'
+
+    def test_to_dict_additional_properties(self):
+        """
+        Additional properties are serialized for models that allow them
+        """
+        item = ResultItem(crn='crn:1', name='n', family=None)
+        assert serialization.to_dict(item) == {'crn': 'crn:1', 'name': 'n'}
+
+    def test_to_dict_accepts_dicts(self):
+        """
+        Dictionaries, including nested ones, are passed through
+        """
+        assert serialization.to_dict({'a': 1}) == {'a': 1}
+        offering = Offering(id='x', rating={'one_star_count': 2})
+        assert serialization.to_dict(offering) == {'id': 'x', 'rating': {'one_star_count': 2}}
+
+    def test_fallback_to_model_to_dict(self):
+        """
+        Compact models fall back to their own to_dict
+        """
+        compact = compact_model(ResourceInstance).from_dict({'id': 'i', 'name': 'n'})
+        assert serialization.to_dict(compact) == {'id': 'i', 'name': 'n'}
+
+    def test_serializer_is_cached(self):
+        """
+        The serializer of a class is compiled once
+        """
+        assert serialization.get_serializer(Offering) is serialization.get_serializer(Offering)
+
+    def test_to_json(self):
+        """
+        to_json() returns UTF-8 JSON bytes
+        """
+        offering = _offering()
+        encoded = serialization.to_json(offering)
+        assert isinstance(encoded, bytes)
+        assert json.loads(encoded.decode('utf-8')) == offering.to_dict()
+        assert json.loads(serialization.to_json(offering, indent=4).decode('utf-8')) == offering.to_dict()
+
+    def test_to_json_without_orjson(self):
+        """
+        to_json() falls back to the json module
+        """
+        with mock.patch.object(serialization, 'orjson', None):
+            encoded = serialization.to_json(Feature(title='t'), indent=2)
+        assert encoded == json.dumps({'title': 't'}, indent=2).encode('utf-8')
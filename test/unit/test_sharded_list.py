@@ -0,0 +1,102 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Unit Tests for the sharded_list module
+"""
+
+import json
+from urllib.parse import parse_qs, urlsplit
+
+from ibm_cloud_sdk_core import ApiException
+from ibm_cloud_sdk_core.authenticators.no_auth_authenticator import NoAuthAuthenticator
+import pytest
+import responses
+
+from ibm_platform_services.resource_controller_v2 import ResourceControllerV2
+from ibm_platform_services.resource_manager_v2 import ResourceManagerV2
+from ibm_platform_services.sharded_list import ShardedLister
+
+controller_url = 'https://resource-controller.cloud.ibm.com'
+manager_url = 'https://resource-controller.cloud.ibm.com/v2'
+json_headers = {'Content-Type': 'application/json'}
+
+controller = ResourceControllerV2(authenticator=NoAuthAuthenticator())
+controller.set_service_url(controller_url)
+manager = ResourceManagerV2(authenticator=NoAuthAuthenticator())
+manager.set_service_url(manager_url)
+
+GROUPS = {'group-b': ['b1', 'b2', 'b3'], 'group-a': ['a1', 'a2', 'a3', 'a4', 'a5'],
+          'group-c': []}
+
+
+def _mock(path, fail_group=None):
+    responses.add(responses.GET, manager_url + '/resource_groups',
+                  json={'resources': [{'id': x} for x in GROUPS]})
+
+    def callback(request):
+        query = {k: v[0] for k, v in parse_qs(urlsplit(request.url).query).items()}
+        group = query['resource_group_id']
+        if group == fail_group:
+            return (500, json_headers, json.dumps({'errors': [{'message': 'boom'}]}))
+        start = int(query.get('start', 0))
+        names = GROUPS[group][start:start + 2]
+        next_url = None
+        if start + 2 < len(GROUPS[group]):
+            next_url = '{0}?resource_group_id={1}&start={2}'.format(path, group, start + 2)
+        result = {'next_url': next_url, 'resources': [{'name': x} for x in names]}
+        return (200, json_headers, json.dumps(result))
+    responses.add_callback(responses.GET, controller_url + path, callback=callback)
+
+
+class TestShardedLister():
+    """
+    Test Class for ShardedLister
+    """
+
+    @responses.activate
+    def test_list_resource_instances(self):
+        """
+        Groups are listed concurrently and merged in group order
+        """
+        _mock('/v2/resource_instances')
+        lister = ShardedLister(controller, manager, max_workers=2, buffer_size=1)
+        names = [x['name'] for x in lister.list_resource_instances(account_id='acct', limit=2)]
+        assert names == ['a1', 'a2', 'a3', 'a4', 'a5', 'b1', 'b2', 'b3']
+        assert 'account_id=acct' in responses.calls[0].request.url
+
+    @responses.activate
+    def test_list_resource_keys_given_groups(self):
+        """
+        The groups to list can be given
+        """
+        _mock('/v2/resource_keys')
+        lister = ShardedLister(controller, manager)
+        names = [x['name'] for x in lister.list_resource_keys(resource_group_ids=['group-b'])]
+        assert names == ['b1', 'b2', 'b3']
+        assert all('/resource_groups' not in x.request.url for x in responses.calls)
+
+    @responses.activate
+    def test_errors(self):
+        """
+        The error of any group is raised
+        """
+        _mock('/v2/resource_instances', fail_group='group-b')
+        lister = ShardedLister(controller, manager)
+        with pytest.raises(ApiException):
+            list(lister.list_resource_instances())
+        with pytest.raises(ValueError):
+            lister.list_resource_instances(resource_group_id='group-a')
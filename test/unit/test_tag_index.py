@@ -0,0 +1,122 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Unit Tests for the tag_index module
+"""
+
+import json
+
+from ibm_cloud_sdk_core.authenticators.no_auth_authenticator import NoAuthAuthenticator
+import responses
+
+from ibm_platform_services.global_search_v2 import GlobalSearchV2, ResultItem
+from ibm_platform_services.tag_index import TagIndex
+
+base_url = 'https://api.global-search-tagging.cloud.ibm.com'
+
+service = GlobalSearchV2(authenticator=NoAuthAuthenticator())
+service.set_service_url(base_url)
+
+
+def _index():
+    index = TagIndex()
+    index.ingest([
+        {'crn': 'crn:a', 'tags': ['env:prod', 'team:x']},
+        {'crn': 'crn:b', 'tags': ['env:prod', 'team:y', 'pci']},
+        {'crn': 'crn:c', 'tags': ['env:dev', 'team:x']},
+        ResultItem(crn='crn:d', tags=['Env:Prod']),
+        {'crn': 'crn:e'},
+        {'name': 'no crn'},
+    ])
+    return index
+
+
+class TestTagIndex():
+    """
+    Test Class for TagIndex
+    """
+
+    def test_query(self):
+        """
+        Boolean tag queries
+        """
+        index = _index()
+        assert len(index) == 5
+        assert index.query(all_of=['env:prod']) == ['crn:a', 'crn:b', 'crn:d']
+        assert index.query(all_of=['env:prod'], none_of=['pci']) == ['crn:a', 'crn:d']
+        assert index.query(any_of=['team:x', 'team:y']) == ['crn:a', 'crn:b', 'crn:c']
+        assert index.query(all_of=['ENV:PROD', 'team:x']) == ['crn:a']
+        assert index.query(none_of=['env:prod', 'env:dev']) == ['crn:e']
+        assert index.query(all_of=['unknown']) == []
+        assert index.count(all_of=['env:prod']) == 3
+        assert len(index.query()) == 5
+        assert index.tags()['team:x'] == 2
+
+    def test_add_and_remove(self):
+        """
+        Resources are re-tagged and removed in place
+        """
+        index = _index()
+        index.add('crn:a', ['env:dev'])
+        assert index.tags_of('crn:a') == {'env:dev'}
+        assert index.query(all_of=['env:dev']) == ['crn:a', 'crn:c']
+        assert index.query(all_of=['team:x']) == ['crn:c']
+
+        assert index.remove('crn:c')
+        assert not index.remove('crn:c')
+        assert 'crn:c' not in index
+        assert index.query(all_of=['team:x']) == []
+        assert 'team:x' not in index.tags()
+
+        # The ID of a removed resource is reused.
+        index.add('crn:f', ['team:z'])
+        assert index.query(any_of=['team:z', 'env:dev']) == ['crn:a', 'crn:f']
+        assert len(index) == 5
+
+    def test_ingest_replace(self):
+        """
+        A full ingest removes the resources that are gone
+        """
+        index = _index()
+        assert index.ingest([{'crn': 'crn:a', 'tags': ['env:prod']}], replace=True) == 1
+        assert len(index) == 1
+        assert index.query(all_of=['env:prod']) == ['crn:a']
+
+    @responses.activate
+    def test_refresh(self):
+        """
+        refresh() loads the index with a search scan
+        """
+        pages = [[{'crn': 'crn:a', 'tags': ['env:prod']}, {'crn': 'crn:z', 'tags': []}], []]
+
+        def callback(request):
+            cursor = int(json.loads(request.body).get('search_cursor') or 0)
+            result = {'search_cursor': str(cursor + 1), 'items': pages[cursor]}
+            return (200, {'Content-Type': 'application/json'}, json.dumps(result))
+        responses.add_callback(responses.POST, base_url + '/v3/resources/search',
+                               callback=callback)
+
+        index = _index()
+        assert index.refresh(service, query='updated:>now-1h') == 2
+        assert len(index) == 6
+        assert index.tags_of('crn:a') == {'env:prod'}
+
+        assert index.refresh(service, full=True) == 2
+        assert sorted(index.query()) == ['crn:a', 'crn:z']
+        body = json.loads(responses.calls[0].request.body)
+        assert body['query'] == 'updated:>now-1h'
+        assert body['fields'] == ['crn', 'tags']
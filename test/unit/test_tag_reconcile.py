@@ -0,0 +1,188 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Unit Tests for the tag_reconcile module
+"""
+
+import json
+import threading
+from urllib.parse import parse_qs, urlsplit
+
+from ibm_cloud_sdk_core.authenticators.no_auth_authenticator import NoAuthAuthenticator
+import pytest
+import responses
+
+from ibm_platform_services.global_search_v2 import GlobalSearchV2
+from ibm_platform_services.global_tagging_v1 import GlobalTaggingV1
+from ibm_platform_services.tag_reconcile import TagReconciler, plan_tags
+
+tagging_url = 'https://tags.global-search-tagging.cloud.ibm.com'
+search_url = 'https://api.global-search-tagging.cloud.ibm.com'
+json_headers = {'Content-Type': 'application/json'}
+
+tagging = GlobalTaggingV1(authenticator=NoAuthAuthenticator())
+tagging.set_service_url(tagging_url)
+search = GlobalSearchV2(authenticator=NoAuthAuthenticator())
+search.set_service_url(search_url)
+
+
+def _mock_tagging(tags):
+    """
+    Serve list_tags, attach_tag and detach_tag over the `tags` dict of
+    resource ID to set of tags.
+    """
+    lock = threading.Lock()
+
+    def list_callback(request):
+        query = parse_qs(urlsplit(request.url).query)
+        with lock:
+            names = sorted(tags.get(query['attached_to'][0], ()))
+        result = {'total_count': len(names), 'offset': 0, 'items': [{'name': x} for x in names]}
+        return (200, json_headers, json.dumps(result))
+
+    def update_callback(attach):
+        def callback(request):
+            body = json.loads(request.body)
+            results = []
+            with lock:
+                for resource in body['resources']:
+                    current = tags.setdefault(resource['resource_id'], set())
+                    if attach:
+                        current.update(body['tag_names'])
+                    else:
+                        current.difference_update(body['tag_names'])
+                    results.append({'resource_id': resource['resource_id'], 'is_error': False})
+            return (200, json_headers, json.dumps({'results': results}))
+        return callback
+
+    responses.add_callback(responses.GET, tagging_url + '/v3/tags', callback=list_callback)
+    responses.add_callback(responses.POST, tagging_url + '/v3/tags/attach',
+                           callback=update_callback(True))
+    responses.add_callback(responses.POST, tagging_url + '/v3/tags/detach',
+                           callback=update_callback(False))
+
+
+def _tagging_calls(path):
+    return [x for x in responses.calls if urlsplit(x.request.url).path == path]
+
+
+class TestPlanTags():
+    """
+    Test Class for plan_tags
+    """
+
+    def test_plan_tags(self):
+        """
+        plan_tags() groups the changes by tag and merges identical groups
+        """
+        desired = {'a': ['env:prod', 'team:x'], 'b': ['env:prod', 'team:x'],
+                   'c': ['Env:Prod'], 'd': []}
+        current = {'a': ['env:dev'], 'b': ['env:dev', 'team:x'], 'c': ['env:prod'],
+                   'd': ['old']}
+        plan = plan_tags(desired, current)
+
+        assert plan.attach == [(['env:prod'], ['a', 'b']), (['team:x'], ['a'])]
+        assert plan.detach == [(['env:dev'], ['a', 'b']), (['old'], ['d'])]
+        assert plan.unchanged == 1
+        assert plan.requests() == 4
+        assert plan.to_dict()['attach'][0] == {'tag_names': ['env:prod'], 'resources': ['a', 'b']}
+
+    def test_plan_tags_merges_tags(self):
+        """
+        Tags added to the same resources share one operation
+        """
+        plan = plan_tags({'a': ['x', 'y'], 'b': ['x', 'y']}, {}, prune=False)
+        assert plan.attach == [(['x', 'y'], ['a', 'b'])]
+        assert plan.detach == []
+
+    def test_plan_tags_no_prune(self):
+        """
+        Without prune, extra tags are kept
+        """
+        plan = plan_tags({'a': ['x']}, {'a': ['x', 'y']}, prune=False)
+        assert not plan
+        assert plan.unchanged == 1
+
+
+class TestTagReconciler():
+    """
+    Test Class for TagReconciler
+    """
+
+    @responses.activate
+    def test_reconcile_with_list_tags(self):
+        """
+        reconcile() reads the current tags with list_tags and applies the delta
+        """
+        tags = {'crn:a': {'env:dev'}, 'crn:b': {'env:prod'}}
+        _mock_tagging(tags)
+        desired = {'crn:a': {'env:prod'}, 'crn:b': {'env:prod'}, 'crn:c': {'env:prod'}}
+        result = TagReconciler(tagging).reconcile(desired)
+
+        assert tags == {'crn:a': {'env:prod'}, 'crn:b': {'env:prod'}, 'crn:c': {'env:prod'}}
+        assert result.to_dict() == {'unchanged': 1, 'attach': 2, 'detach': 1,
+                                    'requests': 2, 'failed': 0}
+        assert len(_tagging_calls('/v3/tags')) == 3
+
+        # Steady state: nothing to send.
+        responses.calls.reset()
+        result = TagReconciler(tagging).reconcile(desired)
+        assert result.to_dict()['requests'] == 0
+        assert len(_tagging_calls('/v3/tags/attach')) == 0
+
+    @responses.activate
+    def test_reconcile_with_search(self):
+        """
+        reconcile() reads the current tags with a search scan
+        """
+        tags = {}
+        _mock_tagging(tags)
+        items = [{'crn': 'crn:a', 'tags': ['env:prod']}, {'crn': 'crn:x', 'tags': []},
+                 {'crn': 'crn:b', 'tags': ['env:dev']}]
+
+        def search_callback(request):
+            cursor = json.loads(request.body).get('search_cursor')
+            page = [] if cursor else items
+            return (200, json_headers, json.dumps({'search_cursor': 'c', 'items': page}))
+        responses.add_callback(responses.POST, search_url + '/v3/resources/search',
+                               callback=search_callback)
+
+        reconciler = TagReconciler(tagging, search=search)
+        result = reconciler.reconcile({'crn:a': ['env:prod'], 'crn:b': ['env:prod']})
+
+        body = json.loads(responses.calls[0].request.body)
+        assert body['fields'] == ['crn', 'tags']
+        assert result.plan.attach == [(['env:prod'], ['crn:b'])]
+        assert result.plan.detach == [(['env:dev'], ['crn:b'])]
+        assert len(_tagging_calls('/v3/tags')) == 0
+        assert result.failed == {}
+
+    @responses.activate
+    def test_current_service_tags_with_search(self):
+        """
+        current_tags() reads the tags of the requested type from the search
+        """
+        items = [{'crn': 'crn:a', 'tags': ['env:prod'], 'service_tags': ['svc:managed']}]
+        responses.add(responses.POST, search_url + '/v3/resources/search',
+                      json={'items': items})
+
+        reconciler = TagReconciler(tagging, search=search)
+        assert reconciler.current_tags(['crn:a'], tag_type='service') == {'crn:a': {'svc:managed'}}
+        assert json.loads(responses.calls[0].request.body)['fields'] == ['crn', 'service_tags']
+        assert reconciler.current_tags(['crn:a'], tag_type='user') == {'crn:a': {'env:prod'}}
+        with pytest.raises(ValueError):
+            reconciler.current_tags(['crn:a'], tag_type='access')
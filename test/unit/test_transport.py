@@ -0,0 +1,143 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Unit Tests for the transport module
+"""
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import threading
+
+from ibm_cloud_sdk_core.authenticators.no_auth_authenticator import NoAuthAuthenticator
+import pytest
+
+from ibm_platform_services import transport
+from ibm_platform_services.global_search_v2 import GlobalSearchV2
+from ibm_platform_services.global_tagging_v1 import GlobalTaggingV1
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def _reply(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+        body = b'{"items": []}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = _reply
+    do_POST = _reply
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+@pytest.fixture(name='server_url')
+def fixture_server_url():
+    """
+    Serve _Handler on a local port for the duration of a test
+    """
+    server = HTTPServer(('127.0.0.1', 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield 'http://127.0.0.1:{0}'.format(server.server_address[1])
+    server.shutdown()
+    server.server_close()
+
+
+def _services(server_url):
+    tagging = GlobalTaggingV1(authenticator=NoAuthAuthenticator())
+    tagging.set_service_url(server_url)
+    search = GlobalSearchV2(authenticator=NoAuthAuthenticator())
+    search.set_service_url(server_url)
+    return tagging, search
+
+
+class TestPooledTransport():
+    """
+    Test Class for PooledTransport
+    """
+
+    def test_services_share_connections(self, server_url):
+        """
+        Two clients of the same host reuse one connection
+        """
+        tagging, search = _services(server_url)
+        pooled = transport.PooledTransport(pool_maxsize=2)
+        pooled.attach(tagging, search)
+
+        tagging.list_tags()
+        search.search(query='*')
+        tagging.list_tags()
+
+        assert pooled.stats.to_dict() == {
+            'requests': 3,
+            'new_connections': 1,
+            'reused_connections': 2,
+            'evicted_pools': 0,
+        }
+        pooled.close()
+
+    def test_evict_idle(self, server_url):
+        """
+        Idle pools are closed and the next request reconnects
+        """
+        tagging, _ = _services(server_url)
+        pooled = transport.PooledTransport(idle_timeout=0)
+        pooled.attach(tagging)
+
+        tagging.list_tags()
+        assert pooled.evict_idle() == 1
+        tagging.list_tags()
+
+        assert pooled.stats.new_connections == 2
+        assert pooled.stats.evicted_pools >= 1
+        pooled.close()
+
+    def test_attach_requires_http_client_support(self):
+        """
+        attach() rejects clients without set_http_client
+        """
+        with pytest.raises(ValueError):
+            transport.PooledTransport().attach(object())
+
+
+class TestRegistry():
+    """
+    Test Class for the named transport registry
+    """
+
+    def test_share_transport(self, server_url):
+        """
+        share_transport() attaches clients to one named transport
+        """
+        configured = transport.configure_transport('test-registry', pool_maxsize=4)
+        tagging, search = _services(server_url)
+
+        shared = transport.share_transport(tagging, search, name='test-registry')
+
+        assert shared is configured
+        assert transport.get_transport('test-registry') is configured
+        assert configured.pool_maxsize == 4
+        tagging.list_tags()
+        search.search(query='*')
+        assert configured.stats.reused_connections == 1
+        configured.close()
@@ -0,0 +1,161 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Unit Tests for the usage_analytics module
+"""
+
+import json
+from urllib.parse import parse_qs, urlsplit
+
+from ibm_cloud_sdk_core.authenticators.no_auth_authenticator import NoAuthAuthenticator
+import pytest
+import responses
+
+from ibm_platform_services import usage_analytics
+from ibm_platform_services.usage_analytics import UsageTable
+from ibm_platform_services.usage_export import UsageExporter, flatten
+from ibm_platform_services.usage_reports_v4 import UsageReportsV4
+
+numpy = pytest.importorskip('numpy')
+
+service_url = 'https://billing.cloud.ibm.com'
+json_headers = {'Content-Type': 'application/json'}
+
+service = UsageReportsV4(authenticator=NoAuthAuthenticator())
+service.set_service_url(service_url)
+
+
+def _instance(i, month='2020-11', cost=1.0):
+    return {
+        'account_id': 'acct',
+        'resource_instance_id': 'instance-{0}'.format(i),
+        'resource_id': 'service-{0}'.format(i % 2),
+        'resource_group_id': 'group-{0}'.format(i % 3),
+        'plan_id': 'plan-{0}'.format(i % 2),
+        'month': month,
+        'usage': [{'metric': 'INSTANCE_HOURS', 'unit': 'HOURS', 'quantity': 1, 'cost': cost * i},
+                  {'metric': 'STORAGE', 'unit': 'GIGABYTES', 'quantity': 2}],
+    }
+
+
+def _table(instances, **kwargs):
+    return UsageTable.from_batches(flatten(instances, **kwargs))
+
+
+class TestUsageTable():
+    """
+    Test Class for UsageTable
+    """
+
+    def test_group_by(self):
+        """
+        Costs are summed per group; missing costs count as 0.
+        """
+        table = _table([_instance(i) for i in range(6)], batch_size=5)
+        assert len(table) == 12
+        assert table.columns['resource_group_id'].dtype == numpy.int32
+        rollup = table.group_by('resource_group_id')
+        assert rollup.to_dict() == {'group-0': 3.0, 'group-1': 5.0, 'group-2': 7.0}
+        assert rollup.counts.tolist() == [4, 4, 4]
+        rollup = table.group_by(['resource_id', 'metric'], value='quantity')
+        assert rollup.to_dict() == {('service-0', 'INSTANCE_HOURS'): 3.0, ('service-0', 'STORAGE'): 6.0,
+                                    ('service-1', 'INSTANCE_HOURS'): 3.0, ('service-1', 'STORAGE'): 6.0}
+        with pytest.raises(ValueError):
+            table.group_by([])
+
+    def test_missing_values(self, monkeypatch):
+        """
+        Missing strings form a group of their own.
+        """
+        instances = [_instance(i) for i in range(4)]
+        del instances[0]['resource_group_id']
+        del instances[3]['resource_group_id']
+        table = _table(instances)
+        expected = {None: 3.0, 'group-1': 1.0, 'group-2': 2.0}
+        assert table.group_by('resource_group_id').to_dict() == expected
+        assert len(table.where(resource_group_id=None)) == 4
+        assert len(table.where(resource_group_id=['group-9'])) == 0
+        keys = ['resource_instance_id', 'resource_group_id', 'metric']
+        dense = table.group_by(keys).to_dict()
+        monkeypatch.setattr(usage_analytics, '_DENSE_LIMIT', 0)
+        assert table.group_by(keys).to_dict() == dense
+        assert dense[('instance-0', None, 'INSTANCE_HOURS')] == 0.0
+
+    def test_sparse_keys(self, monkeypatch):
+        """
+        Large key spaces are grouped by sorting, with the same results.
+        """
+        table = _table([_instance(i) for i in range(20)])
+        keys = ['resource_instance_id', 'resource_group_id', 'metric']
+        dense = table.group_by(keys).to_dict()
+        monkeypatch.setattr(usage_analytics, '_DENSE_LIMIT', 0)
+        table.columns = {name: column[:4] for name, column in table.columns.items()}
+        assert table.group_by(keys).to_dict() == {
+            k: v for k, v in dense.items() if k[0] in ('instance-0', 'instance-1')}
+
+    def test_top(self):
+        """
+        The groups with the largest totals come first.
+        """
+        table = _table([_instance(i) for i in range(10)])
+        assert table.top('resource_instance_id', 3) == [
+            ('instance-9', 9.0), ('instance-8', 8.0), ('instance-7', 7.0)]
+        assert len(table.top('resource_instance_id', 50)) == 10
+        assert table.top('resource_instance_id', 0) == []
+
+    def test_where(self):
+        """
+        Rows are filtered by the values of string columns.
+        """
+        table = _table([_instance(i) for i in range(6)])
+        subset = table.where(resource_group_id=['group-1', 'group-2'], metric='INSTANCE_HOURS')
+        assert len(subset) == 4
+        assert subset.group_by('plan_id').to_dict() == {'plan-0': 6.0, 'plan-1': 6.0}
+        assert len(table.where(region='us-east')) == 0
+
+    def test_month_over_month(self):
+        """
+        Tables of several months are merged and compared month by month.
+        """
+        october = _table([_instance(i, month='2020-10') for i in range(4)])
+        november = _table([_instance(i, month='2020-11', cost=2.0) for i in range(1, 5)])
+        monthly = UsageTable.concat([november, october]).month_over_month('resource_instance_id')
+        assert monthly.months == ['2020-10', '2020-11']
+        assert monthly.to_dict()['instance-0'] == {'2020-10': 0.0, '2020-11': 0.0}
+        assert monthly.to_dict()['instance-4'] == {'2020-10': 0.0, '2020-11': 8.0}
+        assert monthly.to_dict()['instance-3'] == {'2020-10': 3.0, '2020-11': 6.0}
+        assert monthly.deltas.shape == (5, 1)
+        assert monthly.top_changes(2) == [('instance-4', 0.0, 8.0), ('instance-3', 3.0, 6.0)]
+        with pytest.raises(ValueError):
+            monthly.top_changes(1, month='2020-10')
+
+    @responses.activate
+    def test_load(self):
+        """
+        Reports are loaded through an exporter.
+        """
+        def callback(request):
+            query = parse_qs(urlsplit(request.url).query)
+            assert query['_limit'] == ['20']
+            result = {'limit': 20, 'count': 3, 'resources': [_instance(i) for i in range(3)]}
+            return (200, json_headers, json.dumps(result))
+
+        responses.add_callback(responses.GET,
+                               service_url + '/v4/accounts/acct/resource_instances/usage/2020-11',
+                               callback=callback)
+        table = UsageTable.load(UsageExporter(service), account_id='acct', billingmonth='2020-11')
+        assert table.group_by('month').to_dict() == {'2020-11': 3.0}
@@ -0,0 +1,248 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Unit Tests for the usage_cache module
+"""
+
+from datetime import datetime, timezone
+import json
+
+from ibm_cloud_sdk_core.authenticators import Authenticator, BasicAuthenticator
+from ibm_cloud_sdk_core.authenticators.no_auth_authenticator import NoAuthAuthenticator
+import pytest
+import responses
+
+from ibm_platform_services.enterprise_usage_reports_v1 import EnterpriseUsageReportsV1
+from ibm_platform_services.usage_cache import UsageReportCache
+from ibm_platform_services.usage_reports_v4 import UsageReportsV4
+
+service_url = 'https://billing.cloud.ibm.com'
+json_headers = {'Content-Type': 'application/json'}
+
+
+class _Clock():
+
+    def __init__(self):
+        self.now = datetime(2020, 11, 15, tzinfo=timezone.utc).timestamp()
+
+    def __call__(self):
+        return self.now
+
+
+def _cache(directory, **kwargs):
+    cache = UsageReportCache(str(directory), **kwargs)
+    cache._clock = _Clock()
+    return cache
+
+
+def _service(cache, service_class=UsageReportsV4):
+    service = service_class(authenticator=NoAuthAuthenticator())
+    service.set_service_url(service_url)
+    cache.attach(service)
+    return service
+
+
+def _mock_summary(month):
+    calls = []
+
+    def callback(request):
+        calls.append(request)
+        return (200, json_headers, json.dumps({'month': month, 'calls': len(calls)}))
+
+    responses.add_callback(responses.GET, service_url + '/v4/accounts/acct/summary/' + month,
+                           callback=callback)
+    return calls
+
+
+class TestUsageReportCache():
+    """
+    Test Class for UsageReportCache
+    """
+
+    def test_is_final(self, tmp_path):
+        """
+        Months are finalized some days after their end.
+        """
+        cache = _cache(tmp_path, grace_days=3)
+        assert cache.is_final('2020-09')
+        assert not cache.is_final('2020-11')
+        cache._clock.now = datetime(2020, 12, 3, 23, tzinfo=timezone.utc).timestamp()
+        assert not cache.is_final('2020-11')
+        cache._clock.now = datetime(2020, 12, 4, tzinfo=timezone.utc).timestamp()
+        assert cache.is_final('2020-11')
+        cache._clock.now = datetime(2021, 1, 4, tzinfo=timezone.utc).timestamp()
+        assert cache.is_final('2020-12')
+        with pytest.raises(ValueError):
+            cache.is_final('2020-1')
+
+    @responses.activate
+    def test_final_month(self, tmp_path):
+        """
+        Finalized months are served from disk, also to other processes.
+        """
+        calls = _mock_summary('2020-09')
+        cache = _cache(tmp_path)
+        service = _service(cache)
+        assert service.get_account_summary('acct', '2020-09').get_result()['calls'] == 1
+        cache._clock.now += 10 ** 8
+        response = service.get_account_summary('acct', '2020-09')
+        assert response.get_result() == {'month': '2020-09', 'calls': 1}
+        assert response.get_status_code() == 200
+        assert response.get_headers()['Content-Type'] == 'application/json'
+        assert len(calls) == 1
+        assert cache.stats() == {'hits': 1, 'misses': 1, 'stores': 1}
+
+        other = _service(_cache(tmp_path))
+        assert other.get_account_summary('acct', '2020-09').get_result()['calls'] == 1
+        assert len(calls) == 1
+
+    @responses.activate
+    def test_identity(self, tmp_path):
+        """
+        Responses cached under one identity are not served to another, and
+        attaching a client twice wraps it once.
+        """
+        calls = _mock_summary('2020-09')
+        cache = _cache(tmp_path, identity='key-1')
+        service = _service(cache)
+        cache.attach(service)
+        service.get_account_summary('acct', '2020-09')
+        assert cache.stats() == {'hits': 0, 'misses': 1, 'stores': 1}
+        assert _service(_cache(tmp_path, identity='key-1')).get_account_summary(
+            'acct', '2020-09').get_result()['calls'] == 1
+        assert _service(_cache(tmp_path, identity='key-2')).get_account_summary(
+            'acct', '2020-09').get_result()['calls'] == 2
+        assert _service(_cache(tmp_path)).get_account_summary(
+            'acct', '2020-09').get_result()['calls'] == 3
+        assert len(calls) == 3
+
+    @responses.activate
+    def test_derived_identity(self, tmp_path):
+        """
+        Without an identity, clients with different credentials do not share
+        responses; clients whose credentials cannot be identified are refused.
+        """
+        calls = _mock_summary('2020-09')
+        cache = _cache(tmp_path)
+
+        def client(authenticator):
+            service = UsageReportsV4(authenticator=authenticator)
+            service.set_service_url(service_url)
+            cache.attach(service)
+            return service
+
+        alice = client(BasicAuthenticator('alice', 'secret'))
+        assert alice.get_account_summary('acct', '2020-09').get_result()['calls'] == 1
+        assert client(BasicAuthenticator('alice', 'secret')).get_account_summary(
+            'acct', '2020-09').get_result()['calls'] == 1
+        assert client(BasicAuthenticator('bob', 'secret')).get_account_summary(
+            'acct', '2020-09').get_result()['calls'] == 2
+        assert client(BasicAuthenticator('alice', 'other')).get_account_summary(
+            'acct', '2020-09').get_result()['calls'] == 3
+        assert len(calls) == 3
+
+        class Anonymous(Authenticator):
+            """An authenticator without credentials to identify."""
+
+            def authenticate(self, req):
+                pass
+
+            def validate(self):
+                pass
+
+            def authentication_type(self):
+                return 'anonymous'
+
+        with pytest.raises(ValueError):
+            client(Anonymous())
+        _cache(tmp_path, identity='acct').attach(UsageReportsV4(authenticator=Anonymous()))
+
+    @responses.activate
+    def test_current_month(self, tmp_path):
+        """
+        The current month is served from disk for ttl seconds only.
+        """
+        calls = _mock_summary('2020-11')
+        cache = _cache(tmp_path, ttl=60)
+        service = _service(cache)
+        service.get_account_summary('acct', '2020-11')
+        cache._clock.now += 59
+        assert service.get_account_summary('acct', '2020-11').get_result()['calls'] == 1
+        cache._clock.now += 1
+        assert service.get_account_summary('acct', '2020-11').get_result()['calls'] == 2
+        assert len(calls) == 2
+
+    @responses.activate
+    def test_month_finalized(self, tmp_path):
+        """
+        A month cached before being finalized is read again once.
+        """
+        calls = _mock_summary('2020-11')
+        cache = _cache(tmp_path, ttl=10 ** 9)
+        service = _service(cache)
+        service.get_account_summary('acct', '2020-11')
+        cache._clock.now = datetime(2021, 1, 1, tzinfo=timezone.utc).timestamp()
+        assert service.get_account_summary('acct', '2020-11').get_result()['calls'] == 2
+        assert service.get_account_summary('acct', '2020-11').get_result()['calls'] == 2
+        assert cache.clear() == 0
+        assert cache.clear(final=True) == 1
+        service.get_account_summary('acct', '2020-11')
+        assert len(calls) == 3
+
+    @responses.activate
+    def test_keys(self, tmp_path):
+        """
+        Responses are cached per operation and parameters; errors are not.
+        """
+        calls = []
+
+        def callback(request):
+            calls.append(request.url)
+            return (200, json_headers, json.dumps({'resources': [], 'url': request.url}))
+
+        path = '/v4/accounts/acct/resource_instances/usage/2020-09'
+        responses.add_callback(responses.GET, service_url + path, callback=callback)
+        responses.add(responses.GET, service_url + '/v4/accounts/acct/usage/2020-09', status=500,
+                      json={'errors': [{'message': 'down'}]})
+        service = _service(_cache(tmp_path))
+        for _ in range(2):
+            service.get_resource_usage_account('acct', '2020-09', limit=10)
+            service.get_resource_usage_account('acct', '2020-09', limit=10, start='x')
+            service.get_resource_usage_account('acct', '2020-09', limit=10, accept_language='fr')
+        assert len(calls) == 3
+        for _ in range(2):
+            with pytest.raises(Exception):
+                service.get_account_usage('acct', '2020-09')
+        assert len(responses.calls) == 5
+
+    @responses.activate
+    def test_enterprise(self, tmp_path):
+        """
+        Enterprise reports are cached by their month parameter, which
+        defaults to the current month.
+        """
+        responses.add(responses.GET, service_url + '/v1/resource-usage-reports', json={'reports': []})
+        cache = _cache(tmp_path, ttl=60)
+        service = _service(cache, EnterpriseUsageReportsV1)
+        for _ in range(2):
+            service.get_resource_usage_report(enterprise_id='e1', month='2020-09')
+            service.get_resource_usage_report(enterprise_id='e1')
+        assert len(responses.calls) == 2
+        cache._clock.now += 60
+        service.get_resource_usage_report(enterprise_id='e1', month='2020-09')
+        service.get_resource_usage_report(enterprise_id='e1')
+        assert len(responses.calls) == 3
@@ -0,0 +1,210 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Unit Tests for the usage_export module
+"""
+
+import csv
+import json
+import math
+from urllib.parse import parse_qs, urlsplit
+
+from ibm_cloud_sdk_core.authenticators.no_auth_authenticator import NoAuthAuthenticator
+import pytest
+import responses
+
+from ibm_platform_services import usage_export
+from ibm_platform_services.usage_export import (COLUMNS, RESOURCE_GROUP, UsageExporter,
+                                                flatten)
+from ibm_platform_services.usage_reports_v4 import UsageReportsV4
+
+service_url = 'https://billing.cloud.ibm.com'
+json_headers = {'Content-Type': 'application/json'}
+
+service = UsageReportsV4(authenticator=NoAuthAuthenticator())
+service.set_service_url(service_url)
+
+
+def _instance(i, metrics=2):
+    return {
+        'account_id': 'acct',
+        'resource_instance_id': 'instance-{0}'.format(i),
+        'resource_id': 'kms',
+        'resource_group_id': 'group-{0}'.format(i % 2),
+        'currency_code': 'USD',
+        'plan_id': 'plan-{0}'.format(i % 3),
+        'region': 'us-south',
+        'month': '2020-11',
+        'usage': [{'metric': 'METRIC_{0}'.format(m), 'unit': 'UNITS', 'quantity': i + m,
+                   'cost': 1.5 * m, 'rated_cost': 2.0 * m} for m in range(metrics)],
+    }
+
+
+def _mock(count, path='/v4/accounts/acct/resource_instances/usage/2020-11'):
+    def callback(request):
+        query = {k: v[0] for k, v in parse_qs(urlsplit(request.url).query).items()}
+        start = int(query.get('_start', 0))
+        limit = int(query['_limit'])
+        end = min(start + limit, count)
+        result = {'limit': limit, 'count': end - start,
+                  'resources': [_instance(i) for i in range(start, end)]}
+        if end < count:
+            result['next'] = {'href': path, 'offset': str(end)}
+        return (200, json_headers, json.dumps(result))
+
+    responses.add_callback(responses.GET, service_url + path, callback=callback)
+
+
+class TestFlatten():
+    """
+    Test Class for flatten
+    """
+
+    def test_rows(self):
+        """
+        Each metric of each instance is a row.
+        """
+        batches = list(flatten([_instance(0), _instance(1, metrics=1), {'usage': []}],
+                               batch_size=2))
+        assert [len(x) for x in batches] == [2, 1]
+        rows = [dict(zip(COLUMNS, row)) for batch in batches for row in batch.rows()]
+        assert [(x['resource_instance_id'], x['metric'], x['quantity']) for x in rows] == [
+            ('instance-0', 'METRIC_0', 0.0), ('instance-0', 'METRIC_1', 1.0),
+            ('instance-1', 'METRIC_0', 1.0)]
+        assert rows[1]['cost'] == 1.5
+        assert rows[0]['organization_id'] is None
+        assert math.isnan(rows[0]['rateable_quantity'])
+
+    def test_shared_dictionaries(self):
+        """
+        The batches of an export share the dictionaries of the string columns.
+        """
+        batches = list(flatten([_instance(i) for i in range(10)], batch_size=4))
+        plans = batches[0].dictionaries['plan_id']
+        assert all(x.dictionaries['plan_id'] is plans for x in batches)
+        assert plans.values == ['plan-0', 'plan-1', 'plan-2']
+        assert plans.code('plan-2') == 2
+        assert plans.code('plan-9') == -1
+        organizations = batches[0].dictionaries['organization_id']
+        assert organizations.values == []
+        assert list(batches[0].codes['organization_id']) == [usage_export.MISSING] * 4
+        assert list(batches[1].codes['plan_id']) == [2, 2, 0, 0]
+        assert batches[1].column('plan_id') == ['plan-2', 'plan-2', 'plan-0', 'plan-0']
+
+    def test_to_numpy(self):
+        """
+        Columns are viewed as NumPy arrays.
+        """
+        numpy = pytest.importorskip('numpy')
+        batch = next(flatten([_instance(i) for i in range(3)]))
+        columns = batch.to_numpy()
+        assert columns['plan_id'].dtype == numpy.int32
+        assert columns['cost'].sum() == 4.5
+
+    def test_to_numpy_missing(self, monkeypatch):
+        """
+        to_numpy requires NumPy.
+        """
+        monkeypatch.setattr(usage_export, 'numpy', None)
+        batch = next(flatten([_instance(0)]))
+        with pytest.raises(ImportError):
+            batch.to_numpy()
+
+
+class TestUsageExporter():
+    """
+    Test Class for UsageExporter
+    """
+
+    @responses.activate
+    def test_batches(self):
+        """
+        All the pages are walked and flattened.
+        """
+        _mock(45)
+        exporter = UsageExporter(service, batch_size=25, limit=20)
+        batches = list(exporter.batches(account_id='acct', billingmonth='2020-11'))
+        assert [len(x) for x in batches] == [25, 25, 25, 15]
+        assert len(responses.calls) == 3
+        instances = [x for batch in batches for x in batch.column('resource_instance_id')]
+        assert instances[::2] == ['instance-{0}'.format(i) for i in range(45)]
+
+    @responses.activate
+    def test_resource_group_scope(self):
+        """
+        Resource group reports use their own operation.
+        """
+        _mock(3, path='/v4/accounts/acct/resource_groups/group-1/resource_instances/usage/2020-11')
+        exporter = UsageExporter(service, prefetch=False)
+        batches = list(exporter.batches(account_id='acct', billingmonth='2020-11',
+                                        scope=RESOURCE_GROUP, resource_group_id='group-1'))
+        assert len(batches[0]) == 6
+        with pytest.raises(ValueError):
+            exporter.batches(account_id='acct', billingmonth='2020-11', scope=RESOURCE_GROUP)
+        with pytest.raises(ValueError):
+            exporter.batches(account_id='acct', billingmonth='2020-11', scope='space')
+
+    @responses.activate
+    def test_export_csv(self, tmp_path):
+        """
+        Reports are written to CSV files batch by batch.
+        """
+        _mock(5)
+        path = str(tmp_path / 'usage.csv')
+        rows = UsageExporter(service, batch_size=3).export(path, format='csv', account_id='acct',
+                                                          billingmonth='2020-11')
+        assert rows == 10
+        with open(path, newline='', encoding='utf-8') as file:
+            records = list(csv.DictReader(file))
+        assert len(records) == 10
+        assert records[3]['resource_instance_id'] == 'instance-1'
+        assert float(records[3]['cost']) == 1.5
+
+    @responses.activate
+    def test_export_parquet(self, tmp_path):
+        """
+        Reports are written to Parquet files, missing strings as nulls.
+        """
+        pytest.importorskip('pyarrow')
+        parquet = pytest.importorskip('pyarrow.parquet')
+        _mock(5)
+        path = str(tmp_path / 'usage.parquet')
+        rows = UsageExporter(service, batch_size=3).export(path, account_id='acct',
+                                                          billingmonth='2020-11')
+        assert rows == 10
+        table = parquet.read_table(path)
+        assert table.column_names == list(COLUMNS)
+        records = table.to_pylist()
+        assert len(records) == 10
+        assert records[3]['resource_instance_id'] == 'instance-1'
+        assert records[3]['plan_id'] == 'plan-1'
+        assert records[3]['cost'] == 1.5
+        assert records[3]['organization_id'] is None
+        assert all(x['region'] == 'us-south' for x in records)
+
+    def test_export_formats(self, monkeypatch, tmp_path):
+        """
+        Parquet requires pyarrow; other formats are rejected.
+        """
+        monkeypatch.setattr(usage_export, 'pyarrow', None)
+        exporter = UsageExporter(service)
+        with pytest.raises(ImportError):
+            exporter.export(str(tmp_path / 'x'), format='parquet', account_id='a',
+                            billingmonth='2020-11')
+        with pytest.raises(ValueError):
+            exporter.export(str(tmp_path / 'x'), format='xlsx', account_id='a',
+                            billingmonth='2020-11')
@@ -0,0 +1,206 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Unit Tests for the usage_fetcher module
+"""
+
+import json
+import re
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+from ibm_cloud_sdk_core.authenticators.no_auth_authenticator import NoAuthAuthenticator
+import pytest
+import responses
+
+from ibm_platform_services import retry
+from ibm_platform_services.usage_fetcher import (ACCOUNT_USAGE, RESOURCE_USAGE, UsageFetcher,
+                                                 months_between)
+from ibm_platform_services.usage_reports_v4 import UsageReportsV4
+
+service_url = 'https://billing.cloud.ibm.com'
+json_headers = {'Content-Type': 'application/json'}
+
+service = UsageReportsV4(authenticator=NoAuthAuthenticator())
+service.set_service_url(service_url)
+
+_RESOURCE_USAGE = re.compile(r'.*/v4/accounts/([^/]+)/resource_instances/usage/([\d-]+)')
+_ACCOUNT_USAGE = re.compile(r'.*/v4/accounts/([^/]+)/usage/([\d-]+)')
+
+
+class _Server():
+    """Serves usage records per account and month, counting concurrency."""
+
+    def __init__(self, delay=0.0, records=5):
+        self.delay = delay
+        self.records = records
+        self.running = {}
+        self.peak = {}
+        self.peak_total = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, request):
+        url = urlsplit(request.url)
+        match = _RESOURCE_USAGE.match(url.path) or _ACCOUNT_USAGE.match(url.path)
+        account_id, month = match.groups()
+        with self.lock:
+            self.running[account_id] = self.running.get(account_id, 0) + 1
+            self.peak[account_id] = max(self.peak.get(account_id, 0), self.running[account_id])
+            self.peak_total = max(self.peak_total, sum(self.running.values()))
+        time.sleep(self.delay)
+        with self.lock:
+            self.running[account_id] -= 1
+        if _RESOURCE_USAGE.match(url.path):
+            query = {k: v[0] for k, v in parse_qs(url.query).items()}
+            start = int(query.get('_start', 0))
+            end = min(start + int(query['_limit']), self.records)
+            result = {'resources': [{'resource_instance_id': '{0}/{1}/{2}'.format(account_id, month, i)}
+                                    for i in range(start, end)]}
+            if end < self.records:
+                result['next'] = {'offset': str(end)}
+        else:
+            result = {'account_id': account_id, 'month': month, 'resources': [{'resource_id': 'kms'}]}
+        return (200, json_headers, json.dumps(result))
+
+
+def _mock(server):
+    responses.add_callback(responses.GET, re.compile(service_url + '/v4/accounts/.*'),
+                           callback=server)
+
+
+class TestMonthsBetween():
+    """
+    Test Class for months_between
+    """
+
+    def test_months_between(self):
+        """
+        Months are listed across years.
+        """
+        assert months_between('2019-11', '2020-02') == ['2019-11', '2019-12', '2020-01', '2020-02']
+        assert months_between('2020-05', '2020-05') == ['2020-05']
+        with pytest.raises(ValueError):
+            months_between('2020-02', '2020-01')
+        with pytest.raises(ValueError):
+            months_between('2020-13', '2021-01')
+
+
+class TestUsageFetcher():
+    """
+    Test Class for UsageFetcher
+    """
+
+    @responses.activate
+    def test_fetch(self):
+        """
+        All the pages of all the reports are passed to the sink.
+        """
+        _mock(_Server())
+        pages = []
+        fetcher = UsageFetcher(service, max_workers=4, limit=2)
+        result = fetcher.fetch(['a1', 'a2'], ['2020-10', '2020-11'], pages.append, names=True)
+        assert result.pages == 2 * 2 * (1 + 3)
+        assert result.records == 2 * 2 * (1 + 5)
+        assert result.requests == 16
+        assert not result.failed
+        assert result.to_dict()['pages'] == 16
+        records = sorted(x['resource_instance_id'] for page in pages if page.report == RESOURCE_USAGE
+                         for x in page.resources)
+        assert len(records) == len(set(records)) == 20
+        a1 = [x.page for x in pages if (x.account_id, x.billingmonth, x.report) ==
+              ('a1', '2020-11', RESOURCE_USAGE)]
+        assert a1 == [0, 1, 2]
+        assert all('_names=true' in x.request.url for x in responses.calls)
+
+    @responses.activate
+    def test_headers(self):
+        """
+        Custom headers are sent with both reports.
+        """
+        _mock(_Server(records=1))
+        result = UsageFetcher(service).fetch(['a1'], ['2020-11'], headers={'X-Test': 'usage'})
+        assert result.pages == 2
+        assert [x.request.headers.get('X-Test') for x in responses.calls] == ['usage', 'usage']
+
+    @responses.activate
+    def test_per_account(self):
+        """
+        Accounts share the workers, each within its own cap.
+        """
+        server = _Server(delay=0.02, records=1)
+        _mock(server)
+        fetcher = UsageFetcher(service, max_workers=6, per_account=2)
+        result = fetcher.fetch(['a1', 'a2', 'a3'], months_between('2020-01', '2020-04'),
+                               reports=[RESOURCE_USAGE])
+        assert result.pages == 12
+        assert max(server.peak.values()) <= 2
+        assert server.peak_total > 2
+
+    @responses.activate
+    def test_retries_and_failures(self, monkeypatch):
+        """
+        Rate limiting and server errors are retried; other errors fail a
+        report without stopping the others.
+        """
+        monkeypatch.setattr(retry.random, 'uniform', lambda a, b: 0.0)
+        attempts = []
+
+        def callback(request):
+            attempts.append(request.url)
+            if '/a1/' in request.url and len(attempts) < 3:
+                return (429 if len(attempts) == 1 else 503, json_headers, '{}')
+            if '/a2/' in request.url:
+                return (403, json_headers, json.dumps({'errors': [{'message': 'forbidden'}]}))
+            return (200, json_headers, json.dumps({'resources': [{}]}))
+
+        responses.add_callback(responses.GET, re.compile(service_url + '/v4/accounts/.*'),
+                               callback=callback)
+        fetcher = UsageFetcher(service, max_workers=1, max_attempts=3)
+        result = fetcher.fetch(['a1', 'a2'], ['2020-11'], reports=[ACCOUNT_USAGE])
+        assert result.pages == 1
+        assert result.requests == 4
+        assert result.retried == 2
+        assert list(result.failed) == [('a2', '2020-11', ACCOUNT_USAGE)]
+        assert retry.status_code(result.failed[('a2', '2020-11', ACCOUNT_USAGE)]) == 403
+
+    @responses.activate
+    def test_sink_error(self):
+        """
+        A failing sink stops the fetch.
+        """
+        _mock(_Server())
+
+        def sink(page):
+            raise OSError('disk full')
+
+        fetcher = UsageFetcher(service, max_workers=1)
+        with pytest.raises(OSError):
+            fetcher.fetch(['a1', 'a2'], ['2020-10', '2020-11'], sink)
+        assert len(responses.calls) == 1
+
+    def test_invalid_arguments(self):
+        """
+        Unknown reports, empty pools and the paging parameters are rejected.
+        """
+        with pytest.raises(ValueError):
+            UsageFetcher(service).fetch(['a1'], ['2020-11'], reports=['summary'])
+        with pytest.raises(ValueError):
+            UsageFetcher(service, per_account=0)
+        for name in ('limit', 'start'):
+            with pytest.raises(ValueError):
+                UsageFetcher(service).fetch(['a1'], ['2020-11'], **{name: 10})
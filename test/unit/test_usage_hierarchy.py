@@ -0,0 +1,168 @@
+# coding: utf-8
+
+# Copyright 2020 IBM All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Unit Tests for the usage_hierarchy module
+"""
+
+import json
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+from ibm_cloud_sdk_core.authenticators.no_auth_authenticator import NoAuthAuthenticator
+import pytest
+import responses
+
+from ibm_platform_services import retry
+from ibm_platform_services.enterprise_usage_reports_v1 import EnterpriseUsageReportsV1
+from ibm_platform_services.usage_hierarchy import (ACCOUNT, ACCOUNT_GROUP, ENTERPRISE,
+                                                   HierarchyTraverser)
+
+service_url = 'https://enterprise.cloud.ibm.com'
+json_headers = {'Content-Type': 'application/json'}
+
+service = EnterpriseUsageReportsV1(authenticator=NoAuthAuthenticator())
+service.set_service_url(service_url)
+
+# e1 -> g1 -> (a1, g2 -> (a2, a3)), a4; a3 is also listed under e1.
+HIERARCHY = {
+    'e1': ['g1', 'a4', 'a3'],
+    'g1': ['a1', 'g2'],
+    'g2': ['a2', 'a3'],
+}
+
+
+def _type(entity_id):
+    return {'e': ENTERPRISE, 'g': ACCOUNT_GROUP, 'a': ACCOUNT}[entity_id[0]]
+
+
+def _report(entity_id):
+    cost = float(entity_id[1:]) if entity_id.startswith('a') else 100.0
+    return {
+        'entity_id': entity_id,
+        'entity_type': _type(entity_id),
+        'entity_name': entity_id.upper(),
+        'month': '2020-11',
+        'billable_cost': cost,
+        'non_billable_cost': 1.0,
+        'resources': [{
+            'resource_id': 'kms',
+            'billable_cost': cost,
+            'plans': [{'plan_id': 'standard', 'billable': True, 'cost': cost, 'rated_cost': cost,
+                       'usage': [{'metric': 'KEYS', 'unit': 'KEYS', 'quantity': 2.0, 'cost': cost,
+                                  'rated_cost': cost, 'price': []}]}],
+        }],
+    }
+
+
+class _Server():
+    """Serves the reports of HIERARCHY, `limit` children per page."""
+
+    def __init__(self, fail=None):
+        self.fail = fail or {}
+        self.requests = []
+
+    def __call__(self, request):
+        query = {k: v[0] for k, v in parse_qs(urlsplit(request.url).query).items()}
+        entity_id = query.get('enterprise_id') or query.get('account_group_id')
+        self.requests.append((entity_id, query.get('children'), query.get('offset')))
+        if self.fail.get(entity_id):
+            self.fail[entity_id] -= 1
+            return (503, json_headers, json.dumps({'errors': [{'message': 'unavailable'}]}))
+        if query.get('children') != 'true':
+            return (200, json_headers, json.dumps({'reports': [_report(entity_id)]}))
+        children = HIERARCHY.get(entity_id, [])
+        start = int(query.get('offset') or 0)
+        end = start + int(query.get('limit') or 100)
+        result = {'reports': [_report(x) for x in children[start:end]]}
+        if end < len(children):
+            result['next'] = {'href': '/v1/resource-usage-reports?' + urlencode(
+                {'children': 'true', 'limit': query.get('limit'), 'offset': str(end)})}
+        return (200, json_headers, json.dumps(result))
+
+
+def _mock(server):
+    responses.add_callback(responses.GET, service_url + '/v1/resource-usage-reports',
+                           callback=server)
+
+
+class TestHierarchyTraverser():
+    """
+    Test Class for HierarchyTraverser
+    """
+
+    @responses.activate
+    def test_traverse(self):
+        """
+        The hierarchy is expanded breadth-first and rolled up from accounts.
+        """
+        server = _Server()
+        _mock(server)
+        root = HierarchyTraverser(service, max_workers=1, limit=2).traverse(enterprise_id='e1',
+                                                                            month='2020-11')
+        assert [x.entity_id for x in root.walk()] == ['e1', 'g1', 'a4', 'a3', 'a1', 'g2', 'a2']
+        assert [x.depth for x in root.walk()] == [0, 1, 1, 1, 2, 2, 3]
+        assert sorted(x.entity_id for x in root.accounts()) == ['a1', 'a2', 'a3', 'a4']
+        assert root.report['billable_cost'] == 100.0
+        assert root.totals['billable_cost'] == 1.0 + 2.0 + 3.0 + 4.0
+        assert root.totals['non_billable_cost'] == 4.0
+        assert root.find('g1').totals['billable_cost'] == 3.0
+        assert root.find('g2').children[0].entity_name == 'A2'
+        plan = root.resources[0]['plans'][0]
+        assert plan['cost'] == 10.0
+        assert plan['usage'] == [{'metric': 'KEYS', 'unit': 'KEYS', 'quantity': 8.0,
+                                  'rateable_quantity': 0.0, 'cost': 10.0, 'rated_cost': 10.0}]
+        assert root.to_dict()['children'][0]['entity_id'] == 'g1'
+        assert ('e1', 'true', '2') in server.requests
+        assert len(server.requests) == 1 + 2 + 1 + 1
+        assert all(x[1] == 'true' for x in server.requests[1:])
+
+    @responses.activate
+    def test_max_depth(self):
+        """
+        Entities at the maximum depth count with their own reports.
+        """
+        _mock(_Server())
+        root = HierarchyTraverser(service).traverse(account_group_id='g1', max_depth=1)
+        assert [x.entity_id for x in root.walk()] == ['g1', 'a1', 'g2']
+        assert not root.find('g2').expanded
+        assert root.totals['billable_cost'] == 101.0
+
+    @responses.activate
+    def test_retries_and_failures(self, monkeypatch):
+        """
+        Server errors are retried; a request that keeps failing fails the
+        traversal.
+        """
+        monkeypatch.setattr(retry.random, 'uniform', lambda a, b: 0.0)
+        _mock(_Server(fail={'g2': 1}))
+        root = HierarchyTraverser(service, max_attempts=2).traverse(enterprise_id='e1')
+        assert root.totals['billable_cost'] == 10.0
+
+        responses.reset()
+        _mock(_Server(fail={'g2': 2}))
+        with pytest.raises(Exception) as info:
+            HierarchyTraverser(service, max_attempts=2).traverse(enterprise_id='e1')
+        assert retry.status_code(info.value) == 503
+
+    def test_invalid_arguments(self):
+        """
+        Exactly one root must be given.
+        """
+        traverser = HierarchyTraverser(service)
+        with pytest.raises(ValueError):
+            traverser.traverse()
+        with pytest.raises(ValueError):
+            traverser.traverse(enterprise_id='e1', account_group_id='g1')